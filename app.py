@@ -1,154 +1,13 @@
-import os
 import json
-from datetime import datetime
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 
-# ============================================================
-# Configuração de paths (igual ao restante do projeto)
-# ============================================================
-
-BASE_PATH = os.path.dirname(os.path.abspath(__file__))
-
-DATA_PATH = os.path.join(BASE_PATH, "date")
-QUEUE_PATH = os.path.join(BASE_PATH, "queue")
-
-ARQ_AUDITORIA = os.path.join(DATA_PATH, "auditoriaEventos.json")
-ARQ_FILA_AUDITORIA = os.path.join(QUEUE_PATH, "filaAuditoria.json")
-ARQ_CONFIG_ALERTAS = os.path.join(DATA_PATH, "configAlertas.json")
-
-
-# ============================================================
-# Funções utilitárias de arquivo JSON
-# ============================================================
-
-def carregar_json(caminho):
-    if not os.path.exists(caminho):
-        return {}
-    with open(caminho, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-
-
-def salvar_json(caminho, dados):
-    os.makedirs(os.path.dirname(caminho), exist_ok=True)
-    with open(caminho, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4, ensure_ascii=False)
-
-
-# ============================================================
-# Lógica de AUDITORIA (coerente com as Lambdas)
-# ============================================================
-
-def registrar_registro_auditoria(detalhes):
-    """
-    Grava diretamente em auditoriaEventos.json:
-    {
-      "eventos": [
-        { "date": "...", "detalhes": {...} }
-      ]
-    }
-    """
-    agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-
-    registro = {
-        "date": agora,
-        "detalhes": detalhes or {}
-    }
-
-    dados_auditoria = carregar_json(ARQ_AUDITORIA)
-    if "eventos" not in dados_auditoria:
-        dados_auditoria["eventos"] = []
-
-    dados_auditoria["eventos"].append(registro)
-    salvar_json(ARQ_AUDITORIA, dados_auditoria)
-
-    return registro
-
-
-def registrar_evento_na_fila(detalhes):
-    """
-    Simula o produtor de auditoria:
-    grava na fila queue/filaAuditoria.json (campo 'mensagens') no formato:
-    { "detalhes": { ... } }
-    """
-    mensagem = {"detalhes": detalhes or {}}
-
-    fila = carregar_json(ARQ_FILA_AUDITORIA)
-    if "mensagens" not in fila:
-        fila["mensagens"] = []
-
-    fila["mensagens"].append(mensagem)
-    salvar_json(ARQ_FILA_AUDITORIA, fila)
-
-    return mensagem
-
-
-def processar_fila_para_banco():
-    """
-    Consumidor da fila:
-    - lê queue/filaAuditoria.json
-    - para cada mensagem, chama registrar_registro_auditoria(detalhes)
-    - esvazia a fila
-    - retorna a lista de registros gravados
-    """
-    fila = carregar_json(ARQ_FILA_AUDITORIA)
-    mensagens = fila.get("mensagens", [])
-
-    registros_processados = []
-
-    for msg in mensagens:
-        if isinstance(msg, dict) and "detalhes" in msg:
-            detalhes = msg.get("detalhes") or {}
-        else:
-            detalhes = msg or {}
-        reg = registrar_registro_auditoria(detalhes)
-        registros_processados.append(reg)
-
-    # esvazia a fila
-    fila["mensagens"] = []
-    salvar_json(ARQ_FILA_AUDITORIA, fila)
-
-    return registros_processados
-
-
-def consultar_eventos(sensorId=None, somente_acionados=False, limite=50):
-    """
-    Consulta os registros gravados em date/auditoriaEventos.json
-    Filtros:
-      - sensorId          (detalhes.sensorId)
-      - somente_acionados (detalhes.acionado == True)
-    """
-    dados = carregar_json(ARQ_AUDITORIA)
-    eventos = dados.get("eventos", [])
-
-    filtrados = []
-    for e in reversed(eventos):  # mais recentes primeiro
-        detalhes = e.get("detalhes", {}) or {}
-
-        if sensorId and detalhes.get("sensorId") != sensorId:
-            continue
-
-        if somente_acionados and not detalhes.get("acionado", False):
-            continue
-
-        filtrados.append(e)
-        if limite and len(filtrados) >= limite:
-            break
-
-    return filtrados
-
-
-def obter_config_alerta():
-    dados = carregar_json(ARQ_CONFIG_ALERTAS)
-    limites = dados.get("limites", {})
-    return {
-        "tempMax": limites.get("tempMax"),
-        "umiMax": limites.get("umiMax")
-    }
+from clima import metricas, servico
+from clima.configuracao import metricas_cache
+from clima.leituras import TIPOS_NDJSON, interpretar_json, interpretar_ndjson
 
+# Caminhos, logs, fila/consumidor de auditoria e consultas ficam em
+# clima.servico, compartilhados com a variante ASGI (app_asgi.py)
 
 # ============================================================
 # Flask APP (API REST semelhante ao API Gateway + Lambdas)
@@ -157,6 +16,12 @@ def obter_config_alerta():
 app = Flask(__name__)
 
 
+@app.before_request
+def garantir_consumidor_auditoria():
+    # só no processo que atende requisições (não no reloader do modo debug)
+    servico.iniciar_consumidor_auditoria()
+
+
 @app.route("/auditoria", methods=["POST"])
 def registrar_auditoria():
     """
@@ -183,68 +48,156 @@ def registrar_auditoria():
       }
     }
     """
-    dados = request.get_json(silent=True) or {}
+    # sem date usa a hora atual; sem acionado, False
+    detalhes = servico.detalhes_do_corpo(request.get_json(silent=True) or {})
 
-    # aceita tanto {"detalhes": {...}} quanto {...} direto
-    if "detalhes" in dados and isinstance(dados["detalhes"], dict):
-        detalhes = dados["detalhes"]
-    else:
-        detalhes = dados
+    mensagem = servico.registrar_evento_na_fila(detalhes)
 
-    # se não vier date na leitura, coloca agora
-    if "date" not in detalhes:
-        detalhes["date"] = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    # 202 = Accepted (aceito para processamento assíncrono)
+    return jsonify(mensagem), 202
 
-    # se não vier acionado, por padrão False
-    if "acionado" not in detalhes:
-        detalhes["acionado"] = False
 
-    mensagem = registrar_evento_na_fila(detalhes)
+@app.route("/leituras", methods=["POST"])
+def registrar_leituras():
+    """
+    POST /leituras
+    Ingestão em lote de leituras de sensores. Corpo:
 
-    # 202 = Accepted (aceito para processamento assíncrono)
-    return jsonify(mensagem), 202
+    1) JSON (application/json): array de leituras (ou um objeto só)
+    [
+      {"sensorId": "sensor-01", "temperatura": 32.5, "umidade": 70,
+       "date": "10/10/2024 10:10:10"},
+      ...
+    ]
+
+    2) NDJSON (application/x-ndjson): uma leitura JSON por linha
+
+    'date' é opcional (usa a hora do recebimento). Se alguma leitura for
+    inválida nada é gravado e a resposta é 400 indicando qual.
+    """
+    tipo = (request.mimetype or "").lower()
+
+    try:
+        if tipo in TIPOS_NDJSON:
+            itens = interpretar_ndjson(request.stream)
+        else:
+            itens = interpretar_json(request.get_data())
+        leituras = servico.registrar_leituras_lote(itens)
+    except ValueError as erro:
+        return jsonify({"erro": str(erro)}), 400
+
+    # 202 = Accepted (a avaliação acontece depois, a partir da fila)
+    return jsonify({"recebidas": len(leituras)}), 202
+
+
+@app.route("/leituras/agregados", methods=["GET"])
+def consultar_agregados_leituras():
+    """
+    GET /leituras/agregados?janela=1h&sensorId=sensor-01
+                          &desde=28/11/2025 00:00:00&ate=28/11/2025 23:59:59&limite=100
+    Mín/máx/média de temperatura e umidade por sensor em janelas fixas
+    (janela = 1m, 1h ou 1d; padrão 1h), mais recentes primeiro.
+    'desde'/'ate' filtram pelo início da janela.
+    """
+    try:
+        limite = int(request.args.get("limite", "500"))
+    except ValueError:
+        limite = 500
+
+    try:
+        agregados = servico.consultar_agregados(
+            janela=request.args.get("janela", "1h"),
+            sensorId=request.args.get("sensorId"),
+            desde=request.args.get("desde"),
+            ate=request.args.get("ate"),
+            limite=limite
+        )
+    except ValueError as erro:
+        return jsonify({"erro": str(erro)}), 400
+
+    return jsonify(agregados), 200
 
 
 @app.route("/auditoria", methods=["GET"])
 def consultar_auditoria():
     """
     GET /auditoria?sensorId=sensor-01&somenteAlerta=true&limite=20
-    - Primeiro processa a fila -> grava no "banco"
-    - Depois consulta auditoriaEventos.json
-    """
-    sensor_id = request.args.get("sensorId")
-    somente_alerta_str = (request.args.get("somenteAlerta") or "").lower()
-    somente_alerta = somente_alerta_str in ("1", "true", "t", "sim", "yes", "y")
+                  &desde=28/11/2025 00:00:00&ate=28/11/2025 23:59:59
+                  &cursor=...&formato=ndjson
+    Só leitura: a fila é drenada pelo consumidor em segundo plano
+    (atraso em GET /auditoria/consumidor).
 
+    Paginação: se houver mais registros, o cabeçalho X-Proximo-Cursor
+    traz o cursor da próxima página (repetir a consulta com &cursor=...).
+
+    formato=ndjson: um registro JSON por linha, enviado em streaming
+    (memória constante); sem 'limite' exporta todos os registros.
+    """
+    # consulta o "banco" de auditoria
     try:
-        limite = int(request.args.get("limite", "50"))
-    except ValueError:
-        limite = 50
+        eventos, ndjson = servico.consultar_auditoria(request.args)
+    except ValueError as erro:
+        return jsonify({"erro": str(erro)}), 400
 
-    # processa a fila (como a Lambda registrar/processarFila)
-    processar_fila_para_banco()
+    cabecalhos = {}
+    if eventos.proximo_cursor:
+        cabecalhos["X-Proximo-Cursor"] = eventos.proximo_cursor
 
-    # consulta o "banco" de auditoria
-    eventos = consultar_eventos(
-        sensorId=sensor_id,
-        somente_acionados=somente_alerta,
-        limite=limite
-    )
+    if ndjson:
+        linhas = (json.dumps(evento, ensure_ascii=False) + "\n" for evento in eventos)
+        return Response(
+            stream_with_context(linhas),
+            mimetype="application/x-ndjson",
+            headers=cabecalhos
+        )
 
-    return jsonify(eventos), 200
+    return jsonify(list(eventos)), 200, cabecalhos
 
 
 @app.route("/auditoria/config", methods=["GET"])
 def consultar_config_alerta():
     """
     GET /auditoria/config
-    Retorna a configuração atual de alerta (tempMax, umiMax)
-    baseada em configAlertas.json
+    Retorna a configuração atual de alerta (tempMax, umiMax, mínimos,
+    histerese, nDeM, cooldown e regras por tipo/sensor) baseada em limites.json
     """
-    cfg = obter_config_alerta()
+    cfg = servico.obter_config_alerta()
     return jsonify(cfg), 200
 
 
+@app.route("/auditoria/config/cache", methods=["GET"])
+def consultar_metricas_cache_config():
+    """
+    GET /auditoria/config/cache
+    Acertos/falhas do cache de configuração deste processo
+    """
+    return jsonify(metricas_cache()), 200
+
+
+@app.route("/auditoria/consumidor", methods=["GET"])
+def consultar_consumidor_auditoria():
+    """
+    GET /auditoria/consumidor
+    Atraso do consumidor da fila de auditoria: profundidade da fila,
+    idade (s) da mensagem mais antiga, mensagens processadas e último erro
+    """
+    return jsonify(servico.iniciar_consumidor_auditoria().metricas()), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def exportar_metricas():
+    """
+    GET /metrics
+    Contadores e histogramas deste processo (clima.metricas) no formato
+    texto do Prometheus: bytes lidos/gravados, duração por etapa,
+    alertas disparados e profundidade das filas. As métricas ficam
+    desligadas (resposta vazia) sem CLIMA_METRICAS=1.
+    """
+    return Response(metricas.texto(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
+    # CLIMA_METRICAS=1 liga as métricas expostas em GET /metrics
+    metricas.configurar_pelo_ambiente()
     # Modo desenvolvimento
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Variante assíncrona (ASGI) da API de app.py.
+
+Mesmas rotas e respostas de app.py para:
+  - POST /auditoria
+  - GET  /auditoria            (inclusive formato=ndjson e cursor)
+  - GET  /auditoria/config
+  - GET  /auditoria/consumidor (mais o estado do buffer de ingestão)
+  - GET  /metrics
+
+Diferenças em relação ao Flask:
+  - nenhuma leitura/escrita de arquivo ou SQLite roda no event loop:
+    consultas e gravações vão para threads (asyncio.to_thread), então
+    uma consulta lenta não segura as outras requisições
+  - POST /auditoria não grava na fila durante a requisição: a mensagem
+    entra num GravadorAssincrono (clima.lote) que envia à fila em lotes
+    (uma transação por lote) a cada 50 ms ou 1000 mensagens. Uma queda
+    do processo perde no máximo o buffer ainda não gravado.
+
+A lógica de armazenamento e consulta é a de app.py, em clima.servico
+(mesmos caminhos, log, índices e consumidor da fila); importar este
+módulo não importa o Flask. Não usa framework: é um app ASGI puro,
+servido por qualquer servidor ASGI:
+
+    uvicorn app_asgi:app --port 5001
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from clima import metricas, servico
+from clima.lote import GravadorAssincrono
+
+# Registros lidos do log por ida à thread no streaming NDJSON
+REGISTROS_POR_PEDACO = 500
+
+
+_gravador_auditoria = None
+
+
+def obter_gravador_auditoria():
+    global _gravador_auditoria
+    if _gravador_auditoria is None:
+        _gravador_auditoria = GravadorAssincrono(
+            lambda mensagens: servico.obter_fila_auditoria().enviar_lote(mensagens)
+        )
+    return _gravador_auditoria
+
+
+# ============================================================
+# Respostas
+# ============================================================
+
+def _cabecalhos(tipo, extras=None):
+    cabecalhos = [(b"content-type", tipo.encode("latin-1"))]
+    for nome, valor in (extras or {}).items():
+        cabecalhos.append((nome.lower().encode("latin-1"), str(valor).encode("latin-1")))
+    return cabecalhos
+
+
+async def responder_json(send, status, dados, cabecalhos=None):
+    corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": _cabecalhos("application/json", cabecalhos)
+    })
+    await send({"type": "http.response.body", "body": corpo})
+
+
+async def responder_texto(send, status, texto, tipo="text/plain; charset=utf-8"):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": _cabecalhos(tipo)
+    })
+    await send({"type": "http.response.body", "body": texto.encode("utf-8")})
+
+
+async def ler_corpo(receive):
+    partes = []
+    while True:
+        mensagem = await receive()
+        partes.append(mensagem.get("body", b""))
+        if not mensagem.get("more_body"):
+            return b"".join(partes)
+
+
+# ============================================================
+# Rotas
+# ============================================================
+
+async def registrar_auditoria(scope, receive, send):
+    """
+    POST /auditoria (mesmo corpo de app.py): a mensagem vai para o buffer
+    de ingestão e é gravada na fila em lote, fora do event loop.
+    """
+    try:
+        dados = json.loads(await ler_corpo(receive) or b"{}")
+    except ValueError:
+        dados = {}
+
+    mensagem = {"detalhes": servico.detalhes_do_corpo(dados)}
+    await obter_gravador_auditoria().adicionar(mensagem)
+
+    # 202 = Accepted (aceito para processamento assíncrono)
+    await responder_json(send, 202, mensagem)
+
+
+def _argumentos(scope):
+    # primeiro valor de cada parâmetro, vazios inclusive (como no Flask)
+    args = parse_qs(scope.get("query_string", b"").decode("utf-8"), keep_blank_values=True)
+    return {nome: valores[0] for nome, valores in args.items()}
+
+
+async def consultar_auditoria(scope, receive, send):
+    """
+    GET /auditoria (mesmos parâmetros de app.py). A busca no índice e a
+    leitura dos registros rodam numa thread.
+    """
+    try:
+        eventos, ndjson = await asyncio.to_thread(servico.consultar_auditoria, _argumentos(scope))
+    except ValueError as erro:
+        await responder_json(send, 400, {"erro": str(erro)})
+        return
+
+    cabecalhos = {}
+    if eventos.proximo_cursor:
+        cabecalhos["X-Proximo-Cursor"] = eventos.proximo_cursor
+
+    if not ndjson:
+        registros = await asyncio.to_thread(list, eventos)
+        await responder_json(send, 200, registros, cabecalhos)
+        return
+
+    # streaming: cada pedaço de registros é lido numa thread e enviado
+    # antes de ler o próximo (memória constante, event loop livre)
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": _cabecalhos("application/x-ndjson", cabecalhos)
+    })
+    iterador = iter(eventos)
+
+    def proximo_pedaco():
+        linhas = []
+        for evento in iterador:
+            linhas.append(json.dumps(evento, ensure_ascii=False) + "\n")
+            if len(linhas) >= REGISTROS_POR_PEDACO:
+                break
+        return "".join(linhas).encode("utf-8")
+
+    while True:
+        pedaco = await asyncio.to_thread(proximo_pedaco)
+        if not pedaco:
+            break
+        await send({"type": "http.response.body", "body": pedaco, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def consultar_config_alerta(scope, receive, send):
+    """
+    GET /auditoria/config
+    """
+    await responder_json(send, 200, await asyncio.to_thread(servico.obter_config_alerta))
+
+
+async def consultar_consumidor_auditoria(scope, receive, send):
+    """
+    GET /auditoria/consumidor
+    Atraso do consumidor da fila de auditoria e, em "buffer", o estado
+    do buffer de ingestão deste processo.
+    """
+    estado = await asyncio.to_thread(lambda: servico.iniciar_consumidor_auditoria().metricas())
+    estado["buffer"] = obter_gravador_auditoria().metricas()
+    await responder_json(send, 200, estado)
+
+
+async def exportar_metricas(scope, receive, send):
+    """
+    GET /metrics (formato texto do Prometheus)
+    """
+    # os medidores de fila consultam o SQLite: fora do event loop
+    texto = await asyncio.to_thread(metricas.texto)
+    await responder_texto(send, 200, texto, "text/plain; version=0.0.4")
+
+
+ROTAS = {
+    ("POST", "/auditoria"): registrar_auditoria,
+    ("GET", "/auditoria"): consultar_auditoria,
+    ("GET", "/auditoria/config"): consultar_config_alerta,
+    ("GET", "/auditoria/consumidor"): consultar_consumidor_auditoria,
+    ("GET", "/metrics"): exportar_metricas,
+}
+
+
+# ============================================================
+# App ASGI
+# ============================================================
+
+async def iniciar():
+    obter_gravador_auditoria().iniciar()
+    await asyncio.to_thread(servico.iniciar_consumidor_auditoria)
+
+
+async def encerrar():
+    # grava na fila o que ainda estiver no buffer
+    await obter_gravador_auditoria().parar()
+
+
+async def _ciclo_de_vida(receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem["type"] == "lifespan.startup":
+            try:
+                await iniciar()
+            except Exception as erro:
+                await send({"type": "lifespan.startup.failed", "message": str(erro)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif mensagem["type"] == "lifespan.shutdown":
+            await encerrar()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _ciclo_de_vida(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    rota = ROTAS.get((scope["method"], scope["path"]))
+    if rota is None:
+        metodos = [m for m, caminho in ROTAS if caminho == scope["path"]]
+        if metodos:
+            await responder_json(send, 405, {"erro": "método não permitido"},
+                                 {"Allow": ", ".join(metodos)})
+        else:
+            await responder_json(send, 404, {"erro": "rota não encontrada"})
+        return
+
+    # servidores sem lifespan: inicia na primeira requisição
+    if not obter_gravador_auditoria().ativo:
+        await iniciar()
+
+    await rota(scope, receive, send)
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Instale um servidor ASGI: pip install uvicorn")
+    # CLIMA_METRICAS=1 liga as métricas expostas em GET /metrics
+    metricas.configurar_pelo_ambiente()
+    uvicorn.run(app, host="0.0.0.0", port=5001)
@@ -0,0 +1,165 @@
+"""
+Benchmark da avaliação de leituras (AvaliarLeitura.avaliar_leituras).
+
+1) Só o cálculo de alerta, sem I/O, em N leituras (padrão 1M):
+   - loop:   comparação leitura a leitura, como o modo "simples"
+   - lote:   LoteColunar + RegrasAlerta.mascara (vetorizado com NumPy, se houver)
+
+2) avaliar_leituras() de ponta a ponta, num diretório temporário, nos
+   modos "simples", "lote" e "paralelo" (2 processos), conferindo que os registros gerados
+   (alertas, notificações e eventos de auditoria) são os mesmos.
+
+Uso:
+    python benchmarks/bench_avaliacao.py --leituras 1000000 --ponta-a-ponta 2000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima import paralelo  # noqa: E402
+from clima.arquivos import salvar_json  # noqa: E402
+from clima.avaliacao import NUMPY_DISPONIVEL, LoteColunar  # noqa: E402
+from clima.regras import RegrasAlerta  # noqa: E402
+from functions import AvaliarLeitura  # noqa: E402
+
+TEMP_MAX = 30
+UMI_MAX = 80
+
+
+class _Config:
+    def obter(self):
+        return {"limites": {"tempMax": TEMP_MAX, "umiMax": UMI_MAX}}
+
+
+def gerar_leituras(quantidade, sensores=1000, semente=42):
+    aleatorio = random.Random(semente)
+    return [
+        {
+            "sensorId": f"sensor-{aleatorio.randrange(sensores):04d}",
+            "temperatura": round(aleatorio.uniform(10, 35), 1),
+            "umidade": aleatorio.randrange(30, 90),
+            "date": "28/11/2025 00:00:00"
+        }
+        for _ in range(quantidade)
+    ]
+
+
+def mascara_loop(leituras):
+    mascara = []
+    for leitura in leituras:
+        temp_alerta = leitura["temperatura"] > TEMP_MAX
+        umi_alerta = leitura["umidade"] > UMI_MAX
+        mascara.append(temp_alerta or umi_alerta)
+    return mascara
+
+
+def bench_calculo(quantidade):
+    leituras = gerar_leituras(quantidade)
+
+    inicio = time.perf_counter()
+    esperado = mascara_loop(leituras)
+    t_loop = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    lote = LoteColunar(leituras)
+    t_colunas = time.perf_counter() - inicio
+
+    regras = RegrasAlerta(_Config())
+    inicio = time.perf_counter()
+    mascara = regras.mascara(lote)
+    t_mascara = time.perf_counter() - inicio
+
+    assert [bool(m) for m in mascara] == esperado
+
+    print(f"NumPy disponível: {NUMPY_DISPONIVEL}")
+    print(f"{quantidade:,} leituras, {sum(esperado):,} alertas")
+    print(f"  loop:                {t_loop:8.3f} s")
+    print(f"  lote (colunas):      {t_colunas:8.3f} s")
+    print(f"  lote (máscara):      {t_mascara:8.3f} s")
+    print(f"  lote (total):        {t_colunas + t_mascara:8.3f} s")
+
+
+def configurar_caminhos(diretorio):
+    AvaliarLeitura.ARQ_FILA = os.path.join(diretorio, "filaLeituras.json")
+    AvaliarLeitura.ARQ_CONFIG_ALERTAS = os.path.join(diretorio, "configAlertas.json")
+    AvaliarLeitura.ARQ_LIMITES = os.path.join(diretorio, "limites.json")
+    AvaliarLeitura.DIR_ALERTAS = os.path.join(diretorio, "alertas")
+    AvaliarLeitura.ARQ_NOTIFICACOES = os.path.join(diretorio, "notificacaoAlerta.json")
+    AvaliarLeitura.ARQ_ESTADO_DISPARO = os.path.join(diretorio, "alertas", "estadoDisparo.json")
+    AvaliarLeitura.ARQ_FILA_AUDITORIA = os.path.join(diretorio, "filaAuditoria.json")
+    AvaliarLeitura.ARQ_FILAS = os.path.join(diretorio, "filas.db")
+
+
+def sem_datas(registros):
+    """
+    Remove a data de processamento (muda entre execuções) para comparar.
+    """
+    dados = json.loads(json.dumps(registros))
+    for registro in dados:
+        registro.pop("date", None)
+    return dados
+
+
+def rodar_modo(leituras, modo, processos=None):
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_caminhos(diretorio)
+        AvaliarLeitura.obter_fila_leituras().enviar_lote(leituras)
+        salvar_json(
+            AvaliarLeitura.ARQ_LIMITES,
+            {"limites": {"tempMax": TEMP_MAX, "umiMax": UMI_MAX}}
+        )
+
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            AvaliarLeitura.avaliar_leituras(modo=modo, processos=processos)
+        duracao = time.perf_counter() - inicio
+
+        resultado = (
+            sem_datas(list(AvaliarLeitura.obter_historico_alertas().iterar())),
+            sem_datas(AvaliarLeitura.obter_fila_notificacoes().espiar()),
+            sem_datas(AvaliarLeitura.obter_fila_auditoria().espiar())
+        )
+    return duracao, resultado
+
+
+def bench_ponta_a_ponta(quantidade):
+    leituras = gerar_leituras(quantidade)
+    t_simples, r_simples = rodar_modo(leituras, "simples")
+    t_lote, r_lote = rodar_modo(leituras, "lote")
+    # força as fatias mesmo em lotes pequenos
+    paralelo.MINIMO_LEITURAS_PARALELO = 0
+    t_paralelo, r_paralelo = rodar_modo(leituras, "paralelo", processos=2)
+
+    assert r_simples == r_lote == r_paralelo, "modos geraram registros diferentes"
+
+    print(f"avaliar_leituras() com {quantidade:,} leituras (registros idênticos)")
+    print(f"  simples:             {t_simples:8.3f} s")
+    print(f"  lote:                {t_lote:8.3f} s")
+    print(f"  paralelo (2 proc.):  {t_paralelo:8.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=1_000_000)
+    parser.add_argument("--ponta-a-ponta", type=int, default=2000,
+                        help="leituras no teste completo (o modo simples envia um evento por vez)")
+    args = parser.parse_args()
+
+    bench_calculo(args.leituras)
+    print()
+    bench_ponta_a_ponta(args.ponta_a_ponta)
+
+
+if __name__ == "__main__":
+    main()
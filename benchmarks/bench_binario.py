@@ -0,0 +1,130 @@
+"""
+Benchmark de tamanho e memória do formato binário de leituras
+(clima.binario) contra os formatos JSON atuais.
+
+Num diretório temporário, com N leituras sintéticas:
+  - disco:   leituras.json (indent=4), log JSON-Lines e leituras.bin
+  - memória: lista de dicts (json.load), lista de Leitura (__slots__)
+             e varredura do binário por mmap (medido com tracemalloc)
+  - tempo:   carregar/percorrer cada formato
+  - confere que exportar(importar(json)) devolve as mesmas leituras
+
+Uso:
+    python benchmarks/bench_binario.py --leituras 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima import LogSegmentado  # noqa: E402
+from clima.binario import ArquivoLeiturasBinario, exportar, importar  # noqa: E402
+
+
+def gerar_leituras(quantidade, sensores=500, semente=7):
+    aleatorio = random.Random(semente)
+    base = 1764200000
+    return [
+        {
+            "sensorId": f"sensor-{aleatorio.randrange(sensores):03d}",
+            "temperatura": round(aleatorio.uniform(10, 35), 1),
+            "umidade": aleatorio.randrange(30, 90),
+            "date": time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(base + i))
+        }
+        for i in range(quantidade)
+    ]
+
+
+def tamanho_pasta(diretorio):
+    return sum(
+        os.path.getsize(os.path.join(diretorio, nome))
+        for nome in os.listdir(diretorio)
+        if not nome.endswith(".lock")
+    )
+
+
+def medir_memoria(funcao):
+    """
+    (pico de memória Python em bytes, segundos, resultado)
+    """
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico, duracao, resultado
+
+
+def linha(descricao, quantidade, bytes_, duracao=None):
+    texto = f"  {descricao:<32} {bytes_ / 1024 / 1024:10.2f} MB  {bytes_ / quantidade:8.1f} B/leitura"
+    if duracao is not None:
+        texto += f"  {duracao:7.3f} s"
+    print(texto)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=200000)
+    args = parser.parse_args()
+
+    n = args.leituras
+    leituras = gerar_leituras(n)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arq_json = os.path.join(diretorio, "leituras.json")
+        with open(arq_json, "w") as f:
+            json.dump({"leituras": leituras}, f, indent=4)
+
+        dir_log = os.path.join(diretorio, "log")
+        LogSegmentado(dir_log).acrescentar_lote(leituras)
+
+        dir_bin = os.path.join(diretorio, "bin")
+        importar(arq_json, dir_bin)
+
+        print(f"Disco ({n:,} leituras):")
+        linha("leituras.json (indent=4)", n, os.path.getsize(arq_json))
+        linha("log JSON-Lines", n, tamanho_pasta(dir_log))
+        linha("binário (20 B + sensores)", n, tamanho_pasta(dir_bin))
+
+        print("Memória (pico Python) e tempo para percorrer tudo:")
+
+        def carregar_json():
+            with open(arq_json) as f:
+                return json.load(f)["leituras"]
+
+        pico, duracao, _ = medir_memoria(carregar_json)
+        linha("json.load -> dicts", n, pico, duracao)
+
+        arquivo = ArquivoLeiturasBinario(dir_bin)
+        pico, duracao, _ = medir_memoria(lambda: list(arquivo.iterar()))
+        linha("binário -> Leitura (__slots__)", n, pico, duracao)
+
+        def varrer():
+            maximo = float("-inf")
+            for _, _, temperatura, _ in arquivo.registros():
+                if temperatura > maximo:
+                    maximo = temperatura
+            return maximo
+
+        pico, duracao, _ = medir_memoria(varrer)
+        linha("binário mmap (varredura)", n, pico, duracao)
+
+        destino = os.path.join(diretorio, "exportado.json")
+        exportar(dir_bin, destino)
+        with open(destino) as f:
+            iguais = json.load(f)["leituras"] == leituras
+        print(f"{'✔' if iguais else '✘'} exportar(importar(leituras.json)) preserva as leituras")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark do leitor colunar (clima.colunar) contra json.load para
+consultas analíticas no histórico de leituras.
+
+Num diretório temporário, com N leituras sintéticas de S sensores:
+  - json:    json.load(leituras.json) e filtro do sensor em Python
+  - colunar: abrir as colunas por mmap e pegar a fatia do sensor
+em cada caso calculando a temperatura média de um sensor num intervalo
+de datas. Mede tempo e pico de memória Python (tracemalloc) e confere
+que os dois chegam ao mesmo resultado.
+
+Uso:
+    python benchmarks/bench_colunar.py --leituras 500000 --sensores 500
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima import LogSegmentado  # noqa: E402
+from clima.colunar import LeitorColunar, construir_do_log, np  # noqa: E402
+from clima.datas import para_epoca  # noqa: E402
+
+from bench_binario import gerar_leituras  # noqa: E402
+
+
+def medir(descricao, funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {descricao:<28} {duracao * 1000:10.2f} ms  {pico / 1024 / 1024:9.2f} MB pico")
+    return resultado, duracao
+
+
+def media_json(arq_json, sensor, desde, ate):
+    with open(arq_json) as f:
+        leituras = json.load(f)["leituras"]
+    valores = [
+        l["temperatura"] for l in leituras
+        if l["sensorId"] == sensor and desde <= para_epoca(l["date"]) <= ate
+    ]
+    return sum(valores) / len(valores) if valores else None, len(valores)
+
+
+def media_colunar(dir_colunar, sensor, desde, ate):
+    with LeitorColunar(dir_colunar) as leitor:
+        fatia = leitor.sensor(sensor)
+        inicio, fim = fatia.intervalo(desde, ate)
+        temperaturas = fatia.temperaturas[inicio:fim]
+        if np is not None:
+            media = float(temperaturas.mean()) if len(temperaturas) else None
+        else:
+            media = sum(temperaturas) / len(temperaturas) if len(temperaturas) else None
+        quantidade = fim - inicio
+        del temperaturas, fatia
+    return media, quantidade
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=500000)
+    parser.add_argument("--sensores", type=int, default=500)
+    args = parser.parse_args()
+
+    leituras = gerar_leituras(args.leituras, sensores=args.sensores)
+    sensor = leituras[0]["sensorId"]
+    epocas = [para_epoca(l["date"]) for l in leituras]
+    desde = epocas[len(epocas) // 4]
+    ate = epocas[3 * len(epocas) // 4]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arq_json = os.path.join(diretorio, "leituras.json")
+        with open(arq_json, "w") as f:
+            json.dump({"leituras": leituras}, f, indent=4)
+        log = LogSegmentado(os.path.join(diretorio, "log"))
+        log.acrescentar_lote(leituras)
+        del leituras, epocas
+
+        dir_colunar = os.path.join(diretorio, "colunar")
+        inicio = time.perf_counter()
+        construir_do_log(log, dir_colunar)
+        print(f"Construção das colunas ({args.leituras:,} leituras): "
+              f"{time.perf_counter() - inicio:.2f} s "
+              f"({'NumPy' if np is not None else 'sem NumPy, memoryview'})")
+
+        print(f"Temperatura média de {sensor} na metade central do período:")
+        (media_j, n_j), t_json = medir("json.load + filtro", lambda: media_json(arq_json, sensor, desde, ate))
+        (media_c, n_c), t_col = medir("mmap colunar + fatia", lambda: media_colunar(dir_colunar, sensor, desde, ate))
+
+        iguais = n_j == n_c and (media_j is None or math.isclose(media_j, media_c, rel_tol=1e-6))
+        print(f"{'✔' if iguais else '✘'} mesmo resultado ({n_c} leituras, média {media_c})")
+        print(f"✔ {t_json / t_col:,.0f}x mais rápido que json.load")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark da decisão de disparo com estado (clima.disparo).
+
+Com N leituras (padrão 1M) de S sensores (padrão 10k), cada sensor
+recebendo leituras em ordem de data:
+  - sem estado:  toda leitura fora dos limites vira alerta (antes)
+  - com estado:  nDeM [3, 5] e cooldown de 300 s
+mede leituras/s do EstadoDisparo.filtrar (meta: 100k leituras/s), o
+tempo do checkpoint (salvar/carregar o estado de todos os sensores) e
+confere que reprocessar o último lote depois de recarregar o checkpoint
+(queda antes da confirmação na fila) não dispara nenhum alerta de novo.
+
+Uso:
+    python benchmarks/bench_disparo.py --leituras 1000000 --sensores 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima.avaliacao import LoteColunar  # noqa: E402
+from clima.disparo import EstadoDisparo  # noqa: E402
+from clima.regras import RegrasAlerta, RegrasCompiladas  # noqa: E402
+
+META_LEITURAS_S = 100000
+TAMANHO_LOTE = 10000
+LIMITES = {"tempMax": 30, "umiMax": 80}
+
+
+class _Config:
+    def obter(self):
+        return {"limites": LIMITES}
+
+
+def gerar_leituras(quantidade, sensores, semente=17):
+    """
+    Leituras em rodadas: cada rodada traz uma leitura de cada sensor,
+    10 s depois da anterior. ~10% dos sensores ficam "quentes" (quase
+    sempre acima do limite); os demais passam do limite às vezes.
+    """
+    aleatorio = random.Random(semente)
+    base = 1764300000
+    quentes = set(aleatorio.sample(range(sensores), sensores // 10))
+    datas = {}
+    leituras = []
+    for i in range(quantidade):
+        rodada, codigo = divmod(i, sensores)
+        epoca = base + rodada * 10
+        data = datas.get(epoca)
+        if data is None:
+            data = datas[epoca] = time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(epoca))
+        limite = 0.8 if codigo in quentes else 0.03
+        temperatura = 31.5 if aleatorio.random() < limite else 25.0
+        leituras.append({
+            "sensorId": f"sensor-{codigo:05d}",
+            "temperatura": temperatura,
+            "umidade": 60,
+            "date": data
+        })
+    return leituras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=1000000)
+    parser.add_argument("--sensores", type=int, default=10000)
+    args = parser.parse_args()
+
+    leituras = gerar_leituras(args.leituras, args.sensores)
+    sem_estado = RegrasCompiladas({"limites": LIMITES})
+    com_estado = RegrasCompiladas({"limites": dict(LIMITES, nDeM=[3, 5], cooldown=300)})
+
+    lotes = [leituras[i:i + TAMANHO_LOTE] for i in range(0, len(leituras), TAMANHO_LOTE)]
+    # ids das mensagens na fila (crescentes, como no SQLite)
+    ids = [list(range(i, i + len(lote))) for i, lote in zip(range(0, len(leituras), TAMANHO_LOTE), lotes)]
+    regras = RegrasAlerta(_Config())
+    mascaras = [regras.mascara(LoteColunar(lote)) for lote in lotes]
+    fora = sum(sum(1 for a in m if a) for m in mascaras)
+
+    print(f"{len(leituras):,} leituras, {args.sensores:,} sensores, {fora:,} fora dos limites")
+
+    for descricao, compiladas in (("sem estado", sem_estado), ("nDeM 3/5 + cooldown 300 s", com_estado)):
+        estado = EstadoDisparo()
+        inicio = time.perf_counter()
+        alertas = sum(
+            len(estado.filtrar(lote, mascara, compiladas.regra, ids_lote))
+            for lote, mascara, ids_lote in zip(lotes, mascaras, ids)
+        )
+        duracao = time.perf_counter() - inicio
+        taxa = len(leituras) / duracao
+        situacao = "✔" if taxa >= META_LEITURAS_S else "✘"
+        print(f"  {descricao:<28} {alertas:>9,} alertas  {duracao:7.3f} s  "
+              f"{situacao} {taxa:>10,.0f} leituras/s")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "estadoDisparo.json")
+        estado = EstadoDisparo(caminho)
+        for lote, mascara, ids_lote in zip(lotes[:-1], mascaras[:-1], ids[:-1]):
+            estado.filtrar(lote, mascara, com_estado.regra, ids_lote)
+
+        inicio = time.perf_counter()
+        estado.salvar()
+        t_salvar = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        estado = EstadoDisparo(caminho)
+        t_carregar = time.perf_counter() - inicio
+        print(f"Checkpoint de {len(estado):,} sensores: salvar {t_salvar * 1000:.1f} ms, "
+              f"carregar {t_carregar * 1000:.1f} ms ({os.path.getsize(caminho) / 1024:.0f} KB)")
+
+        # último lote processado e checkpoint gravado, mas sem confirmar na fila
+        primeira = estado.filtrar(lotes[-1], mascaras[-1], com_estado.regra, ids[-1])
+        estado.salvar()
+        estado = EstadoDisparo(caminho)
+        repetida = estado.filtrar(lotes[-1], mascaras[-1], com_estado.regra, ids[-1])
+        situacao = "✔" if not repetida else "✘"
+        print(f"{situacao} lote reentregue após reinício: {len(primeira)} alertas na 1ª vez, "
+              f"{len(repetida)} na reentrega")
+
+
+if __name__ == "__main__":
+    main()
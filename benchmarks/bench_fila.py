@@ -0,0 +1,115 @@
+"""
+Benchmark da fila durável (clima.fila) contra a fila em arquivo JSON.
+
+Num diretório temporário (não toca em queue/):
+  - json:          produtor antigo (carrega, acrescenta e regrava
+                   filaLeituras.json a cada mensagem)
+  - enviar:        FilaDuravel.enviar, um INSERT/commit por mensagem
+  - enviar_lote:   FilaDuravel.enviar_lote, uma transação por lote
+  - receber+ack:   consumo em lotes com confirmação
+
+Meta: >= 50.000 mensagens/s no envio em lote.
+
+Uso:
+    python benchmarks/bench_fila.py --mensagens 100000 --json 1000 --lote 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima.fila import FilaDuravel  # noqa: E402
+
+META_ENVIOS_POR_SEGUNDO = 50000
+
+
+def gerar_leituras(quantidade):
+    return [
+        {
+            "sensorId": f"sensor-{i % 1000:04d}",
+            "temperatura": 20 + (i % 15),
+            "umidade": 50 + (i % 40),
+            "date": "28/11/2025 00:00:00"
+        }
+        for i in range(quantidade)
+    ]
+
+
+def enviar_json(leituras, arquivo):
+    for leitura in leituras:
+        fila = {}
+        if os.path.exists(arquivo):
+            with open(arquivo, "r") as f:
+                fila = json.load(f)
+        fila.setdefault("mensagens", []).append(leitura)
+        with open(arquivo, "w") as f:
+            json.dump(fila, f, indent=4)
+
+
+def em_lotes(itens, tamanho):
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def medir(descricao, quantidade, funcao):
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    taxa = quantidade / duracao
+    print(f"{descricao:<14} {quantidade:>8} msgs  {duracao:8.3f} s  {taxa:>12,.0f} msgs/s")
+    return taxa
+
+
+def consumir(fila, tamanho_lote):
+    while True:
+        mensagens = fila.receber(tamanho_lote)
+        if not mensagens:
+            return
+        fila.confirmar(mensagens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mensagens", type=int, default=100000)
+    parser.add_argument("--json", type=int, default=1000,
+                        help="mensagens na fila JSON antiga (custo O(n²))")
+    parser.add_argument("--individual", type=int, default=20000,
+                        help="mensagens enviadas uma a uma")
+    parser.add_argument("--lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    leituras = gerar_leituras(args.mensagens)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        amostra = leituras[:args.json]
+        medir("json", len(amostra), lambda: enviar_json(
+            amostra, os.path.join(diretorio, "filaLeituras.json")
+        ))
+
+        fila = FilaDuravel(os.path.join(diretorio, "filas.db"), "leituras")
+
+        amostra = leituras[:args.individual]
+        medir("enviar", len(amostra), lambda: [fila.enviar(l) for l in amostra])
+        consumir(fila, args.lote)
+
+        taxa = medir("enviar_lote", len(leituras), lambda: [
+            fila.enviar_lote(lote) for lote in em_lotes(leituras, args.lote)
+        ])
+        assert fila.profundidade() == len(leituras)
+
+        medir("receber+ack", len(leituras), lambda: consumir(fila, args.lote))
+        assert fila.profundidade() == 0
+
+    situacao = "✔" if taxa >= META_ENVIOS_POR_SEGUNDO else "✘"
+    print(f"{situacao} meta de {META_ENVIOS_POR_SEGUNDO:,} envios/s em lote")
+
+
+if __name__ == "__main__":
+    main()
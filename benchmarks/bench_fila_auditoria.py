@@ -0,0 +1,118 @@
+"""
+Benchmark do consumo da fila de auditoria.
+
+Compara, num diretório temporário (não toca em date/ nem queue/):
+  - legado:     uma regravação completa de auditoriaEventos.json por mensagem
+                (comportamento antigo de registrar_registro_auditoria)
+  - por evento: uma escrita no log segmentado por mensagem
+  - em lote:    processar_fila_auditoria() (fila durável, uma escrita e
+                uma confirmação por lote)
+
+Uso:
+    python benchmarks/bench_fila_auditoria.py --mensagens 10000 --legado 2000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima import servico  # noqa: E402
+from functions import registrarauditoria  # noqa: E402
+
+
+def gerar_mensagens(quantidade):
+    return [
+        {
+            "detalhes": {
+                "sensorId": f"sensor-{i % 50:02d}",
+                "temperatura": 20 + (i % 15),
+                "umidade": 50 + (i % 40),
+                "date": "28/11/2025 00:00:00",
+                "acionado": i % 7 == 0
+            }
+        }
+        for i in range(quantidade)
+    ]
+
+
+def configurar_caminhos(diretorio):
+    # log e fila de auditoria de registrarauditoria (clima.servico)
+    servico.ARQ_AUDITORIA = os.path.join(diretorio, "auditoriaEventos.json")
+    servico.ARQ_FILA_AUDITORIA = os.path.join(diretorio, "filaAuditoria.json")
+    servico.DIR_AUDITORIA = os.path.join(diretorio, "auditoria")
+    servico.ARQ_FILAS = os.path.join(diretorio, "filas.db")
+    servico._log_auditoria = None
+
+
+def drenar_legado(mensagens, arquivo):
+    """
+    Reproduz o consumo antigo: carrega, acrescenta e regrava o documento
+    inteiro para cada mensagem.
+    """
+    for msg in mensagens:
+        dados = {}
+        if os.path.exists(arquivo):
+            with open(arquivo, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        dados.setdefault("eventos", []).append(
+            {"date": "28/11/2025 00:00:00", "detalhes": msg["detalhes"]}
+        )
+        with open(arquivo, "w", encoding="utf-8") as f:
+            json.dump(dados, f, indent=4, ensure_ascii=False)
+
+
+def medir(descricao, quantidade, funcao):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcao()
+    duracao = time.perf_counter() - inicio
+    print(
+        f"{descricao:<12} {quantidade:>8} msgs  {duracao:8.3f} s  "
+        f"{quantidade / duracao:>12,.0f} msgs/s"
+    )
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mensagens", type=int, default=10000)
+    parser.add_argument("--legado", type=int, default=2000,
+                        help="mensagens no modo legado (custo O(n²))")
+    parser.add_argument("--lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    mensagens = gerar_mensagens(args.mensagens)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        legado = mensagens[:args.legado]
+        medir("legado", len(legado), lambda: drenar_legado(
+            legado, os.path.join(diretorio, "legado.json")
+        ))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_caminhos(diretorio)
+        medir("por evento", len(mensagens), lambda: [
+            registrarauditoria.registrar_registro_auditoria(m["detalhes"]) for m in mensagens
+        ])
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_caminhos(diretorio)
+        registrarauditoria.obter_fila_auditoria().enviar_lote(mensagens)
+        medir("em lote", len(mensagens), lambda: registrarauditoria.processar_fila_auditoria(
+            tamanho_lote=args.lote
+        ))
+        total = sum(1 for _ in registrarauditoria.obter_log_auditoria().iterar())
+        print(f"✔ {total} registros no log (esperado {len(mensagens)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark da ingestão de leituras: syscalls e tempo por leitura.
+
+Num diretório temporário (não toca em date/ nem queue/):
+  - legado:   registrar_leitura antigo (carrega e regrava leituras.json
+              e filaLeituras.json inteiros a cada leitura)
+  - unitária: registrar_leitura atual (append no log + INSERT na fila)
+  - lote:     registrar_leituras_lote (uma escrita no log e uma
+              transação na fila por bloco)
+
+As syscalls de leitura/escrita são contadas por /proc/self/io
+(syscr + syscw), então o benchmark só conta syscalls no Linux.
+
+Meta: lote com 100x menos syscalls por leitura que o legado.
+
+Uso:
+    python benchmarks/bench_ingestao.py --leituras 10000 --legado 500 --existentes 1000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima import servico  # noqa: E402
+from functions import RegistrarLeitura  # noqa: E402
+
+META_REDUCAO = 100
+
+
+def contar_syscalls():
+    """
+    syscr + syscw do processo (None fora do Linux).
+    """
+    try:
+        with open("/proc/self/io") as f:
+            campos = dict(linha.split(":") for linha in f.read().splitlines())
+    except OSError:
+        return None
+    return int(campos["syscr"]) + int(campos["syscw"])
+
+
+def gerar_leituras(quantidade):
+    return [
+        {
+            "sensorId": f"sensor-{i % 200:03d}",
+            "temperatura": 20 + (i % 15) + 0.5,
+            "umidade": 50 + (i % 40),
+            "date": "28/11/2025 00:00:00"
+        }
+        for i in range(quantidade)
+    ]
+
+
+def registrar_legado(leitura, arq_leituras, arq_fila):
+    """
+    Comportamento antigo de registrar_leitura.
+    """
+    for caminho, chave in ((arq_leituras, "leituras"), (arq_fila, "mensagens")):
+        dados = {}
+        if os.path.exists(caminho):
+            with open(caminho, "r") as f:
+                dados = json.load(f)
+        dados.setdefault(chave, []).append(leitura)
+        with open(caminho, "w") as f:
+            json.dump(dados, f, indent=4)
+
+
+def configurar_caminhos(diretorio):
+    # log e fila de leituras de RegistrarLeitura (clima.servico)
+    servico.ARQ_LEITURAS = os.path.join(diretorio, "leituras.json")
+    servico.ARQ_FILA_LEITURAS = os.path.join(diretorio, "filaLeituras.json")
+    servico.ARQ_FILAS = os.path.join(diretorio, "filas.db")
+    servico.DIR_LEITURAS = os.path.join(diretorio, "leituras")
+    servico._log_leituras = None
+    # abre log e fila antes de medir (a criação não entra na conta)
+    RegistrarLeitura.obter_log_leituras()
+    RegistrarLeitura.obter_fila_leituras()
+
+
+def medir(descricao, quantidade, funcao):
+    antes = contar_syscalls()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcao()
+    duracao = time.perf_counter() - inicio
+    depois = contar_syscalls()
+
+    por_leitura = None if antes is None else (depois - antes) / quantidade
+    texto_syscalls = "   n/d" if por_leitura is None else f"{por_leitura:10.3f}"
+    print(
+        f"{descricao:<10} {quantidade:>8} leituras  {duracao:8.3f} s  "
+        f"{quantidade / duracao:>10,.0f} leituras/s  {texto_syscalls} syscalls/leitura"
+    )
+    return por_leitura
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=10000)
+    parser.add_argument("--legado", type=int, default=500,
+                        help="leituras no modo legado (custo O(n²))")
+    parser.add_argument("--existentes", type=int, default=1000,
+                        help="leituras já gravadas antes da medição no modo legado")
+    parser.add_argument("--unitarias", type=int, default=2000)
+    parser.add_argument("--lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    leituras = gerar_leituras(args.leituras)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arq_leituras = os.path.join(diretorio, "leituras.json")
+        arq_fila = os.path.join(diretorio, "filaLeituras.json")
+        with open(arq_leituras, "w") as f:
+            json.dump({"leituras": gerar_leituras(args.existentes)}, f, indent=4)
+
+        amostra = leituras[:args.legado]
+        legado = medir("legado", len(amostra), lambda: [
+            registrar_legado(l, arq_leituras, arq_fila) for l in amostra
+        ])
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_caminhos(diretorio)
+        amostra = leituras[:args.unitarias]
+        medir("unitária", len(amostra), lambda: [
+            RegistrarLeitura.registrar_leitura(
+                l["sensorId"], l["temperatura"], l["umidade"], l["date"]
+            )
+            for l in amostra
+        ])
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_caminhos(diretorio)
+        lote = medir("lote", len(leituras), lambda: RegistrarLeitura.registrar_leituras_lote(
+            leituras, tamanho_lote=args.lote
+        ))
+        gravadas = sum(1 for _ in RegistrarLeitura.obter_log_leituras().iterar())
+        na_fila = RegistrarLeitura.obter_fila_leituras().profundidade()
+        print(f"✔ {gravadas} leituras no log e {na_fila} na fila (esperado {len(leituras)})")
+
+    if legado is not None and lote:
+        reducao = legado / lote
+        situacao = "✔" if reducao >= META_REDUCAO else "✘"
+        print(f"{situacao} {reducao:,.0f}x menos syscalls por leitura que o legado "
+              f"(meta {META_REDUCAO}x)")
+
+
+if __name__ == "__main__":
+    main()
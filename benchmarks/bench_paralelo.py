@@ -0,0 +1,98 @@
+"""
+Benchmark da avaliação paralela por sensor (clima.paralelo).
+
+Com N leituras (padrão 1M) de S sensores (padrão 10k), avaliadas em
+lotes de L leituras (padrão 100k) com histerese, nDeM [3, 5] e cooldown:
+  - 1 processo:  regras.mascara() + EstadoDisparo.filtrar() (modo "lote")
+  - P processos: AvaliadorParalelo com 2, 4, ... até um por núcleo
+mede leituras/s e a aceleração em relação a 1 processo, e confere que
+a máscara e os alertas de cada configuração são idênticos aos do modo
+"lote". Só a avaliação é medida (sem fila nem gravação).
+
+Uso:
+    python benchmarks/bench_paralelo.py --leituras 1000000 --sensores 10000 --lote 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima.avaliacao import LoteColunar  # noqa: E402
+from clima.disparo import EstadoDisparo  # noqa: E402
+from clima.paralelo import AvaliadorParalelo  # noqa: E402
+from clima.regras import RegrasAlerta  # noqa: E402
+
+from bench_disparo import gerar_leituras  # noqa: E402
+
+CONFIG = {
+    "limites": {"tempMax": 30, "umiMax": 80, "nDeM": [3, 5], "cooldown": 300},
+    "regras": {"tipos": {"sensor": {"histerese": 1.0}}}
+}
+
+
+class _Config:
+    def obter(self):
+        return CONFIG
+
+
+def avaliar(lotes, ids, avaliador=None):
+    """
+    Avalia todos os lotes; retorna (duração, máscaras, alertas).
+    """
+    regras = RegrasAlerta(_Config())
+    estado = EstadoDisparo()
+    mascaras = []
+    alertas = []
+    inicio = time.perf_counter()
+    for lote, ids_lote in zip(lotes, ids):
+        if avaliador is None:
+            mascara = regras.mascara(LoteColunar(lote))
+            disparados = estado.filtrar(lote, mascara, regras.compiladas().regra, ids_lote)
+        else:
+            mascara, disparados = avaliador.avaliar(lote, regras, estado, ids_lote)
+        mascaras.append([bool(a) for a in mascara])
+        alertas.append(disparados)
+    return time.perf_counter() - inicio, mascaras, alertas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=1000000)
+    parser.add_argument("--sensores", type=int, default=10000)
+    parser.add_argument("--lote", type=int, default=100000)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1,
+                        help="máximo de processos testados")
+    args = parser.parse_args()
+
+    leituras = gerar_leituras(args.leituras, args.sensores)
+    lotes = [leituras[i:i + args.lote] for i in range(0, len(leituras), args.lote)]
+    ids = [list(range(i, i + len(lote))) for i, lote in zip(range(0, len(leituras), args.lote), lotes)]
+
+    print(f"{len(leituras):,} leituras, {args.sensores:,} sensores, "
+          f"lotes de {args.lote:,}, {os.cpu_count()} núcleos")
+
+    base, mascaras, alertas = avaliar(lotes, ids)
+    total = sum(len(a) for a in alertas)
+    print(f"  {'1 processo (lote)':<22} {base:7.3f} s  {len(leituras) / base:>10,.0f} leituras/s  "
+          f"{total:,} alertas")
+
+    processos = 2
+    while processos <= max(args.processos, 2):
+        with AvaliadorParalelo(processos, minimo=0) as avaliador:
+            # aquece o pool (criação dos processos fora da medição)
+            avaliador.avaliar(lotes[0][:processos * 100], RegrasAlerta(_Config()), EstadoDisparo())
+            duracao, m, a = avaliar(lotes, ids, avaliador)
+        situacao = "✔" if (m, a) == (mascaras, alertas) else "✘ resultado diferente"
+        print(f"  {f'{processos} processos':<22} {duracao:7.3f} s  "
+              f"{len(leituras) / duracao:>10,.0f} leituras/s  "
+              f"{base / duracao:4.2f}x  {situacao}")
+        processos *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark do pipeline leitura -> avaliação -> auditoria, de ponta a ponta.
+
+Num diretório temporário (não toca em date/ nem queue/), com N leituras
+(padrão 200k):
+  - arquivos: registrar_leituras_lote -> avaliar_leituras ->
+              processar_fila_auditoria (filas duráveis entre as etapas)
+  - processo: ExecutarPipeline.executar_em_processo (filas em memória
+              com contrapressão; só logs, alertas e checkpoint em disco)
+mede leituras/s e confere que os dois modos gravam as mesmas leituras,
+os mesmos alertas, as mesmas notificações e os mesmos registros de
+auditoria (sem as datas de processamento).
+
+Uso:
+    python benchmarks/bench_pipeline.py --leituras 200000 --lote 1000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima import servico  # noqa: E402
+from clima.arquivos import salvar_json  # noqa: E402
+from functions import AvaliarLeitura, ExecutarPipeline, RegistrarLeitura, registrarauditoria  # noqa: E402
+
+from bench_avaliacao import configurar_caminhos as configurar_avaliacao  # noqa: E402
+from bench_avaliacao import gerar_leituras, sem_datas, TEMP_MAX, UMI_MAX  # noqa: E402
+
+
+def configurar_caminhos(diretorio):
+    configurar_avaliacao(diretorio)
+
+    # logs e filas de RegistrarLeitura e registrarauditoria (clima.servico)
+    servico.ARQ_LEITURAS = os.path.join(diretorio, "leituras.json")
+    servico.ARQ_FILA_LEITURAS = AvaliarLeitura.ARQ_FILA
+    servico.ARQ_FILAS = AvaliarLeitura.ARQ_FILAS
+    servico.DIR_LEITURAS = os.path.join(diretorio, "leituras")
+    servico._log_leituras = None
+
+    servico.ARQ_AUDITORIA = os.path.join(diretorio, "auditoriaEventos.json")
+    servico.ARQ_FILA_AUDITORIA = AvaliarLeitura.ARQ_FILA_AUDITORIA
+    servico.DIR_AUDITORIA = os.path.join(diretorio, "auditoria")
+    servico._log_auditoria = None
+
+    salvar_json(
+        AvaliarLeitura.ARQ_LIMITES,
+        {"limites": {"tempMax": TEMP_MAX, "umiMax": UMI_MAX}}
+    )
+
+
+def rodar_modo(leituras, modo, tamanho_lote):
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_caminhos(diretorio)
+
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ExecutarPipeline.executar_pipeline(iter(leituras), modo, tamanho_lote)
+        duracao = time.perf_counter() - inicio
+
+        resultado = (
+            list(RegistrarLeitura.obter_log_leituras().iterar()),
+            sem_datas(list(AvaliarLeitura.obter_historico_alertas().iterar())),
+            sem_datas(AvaliarLeitura.obter_fila_notificacoes().espiar()),
+            [json.dumps(r["detalhes"], sort_keys=True)
+             for r in registrarauditoria.obter_log_auditoria().iterar()]
+        )
+    return duracao, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=200000)
+    parser.add_argument("--lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    leituras = gerar_leituras(args.leituras)
+    t_arquivos, r_arquivos = rodar_modo(leituras, "arquivos", args.lote)
+    t_processo, r_processo = rodar_modo(leituras, "processo", args.lote)
+
+    situacao = "✔ registros idênticos" if r_arquivos == r_processo else "✘ registros diferentes"
+    print(f"{len(leituras):,} leituras em lotes de {args.lote:,} ({situacao})")
+    print(f"  arquivos:  {t_arquivos:8.3f} s  {len(leituras) / t_arquivos:>10,.0f} leituras/s")
+    print(f"  processo:  {t_processo:8.3f} s  {len(leituras) / t_processo:>10,.0f} leituras/s  "
+          f"{t_arquivos / t_processo:4.2f}x")
+    if r_arquivos != r_processo:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
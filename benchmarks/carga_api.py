@@ -0,0 +1,237 @@
+"""
+Teste de carga: API Flask (app.py) x variante ASGI (app_asgi.py).
+
+Cada servidor sobe num processo próprio, com os arquivos num diretório
+temporário (não toca em date/ nem queue/) e o log de auditoria
+pré-carregado com R registros. C clientes (threads com conexão
+keep-alive) disparam requisições por D segundos, na proporção:
+  - 70% POST /auditoria
+  - 25% GET  /auditoria?limite=50
+  -  4% GET  /auditoria/config
+  -  1% GET  /auditoria?formato=ndjson (exportação inteira: consulta lenta)
+e o resultado mostra requisições/s e latência p50/p99 por rota.
+
+Flask roda no servidor do Werkzeug (threaded); a variante ASGI precisa
+do uvicorn (pip install uvicorn), senão é pulada.
+
+Uso:
+    python benchmarks/carga_api.py --clientes 32 --duracao 10 --registros 20000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima import servico  # noqa: E402
+from clima.arquivos import salvar_json  # noqa: E402
+
+ROTAS = (
+    (0.70, "POST /auditoria", "POST", "/auditoria"),
+    (0.25, "GET /auditoria", "GET", "/auditoria?limite=50"),
+    (0.04, "GET /auditoria/config", "GET", "/auditoria/config"),
+    (0.01, "GET ndjson", "GET", "/auditoria?formato=ndjson"),
+)
+
+
+# ============================================================
+# Servidor (processo filho)
+# ============================================================
+
+def configurar_caminhos(diretorio):
+    """
+    Redireciona os caminhos da API (clima.servico, usados por app.py e
+    app_asgi.py) para 'diretorio' e descarta logs e consumidor já abertos.
+    """
+    servico.parar_consumidor_auditoria()
+    servico.ARQ_AUDITORIA = os.path.join(diretorio, "auditoriaEventos.json")
+    servico.ARQ_FILA_AUDITORIA = os.path.join(diretorio, "filaAuditoria.json")
+    servico.ARQ_CONFIG_ALERTAS = os.path.join(diretorio, "configAlertas.json")
+    servico.ARQ_LIMITES = os.path.join(diretorio, "limites.json")
+    servico.ARQ_FILAS = os.path.join(diretorio, "filas.db")
+    servico.DIR_AUDITORIA = os.path.join(diretorio, "auditoria")
+    servico.ARQ_LEITURAS = os.path.join(diretorio, "leituras.json")
+    servico.ARQ_FILA_LEITURAS = os.path.join(diretorio, "filaLeituras.json")
+    servico.DIR_LEITURAS = os.path.join(diretorio, "leituras")
+    servico._log_auditoria = None
+    servico._log_leituras = None
+
+
+def servir(tipo, porta, diretorio, registros):
+    configurar_caminhos(diretorio)
+    salvar_json(servico.ARQ_LIMITES, {"limites": {"tempMax": 30, "umiMax": 80}})
+    servico.obter_log_auditoria().acrescentar_lote([
+        servico.montar_registro_auditoria({
+            "sensorId": f"sensor-{i % 50:02d}",
+            "temperatura": 20 + i % 15,
+            "umidade": 60,
+            "date": "28/11/2025 00:00:00",
+            "acionado": i % 7 == 0
+        })
+        for i in range(registros)
+    ])
+
+    if tipo == "flask":
+        from werkzeug.serving import make_server
+        import app as api
+        make_server("127.0.0.1", porta, api.app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+        import app_asgi
+        uvicorn.run(app_asgi.app, host="127.0.0.1", port=porta, log_level="warning")
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def esperar_porta(porta, processo, timeout=60):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("o servidor terminou antes de abrir a porta")
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"porta {porta} não abriu em {timeout}s")
+
+
+# ============================================================
+# Clientes
+# ============================================================
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def cliente(porta, ate, latencias, erros, semente):
+    aleatorio = random.Random(semente)
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+    while time.monotonic() < ate:
+        sorteio = aleatorio.random()
+        for peso, nome, metodo, caminho in ROTAS:
+            sorteio -= peso
+            if sorteio < 0:
+                break
+        corpo = None
+        cabecalhos = {}
+        if metodo == "POST":
+            corpo = json.dumps({
+                "sensorId": f"sensor-{aleatorio.randrange(50):02d}",
+                "temperatura": 25.0,
+                "umidade": 60,
+                "acionado": False
+            })
+            cabecalhos["Content-Type"] = "application/json"
+
+        inicio = time.perf_counter()
+        try:
+            conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            resposta.read()
+            if resposta.status >= 400:
+                raise RuntimeError(f"HTTP {resposta.status}")
+        except Exception:
+            erros[nome] = erros.get(nome, 0) + 1
+            conexao.close()
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+            continue
+        latencias.setdefault(nome, []).append(time.perf_counter() - inicio)
+    conexao.close()
+
+
+def carregar(tipo, args):
+    porta = porta_livre()
+    with tempfile.TemporaryDirectory() as diretorio:
+        processo = subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), "--servir", tipo,
+            "--porta", str(porta), "--diretorio", diretorio,
+            "--registros", str(args.registros)
+        ])
+        try:
+            esperar_porta(porta, processo)
+            ate = time.monotonic() + args.duracao
+            resultados = [({}, {}) for _ in range(args.clientes)]
+            threads = [
+                threading.Thread(target=cliente, args=(porta, ate, lat, err, i))
+                for i, (lat, err) in enumerate(resultados)
+            ]
+            inicio = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            duracao = time.perf_counter() - inicio
+        finally:
+            processo.terminate()
+            processo.wait()
+
+    latencias = {}
+    erros = {}
+    for lat, err in resultados:
+        for nome, valores in lat.items():
+            latencias.setdefault(nome, []).extend(valores)
+        for nome, quantidade in err.items():
+            erros[nome] = erros.get(nome, 0) + quantidade
+    return duracao, latencias, erros
+
+
+def imprimir(tipo, duracao, latencias, erros):
+    todas = [v for valores in latencias.values() for v in valores]
+    print(f"{tipo}: {len(todas) / duracao:,.0f} req/s, "
+          f"p50 {percentil(todas, 0.5) * 1000:.1f} ms, p99 {percentil(todas, 0.99) * 1000:.1f} ms"
+          + (f", {sum(erros.values())} erros" if erros else ""))
+    for _, nome, _, _ in ROTAS:
+        valores = latencias.get(nome, [])
+        print(f"  {nome:<24} {len(valores):>7,} req  "
+              f"p50 {percentil(valores, 0.5) * 1000:8.1f} ms  "
+              f"p99 {percentil(valores, 0.99) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--duracao", type=float, default=10.0)
+    parser.add_argument("--registros", type=int, default=20000,
+                        help="registros de auditoria pré-carregados")
+    parser.add_argument("--servir", choices=("flask", "asgi"), help=argparse.SUPPRESS)
+    parser.add_argument("--porta", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--diretorio", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.servir:
+        servir(args.servir, args.porta, args.diretorio, args.registros)
+        return
+
+    print(f"{args.clientes} clientes por {args.duracao:.0f} s, "
+          f"{args.registros:,} registros de auditoria\n")
+    for tipo in ("flask", "asgi"):
+        if tipo == "asgi":
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                print("asgi: uvicorn não instalado (pip install uvicorn), pulado")
+                continue
+        imprimir(tipo, *carregar(tipo, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Gerador de dados sintéticos para os benchmarks.
+
+Leituras e registros de auditoria reprodutíveis (mesma semente -> mesmos
+dados), com:
+  - sensores:          quantidade de sensores distintos ("sensor-00000")
+  - proporcao_alerta:  fração das leituras acima de tempMax/umiMax
+  - horas:             duração do histórico; as datas são espalhadas em
+                       ordem crescente ao longo dele, terminando em FIM
+
+Uso como script (NDJSON na saída padrão, ex.: para ExecutarPipeline.py):
+    python benchmarks/dados_sinteticos.py leituras 100000 --sensores 500 > leituras.ndjson
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+TEMP_MAX = 30
+UMI_MAX = 80
+
+# Fim do histórico gerado (28/11/2025 00:00:00 local), fixo para que os
+# dados não mudem entre execuções
+FIM = 1764298800
+
+FORMATO_DATA = "%d/%m/%Y %H:%M:%S"
+
+
+def _datas(quantidade, horas):
+    """
+    'quantidade' datas crescentes ao longo de 'horas' horas até FIM.
+    """
+    inicio = FIM - int(horas * 3600)
+    passo = (FIM - inicio) / max(1, quantidade)
+    cache = {}
+    for i in range(quantidade):
+        epoca = inicio + int(i * passo)
+        data = cache.get(epoca)
+        if data is None:
+            cache.clear()
+            data = cache[epoca] = time.strftime(FORMATO_DATA, time.localtime(epoca))
+        yield data
+
+
+def iterar_leituras(quantidade, sensores=1000, proporcao_alerta=0.05, horas=24, semente=42):
+    """
+    Gera as leituras uma a uma (históricos grandes sem tudo na memória).
+    """
+    aleatorio = random.Random(semente)
+    for data in _datas(quantidade, horas):
+        alerta = aleatorio.random() < proporcao_alerta
+        yield {
+            "sensorId": f"sensor-{aleatorio.randrange(sensores):05d}",
+            "temperatura": round(aleatorio.uniform(TEMP_MAX + 0.1, TEMP_MAX + 8), 1) if alerta
+            else round(aleatorio.uniform(10, TEMP_MAX), 1),
+            "umidade": aleatorio.randrange(30, UMI_MAX),
+            "date": data
+        }
+
+
+def iterar_registros_auditoria(quantidade, sensores=1000, proporcao_alerta=0.05, horas=24, semente=43):
+    """
+    Registros no formato gravado no log de auditoria:
+    {"date": ..., "detalhes": {sensorId, temperatura, umidade, date, acionado}}
+    """
+    for leitura in iterar_leituras(quantidade, sensores, proporcao_alerta, horas, semente):
+        yield {"date": leitura["date"], "detalhes": dict(leitura, acionado=leitura["temperatura"] > TEMP_MAX)}
+
+
+def gerar_leituras(*args, **kwargs):
+    return list(iterar_leituras(*args, **kwargs))
+
+
+def gerar_registros_auditoria(*args, **kwargs):
+    return list(iterar_registros_auditoria(*args, **kwargs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("tipo", choices=("leituras", "auditoria"))
+    parser.add_argument("quantidade", type=int)
+    parser.add_argument("--sensores", type=int, default=1000)
+    parser.add_argument("--proporcao-alerta", type=float, default=0.05)
+    parser.add_argument("--horas", type=float, default=24)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    gerar = iterar_leituras if args.tipo == "leituras" else iterar_registros_auditoria
+    for item in gerar(args.quantidade, args.sensores, args.proporcao_alerta, args.horas, args.semente):
+        sys.stdout.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
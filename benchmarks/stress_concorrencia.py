@@ -0,0 +1,206 @@
+"""
+Teste de estresse com vários processos gravando nos mesmos arquivos.
+
+Num diretório temporário, N processos fazem K operações cada e, no fim,
+confere-se que nenhuma atualização foi perdida:
+  - json:      atualizar_json incrementando um contador e uma lista
+               (mais a versão antiga sem trava, para comparação)
+  - log:       LogSegmentado + IndiceLeituras com segmentos pequenos
+               (força várias rolagens concorrentes)
+  - historico: HistoricoAlertas.registrar e o ultimos.json por sensor
+
+Sai com código 1 se alguma verificação falhar.
+
+Uso:
+    python benchmarks/stress_concorrencia.py --processos 8 --operacoes 200
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima import HistoricoAlertas, IndiceLeituras, LogSegmentado  # noqa: E402
+from clima.arquivos import atualizar_json, carregar_json  # noqa: E402
+
+TAMANHO_SEGMENTO_TESTE = 4096  # bytes
+
+
+# ============================================================
+# Trabalhos executados em cada processo
+# ============================================================
+
+def trabalho_json(caminho, processo, operacoes):
+    for i in range(operacoes):
+        with atualizar_json(caminho) as dados:
+            dados["contador"] = dados.get("contador", 0) + 1
+            dados.setdefault("itens", []).append([processo, i])
+
+
+def trabalho_json_sem_trava(caminho, processo, operacoes):
+    """
+    Comportamento antigo: carrega, altera e regrava com "w", sem trava.
+    """
+    for i in range(operacoes):
+        dados = {}
+        try:
+            with open(caminho, "r") as f:
+                dados = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            dados = {}
+        dados["contador"] = dados.get("contador", 0) + 1
+        with open(caminho, "w") as f:
+            json.dump(dados, f, indent=4)
+
+
+def trabalho_log(diretorio, processo, operacoes):
+    log = LogSegmentado(diretorio, tamanho_max_segmento=TAMANHO_SEGMENTO_TESTE)
+    IndiceLeituras(log)
+    i = 0
+    while i < operacoes:
+        if i % 3 == 0:
+            lote = [
+                {"sensorId": f"sensor-{processo:02d}", "processo": processo, "i": j,
+                 "date": "28/11/2025 00:00:00"}
+                for j in range(i, min(i + 5, operacoes))
+            ]
+            log.acrescentar_lote(lote)
+            i += len(lote)
+        else:
+            log.acrescentar({"sensorId": f"sensor-{processo:02d}", "processo": processo,
+                             "i": i, "date": "28/11/2025 00:00:00"})
+            i += 1
+
+
+def trabalho_historico(diretorio, processo, operacoes):
+    historico = HistoricoAlertas(diretorio, tamanho_max_segmento=TAMANHO_SEGMENTO_TESTE)
+    for i in range(operacoes):
+        historico.registrar([{
+            "sensorId": f"sensor-{processo:02d}",
+            "temperatura": 40,
+            "umidade": 90,
+            "i": i,
+            "date": "28/11/2025 00:00:00"
+        }])
+
+
+def rodar(alvo, argumento, processos, operacoes):
+    contexto = multiprocessing.get_context("spawn")
+    filhos = [
+        contexto.Process(target=alvo, args=(argumento, p, operacoes))
+        for p in range(processos)
+    ]
+    inicio = time.perf_counter()
+    for filho in filhos:
+        filho.start()
+    for filho in filhos:
+        filho.join()
+    duracao = time.perf_counter() - inicio
+    falhas = [f.exitcode for f in filhos if f.exitcode != 0]
+    if falhas:
+        raise RuntimeError(f"processos terminaram com erro: {falhas}")
+    return duracao
+
+
+# ============================================================
+# Verificações
+# ============================================================
+
+def verificar(descricao, ok, detalhe):
+    print(f"{'✔' if ok else '✘'} {descricao}: {detalhe}")
+    return ok
+
+
+def cenario_json(diretorio, processos, operacoes):
+    esperado = processos * operacoes
+
+    caminho = os.path.join(diretorio, "sem_trava.json")
+    rodar(trabalho_json_sem_trava, caminho, processos, operacoes)
+    try:
+        antigo = carregar_json(caminho).get("contador", 0)
+    except json.JSONDecodeError:
+        antigo = 0
+    print(f"  (sem trava: {antigo}/{esperado} incrementos sobreviveram)")
+
+    caminho = os.path.join(diretorio, "com_trava.json")
+    duracao = rodar(trabalho_json, caminho, processos, operacoes)
+    dados = carregar_json(caminho)
+    itens = {tuple(item) for item in dados.get("itens", [])}
+    return verificar(
+        "json com atualizar_json",
+        dados.get("contador") == esperado and len(itens) == esperado,
+        f"contador={dados.get('contador')} itens únicos={len(itens)} "
+        f"esperado={esperado} ({duracao:.2f} s)"
+    )
+
+
+def cenario_log(diretorio, processos, operacoes):
+    esperado = processos * operacoes
+    pasta = os.path.join(diretorio, "log")
+    duracao = rodar(trabalho_log, pasta, processos, operacoes)
+
+    log = LogSegmentado(pasta, tamanho_max_segmento=TAMANHO_SEGMENTO_TESTE)
+    registros = list(log.iterar_com_posicao())
+    chaves = {(r["processo"], r["i"]) for _, r in registros}
+    legiveis = all(log.ler(posicao) == registro for posicao, registro in registros)
+
+    indice = IndiceLeituras(log)
+    por_sensor = sum(
+        sum(1 for _ in indice.buscar(sensorId=f"sensor-{p:02d}"))
+        for p in range(processos)
+    )
+
+    return verificar(
+        "log segmentado + índice",
+        len(registros) == esperado and len(chaves) == esperado and legiveis
+        and len(indice) == esperado and por_sensor == esperado,
+        f"registros={len(registros)} únicos={len(chaves)} índice={len(indice)} "
+        f"segmentos={len(log.segmentos)} esperado={esperado} ({duracao:.2f} s)"
+    )
+
+
+def cenario_historico(diretorio, processos, operacoes):
+    esperado = processos * operacoes
+    pasta = os.path.join(diretorio, "alertas")
+    duracao = rodar(trabalho_historico, pasta, processos, operacoes)
+
+    historico = HistoricoAlertas(pasta, tamanho_max_segmento=TAMANHO_SEGMENTO_TESTE)
+    total = sum(1 for _ in historico.iterar())
+    ultimos = historico.ultimos_por_sensor()
+    completos = all(
+        (ultimos.get(f"sensor-{p:02d}") or {}).get("i") == operacoes - 1
+        for p in range(processos)
+    )
+    return verificar(
+        "histórico de alertas",
+        total == esperado and completos,
+        f"alertas={total} esperado={esperado} último por sensor "
+        f"{'ok' if completos else 'perdido'} ({duracao:.2f} s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processos", type=int, default=8)
+    parser.add_argument("--operacoes", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        resultados = [
+            cenario_json(diretorio, args.processos, args.operacoes),
+            cenario_log(diretorio, args.processos, args.operacoes),
+            cenario_historico(diretorio, args.processos, args.operacoes)
+        ]
+
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Suíte de benchmarks dos caminhos quentes, por tamanho de histórico.
+
+Para cada tamanho de histórico H (padrão 1k, 100k e 1M), num diretório
+temporário novo (não toca em date/ nem queue/):
+  1. preparo:   H leituras no log de leituras e H registros no log de
+                auditoria (dados_sinteticos.py)
+  2. mede, com K operações (padrão 1000) sobre esse histórico:
+     - registrar_leitura            latência por leitura (p50/p99)
+     - registrar_leituras_lote      vazão de 10*K leituras num lote
+     - avaliar_leituras             vazão da fila de leituras inteira
+     - processar_fila_auditoria     vazão do dreno da fila de auditoria
+     - consultar_eventos            latência (sensorId, limite 50)
+     - consultar_eventos (período)  latência (última hora, limite 50)
+     - GET /auditoria (lambda)      latência do lambda_handler
+     - GET /auditoria (flask)       latência pelo test client do Flask
+                                    (pulado se o Flask não estiver instalado)
+
+Os resultados saem numa tabela e, com --saida, num JSON para comparar
+execuções (--comparar anterior.json mostra a razão de vazão).
+
+Uso:
+    python benchmarks/suite.py --tamanhos 1000 100000 1000000 --operacoes 1000 \\
+        --sensores 1000 --proporcao-alerta 0.05 --horas 720 --saida resultado.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from itertools import islice
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+from clima.avaliacao import NUMPY_DISPONIVEL  # noqa: E402
+from functions import AvaliarLeitura, RegistrarLeitura, consultarauditoria, registrarauditoria  # noqa: E402
+
+from bench_pipeline import configurar_caminhos as configurar_pipeline  # noqa: E402
+from carga_api import configurar_caminhos as configurar_api  # noqa: E402
+from dados_sinteticos import FIM, iterar_leituras, iterar_registros_auditoria  # noqa: E402
+
+try:
+    import app as api
+except ImportError:  # Flask é opcional aqui
+    api = None
+
+VERSAO = 1
+TAMANHOS = (1000, 100000, 1000000)
+BLOCO_PREPARO = 10000
+
+
+def configurar_caminhos(diretorio):
+    configurar_pipeline(diretorio)
+
+    consultarauditoria.ARQ_CONFIG_ALERTAS = AvaliarLeitura.ARQ_CONFIG_ALERTAS
+    consultarauditoria.ARQ_LIMITES = AvaliarLeitura.ARQ_LIMITES
+    consultarauditoria.DIR_ALERTAS = AvaliarLeitura.DIR_ALERTAS
+    consultarauditoria._historico_alertas = None
+
+    configurar_api(diretorio)
+
+
+# ============================================================
+# Medição
+# ============================================================
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def latencias(caminho, historico, funcao, argumentos):
+    """
+    Chama funcao(*a) para cada a em 'argumentos'; resultado com p50/p99.
+    """
+    duracoes = []
+    for a in argumentos:
+        inicio = time.perf_counter()
+        funcao(*a)
+        duracoes.append(time.perf_counter() - inicio)
+    total = sum(duracoes)
+    return {
+        "caminho": caminho,
+        "historico": historico,
+        "operacoes": len(duracoes),
+        "segundos": round(total, 6),
+        "porSegundo": round(len(duracoes) / total, 1) if total else None,
+        "p50Ms": round(percentil(duracoes, 0.5) * 1000, 3),
+        "p99Ms": round(percentil(duracoes, 0.99) * 1000, 3)
+    }
+
+
+def vazao(caminho, historico, funcao, itens):
+    """
+    Uma chamada de funcao() processando 'itens' itens.
+    """
+    inicio = time.perf_counter()
+    funcao()
+    total = time.perf_counter() - inicio
+    return {
+        "caminho": caminho,
+        "historico": historico,
+        "operacoes": itens,
+        "segundos": round(total, 6),
+        "porSegundo": round(itens / total, 1) if total else None,
+        "p50Ms": None,
+        "p99Ms": None
+    }
+
+
+def em_blocos(itens, tamanho=BLOCO_PREPARO):
+    iterador = iter(itens)
+    while True:
+        bloco = list(islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+# ============================================================
+# Cenário por tamanho de histórico
+# ============================================================
+
+def preparar(historico, args):
+    """
+    Grava o histórico direto nos logs (sem passar pelas filas).
+    """
+    log_leituras = RegistrarLeitura.obter_log_leituras()
+    for bloco in em_blocos(iterar_leituras(
+        historico, args.sensores, args.proporcao_alerta, args.horas, args.semente
+    )):
+        log_leituras.acrescentar_lote(bloco)
+
+    log_auditoria = consultarauditoria.obter_log_auditoria()
+    for bloco in em_blocos(iterar_registros_auditoria(
+        historico, args.sensores, args.proporcao_alerta, args.horas, args.semente + 1
+    )):
+        log_auditoria.acrescentar_lote(bloco)
+
+
+def medir(historico, args):
+    aleatorio = random.Random(args.semente)
+    k = args.operacoes
+    novas = list(iterar_leituras(
+        k * 11, args.sensores, args.proporcao_alerta, 1, args.semente + 2
+    ))
+    sensores = [f"sensor-{aleatorio.randrange(args.sensores):05d}" for _ in range(k)]
+    desde = time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(FIM - 3600))
+    resultados = []
+
+    resultados.append(latencias(
+        "registrar_leitura", historico, RegistrarLeitura.registrar_leitura,
+        [(l["sensorId"], l["temperatura"], l["umidade"], l["date"]) for l in novas[:k]]
+    ))
+    resultados.append(vazao(
+        "registrar_leituras_lote", historico,
+        lambda: RegistrarLeitura.registrar_leituras_lote(novas[k:]), len(novas) - k
+    ))
+
+    pendentes = AvaliarLeitura.obter_fila_leituras().profundidade()
+    resultados.append(vazao("avaliar_leituras", historico, AvaliarLeitura.avaliar_leituras, pendentes))
+
+    pendentes = registrarauditoria.obter_fila_auditoria().profundidade()
+    resultados.append(vazao(
+        "processar_fila_auditoria", historico, registrarauditoria.processar_fila_auditoria, pendentes
+    ))
+
+    resultados.append(latencias(
+        "consultar_eventos", historico,
+        lambda s: list(consultarauditoria.consultar_eventos(sensorId=s, limite=50)),
+        [(s,) for s in sensores]
+    ))
+    resultados.append(latencias(
+        "consultar_eventos (período)", historico,
+        lambda: list(consultarauditoria.consultar_eventos(desde=desde, limite=50)),
+        [()] * k
+    ))
+    resultados.append(latencias(
+        "GET /auditoria (lambda)", historico,
+        lambda s: consultarauditoria.lambda_handler(
+            {"queryStringParameters": {"sensorId": s, "limite": "50"}}, None
+        ),
+        [(s,) for s in sensores]
+    ))
+
+    if api is not None:
+        cliente = api.app.test_client()
+        resultados.append(latencias(
+            "GET /auditoria (flask)", historico,
+            lambda s: cliente.get(f"/auditoria?sensorId={s}&limite=50").get_data(),
+            [(s,) for s in sensores]
+        ))
+
+    return resultados
+
+
+# ============================================================
+# Saída
+# ============================================================
+
+def imprimir(resultados):
+    print(f"  {'caminho':<30} {'histórico':>10} {'ops':>8} {'ops/s':>12} {'p50 ms':>9} {'p99 ms':>9}")
+    for r in resultados:
+        p50 = "" if r["p50Ms"] is None else f"{r['p50Ms']:.3f}"
+        p99 = "" if r["p99Ms"] is None else f"{r['p99Ms']:.3f}"
+        print(f"  {r['caminho']:<30} {r['historico']:>10,} {r['operacoes']:>8,} "
+              f"{r['porSegundo'] or 0:>12,.1f} {p50:>9} {p99:>9}")
+
+
+def comparar(resultados, caminho_anterior):
+    """
+    Razão de vazão (atual / anterior) por caminho e tamanho de histórico.
+    """
+    with open(caminho_anterior, "r", encoding="utf-8") as f:
+        anterior = json.load(f)
+    base = {(r["caminho"], r["historico"]): r for r in anterior.get("resultados", [])}
+
+    print(f"\nComparação com {caminho_anterior} (vazão atual / anterior):")
+    for r in resultados:
+        antes = base.get((r["caminho"], r["historico"]))
+        if not antes or not antes.get("porSegundo") or not r["porSegundo"]:
+            continue
+        razao = r["porSegundo"] / antes["porSegundo"]
+        marca = "✘" if razao < 0.9 else "✔"
+        print(f"  {marca} {r['caminho']:<30} {r['historico']:>10,}  {razao:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS))
+    parser.add_argument("--operacoes", type=int, default=1000)
+    parser.add_argument("--sensores", type=int, default=1000)
+    parser.add_argument("--proporcao-alerta", type=float, default=0.05)
+    parser.add_argument("--horas", type=float, default=720, help="duração do histórico")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="grava os resultados neste JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    resultados = []
+    preparos = {}
+    for historico in args.tamanhos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            configurar_caminhos(diretorio)
+            with contextlib.redirect_stdout(io.StringIO()):
+                inicio = time.perf_counter()
+                preparar(historico, args)
+                preparos[historico] = round(time.perf_counter() - inicio, 3)
+                parciais = medir(historico, args)
+        print(f"Histórico de {historico:,} registros (preparo {preparos[historico]:.1f} s)")
+        imprimir(parciais)
+        resultados.extend(parciais)
+
+    documento = {
+        "versao": VERSAO,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parametros": {
+            "tamanhos": args.tamanhos,
+            "operacoes": args.operacoes,
+            "sensores": args.sensores,
+            "proporcaoAlerta": args.proporcao_alerta,
+            "horas": args.horas,
+            "semente": args.semente
+        },
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy": NUMPY_DISPONIVEL,
+            "flask": api is not None,
+            "nucleos": os.cpu_count()
+        },
+        "preparoSegundos": {str(h): s for h, s in preparos.items()},
+        "resultados": resultados
+    }
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(documento, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Pacote compartilhado do Sistema de Alerta de Clima.
+
+Reúne os componentes usados pelas "Lambdas" de functions/ e pela API
+Flask (app.py), para que todas as etapas usem o mesmo código de
+armazenamento e processamento.
+"""
+
+from clima.log_segmentado import LogSegmentado
+from clima.indices import IndiceAuditoria, IndiceLeituras
+from clima.alertas import HistoricoAlertas
+from clima.fila import FilaDuravel
+from clima.armazenamento import DocumentoJson, LogSqlite, abrir_log
+
+__all__ = [
+    "LogSegmentado",
+    "IndiceAuditoria",
+    "IndiceLeituras",
+    "HistoricoAlertas",
+    "FilaDuravel",
+    "LogSqlite",
+    "DocumentoJson",
+    "abrir_log"
+]
@@ -0,0 +1,339 @@
+"""
+Agregados por janela (1m, 1h, 1d) das leituras de cada sensor.
+
+Painéis que querem "temperatura mín/máx/média do sensor-07 por hora"
+não devem reler o histórico bruto. AgregadosLeituras observa o log de
+leituras (como os índices): cada leitura gravada atualiza, em O(1), o
+balde da janela fixa a que pertence em cada resolução:
+
+    (janela, sensorId, inicio) -> leituras,
+                                  temperatura n/min/max/soma,
+                                  umidade n/min/max/soma
+
+Os baldes ficam em SQLite (agregados.db dentro da pasta do log), junto
+com a posição do último registro do log já agregado, gravados na mesma
+transação: cada leitura entra uma única vez, mesmo com vários processos
+gravando no log. Leituras sem data ou sem sensorId são ignoradas.
+
+Janelas de 1d seguem o dia local (meia-noite do fuso da máquina); as
+menores são alinhadas ao minuto/hora.
+
+Os agregados são derivados do log e podem ser refeitos:
+
+    python -m clima.agregados reconstruir date/leituras
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from clima.datas import FORMATO_DATA, para_epoca
+
+NOME_BANCO = "agregados.db"
+
+# nome -> segundos
+JANELAS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+# Leituras do log aplicadas por transação na sincronização
+LOTE_SINCRONIZACAO = 10000
+
+# posicao_final() de um log vazio é None: marca "nunca sincronizado"
+_NAO_SINCRONIZADO = object()
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS agregados (
+    janela    TEXT    NOT NULL,
+    sensor    TEXT    NOT NULL,
+    inicio    REAL    NOT NULL,
+    leituras  INTEGER NOT NULL,
+    temp_n    INTEGER NOT NULL,
+    temp_min  REAL,
+    temp_max  REAL,
+    temp_soma REAL    NOT NULL,
+    umi_n     INTEGER NOT NULL,
+    umi_min   REAL,
+    umi_max   REAL,
+    umi_soma  REAL    NOT NULL,
+    PRIMARY KEY (janela, sensor, inicio)
+);
+CREATE INDEX IF NOT EXISTS idx_agregados_inicio ON agregados (janela, inicio);
+CREATE TABLE IF NOT EXISTS progresso (
+    id       INTEGER PRIMARY KEY CHECK (id = 1),
+    segmento INTEGER NOT NULL,
+    offset   INTEGER NOT NULL
+);
+"""
+
+# soma os baldes novos aos existentes; min/max ignoram NULL dos dois lados
+_UPSERT = """
+INSERT INTO agregados VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (janela, sensor, inicio) DO UPDATE SET
+    leituras  = leituras + excluded.leituras,
+    temp_n    = temp_n + excluded.temp_n,
+    temp_min  = min(coalesce(temp_min, excluded.temp_min), coalesce(excluded.temp_min, temp_min)),
+    temp_max  = max(coalesce(temp_max, excluded.temp_max), coalesce(excluded.temp_max, temp_max)),
+    temp_soma = temp_soma + excluded.temp_soma,
+    umi_n     = umi_n + excluded.umi_n,
+    umi_min   = min(coalesce(umi_min, excluded.umi_min), coalesce(excluded.umi_min, umi_min)),
+    umi_max   = max(coalesce(umi_max, excluded.umi_max), coalesce(excluded.umi_max, umi_max)),
+    umi_soma  = umi_soma + excluded.umi_soma
+"""
+
+_NUMERICOS = {int, float}
+
+
+def inicio_janela(epoca, segundos):
+    """
+    Início (epoch) da janela fixa de 'segundos' que contém 'epoca'.
+    """
+    if segundos >= 86400:
+        deslocamento = time.localtime(epoca).tm_gmtoff
+        return math.floor((epoca + deslocamento) / segundos) * segundos - deslocamento
+    return math.floor(epoca / segundos) * segundos
+
+
+def _valor(valor):
+    if type(valor) in _NUMERICOS and valor == valor:
+        return float(valor)
+    return None
+
+
+class _Balde:
+    """
+    Acumulador de uma janela: [leituras, n, min, max, soma] x 2 grandezas.
+    """
+
+    __slots__ = ("leituras", "temp", "umi")
+
+    def __init__(self):
+        self.leituras = 0
+        self.temp = [0, None, None, 0.0]
+        self.umi = [0, None, None, 0.0]
+
+    def adicionar(self, temperatura, umidade):
+        self.leituras += 1
+        for acumulado, valor in ((self.temp, temperatura), (self.umi, umidade)):
+            if valor is None:
+                continue
+            acumulado[0] += 1
+            if acumulado[1] is None or valor < acumulado[1]:
+                acumulado[1] = valor
+            if acumulado[2] is None or valor > acumulado[2]:
+                acumulado[2] = valor
+            acumulado[3] += valor
+
+
+class AgregadosLeituras:
+    """
+    Agregados por janela sobre um LogSegmentado de leituras.
+
+    Ao ser criado, agrega o que estiver no log e ainda não estiver no
+    banco e passa a observar o log: cada acrescentar()/acrescentar_lote()
+    atualiza os baldes.
+    """
+
+    def __init__(self, log, janelas=JANELAS):
+        self.log = log
+        self.janelas = dict(janelas)
+        self.caminho = os.path.join(log.diretorio, NOME_BANCO)
+        self._local = threading.local()
+        # log.posicao_final() na última sincronização completa
+        self._posicao_sincronizada = _NAO_SINCRONIZADO
+
+        self._conexao().executescript(_ESQUEMA)
+        self.sincronizar()
+        log.observadores.append(self)
+
+    def _conexao(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def posicao(self):
+        """
+        Posição (segmento, offset) do último registro agregado, ou None.
+        """
+        linha = self._conexao().execute(
+            "SELECT segmento, offset FROM progresso WHERE id = 1"
+        ).fetchone()
+        return None if linha is None else (linha[0], linha[1])
+
+    # --------------------------------------------------------
+    # Manutenção
+    # --------------------------------------------------------
+
+    def _aplicar(self, posicoes, registros):
+        """
+        Agrega os registros posteriores à posição já gravada e avança a
+        posição, tudo numa transação. Retorna quantos foram agregados.
+        """
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            ultima = self.posicao()
+            baldes = {}
+            aplicados = 0
+            final = None
+            for posicao, registro in zip(posicoes, registros):
+                posicao = tuple(posicao)
+                if ultima is not None and posicao <= ultima:
+                    continue
+                final = posicao
+                aplicados += 1
+
+                epoca = para_epoca(registro.get("date"))
+                sensor = registro.get("sensorId")
+                if epoca is None or not isinstance(sensor, str):
+                    continue
+                temperatura = _valor(registro.get("temperatura"))
+                umidade = _valor(registro.get("umidade"))
+                for nome, segundos in self.janelas.items():
+                    chave = (nome, sensor, inicio_janela(epoca, segundos))
+                    balde = baldes.get(chave)
+                    if balde is None:
+                        balde = baldes[chave] = _Balde()
+                    balde.adicionar(temperatura, umidade)
+
+            if baldes:
+                con.executemany(_UPSERT, [
+                    (*chave, b.leituras, *b.temp, *b.umi)
+                    for chave, b in baldes.items()
+                ])
+            if final is not None:
+                con.execute(
+                    "INSERT OR REPLACE INTO progresso (id, segmento, offset) VALUES (1, ?, ?)",
+                    final
+                )
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+        return aplicados
+
+    def ao_acrescentar(self, posicoes, registros):
+        self._aplicar(posicoes, registros)
+
+    def sincronizar(self):
+        """
+        Agrega os registros do log que ainda não entraram nos baldes
+        (gravados por outro processo sem este observador, ou antes de
+        uma queda). Retorna quantos foram agregados.
+
+        Se o log não mudou desde a última sincronização, volta sem tomar
+        a trava de escrita do log.
+        """
+        if self.log.posicao_final() == self._posicao_sincronizada:
+            return 0
+
+        total = 0
+        with self.log.trava:
+            self.log.recarregar()
+            posicoes, registros = [], []
+            for posicao, registro in self.log.iterar_com_posicao(desde=self.posicao()):
+                posicoes.append(posicao)
+                registros.append(registro)
+                if len(posicoes) >= LOTE_SINCRONIZACAO:
+                    total += self._aplicar(posicoes, registros)
+                    posicoes, registros = [], []
+            total += self._aplicar(posicoes, registros)
+            self._posicao_sincronizada = self.log.posicao_final()
+        return total
+
+    def reconstruir(self):
+        """
+        Apaga os agregados e refaz tudo a partir do log bruto.
+        """
+        with self.log.trava:
+            con = self._conexao()
+            con.execute("BEGIN IMMEDIATE")
+            con.execute("DELETE FROM agregados")
+            con.execute("DELETE FROM progresso")
+            con.execute("COMMIT")
+            self._posicao_sincronizada = _NAO_SINCRONIZADO
+            return self.sincronizar()
+
+    # --------------------------------------------------------
+    # Consulta
+    # --------------------------------------------------------
+
+    def consultar(self, janela="1h", sensorId=None, desde=None, ate=None, limite=None):
+        """
+        Baldes da 'janela' (1m, 1h, 1d), mais recentes primeiro.
+        'desde'/'ate' (epoch) filtram pelo início da janela.
+        Levanta ValueError se a janela não existir.
+        """
+        if janela not in self.janelas:
+            raise ValueError(
+                f"janela inválida: {janela!r} (use {', '.join(self.janelas)})"
+            )
+        self.sincronizar()
+
+        consulta = (
+            "SELECT sensor, inicio, leituras, temp_n, temp_min, temp_max, temp_soma, "
+            "umi_n, umi_min, umi_max, umi_soma FROM agregados WHERE janela = ?"
+        )
+        parametros = [janela]
+        if sensorId is not None:
+            consulta += " AND sensor = ?"
+            parametros.append(sensorId)
+        if desde is not None:
+            consulta += " AND inicio >= ?"
+            parametros.append(desde)
+        if ate is not None:
+            consulta += " AND inicio <= ?"
+            parametros.append(ate)
+        consulta += " ORDER BY inicio DESC, sensor"
+        if limite:
+            consulta += " LIMIT ?"
+            parametros.append(int(limite))
+
+        segundos = self.janelas[janela]
+        return [
+            {
+                "sensorId": sensor,
+                "janela": janela,
+                "inicio": datetime.fromtimestamp(inicio).strftime(FORMATO_DATA),
+                "fim": datetime.fromtimestamp(inicio + segundos).strftime(FORMATO_DATA),
+                "leituras": leituras,
+                "temperatura": _resumo(temp_n, temp_min, temp_max, temp_soma),
+                "umidade": _resumo(umi_n, umi_min, umi_max, umi_soma)
+            }
+            for (sensor, inicio, leituras, temp_n, temp_min, temp_max, temp_soma,
+                 umi_n, umi_min, umi_max, umi_soma)
+            in self._conexao().execute(consulta, parametros)
+        ]
+
+
+def _resumo(n, minimo, maximo, soma):
+    return {
+        "min": minimo,
+        "max": maximo,
+        "media": soma / n if n else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agregados por janela das leituras")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    rec = sub.add_parser("reconstruir", help="refaz os agregados a partir do log")
+    rec.add_argument("log", help="pasta do log de leituras (ex.: date/leituras)")
+
+    args = parser.parse_args(argv)
+
+    from clima.armazenamento import abrir_log
+    agregados = AgregadosLeituras(abrir_log(args.log))
+    total = agregados.reconstruir()
+    print(f"✔ {total} leituras agregadas em {agregados.caminho}")
+
+
+if __name__ == "__main__":
+    main()
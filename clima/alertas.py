@@ -0,0 +1,215 @@
+"""
+Histórico de alertas separado de configAlertas.json.
+
+Antes, avaliar_leituras() acrescentava cada alerta em config["alertas"] e
+regravava configAlertas.json inteiro, e obter_ultimo_alerta() carregava
+todo o histórico só para pegar alertas[-1].
+
+Agora:
+  - o histórico é um log append-only em <diretorio>/ (LogSegmentado
+    ou outro backend de clima.armazenamento)
+  - 'ultimos.json' guarda o alerta mais recente (geral e por sensor),
+    atualizado a cada gravação; obter o último alerta lê só esse arquivo
+    pequeno (e, com o cache de clima.configuracao, custa um stat())
+  - a retenção descarta segmentos inteiros mais antigos que N dias ou
+    além de N alertas
+
+Os alertas antigos de configAlertas.json são importados na primeira
+abertura. Compactação manual:
+
+    python -m clima.alertas compactar date/alertas --dias 30 --maximo 100000
+"""
+
+import argparse
+import json
+import os
+import time
+
+from clima.arquivos import salvar_atomico
+from clima.configuracao import obter_cache
+from clima.datas import para_epoca
+from clima.armazenamento import abrir_log
+
+NOME_ULTIMOS = "ultimos.json"
+
+# Segmentos menores deixam a retenção mais precisa (ela remove segmentos inteiros)
+TAMANHO_SEGMENTO_ALERTAS = 1024 * 1024  # bytes
+
+# Retenção padrão (None = sem limite)
+RETENCAO_DIAS = None
+RETENCAO_MAXIMO = None
+
+
+class HistoricoAlertas:
+    """
+    Histórico append-only de alertas com o último alerta materializado.
+    """
+
+    def __init__(
+        self,
+        diretorio,
+        legado=None,
+        retencao_dias=RETENCAO_DIAS,
+        retencao_maximo=RETENCAO_MAXIMO,
+        tamanho_max_segmento=TAMANHO_SEGMENTO_ALERTAS
+    ):
+        # backend de clima.armazenamento (o tamanho só vale para "log")
+        self.log = abrir_log(
+            diretorio,
+            legado=legado,
+            chave_legado="alertas",
+            tamanho_max_segmento=tamanho_max_segmento
+        )
+        self.diretorio = diretorio
+        self.retencao_dias = retencao_dias
+        self.retencao_maximo = retencao_maximo
+        self.caminho_ultimos = os.path.join(diretorio, NOME_ULTIMOS)
+
+        with self.log.trava:
+            if not os.path.exists(self.caminho_ultimos):
+                self._materializar()
+
+    # --------------------------------------------------------
+    # Último alerta (materializado)
+    # --------------------------------------------------------
+
+    def _ultimos(self):
+        dados = obter_cache(self.caminho_ultimos).obter()
+        return dados or {"ultimo": None, "por_sensor": {}}
+
+    def _salvar_ultimos(self, ultimos):
+        salvar_atomico(
+            self.caminho_ultimos,
+            json.dumps(ultimos, indent=4, ensure_ascii=False).encode("utf-8")
+        )
+
+    def _materializar(self):
+        """
+        Recalcula ultimos.json percorrendo o histórico inteiro.
+        """
+        ultimos = {"ultimo": None, "por_sensor": {}}
+        for alerta in self.log.iterar():
+            ultimos["ultimo"] = alerta
+            ultimos["por_sensor"][str(alerta.get("sensorId"))] = alerta
+        self._salvar_ultimos(ultimos)
+
+    def ultimo(self, sensorId=None):
+        """
+        Último alerta registrado (de um sensor, se informado) ou None.
+        """
+        ultimos = self._ultimos()
+        if sensorId is None:
+            return ultimos.get("ultimo")
+        return ultimos.get("por_sensor", {}).get(str(sensorId))
+
+    def ultimos_por_sensor(self):
+        return dict(self._ultimos().get("por_sensor", {}))
+
+    # --------------------------------------------------------
+    # Gravação
+    # --------------------------------------------------------
+
+    def registrar(self, alertas):
+        """
+        Acrescenta os alertas ao histórico (uma escrita) e atualiza o
+        último alerta por sensor. Tudo sob a trava do log, para que dois
+        processos não percam a atualização um do outro em ultimos.json.
+        """
+        alertas = list(alertas)
+        if not alertas:
+            return
+
+        with self.log.trava:
+            self.log.recarregar()
+            segmentos_antes = len(self.log.segmentos)
+            self.log.acrescentar_lote(alertas)
+
+            atual = self._ultimos()
+            ultimos = {
+                "ultimo": alertas[-1],
+                "por_sensor": dict(atual.get("por_sensor", {}))
+            }
+            for alerta in alertas:
+                ultimos["por_sensor"][str(alerta.get("sensorId"))] = alerta
+            self._salvar_ultimos(ultimos)
+
+            # a retenção só precisa rodar quando um segmento novo é aberto
+            if len(self.log.segmentos) != segmentos_antes:
+                self.compactar()
+
+    def iterar(self):
+        return self.log.iterar()
+
+    # --------------------------------------------------------
+    # Retenção
+    # --------------------------------------------------------
+
+    def compactar(self, dias=None, maximo=None):
+        """
+        Remove segmentos inteiros que estão fora da retenção:
+          - dias:   todos os alertas do segmento são mais antigos que isso
+          - maximo: os segmentos mais novos já somam 'maximo' alertas
+        Sem argumentos, usa a retenção configurada no histórico.
+        Retorna quantos segmentos foram removidos.
+        """
+        dias = self.retencao_dias if dias is None else dias
+        maximo = self.retencao_maximo if maximo is None else maximo
+        if dias is None and maximo is None:
+            return 0
+
+        antigos = list(self.log.segmentos[:-1])   # o ativo nunca sai
+        descartar = 0
+
+        if dias is not None:
+            corte = time.time() - dias * 86400
+            for numero in antigos:
+                datas = [para_epoca(a.get("date")) for a in self.log.registros_segmento(numero)]
+                datas = [d for d in datas if d is not None]
+                if datas and max(datas) < corte:
+                    descartar += 1
+                else:
+                    break
+
+        if maximo is not None:
+            # conta do mais novo para o mais antigo
+            total = sum(1 for _ in self.log.registros_segmento(self.log.segmentos[-1]))
+            manter = len(antigos)
+            for numero in reversed(antigos):
+                if total >= maximo:
+                    break
+                total += sum(1 for _ in self.log.registros_segmento(numero))
+                manter -= 1
+            descartar = max(descartar, manter)
+
+        return len(self.log.descartar_segmentos_antigos(descartar))
+
+
+# ============================================================
+# Linha de comando
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Histórico de alertas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    comp = sub.add_parser("compactar", help="aplica a retenção por idade e/ou quantidade")
+    comp.add_argument("diretorio", help="pasta do histórico (ex.: date/alertas)")
+    comp.add_argument("--dias", type=float)
+    comp.add_argument("--maximo", type=int)
+
+    ult = sub.add_parser("ultimo", help="mostra o último alerta")
+    ult.add_argument("diretorio")
+    ult.add_argument("--sensor")
+
+    args = parser.parse_args(argv)
+    historico = HistoricoAlertas(args.diretorio)
+
+    if args.comando == "compactar":
+        removidos = historico.compactar(dias=args.dias, maximo=args.maximo)
+        print(f"✔ {removidos} segmentos removidos do histórico de alertas")
+    else:
+        print(json.dumps(historico.ultimo(args.sensor), indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Armazenamento compartilhado: caminhos dos arquivos e backends dos logs.
+
+Cada módulo (app.py e as Lambdas de functions/) repetia BASE_PATH,
+DATA_PATH e as constantes ARQ_*/DIR_*, e não do mesmo jeito: app.py
+gravava em date/ enquanto functions/ apontava para data/, então a API e
+as Lambdas não viam os mesmos arquivos. Os caminhos agora saem daqui:
+
+  DIR_DADOS   CLIMA_DADOS (padrão <raiz>/date)
+  DIR_FILAS   CLIMA_FILAS (padrão <raiz>/queue)
+  ARQ_* / DIR_* derivados deles
+
+Os módulos continuam com as próprias constantes (ARQ_AUDITORIA = ...),
+agora copiadas destas, para que os benchmarks possam redirecioná-las.
+
+Os logs de registros (auditoria, leituras, alertas) são abertos por
+abrir_log(), que escolhe o backend por CLIMA_BACKEND (ou BACKEND):
+
+  "log"     LogSegmentado (padrão): JSON-Lines em segmentos, append O(1)
+  "sqlite"  LogSqlite: uma tabela em <diretorio>/sqlite/registros.db (WAL)
+  "json"    DocumentoJson: o documento único antigo ({"eventos": [...]}),
+            regravado inteiro a cada escrita; só para compatibilidade
+
+Todos têm a interface de LogSegmentado usada pelo resto do pacote
+(acrescentar_lote, iterar, iterar_com_posicao, ler, trava,
+observadores...), então índices, agregados, paginação e histórico de
+alertas funcionam sobre qualquer um. Os backends "sqlite" e "json"
+guardam índices e agregados num subdiretório próprio e, na primeira
+abertura, importam os registros do log segmentado que já existir no
+diretório (ou o documento legado); o "json" substitui os registros do
+documento pelos do log, que já importou o documento e pode ter mais.
+Voltar para "log" depois não traz de volta o que foi gravado nos
+outros backends. A retenção por segmentos do histórico de alertas só
+existe no backend "log".
+
+    from clima import armazenamento
+    log = armazenamento.abrir_log(armazenamento.DIR_AUDITORIA, legado=armazenamento.ARQ_AUDITORIA)
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+
+from clima import metricas
+from clima.arquivos import carregar_json, salvar_json, trava
+from clima.configuracao import obter_cache
+from clima.log_segmentado import NOME_MANIFESTO, LogSegmentado
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DIR_DADOS = os.environ.get("CLIMA_DADOS") or os.path.join(BASE_PATH, "date")
+DIR_FILAS = os.environ.get("CLIMA_FILAS") or os.path.join(BASE_PATH, "queue")
+
+# Documentos antigos (importados na primeira abertura dos logs/filas)
+ARQ_AUDITORIA = os.path.join(DIR_DADOS, "auditoriaEventos.json")
+ARQ_LEITURAS = os.path.join(DIR_DADOS, "leituras.json")
+ARQ_CONFIG_ALERTAS = os.path.join(DIR_DADOS, "configAlertas.json")
+ARQ_FILA_LEITURAS = os.path.join(DIR_FILAS, "filaLeituras.json")
+ARQ_FILA_AUDITORIA = os.path.join(DIR_FILAS, "filaAuditoria.json")
+ARQ_NOTIFICACOES = os.path.join(DIR_FILAS, "notificacaoAlerta.json")
+
+# Configuração de limites/regras/notificações (clima.configuracao)
+ARQ_LIMITES = os.path.join(DIR_DADOS, "limites.json")
+
+# Filas duráveis (clima.fila), todas no mesmo banco
+ARQ_FILAS = os.path.join(DIR_FILAS, "filas.db")
+
+# Logs de registros
+DIR_AUDITORIA = os.path.join(DIR_DADOS, "auditoria")
+DIR_LEITURAS = os.path.join(DIR_DADOS, "leituras")
+DIR_ALERTAS = os.path.join(DIR_DADOS, "alertas")
+
+# Checkpoint do estado de disparo por sensor (clima.disparo)
+ARQ_ESTADO_DISPARO = os.path.join(DIR_ALERTAS, "estadoDisparo.json")
+
+# Cópia colunar (mmap) do log de leituras
+DIR_LEITURAS_COLUNAR = os.path.join(DIR_DADOS, "leituras_colunar")
+
+BACKEND = os.environ.get("CLIMA_BACKEND") or "log"
+
+NOME_BANCO_REGISTROS = "registros.db"
+NOME_DOCUMENTO = "registros.json"
+
+# Marca, no diretório do backend "json", de que a origem já foi exportada
+NOME_MARCA_EXPORTACAO = "exportado.json"
+
+# Registros lidos por ida ao SQLite ao percorrer o log
+REGISTROS_POR_LEITURA = 1000
+
+
+class _LogUnico:
+    """
+    Base dos backends sem segmentos: um "segmento" só (número 1) e
+    posições (1, n), comparáveis e serializáveis como as do LogSegmentado.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.segmentos = [1]
+        self.observadores = []
+        self.trava = trava(os.path.join(diretorio, "escrita"))
+        os.makedirs(diretorio, exist_ok=True)
+
+    def recarregar(self):
+        pass
+
+    def acrescentar(self, registro):
+        """
+        Acrescenta um registro no fim do log e retorna sua posição.
+        """
+        return self.acrescentar_lote([registro])[0]
+
+    def _notificar(self, posicoes, registros):
+        for observador in self.observadores:
+            observador.ao_acrescentar(posicoes, registros)
+
+    def iterar(self):
+        for _, registro in self.iterar_com_posicao():
+            yield registro
+
+    def registros_segmento(self, numero):
+        return self.iterar() if numero == 1 else iter(())
+
+    def descartar_segmentos_antigos(self, quantidade):
+        # sem segmentos: a retenção por segmentos não se aplica
+        return []
+
+    def exportar_documento(self, caminho, chave="eventos"):
+        """
+        Gera o documento no formato antigo ({"eventos": [...]}).
+        """
+        registros = list(self.iterar())
+        salvar_json(caminho, {chave: registros})
+        return len(registros)
+
+    def _importar_existente(self, diretorio_log, legado, chave_legado):
+        """
+        Registros para a primeira abertura: os do log segmentado que já
+        existir em 'diretorio_log' ou, sem ele, os do documento legado.
+        """
+        if os.path.exists(os.path.join(diretorio_log, NOME_MANIFESTO)):
+            return list(LogSegmentado(diretorio_log).iterar())
+        if legado and os.path.exists(legado):
+            dados = obter_cache(legado).obter()
+            if isinstance(dados, dict):
+                return list(dados.get(chave_legado, []))
+        return []
+
+
+class LogSqlite(_LogUnico):
+    """
+    Log de registros numa tabela SQLite (WAL), em <diretorio>/registros.db.
+    Cada thread usa a sua própria conexão, como em clima.fila.
+    """
+
+    def __init__(self, diretorio, legado=None, chave_legado="eventos", origem=None):
+        """
+        - origem: diretório de um LogSegmentado a importar na primeira
+                  abertura (no lugar do documento legado)
+        """
+        super().__init__(diretorio)
+        self.caminho = os.path.join(diretorio, NOME_BANCO_REGISTROS)
+        self._local = threading.local()
+
+        with self.trava:
+            novo = not os.path.exists(self.caminho)
+            self._conexao().execute(
+                "CREATE TABLE IF NOT EXISTS registros ("
+                "id INTEGER PRIMARY KEY, registro TEXT NOT NULL)"
+            )
+            if novo:
+                registros = self._importar_existente(origem or diretorio, legado, chave_legado)
+                self._inserir(registros)
+
+    def _conexao(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _inserir(self, registros):
+        linhas = [json.dumps(r, ensure_ascii=False) for r in registros]
+        if not linhas:
+            return [], 0
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            # sob a trava do log e BEGIN IMMEDIATE: ids consecutivos
+            ultimo = con.execute("SELECT COALESCE(MAX(id), 0) FROM registros").fetchone()[0]
+            ids = range(ultimo + 1, ultimo + 1 + len(linhas))
+            con.executemany("INSERT INTO registros (id, registro) VALUES (?, ?)", zip(ids, linhas))
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+        return [(1, i) for i in ids], sum(len(linha) for linha in linhas)
+
+    def acrescentar_lote(self, registros):
+        """
+        Acrescenta vários registros numa única transação e retorna as
+        posições (na mesma ordem dos registros).
+        """
+        registros = list(registros)
+        if not registros:
+            return []
+        with self.trava:
+            posicoes, total = self._inserir(registros)
+            self._notificar(posicoes, registros)
+        if metricas.ATIVO:
+            metricas.contar_bytes("log:" + os.path.basename(self.diretorio), gravados=total)
+        return posicoes
+
+    def _percorrer(self, sql, parametros=()):
+        cursor = self._conexao().execute(sql, parametros)
+        while True:
+            linhas = cursor.fetchmany(REGISTROS_POR_LEITURA)
+            if not linhas:
+                return
+            yield from linhas
+
+    def iterar_com_posicao(self, desde=None):
+        """
+        Percorre (posicao, registro) em ordem de gravação.
+        Se 'desde' for uma posição, começa no registro SEGUINTE a ela.
+        """
+        ultimo = desde[1] if desde is not None else 0
+        for id_, texto in self._percorrer(
+            "SELECT id, registro FROM registros WHERE id > ? ORDER BY id", (ultimo,)
+        ):
+            yield (1, id_), json.loads(texto)
+
+    def iterar_reverso(self):
+        for _, texto in self._percorrer("SELECT id, registro FROM registros ORDER BY id DESC"):
+            yield json.loads(texto)
+
+    def ler(self, posicao):
+        linha = self._conexao().execute(
+            "SELECT registro FROM registros WHERE id = ?", (posicao[1],)
+        ).fetchone()
+        if linha is None:
+            raise KeyError(f"posição inexistente no log: {posicao}")
+        if metricas.ATIVO:
+            metricas.BYTES_LIDOS.inc(len(linha[0]), operacao="log:" + os.path.basename(self.diretorio))
+        return json.loads(linha[0])
+
+    def posicao_final(self):
+        ultimo = self._conexao().execute("SELECT MAX(id) FROM registros").fetchone()[0]
+        return None if ultimo is None else (1, ultimo)
+
+
+class DocumentoJson(_LogUnico):
+    """
+    Log de registros no documento único antigo ({chave: [...]}), regravado
+    inteiro a cada escrita (as outras chaves do documento são mantidas).
+    Existe para ferramentas que ainda leem o documento; custa O(n) por
+    gravação. Os registros lidos são cópias (o documento fica em cache).
+    """
+
+    def __init__(self, diretorio, legado=None, chave_legado="eventos", origem=None):
+        """
+        - legado: o próprio documento (ex.: auditoriaEventos.json); sem
+                  ele, <diretorio>/registros.json
+        - origem: diretório de um LogSegmentado a exportar para o
+                  documento na primeira abertura
+        """
+        super().__init__(diretorio)
+        self.caminho = legado or os.path.join(diretorio, NOME_DOCUMENTO)
+        self.chave = chave_legado
+
+        with self.trava:
+            marca = os.path.join(diretorio, NOME_MARCA_EXPORTACAO)
+            if origem is not None and not os.path.exists(marca):
+                self._exportar_origem(origem, marca)
+
+    def _exportar_origem(self, origem, marca):
+        """
+        Primeira abertura: o documento legado (que vem no repositório)
+        parou de receber escritas quando o log segmentado passou a ser o
+        armazenamento, e o log já importou o que havia nele. Se a origem
+        tem registros, eles substituem os do documento; a marca impede
+        que aberturas seguintes desfaçam o que este backend gravar.
+        """
+        registros = self._importar_existente(origem, None, self.chave)
+        if registros:
+            documento = carregar_json(self.caminho)
+            if not isinstance(documento, dict):
+                documento = {}
+            documento[self.chave] = registros
+            salvar_json(self.caminho, documento)
+        salvar_json(marca, {"origem": origem, "registros": len(registros)})
+
+    def _documento(self):
+        # cache validado por stat(): reler só quando o arquivo muda
+        dados = obter_cache(self.caminho).obter()
+        return dados if isinstance(dados, dict) else {}
+
+    def _registros(self):
+        return self._documento().get(self.chave) or []
+
+    def acrescentar_lote(self, registros):
+        registros = list(registros)
+        if not registros:
+            return []
+        with self.trava:
+            documento = dict(self._documento())
+            existentes = documento.get(self.chave) or []
+            documento[self.chave] = existentes + registros
+            salvar_json(self.caminho, documento)
+            posicoes = [(1, i) for i in range(len(existentes), len(existentes) + len(registros))]
+            self._notificar(posicoes, registros)
+        return posicoes
+
+    def iterar_com_posicao(self, desde=None):
+        inicio = desde[1] + 1 if desde is not None else 0
+        registros = self._registros()
+        for i in range(inicio, len(registros)):
+            yield (1, i), copy.deepcopy(registros[i])
+
+    def iterar_reverso(self):
+        for registro in reversed(list(self._registros())):
+            yield copy.deepcopy(registro)
+
+    def ler(self, posicao):
+        registros = self._registros()
+        if not 0 <= posicao[1] < len(registros):
+            raise KeyError(f"posição inexistente no log: {posicao}")
+        return copy.deepcopy(registros[posicao[1]])
+
+    def posicao_final(self):
+        quantidade = len(self._registros())
+        return (1, quantidade - 1) if quantidade else None
+
+
+TIPOS_BACKEND = ("log", "sqlite", "json")
+
+
+def abrir_log(diretorio, legado=None, chave_legado="eventos", backend=None, **opcoes):
+    """
+    Abre o log de registros de 'diretorio' no backend configurado
+    ('backend' ou BACKEND). 'opcoes' vão para o LogSegmentado
+    (ex.: tamanho_max_segmento) e são ignoradas pelos outros backends.
+    Levanta ValueError se o backend for desconhecido.
+    """
+    backend = backend or BACKEND
+    if backend == "log":
+        return LogSegmentado(diretorio, legado=legado, chave_legado=chave_legado, **opcoes)
+    if backend == "sqlite":
+        return LogSqlite(os.path.join(diretorio, "sqlite"), legado, chave_legado, origem=diretorio)
+    if backend == "json":
+        return DocumentoJson(os.path.join(diretorio, "json"), legado, chave_legado, origem=diretorio)
+    raise ValueError(f"backend de armazenamento desconhecido: {backend!r} (use {', '.join(TIPOS_BACKEND)})")
@@ -0,0 +1,153 @@
+"""
+Acesso a arquivos seguro entre threads e processos.
+
+A API Flask roda com várias threads e as Lambdas de functions/ rodam
+como processos separados, todos gravando nos mesmos arquivos. Antes,
+salvar_json abria o destino com "w" (truncando no lugar): um leitor
+podia ver o JSON pela metade e dois "carrega, altera, grava"
+simultâneos perdiam atualizações.
+
+Aqui ficam:
+  - Trava:          trava exclusiva por arquivo (fcntl.flock num arquivo
+                    "<caminho>.lock" + RLock), reentrante no processo
+  - salvar_atomico: grava num temporário único e troca com os.replace
+  - carregar_json / salvar_json: leitura e gravação atômica de JSON
+  - atualizar_json: "carrega, altera, grava" sob a trava do arquivo
+
+Sem fcntl (Windows) a trava vale só dentro do processo.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from clima import metricas
+
+try:
+    import fcntl
+except ImportError:  # Windows: só a trava entre threads
+    fcntl = None
+
+EXTENSAO_TRAVA = ".lock"
+
+
+class Trava:
+    """
+    Trava exclusiva entre processos (flock) e entre threads (RLock).
+
+    É reentrante: a mesma thread pode entrar de novo sem travar a si
+    mesma (ex.: o log grava e o índice dele grava o diário).
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._rlock = threading.RLock()
+        self._profundidade = 0
+        self._arquivo = None
+
+    def __enter__(self):
+        self._rlock.acquire()
+        if self._profundidade == 0:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+                self._arquivo = open(self.caminho, "a+b")
+                if fcntl is not None:
+                    fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._arquivo is not None:
+                    self._arquivo.close()
+                    self._arquivo = None
+                self._rlock.release()
+                raise
+        self._profundidade += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._profundidade -= 1
+        if self._profundidade == 0:
+            if fcntl is not None:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+            self._arquivo.close()
+            self._arquivo = None
+        self._rlock.release()
+        return False
+
+
+_travas = {}
+_trava_registro = threading.Lock()
+
+
+def trava(caminho):
+    """
+    Trava do arquivo (ou diretório) 'caminho', compartilhada no processo.
+    O flock é feito em "<caminho>.lock", que nunca é substituído.
+    """
+    caminho = os.path.abspath(caminho) + EXTENSAO_TRAVA
+    with _trava_registro:
+        existente = _travas.get(caminho)
+        if existente is None:
+            existente = _travas[caminho] = Trava(caminho)
+        return existente
+
+
+def salvar_atomico(caminho, conteudo):
+    """
+    Grava 'conteudo' (bytes) num arquivo temporário único e troca pelo
+    destino, para que leitores nunca vejam o arquivo pela metade.
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(diretorio, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(
+        prefix=os.path.basename(caminho) + ".", suffix=".tmp", dir=diretorio
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+@metricas.etapa("carregar_json")
+def carregar_json(caminho):
+    """
+    Lê um JSON ({} se o arquivo não existir). Como toda gravação é
+    atômica, um JSON inválido é erro de verdade e não é engolido.
+    """
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+        if metricas.ATIVO:
+            metricas.contar_bytes("carregar_json", lidos=os.fstat(f.fileno()).st_size)
+    return dados
+
+
+@metricas.etapa("salvar_json")
+def salvar_json(caminho, dados):
+    conteudo = json.dumps(dados, indent=4, ensure_ascii=False).encode("utf-8")
+    salvar_atomico(caminho, conteudo)
+    if metricas.ATIVO:
+        metricas.contar_bytes("salvar_json", gravados=len(conteudo))
+
+
+@contextmanager
+def atualizar_json(caminho):
+    """
+    Carrega, deixa alterar e grava o JSON sob a trava do arquivo:
+
+        with atualizar_json(ARQ_NOTIFICACOES) as dados:
+            dados.setdefault("notificacoes", []).extend(novas)
+
+    Se o bloco levantar exceção, nada é gravado.
+    """
+    with trava(caminho):
+        dados = carregar_json(caminho)
+        yield dados
+        salvar_json(caminho, dados)
@@ -0,0 +1,72 @@
+"""
+Motor de avaliação em lote das leituras.
+
+Em vez de comparar leitura por leitura num loop Python, o lote da fila é
+convertido em colunas (código do sensor, temperatura, umidade) e a
+máscara de alerta é calculada de uma vez:
+
+    alerta = (temperatura > tempMax) | (umidade > umiMax)
+
+Com NumPy instalado as colunas são arrays e a máscara é vetorizada; sem
+NumPy o mesmo cálculo é feito em Python puro (mais lento, mas com o mesmo
+resultado). A máscara, com os limites de cada sensor, é calculada por
+clima.regras.RegrasAlerta.mascara.
+"""
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+NUMPY_DISPONIVEL = np is not None
+
+# bool fica de fora de propósito (type(True) é bool, não int)
+_NUMERICOS = {int, float}
+
+
+class LoteColunar:
+    """
+    Lote de leituras em formato colunar.
+
+    - sensores:     lista de sensorId distintos (o código é o índice aqui)
+    - codigos:      código do sensor de cada leitura
+    - temperaturas: temperatura de cada leitura (float64; NaN se ausente)
+    - umidades:     umidade de cada leitura (float64; NaN se ausente)
+    """
+
+    def __init__(self, leituras):
+        self.leituras = leituras
+        self.sensores = []
+        codigo_por_sensor = {}
+
+        # uma única passada pelos dicts da fila monta as três colunas
+        codigos = []
+        temperaturas = []
+        umidades = []
+        nan = float("nan")
+        for leitura in leituras:
+            sensor = leitura.get("sensorId")
+            codigo = codigo_por_sensor.get(sensor)
+            if codigo is None:
+                codigo = codigo_por_sensor[sensor] = len(self.sensores)
+                self.sensores.append(sensor)
+            codigos.append(codigo)
+
+            temp = leitura.get("temperatura")
+            umi = leitura.get("umidade")
+            temperaturas.append(temp if type(temp) in _NUMERICOS else nan)
+            umidades.append(umi if type(umi) in _NUMERICOS else nan)
+
+        if NUMPY_DISPONIVEL:
+            self.codigos = np.array(codigos, dtype=np.int32)
+            self.temperaturas = np.array(temperaturas, dtype=np.float64)
+            self.umidades = np.array(umidades, dtype=np.float64)
+        else:
+            self.codigos = array("i", codigos)
+            self.temperaturas = array("d", temperaturas)
+            self.umidades = array("d", umidades)
+
+    def __len__(self):
+        return len(self.leituras)
@@ -0,0 +1,311 @@
+"""
+Formato binário compacto para leituras de sensores.
+
+No JSON (leituras.json com indent=4, ou uma linha por leitura no log)
+cada leitura ocupa ~120 bytes em disco e centenas de bytes como dict
+em memória. Aqui cada leitura é um registro de largura fixa:
+
+    código do sensor  uint32   (índice no dicionário de sensores)
+    epoch             float64  (data da leitura; NaN se ausente)
+    temperatura       float32  (NaN se ausente)
+    umidade           float32  (NaN se ausente)
+
+= 20 bytes por leitura, little-endian, sem alinhamento.
+
+Estrutura em disco:
+  <diretorio>/
+    leituras.bin    cabeçalho (8 bytes) + registros de 20 bytes
+    sensores.json   ["sensor-01", "sensor-02", ...]  (código = posição)
+
+O arquivo é lido por mmap (sem carregar tudo em memória); com NumPy,
+'colunas()' devolve views dos campos sem cópia.
+
+Conversão de/para os formatos atuais:
+
+    python -m clima.binario importar date/leituras.json date/leituras_bin
+    python -m clima.binario importar date/leituras date/leituras_bin     (log segmentado)
+    python -m clima.binario exportar date/leituras_bin leituras.json
+
+float32 guarda ~7 dígitos significativos: a exportação arredonda para
+isso, então 32.5 ou 20.1 voltam iguais, mas valores com mais casas
+decimais perdem precisão.
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+from datetime import datetime
+
+from clima.arquivos import carregar_json, salvar_json, trava
+from clima.datas import FORMATO_DATA, para_epoca
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+NOME_DADOS = "leituras.bin"
+NOME_SENSORES = "sensores.json"
+
+MAGICO = b"CLB1"
+VERSAO = 1
+CABECALHO = struct.Struct("<4sHH")          # mágico, versão, tamanho do registro
+REGISTRO = struct.Struct("<Idff")            # código, epoch, temperatura, umidade
+
+if np is not None:
+    DTYPE_REGISTRO = np.dtype([
+        ("codigo", "<u4"), ("epoca", "<f8"), ("temperatura", "<f4"), ("umidade", "<f4")
+    ])
+else:
+    DTYPE_REGISTRO = None
+
+_NUMERICOS = {int, float}
+_NAN = float("nan")
+
+
+def _numero(valor):
+    return valor if type(valor) in _NUMERICOS else _NAN
+
+
+def _de_float32(valor):
+    """
+    Valor gravado em float32 de volta para JSON: None se NaN, int se
+    inteiro, senão arredondado aos dígitos que o float32 guarda.
+    """
+    if math.isnan(valor):
+        return None
+    if valor.is_integer():
+        return int(valor)
+    return float(f"{valor:.7g}")
+
+
+def data_de_epoca(epoca):
+    if math.isnan(epoca):
+        return None
+    return datetime.fromtimestamp(epoca).strftime(FORMATO_DATA)
+
+
+class Leitura:
+    """
+    Leitura em memória sem dict por instância (__slots__).
+    """
+
+    __slots__ = ("sensorId", "epoca", "temperatura", "umidade")
+
+    def __init__(self, sensorId, epoca, temperatura, umidade):
+        self.sensorId = sensorId
+        self.epoca = epoca
+        self.temperatura = temperatura
+        self.umidade = umidade
+
+    def para_dict(self):
+        return {
+            "sensorId": self.sensorId,
+            "temperatura": _de_float32(self.temperatura),
+            "umidade": _de_float32(self.umidade),
+            "date": data_de_epoca(self.epoca)
+        }
+
+    def __repr__(self):
+        return (f"Leitura({self.sensorId!r}, {self.epoca!r}, "
+                f"{self.temperatura!r}, {self.umidade!r})")
+
+
+class ArquivoLeiturasBinario:
+    """
+    Arquivo append-only de leituras em registros de 20 bytes.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.caminho_dados = os.path.join(diretorio, NOME_DADOS)
+        self.caminho_sensores = os.path.join(diretorio, NOME_SENSORES)
+        self.trava = trava(os.path.join(diretorio, "escrita"))
+
+        os.makedirs(diretorio, exist_ok=True)
+        with self.trava:
+            if not os.path.exists(self.caminho_dados):
+                with open(self.caminho_dados, "wb") as f:
+                    f.write(CABECALHO.pack(MAGICO, VERSAO, REGISTRO.size))
+        self._validar_cabecalho()
+        self._carregar_sensores()
+
+    def _validar_cabecalho(self):
+        with open(self.caminho_dados, "rb") as f:
+            magico, versao, tamanho = CABECALHO.unpack(f.read(CABECALHO.size))
+        if magico != MAGICO or versao != VERSAO or tamanho != REGISTRO.size:
+            raise ValueError(f"{self.caminho_dados}: não é um arquivo de leituras v{VERSAO}")
+
+    def _carregar_sensores(self):
+        self.sensores = list(carregar_json(self.caminho_sensores) or [])
+        self._codigos = {sensor: codigo for codigo, sensor in enumerate(self.sensores)}
+
+    def codigo(self, sensor_id):
+        return self._codigos.get(sensor_id)
+
+    def __len__(self):
+        tamanho = os.path.getsize(self.caminho_dados) - CABECALHO.size
+        return tamanho // REGISTRO.size
+
+    # --------------------------------------------------------
+    # Escrita
+    # --------------------------------------------------------
+
+    def acrescentar_lote(self, leituras):
+        """
+        Acrescenta leituras (dicts no formato da fila) com UMA escrita.
+        Sensores novos entram no dicionário antes dos registros.
+        """
+        leituras = list(leituras)
+        if not leituras:
+            return 0
+
+        with self.trava:
+            # outro processo pode ter acrescentado sensores
+            self._carregar_sensores()
+            novos = False
+            partes = []
+            for leitura in leituras:
+                sensor_id = leitura.get("sensorId")
+                codigo = self._codigos.get(sensor_id)
+                if codigo is None:
+                    codigo = self._codigos[sensor_id] = len(self.sensores)
+                    self.sensores.append(sensor_id)
+                    novos = True
+                epoca = para_epoca(leitura.get("date"))
+                partes.append(REGISTRO.pack(
+                    codigo,
+                    _NAN if epoca is None else epoca,
+                    _numero(leitura.get("temperatura")),
+                    _numero(leitura.get("umidade"))
+                ))
+            if novos:
+                salvar_json(self.caminho_sensores, self.sensores)
+
+            with open(self.caminho_dados, "ab") as f:
+                f.write(b"".join(partes))
+        return len(partes)
+
+    # --------------------------------------------------------
+    # Leitura (mmap)
+    # --------------------------------------------------------
+
+    def _mapear(self):
+        with open(self.caminho_dados, "rb") as f:
+            if os.fstat(f.fileno()).st_size <= CABECALHO.size:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def registros(self):
+        """
+        Gera tuplas (codigo, epoca, temperatura, umidade) direto do mmap.
+        """
+        mapa = self._mapear()
+        if mapa is None:
+            return
+        with mapa:
+            fim = CABECALHO.size + (len(mapa) - CABECALHO.size) // REGISTRO.size * REGISTRO.size
+            visao = memoryview(mapa)[CABECALHO.size:fim]
+            try:
+                yield from REGISTRO.iter_unpack(visao)
+            finally:
+                visao.release()
+
+    def iterar(self):
+        """
+        Gera Leitura (__slots__) em ordem de gravação.
+        """
+        sensores = self.sensores
+        for codigo, epoca, temperatura, umidade in self.registros():
+            yield Leitura(sensores[codigo], epoca, temperatura, umidade)
+
+    def iterar_dicts(self):
+        for leitura in self.iterar():
+            yield leitura.para_dict()
+
+    def colunas(self):
+        """
+        Array estruturado NumPy sobre o mmap (sem cópia): campos
+        'codigo', 'epoca', 'temperatura', 'umidade'. Exige NumPy.
+        """
+        if np is None:
+            raise RuntimeError("colunas() precisa do NumPy instalado")
+        quantidade = len(self)
+        if quantidade == 0:
+            return np.zeros(0, dtype=DTYPE_REGISTRO)
+        return np.memmap(
+            self.caminho_dados, dtype=DTYPE_REGISTRO, mode="r",
+            offset=CABECALHO.size, shape=(quantidade,)
+        )
+
+
+# ============================================================
+# Conversores
+# ============================================================
+
+def _leituras_de(origem, chave="leituras"):
+    """
+    Leituras de um documento JSON ({"leituras": [...]}) ou de um log
+    de leituras (diretório, no backend de clima.armazenamento).
+    """
+    if os.path.isdir(origem):
+        from clima.armazenamento import abrir_log
+        return abrir_log(origem).iterar()
+    dados = carregar_json(origem)
+    return dados.get(chave, []) if isinstance(dados, dict) else dados
+
+
+def importar(origem, diretorio, chave="leituras", tamanho_lote=10000):
+    """
+    Converte leituras.json (ou o log de leituras) para o formato binário.
+    """
+    arquivo = ArquivoLeiturasBinario(diretorio)
+    total = 0
+    lote = []
+    for leitura in _leituras_de(origem, chave):
+        lote.append(leitura)
+        if len(lote) >= tamanho_lote:
+            total += arquivo.acrescentar_lote(lote)
+            lote = []
+    total += arquivo.acrescentar_lote(lote)
+    return total
+
+
+def exportar(diretorio, destino, chave="leituras"):
+    """
+    Gera o documento {"leituras": [...]} a partir do formato binário.
+    """
+    leituras = list(ArquivoLeiturasBinario(diretorio).iterar_dicts())
+    salvar_json(destino, {chave: leituras})
+    return len(leituras)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Formato binário de leituras")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    imp = sub.add_parser("importar", help="JSON/log de leituras -> binário")
+    imp.add_argument("origem", help="leituras.json ou pasta do log (ex.: date/leituras)")
+    imp.add_argument("diretorio")
+    imp.add_argument("--chave", default="leituras")
+
+    exp = sub.add_parser("exportar", help="binário -> documento JSON")
+    exp.add_argument("diretorio")
+    exp.add_argument("destino")
+    exp.add_argument("--chave", default="leituras")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "importar":
+        total = importar(args.origem, args.diretorio, args.chave)
+        print(f"✔ {total} leituras gravadas em {args.diretorio}")
+    else:
+        total = exportar(args.diretorio, args.destino, args.chave)
+        print(f"✔ {total} leituras exportadas para {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
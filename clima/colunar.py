@@ -0,0 +1,312 @@
+"""
+Leitor colunar com mmap para análise do histórico de leituras.
+
+Analisar meses de leituras hoje exige json.load do arquivo inteiro (ou
+percorrer o log linha a linha). Aqui as leituras viram colunas binárias,
+ordenadas por (sensor, data), e são lidas por mmap sem cópia:
+
+  <diretorio>/
+    meta.json                 geração atual, sensores, faixas por sensor
+    codigos.<g>.u4            uint32  código do sensor (posição em "sensores")
+    epocas.<g>.f8             float64 data da leitura (NaN se ausente)
+    temperaturas.<g>.f4       float32 (NaN se ausente)
+    umidades.<g>.f4           float32 (NaN se ausente)
+
+Como as linhas estão agrupadas por sensor, as leituras de um sensor são
+uma fatia contínua [inicio, fim) de cada coluna, e dentro dela as datas
+estão em ordem (busca binária por intervalo).
+
+Com NumPy as colunas são np.ndarray sobre o mmap; sem NumPy são
+memoryview tipadas (também sem cópia).
+
+O armazenamento é derivado do log de leituras (fonte de verdade) e pode
+ser refeito a qualquer momento; uma nova geração só substitui a
+anterior quando está completa:
+
+    python -m clima.colunar construir date/leituras date/leituras_colunar
+"""
+
+import argparse
+import json
+import mmap
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+from clima.arquivos import carregar_json, salvar_json, trava
+from clima.datas import para_epoca
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+NOME_META = "meta.json"
+VERSAO = 1
+
+# nome -> (typecode do array, dtype NumPy, extensão)
+COLUNAS = {
+    "codigos": ("I", "<u4", "u4"),
+    "epocas": ("d", "<f8", "f8"),
+    "temperaturas": ("f", "<f4", "f4"),
+    "umidades": ("f", "<f4", "f4"),
+}
+
+_NUMERICOS = {int, float}
+_NAN = float("nan")
+
+
+def _nome_coluna(coluna, geracao):
+    return f"{coluna}.{geracao}.{COLUNAS[coluna][2]}"
+
+
+def posicao_final(log):
+    """
+    Posição do último registro do log (qualquer backend de
+    clima.armazenamento) como lista, para comparar com a guardada no
+    meta.json: muda sempre que algo é gravado.
+    """
+    posicao = log.posicao_final()
+    return None if posicao is None else list(posicao)
+
+
+# ============================================================
+# Construção
+# ============================================================
+
+def construir(leituras, diretorio, fonte=None):
+    """
+    Grava uma nova geração colunar a partir de um iterável de leituras
+    (dicts no formato do log) e troca a geração atual por ela.
+    'fonte' é guardado no meta.json para detectar se ficou desatualizado.
+    Retorna a quantidade de leituras.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+
+    sensores = []
+    codigo_por_sensor = {}
+    colunas = {nome: array(typecode) for nome, (typecode, _, _) in COLUNAS.items()}
+
+    for leitura in leituras:
+        sensor = leitura.get("sensorId")
+        codigo = codigo_por_sensor.get(sensor)
+        if codigo is None:
+            codigo = codigo_por_sensor[sensor] = len(sensores)
+            sensores.append(sensor)
+        epoca = para_epoca(leitura.get("date"))
+        temp = leitura.get("temperatura")
+        umi = leitura.get("umidade")
+        colunas["codigos"].append(codigo)
+        colunas["epocas"].append(_NAN if epoca is None else epoca)
+        colunas["temperaturas"].append(temp if type(temp) in _NUMERICOS else _NAN)
+        colunas["umidades"].append(umi if type(umi) in _NUMERICOS else _NAN)
+
+    quantidade = len(colunas["codigos"])
+
+    # ordena por (sensor, data); NaN vai para o fim da fatia do sensor
+    if np is not None:
+        epocas = np.frombuffer(colunas["epocas"], dtype=np.float64) if quantidade else np.zeros(0)
+        codigos = np.frombuffer(colunas["codigos"], dtype=np.uint32) if quantidade else np.zeros(0, np.uint32)
+        ordem = np.lexsort((epocas, codigos)).tolist()
+    else:
+        codigos = colunas["codigos"]
+        epocas = colunas["epocas"]
+        ordem = sorted(
+            range(quantidade),
+            key=lambda i: (codigos[i], epocas[i] != epocas[i], epocas[i] if epocas[i] == epocas[i] else 0)
+        )
+
+    faixas = {}
+    for inicio_ordem, i in enumerate(ordem):
+        sensor = sensores[colunas["codigos"][i]]
+        faixa = faixas.get(sensor)
+        if faixa is None:
+            faixas[sensor] = [inicio_ordem, inicio_ordem + 1]
+        else:
+            faixa[1] = inicio_ordem + 1
+
+    with trava(os.path.join(diretorio, "escrita")):
+        anterior = carregar_json(os.path.join(diretorio, NOME_META))
+        geracao = anterior.get("geracao", 0) + 1
+
+        for nome, (typecode, _, _) in COLUNAS.items():
+            origem = colunas[nome]
+            ordenada = array(typecode, (origem[i] for i in ordem))
+            caminho = os.path.join(diretorio, _nome_coluna(nome, geracao))
+            with open(caminho, "wb") as f:
+                ordenada.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+
+        salvar_json(os.path.join(diretorio, NOME_META), {
+            "versao": VERSAO,
+            "geracao": geracao,
+            "quantidade": quantidade,
+            "sensores": sensores,
+            "faixas": faixas,
+            "fonte": fonte
+        })
+
+        # leitores com a geração anterior já mapeada continuam válidos
+        # (no Linux o arquivo removido só some depois do último munmap)
+        if anterior.get("geracao"):
+            for nome in COLUNAS:
+                caminho = os.path.join(diretorio, _nome_coluna(nome, anterior["geracao"]))
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+    return quantidade
+
+
+def construir_do_log(log, diretorio):
+    """
+    Refaz o armazenamento colunar a partir do log de leituras.
+    """
+    with log.trava:
+        fonte = posicao_final(log)
+    return construir(log.iterar(), diretorio, fonte=fonte)
+
+
+# ============================================================
+# Leitura
+# ============================================================
+
+class FatiaSensor:
+    """
+    Leituras de um sensor: views [inicio, fim) das colunas, ordenadas
+    por data.
+    """
+
+    def __init__(self, leitor, sensor_id, inicio, fim):
+        self.sensorId = sensor_id
+        self.inicio = inicio
+        self.fim = fim
+        self.epocas = leitor.epocas[inicio:fim]
+        self.temperaturas = leitor.temperaturas[inicio:fim]
+        self.umidades = leitor.umidades[inicio:fim]
+
+    def __len__(self):
+        return self.fim - self.inicio
+
+    def intervalo(self, desde=None, ate=None):
+        """
+        (inicio, fim) relativos à fatia com desde <= data <= ate.
+        """
+        if np is not None and isinstance(self.epocas, np.ndarray):
+            i = 0 if desde is None else int(np.searchsorted(self.epocas, desde, "left"))
+            f = len(self) if ate is None else int(np.searchsorted(self.epocas, ate, "right"))
+            return i, f
+        i = 0 if desde is None else bisect_left(self.epocas, desde)
+        f = len(self) if ate is None else bisect_right(self.epocas, ate)
+        return i, f
+
+
+class LeitorColunar:
+    """
+    Colunas do armazenamento colunar mapeadas em memória (sem cópia).
+
+    - epocas, temperaturas, umidades, codigos: colunas inteiras
+    - sensores: código -> sensorId
+    - sensor(sensorId): FatiaSensor com as leituras daquele sensor
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.meta = carregar_json(os.path.join(diretorio, NOME_META))
+        if not self.meta:
+            raise FileNotFoundError(f"{diretorio}: armazenamento colunar não construído")
+        if self.meta.get("versao") != VERSAO:
+            raise ValueError(f"{diretorio}: versão {self.meta.get('versao')} não suportada")
+
+        self.sensores = self.meta["sensores"]
+        self.faixas = self.meta["faixas"]
+        self.quantidade = self.meta["quantidade"]
+        self._mapas = []
+
+        for nome in COLUNAS:
+            setattr(self, nome, self._mapear(nome))
+
+    def _mapear(self, nome):
+        typecode, dtype, _ = COLUNAS[nome]
+        caminho = os.path.join(self.diretorio, _nome_coluna(nome, self.meta["geracao"]))
+
+        if self.quantidade == 0:
+            return np.zeros(0, dtype=dtype) if np is not None else memoryview(array(typecode))
+
+        with open(caminho, "rb") as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapas.append(mapa)
+
+        if np is not None:
+            return np.frombuffer(mapa, dtype=dtype, count=self.quantidade)
+        return memoryview(mapa).cast(typecode)
+
+    def __len__(self):
+        return self.quantidade
+
+    def fechar(self):
+        """
+        Solta os mmaps. As colunas/fatias deixam de ser válidas.
+        """
+        for nome in COLUNAS:
+            coluna = getattr(self, nome, None)
+            if isinstance(coluna, memoryview):
+                coluna.release()
+            setattr(self, nome, None)
+        for mapa in self._mapas:
+            try:
+                mapa.close()
+            except BufferError:
+                pass  # ainda há views NumPy vivas; o GC fecha depois
+        self._mapas = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def desatualizado(self, log):
+        """
+        True se o log recebeu leituras depois desta geração.
+        """
+        return self.meta.get("fonte") != posicao_final(log)
+
+    def sensor(self, sensor_id):
+        """
+        Fatia das leituras do sensor (None se não houver leituras).
+        """
+        faixa = self.faixas.get(sensor_id)
+        if faixa is None:
+            return None
+        return FatiaSensor(self, sensor_id, faixa[0], faixa[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Armazenamento colunar de leituras")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    cons = sub.add_parser("construir", help="refaz as colunas a partir do log de leituras")
+    cons.add_argument("log", help="pasta do log de leituras (ex.: date/leituras)")
+    cons.add_argument("diretorio")
+
+    res = sub.add_parser("resumo", help="leituras por sensor")
+    res.add_argument("diretorio")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "construir":
+        from clima.armazenamento import abrir_log
+        total = construir_do_log(abrir_log(args.log), args.diretorio)
+        print(f"✔ {total} leituras em colunas em {args.diretorio}")
+    else:
+        with LeitorColunar(args.diretorio) as leitor:
+            resumo = {
+                sensor: fim - inicio for sensor, (inicio, fim) in sorted(leitor.faixas.items())
+            }
+        print(json.dumps(resumo, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
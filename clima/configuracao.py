@@ -0,0 +1,167 @@
+"""
+Leitura da configuração de limites com cache em memória.
+
+Antes, cada GET /auditoria/config e cada avaliar_leituras() abria e
+interpretava configAlertas.json inteiro, que também guarda a lista
+crescente de "alertas" -- ler dois números custava ler todo o histórico.
+
+Agora os limites ficam num arquivo pequeno próprio (limites.json):
+
+{
+    "limites": {"tempMax": 30, "umiMax": 80},
+    "regras": {"tipos": {...}, "sensores": {...}}
+}
+
+e ConfigEmCache guarda o conteúdo em memória, validado pela assinatura
+do arquivo (mtime, inode e tamanho). Em regime normal uma leitura de
+configuração custa só um stat().
+
+Se limites.json ainda não existir, os blocos "limites"/"regras" são
+lidos de configAlertas.json (legado). Para separar o arquivo:
+
+    python -m clima.configuracao separar date/configAlertas.json date/limites.json
+"""
+
+import argparse
+import json
+import os
+import threading
+
+from clima.arquivos import salvar_json
+
+CHAVES_LIMITES = ("limites", "regras", "notificacoes")
+
+_NUNCA_LIDO = object()
+
+
+class ConfigEmCache:
+    """
+    Conteúdo de um arquivo JSON em cache, revalidado por stat().
+
+    O dict retornado por obter() é compartilhado entre chamadas e
+    NÃO deve ser alterado por quem o recebe.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._assinatura = _NUNCA_LIDO
+        self._dados = {}
+        self.ausente = False
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def _assinatura_atual(self):
+        try:
+            st = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def obter(self):
+        assinatura = self._assinatura_atual()
+        with self._trava:
+            if assinatura == self._assinatura:
+                self.acertos += 1
+                return self._dados
+
+            self.falhas += 1
+            dados = {}
+            if assinatura is not None:
+                with open(self.caminho, "r", encoding="utf-8") as f:
+                    try:
+                        dados = json.load(f)
+                    except json.JSONDecodeError:
+                        # arquivo sendo gravado: mantém a versão anterior
+                        return self._dados
+            self._dados = dados
+            self._assinatura = assinatura
+            self.ausente = assinatura is None
+            return dados
+
+    def metricas(self):
+        return {"caminho": self.caminho, "acertos": self.acertos, "falhas": self.falhas}
+
+
+_caches = {}
+_trava_caches = threading.Lock()
+
+
+def obter_cache(caminho):
+    """
+    Um ConfigEmCache por arquivo, compartilhado no processo.
+    """
+    caminho = os.path.abspath(caminho)
+    with _trava_caches:
+        cache = _caches.get(caminho)
+        if cache is None:
+            cache = _caches[caminho] = ConfigEmCache(caminho)
+        return cache
+
+
+def metricas_cache():
+    """
+    Acertos/falhas de todos os caches de configuração do processo.
+    """
+    with _trava_caches:
+        caches = list(_caches.values())
+    por_arquivo = [c.metricas() for c in caches]
+    return {
+        "acertos": sum(m["acertos"] for m in por_arquivo),
+        "falhas": sum(m["falhas"] for m in por_arquivo),
+        "arquivos": por_arquivo
+    }
+
+
+class ConfigLimites:
+    """
+    Fonte dos limites/regras: limites.json se existir, senão os blocos
+    equivalentes de configAlertas.json.
+    """
+
+    def __init__(self, caminho, legado=None):
+        self.caminho = caminho
+        self.legado = legado
+
+    def obter(self):
+        cache = obter_cache(self.caminho)
+        dados = cache.obter()
+        if cache.ausente and self.legado:
+            return obter_cache(self.legado).obter()
+        return dados
+
+
+# ============================================================
+# Linha de comando
+# ============================================================
+
+def separar(origem, destino):
+    """
+    Copia "limites"/"regras"/"notificacoes" de configAlertas.json para limites.json.
+    """
+    with open(origem, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+
+    limites = {chave: dados[chave] for chave in CHAVES_LIMITES if chave in dados}
+
+    salvar_json(destino, limites)
+    return limites
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Configuração de limites")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    sep = sub.add_parser("separar", help="cria limites.json a partir de configAlertas.json")
+    sep.add_argument("origem")
+    sep.add_argument("destino")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "separar":
+        limites = separar(args.origem, args.destino)
+        print(f"✔ {', '.join(limites) or 'nada'} copiado para {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
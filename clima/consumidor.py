@@ -0,0 +1,115 @@
+"""
+Consumidor contínuo de uma FilaDuravel em segundo plano.
+
+Antes, GET /auditoria (e a Lambda/menu de consulta) drenava a fila de
+auditoria antes de cada leitura: a latência da consulta crescia com o
+atraso de gravação e GETs simultâneos disputavam a mesma fila.
+
+ConsumidorFila roda numa thread própria: a cada 'intervalo' segundos
+drena a fila para o log (clima.fila.drenar, em lotes com confirmação)
+e guarda métricas de atraso para a API expor. As consultas passam a
+ser só leitura.
+"""
+
+import threading
+import time
+
+from clima.fila import drenar
+from clima.lote import TAMANHO_LOTE
+
+# Segundos entre duas verificações da fila quando ela está vazia
+INTERVALO_CONSUMIDOR = 1.0
+
+
+class ConsumidorFila:
+    """
+    Thread que drena 'fila' para 'log' continuamente.
+
+    - transformar:  corpo da mensagem -> registro gravado no log
+    - intervalo:    espera entre verificações com a fila vazia
+    - tamanho_lote: mensagens recebidas/gravadas/confirmadas por vez
+    """
+
+    def __init__(
+        self,
+        fila,
+        log,
+        transformar=None,
+        intervalo=INTERVALO_CONSUMIDOR,
+        tamanho_lote=TAMANHO_LOTE,
+        nome="consumidor"
+    ):
+        self.fila = fila
+        self.log = log
+        self.transformar = transformar
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self.nome = nome
+
+        self._parar = threading.Event()
+        self._thread = None
+
+        self.processadas = 0
+        self.ciclos = 0
+        self.ultimo_ciclo = None
+        self.ultimo_erro = None
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self):
+        """
+        Inicia a thread (não faz nada se ela já estiver rodando).
+        """
+        if self.ativo:
+            return self
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._rodar, name=self.nome, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        """
+        Pede a parada e espera o ciclo atual terminar.
+        """
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def ciclo(self):
+        """
+        Drena o que houver na fila agora; retorna quantas mensagens gravou.
+        """
+        gravados = drenar(self.fila, self.log, self.transformar, self.tamanho_lote)
+        self.processadas += len(gravados)
+        self.ciclos += 1
+        self.ultimo_ciclo = time.time()
+        return len(gravados)
+
+    def _rodar(self):
+        while not self._parar.is_set():
+            try:
+                self.ciclo()
+                self.ultimo_erro = None
+            except Exception as erro:  # a thread não pode morrer calada
+                self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+            self._parar.wait(self.intervalo)
+
+    def metricas(self):
+        """
+        Atraso do consumidor: profundidade da fila e idade da mensagem
+        mais antiga ainda não confirmada.
+        """
+        idade = self.fila.idade_mais_antiga()
+        return {
+            "ativo": self.ativo,
+            "profundidade": self.fila.profundidade(),
+            "idadeMaisAntiga": None if idade is None else round(idade, 3),
+            "processadas": self.processadas,
+            "ciclos": self.ciclos,
+            "ultimoCiclo": self.ultimo_ciclo,
+            "ultimoErro": self.ultimo_erro,
+            "intervalo": self.intervalo,
+            "tamanhoLote": self.tamanho_lote
+        }
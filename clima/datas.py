@@ -0,0 +1,56 @@
+"""
+Conversão das datas do projeto ("%d/%m/%Y %H:%M:%S") para epoch.
+
+Os registros guardam a data como texto, que não pode ser comparado por
+intervalo. Os índices temporais trabalham com segundos desde a epoch.
+"""
+
+from datetime import datetime
+
+FORMATO_DATA = "%d/%m/%Y %H:%M:%S"
+
+
+def para_epoca(valor):
+    """
+    Converte uma data do projeto em epoch (float).
+    Aceita também números (já em epoch) e ISO 8601.
+    Retorna None se o valor não for uma data reconhecível.
+    """
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if not isinstance(valor, str):
+        return None
+
+    texto = valor.strip()
+    if not texto:
+        return None
+
+    try:
+        return datetime.strptime(texto, FORMATO_DATA).timestamp()
+    except ValueError:
+        pass
+
+    try:
+        return float(texto)
+    except ValueError:
+        pass
+
+    try:
+        return datetime.fromisoformat(texto).timestamp()
+    except ValueError:
+        return None
+
+
+def interpretar_limite(valor):
+    """
+    Interpreta os parâmetros 'desde'/'ate' das consultas.
+    Valor vazio -> None (sem limite); valor inválido -> ValueError.
+    """
+    if valor is None or valor == "":
+        return None
+    epoca = para_epoca(valor)
+    if epoca is None:
+        raise ValueError(f"data inválida: {valor!r}")
+    return epoca
@@ -0,0 +1,241 @@
+"""
+Decisão de disparo de alertas com estado por sensor.
+
+A máscara de clima.regras diz se cada leitura está fora dos limites.
+Antes, toda leitura fora dos limites virava um alerta e um SMS: um
+sensor acima de tempMax por uma hora gerava um alerta por leitura, e a
+mesma leitura entregue duas vezes pela fila gerava dois.
+
+EstadoDisparo guarda, por sensor:
+  - as últimas M leituras (dentro/fora dos limites) num anel de bits
+  - a data (epoch da leitura) e a identidade do último alerta disparado
+
+e uma leitura fora dos limites só dispara se:
+  - nDeM = [N, M]: pelo menos N das últimas M leituras estão fora
+  - cooldown:      passou 'cooldown' segundos desde o último alerta
+  - não é a mesma leitura (sensor, data, valores) do último alerta
+
+Sem nDeM/cooldown na configuração, toda leitura fora dos limites
+dispara, como antes (só a leitura repetida deixa de disparar).
+
+Para todos os sensores, guarda ainda os ids (na fila) das mensagens já
+aplicadas e os sensores em alerta pela histerese (RegrasAlerta.em_alerta),
+que assim continuam em alerta depois de um reinício.
+
+O estado é salvo num JSON (checkpoint) depois de cada lote, para que um
+reinício não dispare de novo nem perca as janelas em andamento. Como a
+fila entrega ao menos uma vez, um lote pode voltar depois do checkpoint;
+mensagens com id já aplicado são ignoradas (não entram de novo no anel
+nem disparam).
+
+Os ids aplicados ficam num conjunto de intervalos [início, fim], e não
+num "último id" por sensor: dois avaliadores recebem lotes da fila fora
+da trava do estado, então o lote de ids menores pode ser aplicado depois
+do de ids maiores (ou voltar depois de uma queda) sem ter sido aplicado
+antes. Uma lacuna entre intervalos nunca é dada como aplicada por
+conta própria (a mensagem pode voltar e precisa ser avaliada). Só
+compactar() fecha lacunas, abaixo do menor id ainda na fila: as filas
+dividem a sequência de ids do banco, então as lacunas são em geral ids
+de outras filas ou mensagens já confirmadas, que não voltam mais.
+"""
+
+import bisect
+import os
+import time
+
+from clima.arquivos import carregar_json, salvar_json
+from clima.datas import para_epoca
+
+VERSAO = 2
+
+
+def _marcar(intervalos, ids):
+    """
+    Marca 'ids' em 'intervalos' (lista ordenada de [início, fim]
+    disjuntos, alterada no lugar) e retorna, para cada id, se ele ainda
+    não estava marcado (repetidos no próprio lote contam uma vez).
+    """
+    novas = []
+    for id_mensagem in ids:
+        # caso comum: ids crescentes, depois de tudo que já foi aplicado
+        if intervalos and id_mensagem > intervalos[-1][1]:
+            novas.append(True)
+            if id_mensagem == intervalos[-1][1] + 1:
+                intervalos[-1][1] = id_mensagem
+            else:
+                intervalos.append([id_mensagem, id_mensagem])
+            continue
+
+        i = bisect.bisect_right(intervalos, [id_mensagem, float("inf")]) - 1
+        if i >= 0 and intervalos[i][1] >= id_mensagem:
+            novas.append(False)
+            continue
+        novas.append(True)
+
+        encosta_antes = i >= 0 and intervalos[i][1] == id_mensagem - 1
+        encosta_depois = i + 1 < len(intervalos) and intervalos[i + 1][0] == id_mensagem + 1
+        if encosta_antes and encosta_depois:
+            intervalos[i][1] = intervalos[i + 1][1]
+            del intervalos[i + 1]
+        elif encosta_antes:
+            intervalos[i][1] = id_mensagem
+        elif encosta_depois:
+            intervalos[i + 1][0] = id_mensagem
+        else:
+            intervalos.insert(i + 1, [id_mensagem, id_mensagem])
+    return novas
+
+
+def _compactar(intervalos, menor_pendente):
+    """
+    Dá como aplicados os ids entre o primeiro intervalo e
+    'menor_pendente' - 1 (alterando 'intervalos' no lugar).
+    """
+    if not intervalos or menor_pendente is None or menor_pendente <= intervalos[0][0]:
+        return
+    fim = menor_pendente - 1
+    j = 0
+    while j < len(intervalos) and intervalos[j][0] <= fim + 1:
+        fim = max(fim, intervalos[j][1])
+        j += 1
+    intervalos[:j] = [[intervalos[0][0], fim]]
+
+
+class EstadoDisparo:
+    """
+    Estado de disparo de todos os sensores, com checkpoint em 'caminho'.
+
+    Por sensor: [bits, m, epoch do último alerta, chave do último alerta]
+    aplicados:  intervalos [início, fim] de ids de mensagens já aplicadas
+    em_alerta:  sensores em alerta (histerese); o avaliador usa este mesmo
+                conjunto como RegrasAlerta.em_alerta
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho
+        self.sensores = {}
+        self.aplicados = []
+        self.em_alerta = set()
+        if caminho:
+            self.carregar()
+
+    def carregar(self):
+        dados = carregar_json(self.caminho) if os.path.exists(self.caminho) else {}
+        versao = dados.get("versao")
+        if versao not in (1, VERSAO):
+            self.sensores = {}
+            self.aplicados = []
+            self.em_alerta.clear()
+            return
+        # a versão 1 guardava o último id por sensor (descartado)
+        self.sensores = {
+            sensor: [bits, m, ultimo, tuple(chave) if chave is not None else None]
+            for sensor, (bits, m, ultimo, chave, *_) in dados.get("sensores", {}).items()
+        }
+        self.aplicados = dados.get("aplicados", []) if versao == VERSAO else []
+        # atualizado no lugar: RegrasAlerta pode estar usando o conjunto
+        self.em_alerta.clear()
+        self.em_alerta.update(dados.get("emAlerta", []))
+
+    def salvar(self):
+        """
+        Grava o checkpoint (troca atômica do arquivo).
+        """
+        if self.caminho:
+            salvar_json(self.caminho, {
+                "versao": VERSAO,
+                "sensores": self.sensores,
+                "aplicados": self.aplicados,
+                "emAlerta": sorted(self.em_alerta)
+            })
+
+    def __len__(self):
+        return len(self.sensores)
+
+    def decidir(self, regra, leitura, violou, id_mensagem=None):
+        """
+        Registra a leitura no estado do sensor e retorna True se ela
+        dispara um alerta. 'violou' vem da máscara/RegrasAlerta.
+        """
+        ids = None if id_mensagem is None else [id_mensagem]
+        return bool(self.filtrar([leitura], [violou], lambda _: regra, ids))
+
+    def marcar_aplicadas(self, ids):
+        """
+        Marca os ids de mensagens como aplicados e retorna, para cada um,
+        se ele é novo (False = mensagem reentregue, já aplicada).
+        """
+        return _marcar(self.aplicados, ids)
+
+    def compactar(self, menor_pendente):
+        """
+        Fecha as lacunas abaixo de 'menor_pendente', o menor id ainda na
+        fila (FilaDuravel.menor_id()): uma mensagem só sai da fila quando
+        é confirmada, então ids menores não são mais entregues.
+        """
+        _compactar(self.aplicados, menor_pendente)
+
+    def filtrar(self, leituras, mascara, regra_de, ids=None, novas=None):
+        """
+        Índices das leituras que disparam alerta, processando-as em ordem.
+
+        - leituras:  dicts da fila
+        - mascara:   leitura i fora dos limites? (lista ou array NumPy)
+        - regra_de:  sensorId -> Regra (ex.: RegrasCompiladas.regra)
+        - ids:       ids das mensagens na fila, para ignorar mensagens
+                     reentregues (em qualquer ordem)
+        - novas:     em vez de 'ids', o resultado de marcar_aplicadas()
+                     já calculado (clima.paralelo)
+        """
+        if hasattr(mascara, "tolist"):
+            mascara = mascara.tolist()
+        if ids is not None:
+            novas = self.marcar_aplicadas(ids)
+
+        estados = self.sensores
+        regras = {}
+        disparados = []
+
+        for i, violou in enumerate(mascara):
+            leitura = leituras[i]
+            sensor = leitura.get("sensorId")
+
+            regra = regras.get(sensor)
+            if regra is None:
+                regra = regras[sensor] = regra_de(sensor)
+            n, m = regra.n_de_m or (1, 1)
+
+            estado = estados.get(sensor)
+            if estado is None:
+                estado = estados[sensor] = [0, m, None, None]
+            elif estado[1] != m:
+                # M mudou na configuração: o anel antigo não vale mais
+                estado[0] = 0
+                estado[1] = m
+
+            if novas is not None and not novas[i]:
+                continue
+
+            if m > 1:
+                estado[0] = ((estado[0] << 1) | (1 if violou else 0)) & ((1 << m) - 1)
+                if not violou or estado[0].bit_count() < n:
+                    continue
+            elif not violou:
+                continue
+
+            chave = (leitura.get("date"), leitura.get("temperatura"), leitura.get("umidade"))
+            if chave == estado[3]:
+                continue
+
+            if regra.cooldown:
+                epoca = para_epoca(leitura.get("date"))
+                if epoca is None:
+                    epoca = time.time()
+                if estado[2] is not None and epoca - estado[2] < regra.cooldown:
+                    continue
+                estado[2] = epoca
+
+            estado[3] = chave
+            disparados.append(i)
+
+        return disparados
@@ -0,0 +1,324 @@
+"""
+Fila durável local (SQLite em modo WAL) com confirmação de recebimento.
+
+Substitui as filas em queue/*.json, que eram lidas inteiras e depois
+esvaziadas com fila["mensagens"] = []: uma queda no meio do consumo
+perdia ou duplicava mensagens, e um produtor gravando ao mesmo tempo era
+sobrescrito.
+
+Semântica (parecida com SQS):
+  - enviar / enviar_lote:  acrescenta mensagens (dicts JSON) no fim
+  - receber:               entrega até N mensagens e as esconde por
+                           'visibilidade' segundos
+  - confirmar:             apaga as mensagens processadas (ack)
+  - estender:              renova a invisibilidade de mensagens ainda em
+                           processamento
+  - mensagem recebida e não confirmada volta a ficar visível quando a
+    visibilidade expira (ex.: o consumidor caiu) -> entrega ao menos uma vez
+
+Todas as filas ficam no mesmo arquivo (ex.: queue/filas.db), separadas
+pelo nome. Na primeira abertura, as mensagens pendentes do arquivo JSON
+antigo da fila são importadas.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from clima import metricas
+
+# Segundos que uma mensagem recebida fica invisível até ser confirmada
+VISIBILIDADE_PADRAO = 30.0
+
+Mensagem = namedtuple("Mensagem", ["id", "corpo", "recebimentos"])
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensagens (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    fila         TEXT    NOT NULL,
+    corpo        TEXT    NOT NULL,
+    visivel_em   REAL    NOT NULL DEFAULT 0,
+    recebimentos INTEGER NOT NULL DEFAULT 0,
+    criada_em    REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mensagens_fila ON mensagens (fila, id);
+CREATE TABLE IF NOT EXISTS importacoes (
+    fila    TEXT NOT NULL,
+    arquivo TEXT NOT NULL,
+    PRIMARY KEY (fila, arquivo)
+);
+"""
+
+
+def _ids(mensagens):
+    return [(m.id if isinstance(m, Mensagem) else int(m),) for m in mensagens]
+
+
+class FilaDuravel:
+    """
+    Uma fila nomeada dentro de um banco SQLite.
+    Cada thread usa a sua própria conexão.
+    """
+
+    def __init__(self, caminho, nome, visibilidade=VISIBILIDADE_PADRAO):
+        self.caminho = caminho
+        self.nome = nome
+        self.visibilidade = visibilidade
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conexao().executescript(_ESQUEMA)
+
+    def _conexao(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            # isolation_level=None: transações explícitas com BEGIN/COMMIT
+            con = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _transacao(self, funcao):
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = funcao(con)
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+        return resultado
+
+    # --------------------------------------------------------
+    # Produtor
+    # --------------------------------------------------------
+
+    def enviar(self, corpo):
+        """
+        Acrescenta uma mensagem (dict) na fila e retorna seu id.
+        """
+        cursor = self._conexao().execute(
+            "INSERT INTO mensagens (fila, corpo, criada_em) VALUES (?, ?, ?)",
+            (self.nome, json.dumps(corpo, ensure_ascii=False), time.time())
+        )
+        return cursor.lastrowid
+
+    def enviar_lote(self, corpos):
+        """
+        Acrescenta várias mensagens numa única transação.
+        """
+        agora = time.time()
+        linhas = [
+            (self.nome, json.dumps(corpo, ensure_ascii=False), agora)
+            for corpo in corpos
+        ]
+        if not linhas:
+            return 0
+        self._transacao(lambda con: con.executemany(
+            "INSERT INTO mensagens (fila, corpo, criada_em) VALUES (?, ?, ?)",
+            linhas
+        ))
+        return len(linhas)
+
+    # --------------------------------------------------------
+    # Consumidor
+    # --------------------------------------------------------
+
+    def receber(self, maximo=1, visibilidade=None):
+        """
+        Entrega até 'maximo' mensagens visíveis (mais antigas primeiro) e as
+        esconde por 'visibilidade' segundos. Retorna lista de Mensagem.
+        """
+        visibilidade = self.visibilidade if visibilidade is None else visibilidade
+
+        def receber_na_transacao(con):
+            agora = time.time()
+            linhas = con.execute(
+                "SELECT id, corpo, recebimentos FROM mensagens "
+                "WHERE fila = ? AND visivel_em <= ? ORDER BY id LIMIT ?",
+                (self.nome, agora, int(maximo))
+            ).fetchall()
+            if linhas:
+                con.executemany(
+                    "UPDATE mensagens SET visivel_em = ?, recebimentos = recebimentos + 1 "
+                    "WHERE id = ?",
+                    [(agora + visibilidade, id_) for id_, _, _ in linhas]
+                )
+            return linhas
+
+        linhas = self._transacao(receber_na_transacao)
+        return [
+            Mensagem(id_, json.loads(corpo), recebimentos + 1)
+            for id_, corpo, recebimentos in linhas
+        ]
+
+    def confirmar(self, mensagens):
+        """
+        Confirma (apaga) mensagens recebidas; aceita Mensagem ou ids.
+        """
+        ids = _ids(mensagens)
+        if ids:
+            self._transacao(lambda con: con.executemany(
+                "DELETE FROM mensagens WHERE id = ?", ids
+            ))
+
+    def devolver(self, mensagens):
+        """
+        Torna mensagens recebidas visíveis de novo imediatamente (nack).
+        """
+        ids = _ids(mensagens)
+        if ids:
+            self._transacao(lambda con: con.executemany(
+                "UPDATE mensagens SET visivel_em = 0 WHERE id = ?", ids
+            ))
+
+    def estender(self, mensagens, visibilidade=None):
+        """
+        Renova a invisibilidade de mensagens recebidas e ainda em
+        processamento por mais 'visibilidade' segundos.
+        """
+        visibilidade = self.visibilidade if visibilidade is None else visibilidade
+        ids = _ids(mensagens)
+        if ids:
+            visivel_em = time.time() + visibilidade
+            self._transacao(lambda con: con.executemany(
+                "UPDATE mensagens SET visivel_em = ? WHERE id = ?",
+                [(visivel_em, id_) for (id_,) in ids]
+            ))
+
+    # --------------------------------------------------------
+    # Inspeção
+    # --------------------------------------------------------
+
+    def profundidade(self):
+        """
+        Quantidade de mensagens na fila (visíveis ou em processamento).
+        """
+        return self._conexao().execute(
+            "SELECT COUNT(*) FROM mensagens WHERE fila = ?", (self.nome,)
+        ).fetchone()[0]
+
+    def menor_id(self):
+        """
+        Menor id ainda na fila (visível ou em processamento), ou None se
+        vazia: ids menores já foram confirmados e não voltam.
+        """
+        return self._conexao().execute(
+            "SELECT MIN(id) FROM mensagens WHERE fila = ?", (self.nome,)
+        ).fetchone()[0]
+
+    def idade_mais_antiga(self):
+        """
+        Segundos desde o envio da mensagem mais antiga (None se vazia).
+        """
+        criada_em = self._conexao().execute(
+            "SELECT MIN(criada_em) FROM mensagens WHERE fila = ?", (self.nome,)
+        ).fetchone()[0]
+        return None if criada_em is None else time.time() - criada_em
+
+    def espiar(self, limite=None):
+        """
+        Corpos das mensagens na fila, sem receber nem esconder nenhuma.
+        """
+        consulta = "SELECT corpo FROM mensagens WHERE fila = ? ORDER BY id"
+        parametros = (self.nome,)
+        if limite is not None:
+            consulta += " LIMIT ?"
+            parametros += (int(limite),)
+        return [json.loads(c) for (c,) in self._conexao().execute(consulta, parametros)]
+
+    # --------------------------------------------------------
+    # Migração do arquivo JSON antigo
+    # --------------------------------------------------------
+
+    def importar_json(self, arquivo, chaves=("mensagens",)):
+        """
+        Importa (uma única vez) as mensagens pendentes de um arquivo de fila
+        no formato antigo {"mensagens": [...]}. Retorna quantas importou.
+        """
+        arquivo = os.path.abspath(arquivo)
+        if not os.path.exists(arquivo):
+            return 0
+
+        with open(arquivo, "r", encoding="utf-8") as f:
+            try:
+                dados = json.load(f)
+            except json.JSONDecodeError:
+                dados = {}
+
+        corpos = []
+        for chave in chaves:
+            corpos.extend(dados.get(chave, []) if isinstance(dados, dict) else [])
+
+        def importar(con):
+            ja_importado = con.execute(
+                "SELECT 1 FROM importacoes WHERE fila = ? AND arquivo = ?",
+                (self.nome, arquivo)
+            ).fetchone()
+            if ja_importado:
+                return 0
+            agora = time.time()
+            con.executemany(
+                "INSERT INTO mensagens (fila, corpo, criada_em) VALUES (?, ?, ?)",
+                [(self.nome, json.dumps(c, ensure_ascii=False), agora) for c in corpos]
+            )
+            con.execute(
+                "INSERT INTO importacoes (fila, arquivo) VALUES (?, ?)",
+                (self.nome, arquivo)
+            )
+            return len(corpos)
+
+        return self._transacao(importar)
+
+
+_filas = {}
+_trava_filas = threading.Lock()
+
+
+def abrir_fila(caminho, nome, legado=None, chaves_legado=("mensagens",)):
+    """
+    Retorna a FilaDuravel 'nome' do banco 'caminho' (uma instância por
+    processo), importando o arquivo JSON 'legado' na primeira abertura.
+    """
+    chave = (os.path.abspath(caminho), nome)
+    with _trava_filas:
+        fila = _filas.get(chave)
+        if fila is None:
+            fila = FilaDuravel(caminho, nome)
+            if legado:
+                fila.importar_json(legado, chaves_legado)
+            _filas[chave] = fila
+            # calculada só quando as métricas são exportadas
+            metricas.PROFUNDIDADE_FILA.registrar(fila.profundidade, fila=nome)
+        return fila
+
+
+@metricas.etapa("drenar")
+def drenar(fila, log, transformar=None, tamanho_lote=1000):
+    """
+    Consome a fila inteira para um LogSegmentado: recebe até 'tamanho_lote'
+    mensagens, grava o lote numa escrita e só então confirma. Se o processo
+    cair entre a gravação e a confirmação, o lote volta para a fila quando
+    a visibilidade expirar (entrega ao menos uma vez).
+
+    'transformar' converte o corpo da mensagem no registro gravado.
+    Retorna a lista de registros gravados.
+    """
+    gravados = []
+    while True:
+        mensagens = fila.receber(tamanho_lote)
+        if not mensagens:
+            return gravados
+        registros = [
+            transformar(m.corpo) if transformar else m.corpo
+            for m in mensagens
+        ]
+        log.acrescentar_lote(registros)
+        fila.confirmar(mensagens)
+        gravados.extend(registros)
+        if metricas.ATIVO:
+            metricas.ITENS_ETAPA.inc(len(registros), etapa="drenar")
@@ -0,0 +1,469 @@
+"""
+Índices secundários dos logs segmentados (auditoria e leituras).
+
+Sem índice, cada consulta (GET /auditoria, menu do terminal) percorre
+todos os registros de trás para frente. Um IndiceLog mantém, por ordinal
+(ordem de gravação do registro):
+
+  - campos de igualdade: valor -> ordinais  (ex.: sensorId, tipoEvento)
+  - flags booleanas:     bitmap + ordinais  (ex.: acionado)
+  - tempo:               epochs ordenados, com busca binária por intervalo
+                         e min/max de epoch por segmento
+
+Cada ordinal aponta para a posição (segmento, offset) do registro no log,
+então uma consulta com 'limite' lê apenas os registros que casam.
+
+Persistência: cada registro gravado gera uma linha no diário do índice
+(dentro da pasta do log):
+
+    [segmento, offset, <campos...>, <flags...>, epoch]
+
+O diário é só acrescentado (O(1) por registro) e pode ser reconstruído a
+partir do log bruto:
+
+    python -m clima.indices reconstruir date/auditoria
+    python -m clima.indices reconstruir date/leituras --tipo leituras
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from clima.datas import para_epoca
+
+# Quantas entradas a reconstrução junta antes de gravar no diário
+LOTE_RECONSTRUCAO = 10000
+
+# posicao_final() de um log vazio é None: marca "nunca sincronizado"
+_NAO_SINCRONIZADO = object()
+
+
+def _chave(valor):
+    """
+    Valores do JSON que não são hasheáveis (listas, dicts) viram texto.
+    """
+    if valor is None or isinstance(valor, (str, int, float, bool)):
+        return valor
+    return json.dumps(valor, sort_keys=True, ensure_ascii=False)
+
+
+class _CampoIndexado:
+    """
+    Campo de igualdade: dicionário de códigos, código por ordinal
+    e lista de ordinais (crescente) por código.
+    """
+
+    def __init__(self):
+        self.codigos = {}
+        self.por_ordinal = array("I")
+        self.ordinais = []
+
+    def adicionar(self, ordinal, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = len(self.ordinais)
+            self.codigos[valor] = codigo
+            self.ordinais.append([])
+        self.por_ordinal.append(codigo)
+        self.ordinais[codigo].append(ordinal)
+
+
+class _FlagIndexada:
+    """
+    Campo booleano: bitmap (1 byte por ordinal) e ordinais verdadeiros.
+    """
+
+    def __init__(self):
+        self.bitmap = bytearray()
+        self.ordinais = []
+
+    def adicionar(self, ordinal, valor):
+        self.bitmap.append(1 if valor else 0)
+        if valor:
+            self.ordinais.append(ordinal)
+
+
+class _CampoTemporal:
+    """
+    Epochs ordenados para busca binária por intervalo.
+
+    Enquanto os registros chegam em ordem de data (o caso normal), os
+    ordinais de qualquer faixa já saem em ordem de gravação. Um registro
+    com data anterior à última (leitura atrasada, lote antigo) é só
+    acrescentado no fim; a ordenação fica para a próxima consulta por
+    intervalo, que ordena uma vez o que chegou fora de ordem (O(1) por
+    registro na manutenção em vez de um insert O(n)).
+    """
+
+    def __init__(self):
+        self.por_ordinal = array("d")   # NaN quando o registro não tem data
+        self.epocas = array("d")        # ordenado se 'ordenado'
+        self.ordinais = array("I")      # mesma ordem de 'epocas'
+        self.ordenado = True
+        self.monotonico = True
+        self.intervalos_segmento = {}   # segmento -> [min, max]
+        # consultas sem a trava do log ordenam enquanto um gravador acrescenta
+        self._trava = threading.Lock()
+
+    def adicionar(self, ordinal, epoca, segmento):
+        if epoca is None:
+            self.por_ordinal.append(math.nan)
+            return
+        self.por_ordinal.append(epoca)
+
+        with self._trava:
+            if self.ordenado and self.epocas and epoca < self.epocas[-1]:
+                self.ordenado = False
+                self.monotonico = False
+            self.epocas.append(epoca)
+            self.ordinais.append(ordinal)
+
+        intervalo = self.intervalos_segmento.get(segmento)
+        if intervalo is None:
+            self.intervalos_segmento[segmento] = [epoca, epoca]
+        else:
+            intervalo[0] = min(intervalo[0], epoca)
+            intervalo[1] = max(intervalo[1], epoca)
+
+    def _ordenar(self):
+        with self._trava:
+            if self.ordenado:
+                return self.epocas, self.ordinais
+            # a parte já ordenada é uma sequência só: o sort custa
+            # O(n + k log k) para k registros fora de ordem
+            pares = sorted(zip(self.epocas, self.ordinais))
+            self.epocas = array("d", [epoca for epoca, _ in pares])
+            self.ordinais = array("I", [ordinal for _, ordinal in pares])
+            self.ordenado = True
+            return self.epocas, self.ordinais
+
+    def ordinais_no_intervalo(self, desde, ate):
+        """
+        Ordinais (crescentes) com desde <= epoch <= ate.
+        """
+        epocas, ordinais = self._ordenar()
+        inicio = bisect_left(epocas, desde) if desde is not None else 0
+        fim = bisect_right(epocas, ate) if ate is not None else len(epocas)
+        faixa = ordinais[inicio:fim]
+        return faixa if self.monotonico else array("I", sorted(faixa))
+
+    def segmentos_no_intervalo(self, desde, ate):
+        """
+        Segmentos cujo [min, max] de epoch cruza o intervalo pedido.
+        """
+        return [
+            segmento
+            for segmento, (minimo, maximo) in sorted(self.intervalos_segmento.items())
+            if (desde is None or maximo >= desde) and (ate is None or minimo <= ate)
+        ]
+
+
+class IndiceLog:
+    """
+    Índice incremental sobre um log de registros (LogSegmentado ou outro
+    backend de clima.armazenamento).
+
+    Ao ser criado, carrega o diário, indexa o que estiver no log e ainda
+    não estiver no diário, e passa a observar o log: cada
+    acrescentar()/acrescentar_lote() atualiza o índice.
+
+    Subclasses definem NOME_DIARIO, CAMPOS, FLAGS e extrair().
+    """
+
+    NOME_DIARIO = None
+    CAMPOS = ()
+    FLAGS = ()
+
+    def __init__(self, log):
+        self.log = log
+        self.caminho_diario = os.path.join(log.diretorio, self.NOME_DIARIO)
+        self._tamanho_entrada = 2 + len(self.CAMPOS) + len(self.FLAGS) + 1
+        self._limpar_memoria()
+        self.sincronizar()
+        log.observadores.append(self)
+
+    def extrair(self, registro):
+        """
+        Retorna (valores dos CAMPOS, valores das FLAGS, epoch ou None).
+        """
+        raise NotImplementedError
+
+    def _limpar_memoria(self):
+        self.posicoes = []                  # ordinal -> (segmento, offset)
+        self._conhecidas = set()
+        self._campos = {campo: _CampoIndexado() for campo in self.CAMPOS}
+        self._flags = {flag: _FlagIndexada() for flag in self.FLAGS}
+        self._tempo = _CampoTemporal()
+        self._offset_diario = 0
+        self._diario_incompativel = False
+        # log.posicao_final() na última sincronização completa
+        self._posicao_sincronizada = _NAO_SINCRONIZADO
+
+    def __len__(self):
+        return len(self.posicoes)
+
+    # --------------------------------------------------------
+    # Manutenção
+    # --------------------------------------------------------
+
+    def _entrada(self, posicao, registro):
+        campos, flags, epoca = self.extrair(registro)
+        return [
+            posicao[0],
+            posicao[1],
+            *(_chave(v) for v in campos),
+            *(bool(v) for v in flags),
+            epoca
+        ]
+
+    def _aplicar(self, entrada):
+        if len(entrada) != self._tamanho_entrada:
+            # diário gravado por uma versão anterior do índice
+            self._diario_incompativel = True
+            return
+
+        posicao = (entrada[0], entrada[1])
+        if posicao in self._conhecidas:
+            return
+        self._conhecidas.add(posicao)
+
+        ordinal = len(self.posicoes)
+        self.posicoes.append(posicao)
+
+        i = 2
+        for campo in self.CAMPOS:
+            self._campos[campo].adicionar(ordinal, entrada[i])
+            i += 1
+        for flag in self.FLAGS:
+            self._flags[flag].adicionar(ordinal, entrada[i])
+            i += 1
+        self._tempo.adicionar(ordinal, entrada[i], posicao[0])
+
+    def _ler_diario(self):
+        """
+        Aplica as linhas do diário gravadas desde a última leitura
+        (inclusive as de outros processos).
+        """
+        if not os.path.exists(self.caminho_diario):
+            return
+        with open(self.caminho_diario, "rb") as f:
+            f.seek(self._offset_diario)
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break
+                self._offset_diario += len(linha)
+                if linha.strip():
+                    self._aplicar(json.loads(linha))
+
+    def _gravar_diario(self, entradas):
+        if not entradas:
+            return
+        conteudo = "".join(
+            json.dumps(e, ensure_ascii=False) + "\n" for e in entradas
+        ).encode("utf-8")
+        with open(self.caminho_diario, "ab") as f:
+            f.write(conteudo)
+
+    def ao_acrescentar(self, posicoes, registros):
+        self._gravar_diario([
+            self._entrada(posicao, registro)
+            for posicao, registro in zip(posicoes, registros)
+        ])
+        self._ler_diario()
+
+    def sincronizar(self):
+        """
+        Lê o que outros processos gravaram no diário e indexa registros que
+        estejam no log mas ainda não no diário (ex.: queda entre a escrita
+        do registro e a do índice).
+
+        Se o log não mudou desde a última sincronização não há o que
+        indexar: a consulta volta sem tomar a trava de escrita do log
+        (e não espera gravadores nem o consumidor da fila).
+        """
+        final = self.log.posicao_final()
+        if final == self._posicao_sincronizada:
+            return
+
+        with self.log.trava:
+            self._ler_diario()
+            if self._diario_incompativel:
+                self.reconstruir()
+                return
+
+            self.log.recarregar()
+
+            ultima = self.posicoes[-1] if self.posicoes else None
+            pendentes = []
+            for posicao, registro in self.log.iterar_com_posicao(desde=ultima):
+                pendentes.append(self._entrada(posicao, registro))
+                if len(pendentes) >= LOTE_RECONSTRUCAO:
+                    self._gravar_diario(pendentes)
+                    pendentes = []
+            self._gravar_diario(pendentes)
+            self._ler_diario()
+            self._posicao_sincronizada = self.log.posicao_final()
+
+    def reconstruir(self):
+        """
+        Descarta o diário e indexa o log bruto do zero.
+        """
+        with self.log.trava:
+            if os.path.exists(self.caminho_diario):
+                os.remove(self.caminho_diario)
+            self._limpar_memoria()
+            self.sincronizar()
+        return len(self.posicoes)
+
+    # --------------------------------------------------------
+    # Consulta
+    # --------------------------------------------------------
+
+    def segmentos_no_intervalo(self, desde=None, ate=None):
+        return self._tempo.segmentos_no_intervalo(desde, ate)
+
+    def buscar_por(self, filtros=None, flags=(), desde=None, ate=None, antes_de=None):
+        """
+        Gera as posições dos registros que casam com TODOS os filtros,
+        do mais recente para o mais antigo.
+
+        - filtros: {campo: valor}; valor vazio = sem filtro
+        - flags:   nomes de FLAGS que precisam ser verdadeiras
+        - desde/ate: intervalo fechado em epoch (None = aberto)
+        - antes_de:  posição (segmento, offset); só registros gravados
+                     antes dela (paginação por cursor)
+        """
+        self.sincronizar()
+
+        listas = []
+        condicoes = []
+        for campo, valor in (filtros or {}).items():
+            if not valor:
+                continue
+            indexado = self._campos[campo]
+            codigo = indexado.codigos.get(_chave(valor))
+            if codigo is None:
+                return
+            listas.append(indexado.ordinais[codigo])
+            condicoes.append((indexado.por_ordinal, codigo))
+
+        bitmaps = []
+        for flag in flags:
+            listas.append(self._flags[flag].ordinais)
+            bitmaps.append(self._flags[flag].bitmap)
+
+        por_tempo = desde is not None or ate is not None
+        if por_tempo:
+            listas.append(self._tempo.ordinais_no_intervalo(desde, ate))
+        epocas = self._tempo.por_ordinal
+
+        # percorre a menor lista e confere as demais condições em O(1)
+        if listas:
+            base = min(listas, key=len)
+        else:
+            base = range(len(self.posicoes))
+
+        if antes_de is not None:
+            # ordinais seguem a ordem de gravação, assim como as posições
+            limite = bisect_left(self.posicoes, tuple(antes_de))
+            base = base[:bisect_left(base, limite)]
+
+        for ordinal in reversed(base):
+            if not all(bitmap[ordinal] for bitmap in bitmaps):
+                continue
+            if not all(por_ordinal[ordinal] == codigo for por_ordinal, codigo in condicoes):
+                continue
+            if por_tempo:
+                # registros sem data (NaN) falham em qualquer comparação
+                epoca = epocas[ordinal]
+                if not (desde is None or epoca >= desde) or not (ate is None or epoca <= ate):
+                    continue
+            yield self.posicoes[ordinal]
+
+
+class IndiceAuditoria(IndiceLog):
+    """
+    Índice do log de auditoria: sensorId, tipoEvento, tipoSensor,
+    acionado e data do registro de auditoria.
+    """
+
+    NOME_DIARIO = "indice_auditoria.jsonl"
+    CAMPOS = ("sensorId", "tipoEvento", "tipoSensor")
+    FLAGS = ("acionado",)
+
+    def extrair(self, registro):
+        # mesma regra usada pelos filtros de consultar_eventos
+        detalhes = registro.get("detalhes", {}) or {}
+        return (
+            (detalhes.get("sensorId"), registro.get("tipoEvento"), detalhes.get("tipoSensor")),
+            (detalhes.get("acionado", False),),
+            para_epoca(registro.get("date") or detalhes.get("date"))
+        )
+
+    def buscar(
+        self,
+        sensorId=None,
+        tipo_evento=None,
+        tipo_sensor=None,
+        somente_acionados=False,
+        desde=None,
+        ate=None,
+        antes_de=None
+    ):
+        return self.buscar_por(
+            {"sensorId": sensorId, "tipoEvento": tipo_evento, "tipoSensor": tipo_sensor},
+            ("acionado",) if somente_acionados else (),
+            desde,
+            ate,
+            antes_de
+        )
+
+
+class IndiceLeituras(IndiceLog):
+    """
+    Índice do log de leituras: sensorId e data da leitura.
+    """
+
+    NOME_DIARIO = "indice_leituras.jsonl"
+    CAMPOS = ("sensorId",)
+
+    def extrair(self, registro):
+        return ((registro.get("sensorId"),), (), para_epoca(registro.get("date")))
+
+    def buscar(self, sensorId=None, desde=None, ate=None, antes_de=None):
+        return self.buscar_por({"sensorId": sensorId}, (), desde, ate, antes_de)
+
+
+TIPOS_INDICE = {
+    "auditoria": IndiceAuditoria,
+    "leituras": IndiceLeituras
+}
+
+
+# ============================================================
+# Linha de comando
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índices dos logs segmentados")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    rec = sub.add_parser("reconstruir", help="recria o índice a partir do log bruto")
+    rec.add_argument("diretorio", help="pasta do log (ex.: date/auditoria)")
+    rec.add_argument("--tipo", choices=sorted(TIPOS_INDICE), default="auditoria")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "reconstruir":
+        from clima.armazenamento import abrir_log
+        indice = TIPOS_INDICE[args.tipo](abrir_log(args.diretorio))
+        quantidade = indice.reconstruir()
+        print(f"✔ Índice reconstruído: {quantidade} registros indexados")
+
+
+if __name__ == "__main__":
+    main()
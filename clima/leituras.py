@@ -0,0 +1,94 @@
+"""
+Leituras de sensores recebidas em lote.
+
+Os gateways acumulam centenas de leituras por segundo; em vez de uma
+chamada (e duas regravações de arquivo) por leitura, o lote inteiro é
+validado aqui e gravado com UMA escrita no log de leituras e UMA
+transação na fila.
+
+Formatos aceitos pelo POST /leituras:
+  - JSON:   [{"sensorId": ..., "temperatura": ..., "umidade": ..., "date": ...}, ...]
+            (ou um único objeto)
+  - NDJSON: um objeto JSON por linha (application/x-ndjson)
+"""
+
+import json
+from datetime import datetime
+
+from clima.datas import FORMATO_DATA, para_epoca
+
+TIPOS_NDJSON = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+_NUMERICOS = {int, float}
+
+
+def normalizar_leitura(dados, agora=None):
+    """
+    Valida um dict de leitura e devolve só os campos gravados.
+    'date' ausente vira 'agora'; presente, precisa ser uma data que os
+    índices e agregados entendam (clima.datas.para_epoca), senão a
+    leitura seria gravada e depois ignorada por eles.
+    Levanta ValueError se inválida.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError("leitura deve ser um objeto JSON")
+
+    sensor_id = dados.get("sensorId")
+    if not isinstance(sensor_id, str) or not sensor_id:
+        raise ValueError("sensorId ausente ou inválido")
+
+    for campo in ("temperatura", "umidade"):
+        if type(dados.get(campo)) not in _NUMERICOS:
+            raise ValueError(f"{campo} ausente ou não numérico")
+
+    date = dados.get("date")
+    if date is None or date == "":
+        date = agora or datetime.now().strftime(FORMATO_DATA)
+    elif para_epoca(date) is None:
+        raise ValueError(f"date inválida: {date!r}")
+
+    return {
+        "sensorId": sensor_id,
+        "temperatura": dados["temperatura"],
+        "umidade": dados["umidade"],
+        "date": date
+    }
+
+
+def normalizar_lote(itens):
+    """
+    Normaliza uma sequência de leituras; o erro indica a posição (1..n).
+    """
+    agora = datetime.now().strftime(FORMATO_DATA)
+    leituras = []
+    for numero, dados in enumerate(itens, start=1):
+        try:
+            leituras.append(normalizar_leitura(dados, agora))
+        except ValueError as erro:
+            raise ValueError(f"leitura {numero}: {erro}") from None
+    return leituras
+
+
+def interpretar_ndjson(linhas):
+    """
+    Gera os objetos de um fluxo NDJSON (linhas em bytes ou str),
+    ignorando linhas em branco.
+    """
+    for numero, linha in enumerate(linhas, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield json.loads(linha)
+        except json.JSONDecodeError as erro:
+            raise ValueError(f"linha {numero}: JSON inválido ({erro.msg})") from None
+
+
+def interpretar_json(texto):
+    """
+    Lista de leituras de um corpo JSON (array ou objeto único).
+    """
+    try:
+        dados = json.loads(texto)
+    except json.JSONDecodeError as erro:
+        raise ValueError(f"JSON inválido ({erro.msg})") from None
+    return dados if isinstance(dados, list) else [dados]
@@ -0,0 +1,450 @@
+"""
+Log append-only gravado em segmentos JSON-Lines.
+
+Substitui a regravação completa de arquivos como auditoriaEventos.json:
+cada registro vira UMA linha no segmento ativo e um manifesto pequeno
+lista os segmentos existentes. Gravar um registro custa O(1) e a
+leitura percorre os segmentos em streaming.
+
+Estrutura em disco:
+  <diretorio>/
+    manifesto.json     {"versao": 1, "segmentos": [1, 2, ...]}
+    00000001.jsonl     um registro JSON por linha
+    00000002.jsonl
+    ...
+
+Para as ferramentas que ainda esperam o documento antigo existe o
+exportador (LogSegmentado.exportar_documento ou a linha de comando):
+
+    python -m clima.log_segmentado exportar date/auditoria date/auditoriaEventos.json
+"""
+
+import argparse
+import json
+import os
+
+from clima import metricas
+from clima.arquivos import salvar_atomico, trava
+
+NOME_MANIFESTO = "manifesto.json"
+EXTENSAO_SEGMENTO = ".jsonl"
+
+# Quando o segmento ativo passa deste tamanho, o próximo registro abre um novo
+TAMANHO_MAX_SEGMENTO = 8 * 1024 * 1024  # bytes
+
+
+def _nome_segmento(numero):
+    return f"{numero:08d}{EXTENSAO_SEGMENTO}"
+
+
+class LogSegmentado:
+    """
+    Log de registros (dicts) em segmentos JSON-Lines.
+
+    Cada registro é identificado por uma posição (segmento, offset):
+      - segmento: número do arquivo de segmento
+      - offset:   byte onde a linha do registro começa
+
+    Objetos em 'observadores' (ex.: IndiceAuditoria) recebem
+    ao_acrescentar(posicoes, registros) depois de cada escrita.
+
+    Escritas e mudanças no manifesto acontecem sob 'trava' (flock em
+    <diretorio>/escrita.lock), então vários processos podem gravar no
+    mesmo log.
+    """
+
+    def __init__(
+        self,
+        diretorio,
+        tamanho_max_segmento=TAMANHO_MAX_SEGMENTO,
+        legado=None,
+        chave_legado="eventos"
+    ):
+        """
+        - diretorio:            pasta dos segmentos e do manifesto
+        - tamanho_max_segmento: bytes a partir dos quais o segmento rola
+        - legado:               documento JSON antigo (ex.: auditoriaEventos.json)
+                                importado na primeira abertura do log
+        - chave_legado:         lista dentro do documento antigo ("eventos")
+        """
+        self.diretorio = diretorio
+        self.tamanho_max_segmento = tamanho_max_segmento
+        self.caminho_manifesto = os.path.join(diretorio, NOME_MANIFESTO)
+        self.observadores = []
+        self.trava = trava(os.path.join(diretorio, "escrita"))
+        self._assinatura_manifesto = None
+
+        os.makedirs(diretorio, exist_ok=True)
+
+        with self.trava:
+            if os.path.exists(self.caminho_manifesto):
+                self._carregar_manifesto()
+            else:
+                existentes = self._segmentos_no_disco()
+                if existentes:
+                    # manifesto perdido: reconstrói a partir dos arquivos
+                    self.segmentos = existentes
+                else:
+                    self.segmentos = [1]
+                    if legado:
+                        self._importar_legado(legado, chave_legado)
+                self._salvar_manifesto()
+
+            self._recuperar_segmento_ativo()
+
+    # --------------------------------------------------------
+    # Manifesto
+    # --------------------------------------------------------
+
+    def _segmentos_no_disco(self):
+        numeros = []
+        for nome in os.listdir(self.diretorio):
+            base, ext = os.path.splitext(nome)
+            if ext == EXTENSAO_SEGMENTO and base.isdigit():
+                numeros.append(int(base))
+        return sorted(numeros)
+
+    def _assinatura(self):
+        try:
+            st = os.stat(self.caminho_manifesto)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def _carregar_manifesto(self):
+        assinatura = self._assinatura()
+        with open(self.caminho_manifesto, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+        self.segmentos = manifesto.get("segmentos") or [1]
+        self._assinatura_manifesto = assinatura
+
+    def recarregar(self):
+        """
+        Relê o manifesto se ele mudou (outro processo pode ter rolado ou
+        descartado um segmento). Custa um stat() quando nada mudou.
+        """
+        assinatura = self._assinatura()
+        if assinatura is not None and assinatura != self._assinatura_manifesto:
+            self._carregar_manifesto()
+
+    def _salvar_manifesto(self):
+        manifesto = {"versao": 1, "segmentos": self.segmentos}
+        salvar_atomico(
+            self.caminho_manifesto,
+            json.dumps(manifesto, indent=4).encode("utf-8")
+        )
+        self._assinatura_manifesto = self._assinatura()
+
+    def caminho_segmento(self, numero):
+        return os.path.join(self.diretorio, _nome_segmento(numero))
+
+    def _recuperar_segmento_ativo(self):
+        """
+        Se o processo caiu no meio de uma gravação, a última linha do
+        segmento ativo pode estar incompleta: ela é descartada.
+        """
+        caminho = self.caminho_segmento(self.segmentos[-1])
+        if not os.path.exists(caminho):
+            open(caminho, "ab").close()
+            return
+
+        with open(caminho, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            tamanho = f.tell()
+            if tamanho == 0:
+                return
+            f.seek(tamanho - 1)
+            if f.read(1) == b"\n":
+                return
+
+            # procura o último '\n' de trás para frente
+            bloco = 4096
+            fim = tamanho
+            while fim > 0:
+                inicio = max(0, fim - bloco)
+                f.seek(inicio)
+                pos = f.read(fim - inicio).rfind(b"\n")
+                if pos != -1:
+                    f.truncate(inicio + pos + 1)
+                    return
+                fim = inicio
+            f.truncate(0)
+
+    def _rolar(self):
+        self.segmentos.append(self.segmentos[-1] + 1)
+        open(self.caminho_segmento(self.segmentos[-1]), "ab").close()
+        self._salvar_manifesto()
+
+    # --------------------------------------------------------
+    # Escrita
+    # --------------------------------------------------------
+
+    def acrescentar(self, registro):
+        """
+        Acrescenta um registro no fim do log e retorna sua posição.
+        """
+        return self.acrescentar_lote([registro])[0]
+
+    def acrescentar_lote(self, registros):
+        """
+        Acrescenta vários registros com UMA escrita no segmento ativo e
+        retorna a lista de posições (na mesma ordem dos registros).
+        """
+        registros = list(registros)
+        linhas = [
+            (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")
+            for r in registros
+        ]
+        if not linhas:
+            return []
+
+        total = sum(len(linha) for linha in linhas)
+
+        with self.trava:
+            # outro processo pode ter rolado o segmento desde a última escrita
+            self.recarregar()
+
+            tamanho = os.path.getsize(self.caminho_segmento(self.segmentos[-1]))
+            if tamanho > 0 and tamanho + total > self.tamanho_max_segmento:
+                self._rolar()
+
+            numero = self.segmentos[-1]
+            posicoes = []
+            with open(self.caminho_segmento(numero), "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                for linha in linhas:
+                    posicoes.append((numero, offset))
+                    offset += len(linha)
+                f.write(b"".join(linhas))
+
+            # os observadores (índices) gravam o diário na mesma ordem do log
+            self._notificar(posicoes, registros)
+
+        if metricas.ATIVO:
+            metricas.contar_bytes("log:" + os.path.basename(self.diretorio), gravados=total)
+        return posicoes
+
+    def _notificar(self, posicoes, registros):
+        for observador in self.observadores:
+            observador.ao_acrescentar(posicoes, registros)
+
+    # --------------------------------------------------------
+    # Leitura
+    # --------------------------------------------------------
+
+    def _linhas_segmento(self, numero, inicio_leitura=0):
+        caminho = self.caminho_segmento(numero)
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, "rb") as f:
+            f.seek(inicio_leitura)
+            offset = inicio_leitura
+            try:
+                for linha in f:
+                    inicio = offset
+                    offset += len(linha)
+                    if not linha.endswith(b"\n"):
+                        # linha sendo gravada agora por outro processo
+                        break
+                    if linha.strip():
+                        yield (numero, inicio), linha
+            finally:
+                if metricas.ATIVO:
+                    metricas.contar_bytes(
+                        "log:" + os.path.basename(self.diretorio), lidos=offset - inicio_leitura
+                    )
+
+    def iterar(self):
+        """
+        Percorre os registros do mais antigo para o mais recente.
+        """
+        for numero in list(self.segmentos):
+            for _, linha in self._linhas_segmento(numero):
+                yield json.loads(linha)
+
+    def registros_segmento(self, numero):
+        """
+        Percorre os registros de um único segmento.
+        """
+        for _, linha in self._linhas_segmento(numero):
+            yield json.loads(linha)
+
+    def iterar_com_posicao(self, desde=None):
+        """
+        Percorre (posicao, registro) em ordem de gravação.
+        Se 'desde' for uma posição, começa no registro SEGUINTE a ela.
+        """
+        for numero in list(self.segmentos):
+            inicio_leitura = 0
+            if desde is not None:
+                if numero < desde[0]:
+                    continue
+                if numero == desde[0]:
+                    inicio_leitura = desde[1]
+
+            for posicao, linha in self._linhas_segmento(numero, inicio_leitura):
+                if desde is not None and posicao <= tuple(desde):
+                    continue
+                yield posicao, json.loads(linha)
+
+    def iterar_reverso(self):
+        """
+        Percorre os registros do mais recente para o mais antigo.
+        Só um segmento por vez fica em memória.
+        """
+        for numero in reversed(list(self.segmentos)):
+            linhas = [linha for _, linha in self._linhas_segmento(numero)]
+            for linha in reversed(linhas):
+                yield json.loads(linha)
+
+    def posicao_final(self):
+        """
+        Posição (segmento, offset) do último registro completo, na forma
+        devolvida por iterar_com_posicao(), ou None se o log estiver
+        vazio. Muda sempre que algo é gravado; só o fim do segmento é lido.
+        """
+        self.recarregar()
+        for numero in reversed(list(self.segmentos)):
+            posicao = self._ultima_posicao(numero)
+            if posicao is not None:
+                return posicao
+        return None
+
+    def _ultima_posicao(self, numero, bloco=4096):
+        caminho = self.caminho_segmento(numero)
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, "rb") as f:
+            fim = f.seek(0, os.SEEK_END)
+            while True:
+                inicio = max(0, fim - bloco)
+                f.seek(inicio)
+                dados = f.read(fim - inicio)
+                # a primeira linha do bloco pode ter começado antes dele
+                base = 0 if inicio == 0 else dados.find(b"\n") + 1
+                ultima = None
+                if base or inicio == 0:
+                    offset = base
+                    # o último pedaço não termina em \n: gravação em andamento
+                    for linha in dados[base:].split(b"\n")[:-1]:
+                        if linha.strip():
+                            ultima = inicio + offset
+                        offset += len(linha) + 1
+                if ultima is not None:
+                    return (numero, ultima)
+                if inicio == 0:
+                    return None
+                bloco *= 2
+
+    def ler(self, posicao):
+        """
+        Lê o registro gravado na posição (segmento, offset).
+        """
+        numero, offset = posicao
+        with open(self.caminho_segmento(numero), "rb") as f:
+            f.seek(offset)
+            linha = f.readline()
+        if metricas.ATIVO:
+            metricas.BYTES_LIDOS.inc(len(linha), operacao="log:" + os.path.basename(self.diretorio))
+        return json.loads(linha)
+
+    # --------------------------------------------------------
+    # Retenção
+    # --------------------------------------------------------
+
+    def descartar_segmentos_antigos(self, quantidade):
+        """
+        Remove os 'quantidade' segmentos mais antigos (nunca o ativo) e
+        retorna os números removidos.
+        """
+        with self.trava:
+            self.recarregar()
+            quantidade = min(quantidade, len(self.segmentos) - 1)
+            if quantidade <= 0:
+                return []
+
+            removidos = self.segmentos[:quantidade]
+            self.segmentos = self.segmentos[quantidade:]
+            self._salvar_manifesto()
+
+            for numero in removidos:
+                caminho = self.caminho_segmento(numero)
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+        return removidos
+
+    # --------------------------------------------------------
+    # Compatibilidade com o documento {"eventos": [...]}
+    # --------------------------------------------------------
+
+    def _importar_legado(self, caminho, chave):
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, "r", encoding="utf-8") as f:
+            try:
+                dados = json.load(f)
+            except json.JSONDecodeError:
+                return
+
+        registros = dados.get(chave, []) if isinstance(dados, dict) else []
+        conteudo = b"".join(
+            (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")
+            for r in registros
+        )
+        salvar_atomico(self.caminho_segmento(self.segmentos[-1]), conteudo)
+
+    def exportar_documento(self, caminho, chave="eventos"):
+        """
+        Gera o documento no formato antigo ({"eventos": [...]}, indent=4)
+        sem carregar o log inteiro em memória.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        temporario = caminho + ".tmp"
+        quantidade = 0
+
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write("{\n" + f'    "{chave}": [')
+            for registro in self.iterar():
+                texto = json.dumps(registro, indent=4, ensure_ascii=False)
+                texto = texto.replace("\n", "\n        ")
+                f.write(("," if quantidade else "") + "\n        " + texto)
+                quantidade += 1
+            f.write("\n    ]\n}" if quantidade else "]\n}")
+
+        os.replace(temporario, caminho)
+        return quantidade
+
+
+# ============================================================
+# Linha de comando
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Ferramentas do log segmentado (auditoria, leituras...)"
+    )
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    exp = sub.add_parser("exportar", help="gera o documento JSON no formato antigo")
+    exp.add_argument("diretorio")
+    exp.add_argument("arquivo")
+    exp.add_argument("--chave", default="eventos")
+
+    imp = sub.add_parser("importar", help="cria um log a partir de um documento JSON antigo")
+    imp.add_argument("arquivo")
+    imp.add_argument("diretorio")
+    imp.add_argument("--chave", default="eventos")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "exportar":
+        log = LogSegmentado(args.diretorio)
+        quantidade = log.exportar_documento(args.arquivo, args.chave)
+        print(f"✔ {quantidade} registros exportados para {args.arquivo}")
+    else:
+        LogSegmentado(args.diretorio, legado=args.arquivo, chave_legado=args.chave)
+        print(f"✔ Log criado em {args.diretorio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Tamanho de lote dos consumidores de fila e gravação em lote para asyncio.
+
+Os consumidores (clima.fila.drenar, ConsumidorFila) recebem até
+TAMANHO_LOTE mensagens, gravam o lote no log com UMA escrita e só então
+confirmam. O intervalo entre gravações de um consumidor contínuo é o
+'intervalo' do ConsumidorFila (registrarauditoria.py --intervalo).
+
+GravadorAssincrono é o buffer de ingestão para asyncio: o buffer é
+esvaziado por uma tarefa em segundo plano e a escrita roda numa thread.
+"""
+
+import asyncio
+
+# Valores padrão usados pelos consumidores da fila de auditoria
+TAMANHO_LOTE = 1000
+
+
+# Espera máxima de um registro no buffer do gravador assíncrono
+INTERVALO_FLUSH_ASSINCRONO = 0.05  # segundos
+
+
+class GravadorAssincrono:
+    """
+    Buffer de ingestão para servidores asyncio (app_asgi.py).
+
+    adicionar() só acrescenta na memória; uma tarefa em segundo plano
+    chama 'gravar(lote)' numa thread (fora do event loop) quando o buffer
+    atinge 'tamanho_max' ou a cada 'intervalo_flush' segundos. Com
+    'capacidade' registros pendentes, adicionar() espera uma gravação
+    (contrapressão em vez de memória sem limite).
+
+    Os registros no buffer ainda não estão na fila: uma queda do processo
+    perde no máximo 'intervalo_flush' segundos de ingestão. parar() grava
+    o que restar.
+    """
+
+    def __init__(
+        self,
+        gravar,
+        tamanho_max=TAMANHO_LOTE,
+        intervalo_flush=INTERVALO_FLUSH_ASSINCRONO,
+        capacidade=None
+    ):
+        self.gravar = gravar
+        self.tamanho_max = max(1, int(tamanho_max))
+        self.intervalo_flush = intervalo_flush
+        self.capacidade = capacidade or self.tamanho_max * 10
+        self.buffer = []
+        self.gravacoes = 0
+        self.total_gravado = 0
+        self.ultimo_erro = None
+        self._cheio = None
+        self._trava = None
+        self._tarefa = None
+
+    @property
+    def ativo(self):
+        return self._tarefa is not None
+
+    def iniciar(self):
+        """
+        Cria a tarefa de gravação (chamar de dentro do event loop).
+        """
+        if self._tarefa is None:
+            self._cheio = asyncio.Event()
+            self._trava = asyncio.Lock()
+            self._tarefa = asyncio.get_running_loop().create_task(self._rodar())
+        return self
+
+    async def adicionar(self, registro):
+        if len(self.buffer) >= self.capacidade:
+            await self.flush()
+        self.buffer.append(registro)
+        if len(self.buffer) >= self.tamanho_max:
+            self._cheio.set()
+
+    async def flush(self):
+        """
+        Grava o buffer atual (uma chamada de 'gravar' por vez). Se a
+        gravação falhar, o lote volta para o início do buffer e o erro é
+        levantado. Retorna quantos registros foram gravados.
+        """
+        async with self._trava:
+            if not self.buffer:
+                return 0
+            lote, self.buffer = self.buffer, []
+            try:
+                await asyncio.to_thread(self.gravar, lote)
+            except Exception:
+                self.buffer[:0] = lote
+                raise
+            self.gravacoes += 1
+            self.total_gravado += len(lote)
+            return len(lote)
+
+    async def _rodar(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._cheio.wait(), self.intervalo_flush)
+            except asyncio.TimeoutError:
+                pass
+            self._cheio.clear()
+            try:
+                await self.flush()
+                self.ultimo_erro = None
+            except Exception as erro:  # a tarefa não pode morrer calada
+                self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+
+    async def parar(self):
+        """
+        Encerra a tarefa de gravação e grava o que restar no buffer.
+        """
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+        await self.flush()
+
+    def metricas(self):
+        return {
+            "pendentes": len(self.buffer),
+            "gravacoes": self.gravacoes,
+            "totalGravado": self.total_gravado,
+            "ultimoErro": self.ultimo_erro,
+            "tamanhoMax": self.tamanho_max,
+            "intervaloFlush": self.intervalo_flush
+        }
@@ -0,0 +1,325 @@
+"""
+Instrumentação leve dos caminhos quentes (contadores e histogramas).
+
+As etapas só imprimiam "✔": não havia como saber onde o tempo ia.
+Este módulo guarda, por processo:
+  - Contador:   total acumulado (bytes gravados, alertas disparados...)
+  - Histograma: distribuição de durações/tamanhos em faixas fixas
+  - Medidor:    valor lido na hora da exportação (ex.: profundidade
+                da fila), por uma função registrada
+
+e exporta tudo no formato texto do Prometheus (GET /metrics no app.py,
+ou despejo periódico num arquivo para os scripts de functions/).
+
+Desligado por padrão: cada ponto instrumentado só testa ATIVO (um
+atributo de módulo) antes de medir, então o custo desligado é uma
+comparação. Liga com ativar() ou com a variável de ambiente
+CLIMA_METRICAS=1; CLIMA_METRICAS_ARQUIVO=<caminho> faz os scripts
+despejarem as métricas nesse arquivo a cada CLIMA_METRICAS_INTERVALO
+segundos (padrão 10) e ao sair.
+
+Uso nos pontos instrumentados:
+
+    from clima import metricas
+
+    @metricas.cronometrado("clima_consulta_segundos", caminho="auditoria")
+    def consultar(...): ...
+
+    if metricas.ATIVO:
+        metricas.BYTES_LIDOS.inc(len(dados), operacao="carregar_json")
+"""
+
+import atexit
+import functools
+import os
+import threading
+import time
+
+ATIVO = False
+
+INTERVALO_DESPEJO = 10.0  # segundos
+
+# Faixas padrão dos histogramas de duração (segundos)
+FAIXAS_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_trava = threading.Lock()
+
+
+def ativar(ligado=True):
+    global ATIVO
+    ATIVO = bool(ligado)
+
+
+def _chave(rotulos):
+    return tuple(sorted(rotulos.items()))
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(chave, extra=None):
+    pares = list(chave) + (list(extra) if extra else [])
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + "}"
+
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nome, ajuda):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.valores = {}
+
+    def inc(self, valor=1, **rotulos):
+        chave = _chave(rotulos)
+        with _trava:
+            self.valores[chave] = self.valores.get(chave, 0) + valor
+
+    def linhas(self):
+        with _trava:
+            valores = list(self.valores.items())
+        return [f"{self.nome}{_formatar_rotulos(chave)} {_numero(v)}" for chave, v in valores]
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, faixas=FAIXAS_SEGUNDOS):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.faixas = tuple(sorted(faixas))
+        self.valores = {}   # rótulos -> [contagens por faixa..., soma, total]
+
+    def observar(self, valor, **rotulos):
+        chave = _chave(rotulos)
+        with _trava:
+            serie = self.valores.get(chave)
+            if serie is None:
+                serie = self.valores[chave] = [0] * (len(self.faixas) + 2)
+            for i, limite in enumerate(self.faixas):
+                if valor <= limite:
+                    serie[i] += 1
+                    break
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def linhas(self):
+        with _trava:
+            valores = [(chave, list(serie)) for chave, serie in self.valores.items()]
+        linhas = []
+        for chave, serie in valores:
+            acumulado = 0
+            for limite, contagem in zip(self.faixas, serie):
+                acumulado += contagem
+                linhas.append(
+                    f"{self.nome}_bucket{_formatar_rotulos(chave, [('le', _numero(limite))])} {acumulado}"
+                )
+            linhas.append(f"{self.nome}_bucket{_formatar_rotulos(chave, [('le', '+Inf')])} {serie[-1]}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(chave)} {_numero(serie[-2])}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(chave)} {serie[-1]}")
+        return linhas
+
+
+class Medidor:
+    """
+    Valor calculado na exportação: 'funcao()' devolve o número da série
+    com os rótulos dados em registrar() (None = série omitida).
+    """
+
+    tipo = "gauge"
+
+    def __init__(self, nome, ajuda):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.funcoes = {}
+
+    def registrar(self, funcao, **rotulos):
+        with _trava:
+            self.funcoes[_chave(rotulos)] = funcao
+
+    def linhas(self):
+        with _trava:
+            funcoes = list(self.funcoes.items())
+        linhas = []
+        for chave, funcao in funcoes:
+            try:
+                valor = funcao()
+            except Exception:  # a exportação não pode falhar por um medidor
+                continue
+            if valor is not None:
+                linhas.append(f"{self.nome}{_formatar_rotulos(chave)} {_numero(valor)}")
+        return linhas
+
+
+_metricas = {}
+
+
+def _registrar(classe, nome, ajuda, *args):
+    with _trava:
+        metrica = _metricas.get(nome)
+        if metrica is None:
+            metrica = _metricas[nome] = classe(nome, ajuda, *args)
+        return metrica
+
+
+def contador(nome, ajuda):
+    return _registrar(Contador, nome, ajuda)
+
+
+def histograma(nome, ajuda, faixas=FAIXAS_SEGUNDOS):
+    return _registrar(Histograma, nome, ajuda, faixas)
+
+
+def medidor(nome, ajuda):
+    return _registrar(Medidor, nome, ajuda)
+
+
+def cronometrado(histograma_ou_nome, **rotulos):
+    """
+    Decorador: observa a duração de cada chamada no histograma (criado
+    com FAIXAS_SEGUNDOS se for dado o nome). Desligado, só chama.
+    """
+    hist = histograma_ou_nome
+    if isinstance(hist, str):
+        hist = histograma(hist, "Duração em segundos")
+
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def embrulho(*args, **kwargs):
+            if not ATIVO:
+                return funcao(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                hist.observar(time.perf_counter() - inicio, **rotulos)
+        return embrulho
+    return decorar
+
+
+def texto():
+    """
+    Todas as métricas no formato texto de exposição do Prometheus.
+    """
+    with _trava:
+        metricas = sorted(_metricas.values(), key=lambda m: m.nome)
+    linhas = []
+    for metrica in metricas:
+        series = metrica.linhas()
+        if not series:
+            continue
+        linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+        linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+        linhas.extend(series)
+    return "\n".join(linhas) + "\n"
+
+
+def zerar():
+    """
+    Apaga os valores acumulados (os medidores continuam registrados).
+    """
+    with _trava:
+        for metrica in _metricas.values():
+            if not isinstance(metrica, Medidor):
+                metrica.valores.clear()
+
+
+# ============================================================
+# Séries principais (usadas pelos módulos instrumentados)
+# ============================================================
+
+BYTES_LIDOS = contador("clima_bytes_lidos_total", "Bytes lidos, por operação")
+BYTES_GRAVADOS = contador("clima_bytes_gravados_total", "Bytes gravados, por operação")
+BYTES_POR_OPERACAO = histograma(
+    "clima_bytes_por_operacao", "Bytes lidos/gravados por chamada, por operação",
+    (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+)
+DURACAO_ETAPA = histograma("clima_etapa_segundos", "Duração de cada etapa, por etapa")
+ITENS_ETAPA = contador("clima_etapa_itens_total", "Itens (leituras, mensagens) processados, por etapa")
+ALERTAS = contador("clima_alertas_total", "Alertas disparados (use rate() para alertas/s)")
+PROFUNDIDADE_FILA = medidor("clima_fila_profundidade", "Mensagens ainda não confirmadas, por fila")
+
+
+def contar_bytes(operacao, lidos=0, gravados=0):
+    """
+    Soma bytes lidos/gravados de uma chamada (só com ATIVO).
+    """
+    if lidos:
+        BYTES_LIDOS.inc(lidos, operacao=operacao)
+        BYTES_POR_OPERACAO.observar(lidos, operacao=operacao, sentido="leitura")
+    if gravados:
+        BYTES_GRAVADOS.inc(gravados, operacao=operacao)
+        BYTES_POR_OPERACAO.observar(gravados, operacao=operacao, sentido="escrita")
+
+
+def etapa(nome):
+    """
+    Decorador de etapa: duração em clima_etapa_segundos{etapa=nome}.
+    """
+    return cronometrado(DURACAO_ETAPA, etapa=nome)
+
+
+# ============================================================
+# Despejo periódico (scripts de functions/)
+# ============================================================
+
+_despejo = None
+
+
+def despejar(caminho):
+    # import tardio: clima.arquivos é instrumentado com este módulo
+    from clima.arquivos import salvar_atomico
+    salvar_atomico(caminho, texto().encode("utf-8"))
+
+
+def iniciar_despejo(caminho, intervalo=INTERVALO_DESPEJO):
+    """
+    Grava texto() em 'caminho' a cada 'intervalo' segundos (thread
+    daemon) e uma última vez ao sair do processo.
+    """
+    global _despejo
+    if _despejo is not None:
+        return
+
+    parar = threading.Event()
+
+    def rodar():
+        while not parar.wait(intervalo):
+            try:
+                despejar(caminho)
+            except OSError:
+                pass
+
+    _despejo = threading.Thread(target=rodar, name="despejo-metricas", daemon=True)
+    _despejo.start()
+
+    def final():
+        parar.set()
+        despejar(caminho)
+
+    atexit.register(final)
+
+
+def configurar_pelo_ambiente():
+    """
+    CLIMA_METRICAS=1 liga as métricas; CLIMA_METRICAS_ARQUIVO inicia o
+    despejo periódico (CLIMA_METRICAS_INTERVALO segundos).
+    """
+    if os.environ.get("CLIMA_METRICAS", "").lower() in ("1", "true", "sim", "yes"):
+        ativar()
+    caminho = os.environ.get("CLIMA_METRICAS_ARQUIVO")
+    if caminho:
+        ativar()
+        intervalo = float(os.environ.get("CLIMA_METRICAS_INTERVALO", INTERVALO_DESPEJO))
+        iniciar_despejo(caminho, intervalo)
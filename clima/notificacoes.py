@@ -0,0 +1,606 @@
+"""
+Despacho de notificações de alerta: agrupamento, limite de taxa e destinos.
+
+Antes, avaliar_leituras() acrescentava cada alerta em
+notificacaoAlerta.json e "enviava" o SMS ali mesmo, dentro do loop de
+avaliação: um sensor oscilando no limite gerava um SMS por leitura e a
+avaliação esperava o envio.
+
+Agora a avaliação só publica os alertas na fila durável "notificacoes"
+e o Despachante, numa etapa separada:
+
+  - agrupa os alertas por (destinatário, sensor) numa janela de
+    'janela' segundos: cada grupo vira UM resumo ("5 alertas do
+    sensor-07 entre 10:00 e 10:01, temperatura máx 34.2")
+  - aplica um balde de fichas por destinatário (token bucket): no máximo
+    'rajada' resumos de uma vez e 'por_minuto' resumos por minuto; o
+    resumo retido continua acumulando alertas até haver ficha
+  - entrega o resumo em cada destino (console, arquivo JSON-Lines, HTTP)
+  - só confirma as mensagens na fila depois da entrega; se o processo
+    cair, os alertas voltam para a fila e entram no próximo resumo
+
+As fichas e as entregas já feitas ficam num EstadoNotificacoes (tabelas
+no mesmo SQLite das filas), e não na memória do processo: cada execução
+da Lambda começaria com o balde cheio e não haveria limite nenhum entre
+execuções. A entrega é registrada por destino: se o SMS sai e o POST
+HTTP falha, a nova tentativa manda ao HTTP o resumo inteiro e ao SMS só
+os alertas que ele ainda não recebeu (nenhum, se não chegou outro),
+inclusive depois de as mensagens voltarem para a fila. Sem estado, o
+Despachante guarda fichas e entregas só em memória (EstadoMemoria).
+
+Configuração (bloco opcional "notificacoes" de limites.json):
+
+{
+    "notificacoes": {
+        "janela": 60,
+        "porMinuto": 6,
+        "rajada": 3,
+        "destinatarios": ["plantao"],
+        "tipos": {"estufa": ["plantao", "estufa@exemplo.com"]},
+        "sensores": {"estufa-07": ["agronomo"]},
+        "destinos": [
+            {"tipo": "console"},
+            {"tipo": "arquivo", "caminho": "date/notificacoesEnviadas.jsonl"},
+            {"tipo": "http", "url": "http://localhost:9000/sms"}
+        ]
+    }
+}
+
+Destinatários: sensor > tipo > global (mesma precedência das regras).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+
+from clima.arquivos import trava
+from clima.regras import tipo_do_sensor
+
+JANELA_AGRUPAMENTO = 60.0       # segundos
+RESUMOS_POR_MINUTO = 6          # por destinatário
+RAJADA_RESUMOS = 3              # resumos de uma vez antes de limitar
+DESTINATARIO_PADRAO = "padrao"
+
+# Mensagens recebidas da fila por ciclo
+TAMANHO_LOTE_NOTIFICACOES = 1000
+
+# Ids por consulta "IN (...)" ao SQLite (limite de parâmetros)
+IDS_POR_CONSULTA = 500
+
+
+class BaldeFichas:
+    """
+    Token bucket: 'capacidade' fichas, repostas a 'taxa' fichas/segundo.
+    """
+
+    def __init__(self, taxa, capacidade, relogio=time.monotonic):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.relogio = relogio
+        self.fichas = float(capacidade)
+        self._atualizado = relogio()
+
+    def _repor(self):
+        agora = self.relogio()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self._atualizado) * self.taxa)
+        self._atualizado = agora
+
+    def consumir(self, quantidade=1):
+        """
+        Retira fichas se houver; retorna False (sem retirar) se não houver.
+        """
+        self._repor()
+        if self.fichas >= quantidade:
+            self.fichas -= quantidade
+            return True
+        return False
+
+
+# ============================================================
+# Destinos
+# ============================================================
+
+class Destino:
+    """
+    Destino de entrega de resumos. Subclasses implementam enviar(),
+    que deve levantar exceção se a entrega falhar.
+    """
+
+    tipo = None
+
+    @property
+    def chave(self):
+        """
+        Identifica o destino no registro de entregas.
+        """
+        return self.tipo
+
+    def enviar(self, resumo):
+        raise NotImplementedError
+
+
+class DestinoConsole(Destino):
+    """
+    SMS/SNS simulado: imprime o resumo.
+    """
+
+    tipo = "console"
+
+    def enviar(self, resumo):
+        print(f"📲 [{resumo['destinatario']}] {resumo['texto']}")
+
+
+class DestinoArquivo(Destino):
+    """
+    Acrescenta cada resumo como uma linha JSON em 'caminho' (sob trava).
+    Útil para testes e para inspecionar o que teria sido enviado.
+    """
+
+    tipo = "arquivo"
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    @property
+    def chave(self):
+        return f"{self.tipo}:{self.caminho}"
+
+    def enviar(self, resumo):
+        linha = json.dumps(resumo, ensure_ascii=False) + "\n"
+        with trava(self.caminho):
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(linha)
+
+
+class DestinoHttp(Destino):
+    """
+    POST do resumo em JSON para 'url' (ex.: um stub local de SMS/e-mail).
+    Resposta fora de 2xx levanta exceção e o resumo é tentado de novo.
+    """
+
+    tipo = "http"
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+
+    @property
+    def chave(self):
+        return f"{self.tipo}:{self.url}"
+
+    def enviar(self, resumo):
+        requisicao = urllib.request.Request(
+            self.url,
+            data=json.dumps(resumo, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+            resposta.read()
+
+
+TIPOS_DESTINO = {
+    DestinoConsole.tipo: DestinoConsole,
+    DestinoArquivo.tipo: DestinoArquivo,
+    DestinoHttp.tipo: DestinoHttp,
+}
+
+
+def criar_destino(especificacao):
+    """
+    Destino a partir de {"tipo": "...", <parâmetros>} (bloco "destinos").
+    Levanta ValueError se o tipo não existir.
+    """
+    parametros = dict(especificacao)
+    tipo = parametros.pop("tipo", None)
+    classe = TIPOS_DESTINO.get(tipo)
+    if classe is None:
+        raise ValueError(f"destino de notificação desconhecido: {tipo!r}")
+    return classe(**parametros)
+
+
+def destinatarios_de(config, sensor_id):
+    """
+    Destinatários do sensor pelo bloco "notificacoes": sensor > tipo > global.
+    """
+    sensores = config.get("sensores") or {}
+    if sensor_id in sensores:
+        return list(sensores[sensor_id])
+    tipos = config.get("tipos") or {}
+    tipo = tipo_do_sensor(sensor_id)
+    if tipo in tipos:
+        return list(tipos[tipo])
+    return list(config.get("destinatarios") or [DESTINATARIO_PADRAO])
+
+
+# ============================================================
+# Estado: fichas e entregas por destino
+# ============================================================
+
+class EstadoMemoria:
+    """
+    Fichas e entregas só na memória deste processo (um despachante
+    contínuo). 'relogio' é o mesmo do Despachante.
+    """
+
+    def __init__(self, relogio=time.monotonic):
+        self.relogio = relogio
+        self._baldes = {}           # destinatario -> BaldeFichas
+        self._entregas = {}         # (mensagem, destinatario) -> destinos
+
+    def consumir_ficha(self, destinatario, taxa, capacidade):
+        balde = self._baldes.get(destinatario)
+        if balde is None or (balde.taxa, balde.capacidade) != (taxa, capacidade):
+            balde = self._baldes[destinatario] = BaldeFichas(taxa, capacidade, self.relogio)
+        return balde.consumir()
+
+    def entregues(self, destinatario, ids):
+        """
+        {id da mensagem: destinos que já receberam} para 'ids'.
+        """
+        return {
+            id_mensagem: set(self._entregas[(id_mensagem, destinatario)])
+            for id_mensagem in ids
+            if (id_mensagem, destinatario) in self._entregas
+        }
+
+    def registrar_entrega(self, destinatario, destino, ids):
+        for id_mensagem in ids:
+            self._entregas.setdefault((id_mensagem, destinatario), set()).add(destino)
+
+    def esquecer(self, ids):
+        """
+        Descarta as entregas de mensagens já confirmadas na fila.
+        """
+        ids = set(ids)
+        for chave in [c for c in self._entregas if c[0] in ids]:
+            del self._entregas[chave]
+
+
+_ESQUEMA_ESTADO = """
+CREATE TABLE IF NOT EXISTS baldes_notificacao (
+    destinatario TEXT PRIMARY KEY,
+    fichas       REAL NOT NULL,
+    atualizado   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entregas_notificacao (
+    mensagem     INTEGER NOT NULL,
+    destinatario TEXT    NOT NULL,
+    destino      TEXT    NOT NULL,
+    PRIMARY KEY (mensagem, destinatario, destino)
+);
+"""
+
+
+def _em_blocos(ids):
+    ids = list(ids)
+    for inicio in range(0, len(ids), IDS_POR_CONSULTA):
+        yield ids[inicio:inicio + IDS_POR_CONSULTA]
+
+
+class EstadoNotificacoes(EstadoMemoria):
+    """
+    Fichas e entregas num banco SQLite (o das filas, ex.: queue/filas.db),
+    compartilhadas por todas as execuções e processos. As fichas usam o
+    relógio de parede ('relogio', padrão time.time), que vale entre
+    processos. Cada thread usa a sua própria conexão, como em clima.fila.
+    """
+
+    def __init__(self, caminho, relogio=time.time):
+        super().__init__(relogio)
+        self.caminho = caminho
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conexao().executescript(_ESQUEMA_ESTADO)
+
+    def _conexao(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def consumir_ficha(self, destinatario, taxa, capacidade):
+        """
+        Repõe e retira uma ficha do balde do destinatário numa transação
+        (dois despachantes não gastam a mesma ficha). Um balde novo começa
+        cheio; mudar a capacidade só limita as fichas ao novo máximo.
+        """
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            agora = self.relogio()
+            linha = con.execute(
+                "SELECT fichas, atualizado FROM baldes_notificacao WHERE destinatario = ?",
+                (destinatario,)
+            ).fetchone()
+            fichas = float(capacidade) if linha is None else linha[0] + max(0.0, agora - linha[1]) * taxa
+            fichas = min(float(capacidade), fichas)
+            consumiu = fichas >= 1
+            if consumiu:
+                fichas -= 1
+            con.execute(
+                "INSERT OR REPLACE INTO baldes_notificacao (destinatario, fichas, atualizado) "
+                "VALUES (?, ?, ?)",
+                (destinatario, fichas, agora)
+            )
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+        return consumiu
+
+    def entregues(self, destinatario, ids):
+        resultado = {}
+        con = self._conexao()
+        for bloco in _em_blocos(ids):
+            marcadores = ",".join("?" * len(bloco))
+            for id_mensagem, destino in con.execute(
+                "SELECT mensagem, destino FROM entregas_notificacao "
+                f"WHERE destinatario = ? AND mensagem IN ({marcadores})",
+                [destinatario, *bloco]
+            ):
+                resultado.setdefault(id_mensagem, set()).add(destino)
+        return resultado
+
+    def registrar_entrega(self, destinatario, destino, ids):
+        self._conexao().executemany(
+            "INSERT OR IGNORE INTO entregas_notificacao (mensagem, destinatario, destino) "
+            "VALUES (?, ?, ?)",
+            [(id_mensagem, destinatario, destino) for id_mensagem in ids]
+        )
+
+    def esquecer(self, ids):
+        con = self._conexao()
+        for bloco in _em_blocos(ids):
+            con.execute(
+                f"DELETE FROM entregas_notificacao WHERE mensagem IN ({','.join('?' * len(bloco))})",
+                bloco
+            )
+
+
+# ============================================================
+# Despachante
+# ============================================================
+
+def _maximo(alertas, campo):
+    valores = [a.get(campo) for a in alertas if isinstance(a.get(campo), (int, float))]
+    return max(valores) if valores else None
+
+
+class _Resumo:
+    """
+    Alertas de um (destinatário, sensor) acumulados desde 'aberto_em',
+    com os ids já entregues a cada destino.
+    """
+
+    __slots__ = ("destinatario", "sensor_id", "aberto_em", "itens", "entregues")
+
+    def __init__(self, destinatario, sensor_id, aberto_em):
+        self.destinatario = destinatario
+        self.sensor_id = sensor_id
+        self.aberto_em = aberto_em
+        self.itens = []             # (id da mensagem, alerta)
+        self.entregues = {}         # chave do destino -> ids entregues
+
+    @property
+    def mensagens(self):
+        return [id_mensagem for id_mensagem, _ in self.itens]
+
+    def adicionar(self, id_mensagem, alerta, destinos_entregues=()):
+        self.itens.append((id_mensagem, alerta))
+        for destino in destinos_entregues:
+            self.entregues.setdefault(destino, set()).add(id_mensagem)
+
+    def pendentes(self, destino):
+        """
+        Itens que o destino ainda não recebeu.
+        """
+        entregues = self.entregues.get(destino)
+        if not entregues:
+            return self.itens
+        return [item for item in self.itens if item[0] not in entregues]
+
+    def marcar_entregues(self, destino, ids):
+        self.entregues.setdefault(destino, set()).update(ids)
+
+    def para_dict(self, itens=None):
+        alertas = [alerta for _, alerta in (self.itens if itens is None else itens)]
+        primeiro = alertas[0].get("date")
+        ultimo = alertas[-1].get("date")
+        temp_max = _maximo(alertas, "temperatura")
+        umi_max = _maximo(alertas, "umidade")
+        if len(alertas) == 1:
+            texto = f"Alerta do {self.sensor_id} em {primeiro}"
+        else:
+            texto = f"{len(alertas)} alertas do {self.sensor_id} entre {primeiro} e {ultimo}"
+        texto += f": temperatura máx {temp_max}, umidade máx {umi_max}"
+        return {
+            "destinatario": self.destinatario,
+            "sensorId": self.sensor_id,
+            "alertas": len(alertas),
+            "primeiro": primeiro,
+            "ultimo": ultimo,
+            "temperaturaMax": temp_max,
+            "umidadeMax": umi_max,
+            "texto": texto
+        }
+
+
+class Despachante:
+    """
+    Consome a fila de notificações e entrega resumos aos destinos.
+
+    - fila:          FilaDuravel com os alertas (um por mensagem)
+    - destinos:      lista de Destino
+    - config:        bloco "notificacoes" (dict) ou callable que o devolve
+    - relogio:       fonte de tempo (segundos) para a janela de agrupamento
+    - estado:        EstadoNotificacoes (fichas e entregas persistidas);
+                     sem ele, EstadoMemoria com o mesmo 'relogio'
+
+    Um único despachante por fila: os alertas agrupados ficam em memória
+    (com a visibilidade renovada na fila) até a entrega.
+    """
+
+    def __init__(self, fila, destinos, config=None, tamanho_lote=TAMANHO_LOTE_NOTIFICACOES,
+                 relogio=time.monotonic, estado=None):
+        self.fila = fila
+        self.destinos = list(destinos)
+        self._config = config if callable(config) else (lambda: config or {})
+        self.tamanho_lote = tamanho_lote
+        self.relogio = relogio
+        self.estado = estado if estado is not None else EstadoMemoria(relogio)
+
+        self._resumos = {}          # (destinatario, sensor) -> _Resumo
+        self._pendentes = {}        # id da mensagem -> destinatários restantes
+
+        self.recebidos = 0
+        self.entregues = 0
+        self.alertas_entregues = 0
+        self.sem_destinatario = 0
+        self.limitados = 0
+        self.falhas = 0
+        self.ultimo_erro = None
+
+    def _parametros(self):
+        config = self._config() or {}
+        janela = float(config.get("janela", JANELA_AGRUPAMENTO))
+        por_minuto = float(config.get("porMinuto", RESUMOS_POR_MINUTO))
+        rajada = float(config.get("rajada", RAJADA_RESUMOS))
+        return config, janela, por_minuto, rajada
+
+    def receber(self):
+        """
+        Traz os alertas visíveis da fila para os resumos abertos.
+        Retorna quantos alertas novos recebeu.
+        """
+        config, janela, _, _ = self._parametros()
+        # a mensagem fica invisível enquanto o resumo pode estar aberto
+        visibilidade = janela * 2 + 30
+        novos = 0
+        while True:
+            mensagens = self.fila.receber(self.tamanho_lote, visibilidade=visibilidade)
+            if not mensagens:
+                break
+            agora = self.relogio()
+            # reapareceu por visibilidade expirada: já está num resumo
+            mensagens = [m for m in mensagens if m.id not in self._pendentes]
+            por_destinatario = {}
+            sem_destinatario = []
+            for mensagem in mensagens:
+                destinatarios = destinatarios_de(config, mensagem.corpo.get("sensorId"))
+                if not destinatarios:
+                    # não entra em resumo nenhum: confirmada agora, senão
+                    # ficaria na fila com a visibilidade renovada para sempre
+                    sem_destinatario.append(mensagem)
+                    continue
+                self._pendentes[mensagem.id] = len(destinatarios)
+                for destinatario in destinatarios:
+                    por_destinatario.setdefault(destinatario, []).append(mensagem)
+            self.fila.confirmar(sem_destinatario)
+            self.sem_destinatario += len(sem_destinatario)
+
+            for destinatario, lista in por_destinatario.items():
+                # só uma mensagem entregue de novo pela fila pode já ter
+                # chegado a algum destino
+                entregues = self.estado.entregues(
+                    destinatario, [m.id for m in lista if m.recebimentos > 1]
+                )
+                for mensagem in lista:
+                    sensor_id = mensagem.corpo.get("sensorId")
+                    chave = (destinatario, sensor_id)
+                    resumo = self._resumos.get(chave)
+                    if resumo is None:
+                        resumo = self._resumos[chave] = _Resumo(destinatario, sensor_id, agora)
+                    resumo.adicionar(mensagem.id, mensagem.corpo, entregues.get(mensagem.id, ()))
+            novos += len(mensagens)
+            if len(mensagens) < self.tamanho_lote:
+                break
+        self.recebidos += novos
+        return novos
+
+    def despachar(self, forcar=False):
+        """
+        Entrega os resumos cuja janela fechou (todos, se 'forcar'),
+        respeitando o limite de taxa de cada destinatário, e confirma na
+        fila os alertas já entregues a todos os seus destinatários.
+        Cada destino recebe só os alertas que ainda não recebeu; um
+        resumo com destino falho fica aberto e a nova tentativa gasta
+        outra ficha. Retorna quantos resumos foram entregues.
+        """
+        _, janela, por_minuto, rajada = self._parametros()
+        agora = self.relogio()
+        entregues = 0
+        concluidas = []
+
+        for chave, resumo in list(self._resumos.items()):
+            if not forcar and agora - resumo.aberto_em < janela:
+                continue
+            if not self.estado.consumir_ficha(resumo.destinatario, por_minuto / 60.0, rajada):
+                # sem ficha: o resumo segue aberto e acumulando alertas
+                self.limitados += 1
+                continue
+
+            falhou = False
+            for destino in self.destinos:
+                itens = resumo.pendentes(destino.chave)
+                if not itens:
+                    continue
+                try:
+                    destino.enviar(resumo.para_dict(itens))
+                except Exception as erro:
+                    # tenta de novo no próximo ciclo (o resumo continua aberto)
+                    falhou = True
+                    self.falhas += 1
+                    self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+                    continue
+                ids = [id_mensagem for id_mensagem, _ in itens]
+                resumo.marcar_entregues(destino.chave, ids)
+                self.estado.registrar_entrega(resumo.destinatario, destino.chave, ids)
+            if falhou:
+                continue
+
+            del self._resumos[chave]
+            entregues += 1
+            self.alertas_entregues += len(resumo.itens)
+            for id_mensagem in resumo.mensagens:
+                self._pendentes[id_mensagem] -= 1
+                if self._pendentes[id_mensagem] == 0:
+                    del self._pendentes[id_mensagem]
+                    concluidas.append(id_mensagem)
+
+        self.fila.confirmar(concluidas)
+        # depois de confirmar: se cair antes, as mensagens voltam e as
+        # entregas registradas evitam reenviar
+        self.estado.esquecer(concluidas)
+        if self._pendentes:
+            self.fila.estender(list(self._pendentes), janela * 2 + 30)
+        self.entregues += entregues
+        return entregues
+
+    def ciclo(self, forcar=False):
+        """
+        receber() + despachar(); retorna quantos resumos foram entregues.
+        """
+        self.receber()
+        return self.despachar(forcar)
+
+    def metricas(self):
+        return {
+            "recebidos": self.recebidos,
+            "resumosEntregues": self.entregues,
+            "alertasEntregues": self.alertas_entregues,
+            "resumosAbertos": len(self._resumos),
+            "alertasPendentes": len(self._pendentes),
+            "semDestinatario": self.sem_destinatario,
+            "limitados": self.limitados,
+            "falhas": self.falhas,
+            "ultimoErro": self.ultimo_erro,
+            "profundidade": self.fila.profundidade()
+        }
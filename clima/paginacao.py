@@ -0,0 +1,71 @@
+"""
+Paginação por cursor sobre os logs segmentados.
+
+O cursor é opaco para quem consome a API: codifica a posição
+(segmento, offset) do último registro entregue. A próxima página começa
+no registro imediatamente mais antigo que ele, sem reler nem pular os
+anteriores, e continua estável se novos registros forem gravados entre
+uma página e outra.
+
+Pagina lê os registros do log sob demanda (um por vez), então uma
+exportação inteira (limite=0) mantém a memória do servidor constante.
+"""
+
+import base64
+from itertools import islice
+
+
+def codificar_cursor(posicao):
+    texto = f"{posicao[0]}.{posicao[1]}".encode("ascii")
+    return base64.urlsafe_b64encode(texto).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    """
+    Posição (segmento, offset) do cursor, ou None se vazio.
+    Levanta ValueError se o cursor não for válido.
+    """
+    if not cursor:
+        return None
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        segmento, offset = texto.split(".")
+        posicao = (int(segmento), int(offset))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"cursor inválido: {cursor!r}") from None
+    if posicao[0] < 0 or posicao[1] < 0:
+        raise ValueError(f"cursor inválido: {cursor!r}")
+    return posicao
+
+
+class Pagina:
+    """
+    Página de registros de um log, iterável uma vez.
+
+    - posicoes: posições já filtradas, na ordem de entrega
+    - limite:   tamanho da página (0/None = tudo, sem próximo cursor;
+                negativo levanta ValueError)
+
+    Com limite, só as posições da página (tuplas pequenas) ficam em
+    memória, o que permite saber o 'proximo_cursor' antes de ler e
+    enviar os registros.
+    """
+
+    def __init__(self, log, posicoes, limite=None):
+        self.log = log
+        self.proximo_cursor = None
+
+        if limite is not None and limite < 0:
+            raise ValueError(f"limite inválido: {limite!r}")
+
+        if limite:
+            posicoes = list(islice(posicoes, limite + 1))
+            if len(posicoes) > limite:
+                posicoes = posicoes[:limite]
+                self.proximo_cursor = codificar_cursor(posicoes[-1])
+
+        self._posicoes = posicoes
+
+    def __iter__(self):
+        for posicao in self._posicoes:
+            yield self.log.ler(posicao)
@@ -0,0 +1,163 @@
+"""
+Avaliação paralela das leituras, particionada por sensor.
+
+avaliar_leituras() avaliava cada lote da fila num único processo. No
+modo "paralelo" o lote é dividido em fatias pelo hash (CRC32) do
+sensorId e cada fatia é avaliada num processo de um ProcessPoolExecutor:
+
+  - um sensor cai sempre na mesma fatia e a fatia mantém a ordem do
+    lote, então as leituras de cada sensor são avaliadas em ordem
+    (histerese, nDeM e cooldown dão o mesmo resultado do modo "lote")
+  - cada fatia leva só o estado dos seus sensores (histerese e
+    EstadoDisparo) e devolve esse estado atualizado, que é mesclado de
+    volta no processo principal
+  - o processo principal continua sendo o único a receber/confirmar a
+    fila e a gravar alertas, notificações e auditoria, na ordem do lote
+
+O resultado (máscara e índices dos alertas) é idêntico ao do modo
+"lote"; só a avaliação (colunas, máscara e decisão de disparo) roda em
+paralelo.
+"""
+
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from clima.avaliacao import LoteColunar
+from clima.disparo import EstadoDisparo
+from clima.regras import RegrasAlerta
+
+# Abaixo disso o custo de enviar as fatias aos processos não compensa
+MINIMO_LEITURAS_PARALELO = 5000
+
+
+def fatia_do_sensor(sensor_id, fatias):
+    """
+    Fatia (0..fatias-1) de um sensor; estável entre processos e
+    execuções (hash() de str muda a cada processo).
+    """
+    return zlib.crc32(str(sensor_id).encode("utf-8")) % fatias
+
+
+def particionar(leituras, fatias):
+    """
+    Divide as leituras por sensor. Retorna uma lista por fatia com as
+    posições (no lote) das leituras, em ordem.
+    """
+    posicoes = [[] for _ in range(fatias)]
+    fatia_de = {}
+    for i, leitura in enumerate(leituras):
+        sensor = leitura.get("sensorId")
+        fatia = fatia_de.get(sensor)
+        if fatia is None:
+            fatia = fatia_de[sensor] = fatia_do_sensor(sensor, fatias)
+        posicoes[fatia].append(i)
+    return posicoes
+
+
+class _ConfigFixa:
+    """
+    Fonte de configuração já lida (o processo da fatia não relê o arquivo).
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def obter(self):
+        return self.config
+
+
+def avaliar_fatia(config, leituras, novas, em_alerta, sensores):
+    """
+    Roda no processo da fatia: máscara de alerta e decisão de disparo.
+
+    - config:    dict de limites/regras (limites.json)
+    - novas:     leitura i ainda não aplicada? (None = todas)
+    - em_alerta: sensores da fatia em alerta (histerese)
+    - sensores:  estado de disparo dos sensores da fatia
+
+    Retorna (máscara em bytes, posições na fatia que disparam,
+    em_alerta atualizado, estado dos sensores atualizado).
+    """
+    regras = RegrasAlerta(_ConfigFixa(config))
+    regras.em_alerta = set(em_alerta)
+    estado = EstadoDisparo()
+    estado.sensores = sensores
+
+    mascara = regras.mascara(LoteColunar(leituras))
+    if hasattr(mascara, "tolist"):
+        mascara = mascara.tolist()
+    disparados = estado.filtrar(leituras, mascara, regras.compiladas().regra, novas=novas)
+    return bytes(mascara), disparados, regras.em_alerta, estado.sensores
+
+
+class AvaliadorParalelo:
+    """
+    Pool de processos reaproveitado entre os lotes da fila.
+    """
+
+    def __init__(self, processos=None, minimo=None):
+        self.processos = processos or os.cpu_count() or 1
+        self.minimo = MINIMO_LEITURAS_PARALELO if minimo is None else minimo
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processos)
+        return self._executor
+
+    def encerrar(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+    def avaliar(self, leituras, regras, estado, ids=None):
+        """
+        Avalia o lote e retorna (máscara, índices que disparam), como
+        regras.mascara() + estado.filtrar() fariam em sequência.
+        Atualiza regras.em_alerta e estado.sensores.
+        """
+        compiladas = regras.compiladas()
+        if self.processos < 2 or len(leituras) < self.minimo:
+            mascara = regras.mascara(LoteColunar(leituras))
+            return mascara, estado.filtrar(leituras, mascara, compiladas.regra, ids)
+
+        # os ids aplicados valem para todos os sensores: são marcados aqui,
+        # e cada fatia recebe só quais das suas leituras são novas
+        novas = None if ids is None else estado.marcar_aplicadas(ids)
+        config = regras.fonte.obter() or {}
+        tarefas = []
+        for posicoes in particionar(leituras, self.processos):
+            if not posicoes:
+                continue
+            fatia = [leituras[i] for i in posicoes]
+            nomes = {leitura.get("sensorId") for leitura in fatia}
+            tarefas.append((posicoes, nomes, self._pool().submit(
+                avaliar_fatia,
+                config,
+                fatia,
+                None if novas is None else [novas[i] for i in posicoes],
+                regras.em_alerta & nomes,
+                {s: estado.sensores[s] for s in nomes if s in estado.sensores}
+            )))
+
+        mascara = [False] * len(leituras)
+        disparados = []
+        for posicoes, nomes, tarefa in tarefas:
+            bits, acionados, em_alerta, sensores = tarefa.result()
+            for i, bit in zip(posicoes, bits):
+                mascara[i] = bool(bit)
+            disparados.extend(posicoes[j] for j in acionados)
+            regras.em_alerta -= nomes
+            regras.em_alerta |= em_alerta
+            estado.sensores.update(sensores)
+
+        # índices em ordem do lote, como no modo "lote"
+        disparados.sort()
+        return mascara, disparados
@@ -0,0 +1,355 @@
+"""
+Perfil opcional dos handlers no estilo Lambda (partida a frio e a quente).
+
+Os lambda_handler de functions/ imitam a AWS Lambda: a primeira
+invocação de um processo paga a importação dos módulos e a primeira
+carga dos arquivos (log, índice, fila); as seguintes reaproveitam tudo.
+Com o perfil ligado, cada invocação grava em DIR_PERFIL:
+
+  <funcao>-<data>-<pid>-<n>.json   relatório: frio/quente, duração,
+                                   tempos da partida (importação e
+                                   primeira carga), pico de memória,
+                                   maiores alocações (tracemalloc) e
+                                   funções mais caras (cProfile)
+  <funcao>-<data>-<pid>-<n>.prof   estatísticas completas do cProfile
+                                   (pstats, snakeviz...)
+
+Desligado por padrão. Liga com CLIMA_PERFIL=1 (todas as invocações) ou
+com ?perfil=1 na query string do evento (só aquela invocação).
+CLIMA_PERFIL_DIR muda o diretório dos relatórios.
+
+Os tempos da partida (importação e primeira carga) são medidos sempre,
+sem cProfile; a duração de uma invocação perfilada inclui o custo do
+próprio cProfile/tracemalloc, então compare frio x quente entre
+relatórios, não com execuções sem perfil.
+
+Resumo dos relatórios (piores funções somadas entre invocações):
+
+    python -m clima.perfil --top 20
+    python -m clima.perfil --dir perfil --funcao consultarauditoria
+"""
+
+import argparse
+import cProfile
+import functools
+import glob
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DIR_PERFIL = os.environ.get("CLIMA_PERFIL_DIR") or os.path.join(BASE_PATH, "perfil")
+
+# Linhas guardadas em cada relatório
+FUNCOES_POR_RELATORIO = 40
+ALOCACOES_POR_RELATORIO = 15
+
+_VERDADEIROS = ("1", "true", "sim", "yes")
+
+_partidas = {}       # módulo -> {"importacaoSegundos": s, "primeiraCargaSegundos": s}
+_invocacoes = {}     # função -> invocações neste processo
+_trava = threading.Lock()
+# cProfile e tracemalloc valem para o processo: uma invocação perfilada por vez
+_trava_perfil = threading.Lock()
+
+
+def ativo(event=None):
+    """
+    CLIMA_PERFIL=1, ou perfil=1 na query string do evento.
+    """
+    if os.environ.get("CLIMA_PERFIL", "").lower() in _VERDADEIROS:
+        return True
+    params = (event or {}).get("queryStringParameters") or {}
+    return str(params.get("perfil", "")).lower() in _VERDADEIROS
+
+
+# ============================================================
+# Partida a frio
+# ============================================================
+
+def registrar_importacao(modulo, inicio):
+    """
+    Chamada no fim do módulo do handler: 'inicio' é o perf_counter()
+    lido no começo da importação.
+    """
+    with _trava:
+        _partidas.setdefault(modulo, {})["importacaoSegundos"] = round(time.perf_counter() - inicio, 6)
+
+
+@contextmanager
+def partida(modulo, etapa):
+    """
+    Mede uma etapa da partida (ex.: "primeiraCarga" ao abrir o log).
+    Só a primeira medição de cada etapa fica registrada.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = round(time.perf_counter() - inicio, 6)
+        with _trava:
+            _partidas.setdefault(modulo, {}).setdefault(etapa + "Segundos", duracao)
+
+
+def partidas(modulo):
+    with _trava:
+        return dict(_partidas.get(modulo, {}))
+
+
+# ============================================================
+# Invocações
+# ============================================================
+
+def perfilado(nome, modulo=None):
+    """
+    Decorador do lambda_handler(event, context). Conta as invocações
+    (a primeira do processo é a fria) e, com o perfil ligado, grava o
+    relatório da invocação. Desligado, só chama o handler.
+    """
+    def decorar(handler):
+        origem = modulo or handler.__module__
+
+        @functools.wraps(handler)
+        def embrulho(event, context):
+            with _trava:
+                numero = _invocacoes[nome] = _invocacoes.get(nome, 0) + 1
+            if not ativo(event):
+                return handler(event, context)
+            with _trava_perfil:
+                return _perfilar(handler, event, context, nome, origem, numero)
+        return embrulho
+    return decorar
+
+
+def _relativo(arquivo):
+    if arquivo.startswith(BASE_PATH + os.sep):
+        return os.path.relpath(arquivo, BASE_PATH)
+    return arquivo
+
+
+def _rotulo(chave):
+    arquivo, linha, funcao = chave
+    if arquivo == "~":  # funções embutidas
+        return funcao
+    return f"{_relativo(arquivo)}:{linha}({funcao})"
+
+
+def _funcoes(estatisticas):
+    linhas = []
+    for chave, (_, chamadas, proprio, acumulado, _) in estatisticas.stats.items():
+        linhas.append({
+            "funcao": _rotulo(chave),
+            "chamadas": chamadas,
+            "proprioSegundos": round(proprio, 6),
+            "acumuladoSegundos": round(acumulado, 6)
+        })
+    linhas.sort(key=lambda l: l["proprioSegundos"], reverse=True)
+    return linhas[:FUNCOES_POR_RELATORIO]
+
+
+def _alocacoes(antes, depois):
+    linhas = []
+    for diferenca in depois.compare_to(antes, "lineno")[:ALOCACOES_POR_RELATORIO]:
+        quadro = diferenca.traceback[0]
+        linhas.append({
+            "local": f"{_relativo(quadro.filename)}:{quadro.lineno}",
+            "bytes": diferenca.size_diff,
+            "blocos": diferenca.count_diff
+        })
+    return linhas
+
+
+def _perfilar(handler, event, context, nome, modulo, numero):
+    iniciou_tracemalloc = not tracemalloc.is_tracing()
+    if iniciou_tracemalloc:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    antes = tracemalloc.take_snapshot()
+
+    perfilador = cProfile.Profile()
+    erro = None
+    inicio = time.perf_counter()
+    inicio_cpu = time.process_time()
+    try:
+        perfilador.enable()
+        try:
+            return handler(event, context)
+        finally:
+            perfilador.disable()
+    except Exception as e:
+        erro = repr(e)
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        cpu = time.process_time() - inicio_cpu
+        atual, pico = tracemalloc.get_traced_memory()
+        depois = tracemalloc.take_snapshot()
+        if iniciou_tracemalloc:
+            tracemalloc.stop()
+
+        estatisticas = pstats.Stats(perfilador)
+        relatorio = {
+            "funcao": nome,
+            "pid": os.getpid(),
+            "invocacao": numero,
+            "frio": numero == 1,
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duracaoSegundos": round(duracao, 6),
+            "cpuSegundos": round(cpu, 6),
+            "erro": erro,
+            "partida": partidas(modulo) if numero == 1 else None,
+            "memoria": {
+                "picoBytes": pico,
+                "retidoBytes": atual,
+                "alocacoes": _alocacoes(antes, depois)
+            },
+            "funcoes": _funcoes(estatisticas)
+        }
+        _gravar(relatorio, estatisticas)
+
+
+def _gravar(relatorio, estatisticas):
+    base = os.path.join(
+        DIR_PERFIL,
+        f"{relatorio['funcao']}-{time.strftime('%Y%m%d-%H%M%S')}-{relatorio['pid']}-{relatorio['invocacao']}"
+    )
+    try:
+        os.makedirs(DIR_PERFIL, exist_ok=True)
+        estatisticas.dump_stats(base + ".prof")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    except OSError as erro:
+        # o perfil nunca derruba a invocação
+        print(f"⚠ Não foi possível gravar o perfil em {DIR_PERFIL}: {erro}")
+
+
+# ============================================================
+# Resumo (linha de comando)
+# ============================================================
+
+def carregar_relatorios(diretorio=None, funcao=None):
+    relatorios = []
+    for caminho in sorted(glob.glob(os.path.join(diretorio or DIR_PERFIL, "*.json"))):
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                relatorio = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if funcao is None or relatorio.get("funcao") == funcao:
+            relatorios.append(relatorio)
+    return relatorios
+
+
+def _media(valores):
+    return sum(valores) / len(valores) if valores else None
+
+
+def _mediana(valores):
+    valores = sorted(valores)
+    return valores[len(valores) // 2] if valores else None
+
+
+def resumir(relatorios, top=15):
+    """
+    Por função: invocações frias x quentes (duração média/mediana/máxima),
+    tempos médios da partida e as funções/alocações mais caras somadas
+    entre todas as invocações.
+    """
+    por_funcao = {}
+    for relatorio in relatorios:
+        por_funcao.setdefault(relatorio["funcao"], []).append(relatorio)
+
+    resumo = {}
+    for nome, lista in por_funcao.items():
+        grupos = {}
+        for tipo, frio in (("frias", True), ("quentes", False)):
+            duracoes = [r["duracaoSegundos"] for r in lista if r["frio"] == frio]
+            grupos[tipo] = {
+                "invocacoes": len(duracoes),
+                "mediaSegundos": _media(duracoes),
+                "medianaSegundos": _mediana(duracoes),
+                "maximoSegundos": max(duracoes) if duracoes else None
+            }
+
+        partida = {}
+        for r in lista:
+            for etapa, segundos in (r.get("partida") or {}).items():
+                partida.setdefault(etapa, []).append(segundos)
+
+        funcoes = {}
+        for r in lista:
+            for f in r.get("funcoes", []):
+                total = funcoes.setdefault(f["funcao"], {"funcao": f["funcao"], "proprioSegundos": 0.0,
+                                                         "chamadas": 0, "invocacoes": 0})
+                total["proprioSegundos"] += f["proprioSegundos"]
+                total["chamadas"] += f["chamadas"]
+                total["invocacoes"] += 1
+
+        alocacoes = {}
+        for r in lista:
+            for a in (r.get("memoria") or {}).get("alocacoes", []):
+                total = alocacoes.setdefault(a["local"], {"local": a["local"], "bytes": 0, "invocacoes": 0})
+                total["bytes"] += a["bytes"]
+                total["invocacoes"] += 1
+
+        resumo[nome] = {
+            **grupos,
+            "partida": {etapa: _media(valores) for etapa, valores in partida.items()},
+            "picoMemoriaBytes": max((r.get("memoria") or {}).get("picoBytes", 0) for r in lista),
+            "erros": sum(1 for r in lista if r.get("erro")),
+            "funcoes": sorted(funcoes.values(), key=lambda f: f["proprioSegundos"], reverse=True)[:top],
+            "alocacoes": sorted(alocacoes.values(), key=lambda a: a["bytes"], reverse=True)[:top]
+        }
+    return resumo
+
+
+def _ms(segundos):
+    return "-" if segundos is None else f"{segundos * 1000:.1f} ms"
+
+
+def imprimir_resumo(resumo):
+    if not resumo:
+        print("⚠ Nenhum relatório de perfil encontrado.")
+        return
+    for nome, dados in resumo.items():
+        print(f"\n=== {nome} ===")
+        for tipo in ("frias", "quentes"):
+            g = dados[tipo]
+            print(f"  {tipo:<8} {g['invocacoes']:>5} invocações   média {_ms(g['mediaSegundos']):>11}   "
+                  f"mediana {_ms(g['medianaSegundos']):>11}   máx {_ms(g['maximoSegundos']):>11}")
+        for etapa, segundos in dados["partida"].items():
+            print(f"  partida  {etapa.removesuffix('Segundos'):<18} {_ms(segundos):>11} (média)")
+        print(f"  pico de memória {dados['picoMemoriaBytes'] / 1024:,.0f} KiB   erros {dados['erros']}")
+
+        print(f"\n  {'tempo próprio':>14} {'chamadas':>10} {'invoc.':>7}  função")
+        for f in dados["funcoes"]:
+            print(f"  {_ms(f['proprioSegundos']):>14} {f['chamadas']:>10,} {f['invocacoes']:>7}  {f['funcao']}")
+
+        if dados["alocacoes"]:
+            print(f"\n  {'KiB alocados':>14} {'invoc.':>7}  local")
+            for a in dados["alocacoes"]:
+                print(f"  {a['bytes'] / 1024:>14,.1f} {a['invocacoes']:>7}  {a['local']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumo dos relatórios de perfil dos handlers")
+    parser.add_argument("--dir", default=None, help=f"diretório dos relatórios (padrão: {DIR_PERFIL})")
+    parser.add_argument("--funcao", default=None, help="só os relatórios desta função")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="imprime o resumo em JSON")
+    args = parser.parse_args(argv)
+
+    resumo = resumir(carregar_relatorios(args.dir, args.funcao), args.top)
+    if args.json:
+        print(json.dumps(resumo, indent=2, ensure_ascii=False))
+    else:
+        imprimir_resumo(resumo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Pipeline em processo: etapas ligadas por filas em memória com limite.
+
+No modo "arquivos" cada etapa (RegistrarLeitura -> AvaliarLeitura ->
+registrarauditoria) é um script separado e entrega o trabalho à próxima
+por uma fila durável em disco: cada leitura é serializada e lida de novo
+a cada passagem.
+
+Pipeline roda as etapas em threads do mesmo processo. Cada etapa recebe
+um lote, devolve o lote da etapa seguinte (ou None) e o entrega por uma
+queue.Queue de tamanho 'profundidade': se uma etapa atrasar, as
+anteriores esperam (contrapressão) em vez de acumular lotes na memória.
+Só as etapas gravam em disco, nos pontos que precisam ser duráveis.
+
+Se uma etapa levantar exceção, o pipeline para de aceitar lotes, as
+etapas terminam e executar() levanta a mesma exceção.
+"""
+
+import queue
+import threading
+import time
+
+from clima import metricas
+
+# Lotes em trânsito entre duas etapas
+PROFUNDIDADE_PIPELINE = 4
+
+_FIM = object()
+
+
+class Etapa:
+    """
+    Etapa do pipeline: 'processar(lote)' devolve o lote da próxima etapa
+    (None = nada a repassar). 'finalizar()' (opcional) roda depois do
+    último lote.
+    """
+
+    def __init__(self, nome, processar, finalizar=None):
+        self.nome = nome
+        self.processar = processar
+        self.finalizar = finalizar
+        self.lotes = 0
+        self.itens = 0
+        self.tempo = 0.0        # segundos processando (sem esperar fila)
+
+
+class Pipeline:
+    """
+    Encadeia Etapas com filas em memória de até 'profundidade' lotes.
+
+    Uso:
+        Pipeline([Etapa("registrar", f1), Etapa("avaliar", f2)]).executar(lotes)
+    """
+
+    def __init__(self, etapas, profundidade=PROFUNDIDADE_PIPELINE):
+        self.etapas = list(etapas)
+        self.profundidade = profundidade
+        self._erro = None
+        self._cancelado = threading.Event()
+
+    def _colocar(self, fila, item):
+        # espera curta em loop: não trava para sempre se o pipeline parou
+        while not self._cancelado.is_set():
+            try:
+                fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _receber(self, fila):
+        while not self._cancelado.is_set():
+            try:
+                return fila.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _FIM
+
+    def _rodar_etapa(self, etapa, entrada, saida):
+        try:
+            while True:
+                lote = self._receber(entrada)
+                if lote is _FIM:
+                    break
+                inicio = time.perf_counter()
+                resultado = etapa.processar(lote)
+                duracao = time.perf_counter() - inicio
+                etapa.tempo += duracao
+                if metricas.ATIVO:
+                    metricas.DURACAO_ETAPA.observar(duracao, etapa="pipeline:" + etapa.nome)
+                    metricas.ITENS_ETAPA.inc(len(lote), etapa="pipeline:" + etapa.nome)
+                etapa.lotes += 1
+                etapa.itens += len(lote)
+                if saida is not None and resultado is not None:
+                    if not self._colocar(saida, resultado):
+                        break
+            if etapa.finalizar is not None and not self._cancelado.is_set():
+                etapa.finalizar()
+        except BaseException as erro:
+            if self._erro is None:
+                self._erro = erro
+            self._cancelado.set()
+        finally:
+            if saida is not None:
+                self._colocar(saida, _FIM)
+
+    def executar(self, lotes):
+        """
+        Passa cada lote de 'lotes' (iterável) por todas as etapas e espera
+        o fim. Retorna as métricas por etapa.
+        """
+        filas = [queue.Queue(self.profundidade) for _ in self.etapas]
+        threads = []
+        for i, etapa in enumerate(self.etapas):
+            saida = filas[i + 1] if i + 1 < len(filas) else None
+            thread = threading.Thread(
+                target=self._rodar_etapa,
+                args=(etapa, filas[i], saida),
+                name=f"pipeline-{etapa.nome}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        inicio = time.perf_counter()
+        try:
+            for lote in lotes:
+                if not self._colocar(filas[0], lote):
+                    break
+        finally:
+            self._colocar(filas[0], _FIM)
+            for thread in threads:
+                thread.join()
+        duracao = time.perf_counter() - inicio
+
+        if self._erro is not None:
+            raise self._erro
+        return self.metricas(duracao)
+
+    def metricas(self, duracao=None):
+        return {
+            "duracao": duracao,
+            "etapas": [
+                {
+                    "nome": etapa.nome,
+                    "lotes": etapa.lotes,
+                    "itens": etapa.itens,
+                    "tempo": round(etapa.tempo, 6)
+                }
+                for etapa in self.etapas
+            ]
+        }
@@ -0,0 +1,234 @@
+"""
+Regras de limite por sensor e por tipo de sensor.
+
+O bloco global "limites" (limites.json, ou configAlertas.json enquanto
+ele não for separado) continua valendo como padrão; o bloco opcional
+"regras" sobrescreve campo a campo:
+
+{
+    "limites": {"tempMax": 30, "umiMax": 80},
+    "regras": {
+        "tipos": {
+            "estufa": {"tempMax": 40, "tempMin": 15, "histerese": 1.5}
+        },
+        "sensores": {
+            "estufa-07": {"umiMax": 95}
+        }
+    }
+}
+
+Precedência: sensor > tipo > limites globais. O tipo é o prefixo do
+sensorId antes do primeiro "-" (mesma regra de consultarauditoria.py).
+
+Campos aceitos em qualquer nível:
+  - tempMax / tempMin: temperatura máxima / mínima
+  - umiMax / umiMin:   umidade máxima / mínima
+  - histerese:         folga para SAIR do alerta. Um sensor em alerta só
+                       volta ao normal quando o valor fica 'histerese'
+                       abaixo do máximo (ou acima do mínimo).
+  - nDeM:              [N, M] -> só dispara quando N das últimas M
+                       leituras do sensor estiverem fora dos limites
+  - cooldown:          segundos (pela data da leitura) sem repetir o
+                       alerta do mesmo sensor
+
+nDeM e cooldown não mudam se uma leitura está fora dos limites (a
+máscara e a auditoria); decidem se ela dispara alerta (clima.disparo).
+
+As regras são compiladas uma vez numa tabela sensorId -> Regra, então a
+avaliação é O(1) por leitura. RegrasAlerta recompila sozinho quando a
+fonte de configuração (clima.configuracao.ConfigLimites) detecta que o
+arquivo mudou.
+"""
+
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+CAMPOS_LIMITE = ("tempMax", "tempMin", "umiMax", "umiMin", "histerese", "nDeM", "cooldown")
+
+Regra = namedtuple("Regra", [
+    "temp_max", "temp_min", "umi_max", "umi_min", "histerese", "n_de_m", "cooldown"
+])
+
+_NUMERICOS = {int, float}
+
+
+def tipo_do_sensor(sensor_id):
+    if isinstance(sensor_id, str) and "-" in sensor_id:
+        return sensor_id.split("-")[0]
+    return "desconhecido"
+
+
+def _mesclar(base, sobrescrita):
+    """
+    Retorna uma Regra com os campos de 'sobrescrita' (dict) aplicados
+    sobre 'base' (Regra).
+    """
+    if not sobrescrita:
+        return base
+    valores = dict(zip(CAMPOS_LIMITE, base))
+    for campo in CAMPOS_LIMITE:
+        if campo in sobrescrita:
+            valores[campo] = sobrescrita[campo]
+    if not valores["histerese"]:
+        valores["histerese"] = 0
+    if not valores["cooldown"]:
+        valores["cooldown"] = 0
+    if valores["nDeM"]:
+        n, m = valores["nDeM"]
+        valores["nDeM"] = (int(n), int(m))
+    else:
+        valores["nDeM"] = None
+    return Regra(*(valores[c] for c in CAMPOS_LIMITE))
+
+
+class RegrasCompiladas:
+    """
+    Tabela de regras já resolvidas (sensor > tipo > global).
+    """
+
+    def __init__(self, config):
+        limites = config.get("limites", {}) or {}
+        regras = config.get("regras", {}) or {}
+
+        self.padrao = _mesclar(Regra(None, None, None, None, 0, None, 0), limites)
+
+        self._por_tipo = {
+            tipo: _mesclar(self.padrao, valores)
+            for tipo, valores in (regras.get("tipos", {}) or {}).items()
+        }
+
+        # sensores com regra explícita já entram resolvidos; os demais são
+        # resolvidos na primeira leitura e ficam no cache
+        self._por_sensor = {}
+        for sensor_id, valores in (regras.get("sensores", {}) or {}).items():
+            base = self._por_tipo.get(tipo_do_sensor(sensor_id), self.padrao)
+            self._por_sensor[sensor_id] = _mesclar(base, valores)
+
+    def regra(self, sensor_id):
+        regra = self._por_sensor.get(sensor_id)
+        if regra is None:
+            regra = self._por_tipo.get(tipo_do_sensor(sensor_id), self.padrao)
+            self._por_sensor[sensor_id] = regra
+        return regra
+
+
+def _fora_dos_limites(regra, temp, umi, folga):
+    """
+    True se temp/umi estão fora da faixa [min + folga, max - folga].
+    folga = 0 -> limites estritos (entrar em alerta)
+    folga = histerese -> faixa para continuar em alerta
+    """
+    if type(temp) in _NUMERICOS:
+        if regra.temp_max is not None and temp > regra.temp_max - folga:
+            return True
+        if regra.temp_min is not None and temp < regra.temp_min + folga:
+            return True
+    if type(umi) in _NUMERICOS:
+        if regra.umi_max is not None and umi > regra.umi_max - folga:
+            return True
+        if regra.umi_min is not None and umi < regra.umi_min + folga:
+            return True
+    return False
+
+
+class RegrasAlerta:
+    """
+    Regras de uma fonte de configuração (objeto com obter() -> dict, como
+    ConfigLimites), com recarga a quente e o estado de histerese de cada
+    sensor.
+    """
+
+    def __init__(self, fonte):
+        self.fonte = fonte
+        self._config = None
+        self._compiladas = RegrasCompiladas({})
+        # sensores em alerta (para a histerese); os avaliadores trocam pelo
+        # conjunto do checkpoint (clima.disparo.EstadoDisparo.em_alerta)
+        self.em_alerta = set()
+
+    def compiladas(self):
+        """
+        Regras atuais; recompila se a fonte devolveu uma configuração nova
+        (o cache da fonte devolve o mesmo dict enquanto o arquivo não muda).
+        """
+        config = self.fonte.obter()
+        if config is not self._config:
+            self._compiladas = RegrasCompiladas(config)
+            self._config = config
+        return self._compiladas
+
+    def _decidir(self, sensor_id, regra, temp, umi):
+        acionado = _fora_dos_limites(regra, temp, umi, 0)
+        if not acionado and regra.histerese and sensor_id in self.em_alerta:
+            acionado = _fora_dos_limites(regra, temp, umi, regra.histerese)
+
+        if regra.histerese:
+            if acionado:
+                self.em_alerta.add(sensor_id)
+            else:
+                self.em_alerta.discard(sensor_id)
+        return acionado
+
+    def avaliar(self, leitura):
+        """
+        Avalia uma leitura (dict da fila). Retorna True se gera alerta.
+        """
+        sensor_id = leitura.get("sensorId")
+        regra = self.compiladas().regra(sensor_id)
+        return self._decidir(sensor_id, regra, leitura.get("temperatura"), leitura.get("umidade"))
+
+    def mascara(self, lote):
+        """
+        Máscara de alerta para um LoteColunar (clima.avaliacao).
+
+        Os limites são expandidos por código de sensor e comparados de uma
+        vez; só as leituras de sensores com histerese são resolvidas em
+        sequência, porque dependem do estado da leitura anterior.
+        """
+        compiladas = self.compiladas()
+        regras = [compiladas.regra(sensor_id) for sensor_id in lote.sensores]
+
+        if np is None or not isinstance(lote.temperaturas, np.ndarray):
+            return [
+                self._decidir(lote.sensores[c], regras[c], t, u)
+                for c, t, u in zip(lote.codigos, lote.temperaturas, lote.umidades)
+            ]
+
+        inf = np.inf
+        t_max = np.array([inf if r.temp_max is None else r.temp_max for r in regras])
+        t_min = np.array([-inf if r.temp_min is None else r.temp_min for r in regras])
+        u_max = np.array([inf if r.umi_max is None else r.umi_max for r in regras])
+        u_min = np.array([-inf if r.umi_min is None else r.umi_min for r in regras])
+        hist = np.array([r.histerese for r in regras], dtype=np.float64)
+
+        c = lote.codigos
+        temps = lote.temperaturas
+        umis = lote.umidades
+
+        mascara = (
+            (temps > t_max[c]) | (temps < t_min[c]) |
+            (umis > u_max[c]) | (umis < u_min[c])
+        )
+
+        if not hist.any():
+            return mascara
+
+        h = hist[c]
+        banda = (
+            (temps > t_max[c] - h) | (temps < t_min[c] + h) |
+            (umis > u_max[c] - h) | (umis < u_min[c] + h)
+        )
+        for i in np.flatnonzero(h > 0).tolist():
+            sensor_id = lote.sensores[c[i]]
+            acionado = bool(mascara[i]) or (sensor_id in self.em_alerta and bool(banda[i]))
+            mascara[i] = acionado
+            if acionado:
+                self.em_alerta.add(sensor_id)
+            else:
+                self.em_alerta.discard(sensor_id)
+
+        return mascara
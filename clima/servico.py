@@ -0,0 +1,398 @@
+"""
+Lógica da API de auditoria/leituras, sem framework web.
+
+app.py (Flask) e app_asgi.py (ASGI) expõem as mesmas rotas, e as
+Lambdas de functions/ (registrarauditoria, consultarauditoria,
+RegistrarLeitura) fazem as mesmas gravações e consultas. Aqui fica a
+única implementação: os caminhos, os logs/índices abertos sob demanda,
+a fila e o consumidor de auditoria, as consultas e a interpretação dos
+corpos/parâmetros. Cada app só traduz requisição e resposta e cada
+Lambda só acrescenta o handler e as ferramentas de terminal.
+
+As constantes de caminho são globais do módulo para que testes e
+benchmarks possam redirecioná-las (e zerar _log_auditoria/_log_leituras
+para reabrir os logs).
+"""
+
+import threading
+from datetime import datetime
+
+from clima import armazenamento, metricas
+from clima.agregados import AgregadosLeituras
+from clima.armazenamento import abrir_log
+from clima.configuracao import ConfigLimites
+from clima.consumidor import ConsumidorFila, INTERVALO_CONSUMIDOR
+from clima.datas import interpretar_limite
+from clima.fila import abrir_fila, drenar
+from clima.indices import IndiceAuditoria, IndiceLeituras
+from clima.leituras import normalizar_lote
+from clima.lote import TAMANHO_LOTE
+from clima.paginacao import Pagina, decodificar_cursor
+
+# ============================================================
+# Configuração de paths (de clima.armazenamento, compartilhados com as
+# Lambdas; CLIMA_DADOS / CLIMA_FILAS mudam os diretórios)
+# ============================================================
+
+DATA_PATH = armazenamento.DIR_DADOS
+QUEUE_PATH = armazenamento.DIR_FILAS
+
+ARQ_AUDITORIA = armazenamento.ARQ_AUDITORIA
+ARQ_FILA_AUDITORIA = armazenamento.ARQ_FILA_AUDITORIA
+ARQ_CONFIG_ALERTAS = armazenamento.ARQ_CONFIG_ALERTAS
+ARQ_LIMITES = armazenamento.ARQ_LIMITES
+
+# Filas duráveis (SQLite); filaAuditoria.json é importado na primeira abertura
+ARQ_FILAS = armazenamento.ARQ_FILAS
+
+# Log segmentado que substitui a regravação de auditoriaEventos.json
+# (o arquivo antigo é importado na primeira abertura)
+DIR_AUDITORIA = armazenamento.DIR_AUDITORIA
+
+# Leituras recebidas pelo POST /leituras (leituras.json é importado na
+# primeira abertura) e fila lida pela Lambda AvaliarLeituras
+ARQ_LEITURAS = armazenamento.ARQ_LEITURAS
+ARQ_FILA_LEITURAS = armazenamento.ARQ_FILA_LEITURAS
+DIR_LEITURAS = armazenamento.DIR_LEITURAS
+
+# Consumidor da fila de auditoria em segundo plano (GET /auditoria só lê)
+INTERVALO_CONSUMIDOR_AUDITORIA = INTERVALO_CONSUMIDOR   # segundos
+TAMANHO_LOTE_CONSUMIDOR_AUDITORIA = TAMANHO_LOTE
+
+# Valores de somenteAlerta entendidos como "sim"
+VALORES_VERDADEIROS = ("1", "true", "t", "sim", "yes", "y")
+
+
+# ============================================================
+# Armazenamento (log de auditoria e fila)
+# ============================================================
+
+_log_auditoria = None
+_indice_auditoria = None
+
+# as requisições rodam em threads: o primeiro acesso abre cada log uma
+# vez só, e o log é publicado depois dos índices/agregados que o observam
+_trava_logs = threading.Lock()
+
+
+def obter_log_auditoria():
+    global _log_auditoria, _indice_auditoria
+    if _log_auditoria is None:
+        with _trava_logs:
+            if _log_auditoria is None:
+                log = abrir_log(DIR_AUDITORIA, legado=ARQ_AUDITORIA)
+                # o índice observa o log e é atualizado a cada gravação
+                _indice_auditoria = IndiceAuditoria(log)
+                _log_auditoria = log
+    return _log_auditoria
+
+
+def obter_indice_auditoria():
+    obter_log_auditoria()
+    return _indice_auditoria
+
+
+def obter_fila_auditoria():
+    return abrir_fila(
+        ARQ_FILAS, "auditoria",
+        legado=ARQ_FILA_AUDITORIA, chaves_legado=("mensagens", "eventos")
+    )
+
+
+_log_leituras = None
+_indice_leituras = None
+_agregados_leituras = None
+
+
+def obter_log_leituras():
+    global _log_leituras, _indice_leituras, _agregados_leituras
+    if _log_leituras is None:
+        with _trava_logs:
+            if _log_leituras is None:
+                log = abrir_log(DIR_LEITURAS, legado=ARQ_LEITURAS, chave_legado="leituras")
+                # índice por sensorId e data da leitura, atualizado a cada gravação
+                _indice_leituras = IndiceLeituras(log)
+                # agregados 1m/1h/1d por sensor, também atualizados a cada gravação
+                _agregados_leituras = AgregadosLeituras(log)
+                # publicado só com índice e agregados prontos
+                _log_leituras = log
+    return _log_leituras
+
+
+def obter_indice_leituras():
+    obter_log_leituras()
+    return _indice_leituras
+
+
+def obter_agregados_leituras():
+    obter_log_leituras()
+    return _agregados_leituras
+
+
+def obter_fila_leituras():
+    return abrir_fila(ARQ_FILAS, "leituras", legado=ARQ_FILA_LEITURAS)
+
+
+# ============================================================
+# Lógica de LEITURAS (POST /leituras e a Lambda RegistrarLeitura)
+# ============================================================
+
+@metricas.etapa("registrar")
+def registrar_leituras_lote(leituras, tamanho_lote=TAMANHO_LOTE):
+    """
+    Registra várias leituras (dicts com sensorId, temperatura, umidade e
+    date opcional) de uma vez: o lote inteiro é validado antes de gravar
+    e cada bloco de até 'tamanho_lote' leituras custa UMA escrita no log
+    e UMA transação na fila.
+
+    Levanta ValueError (nada é gravado) se alguma leitura for inválida.
+    Retorna a lista de leituras gravadas.
+    """
+    leituras = normalizar_lote(leituras)
+
+    log = obter_log_leituras()
+    fila = obter_fila_leituras()
+    for inicio in range(0, len(leituras), tamanho_lote):
+        bloco = leituras[inicio:inicio + tamanho_lote]
+        log.acrescentar_lote(bloco)
+        fila.enviar_lote(bloco)
+
+    if metricas.ATIVO:
+        metricas.ITENS_ETAPA.inc(len(leituras), etapa="registrar")
+    return leituras
+
+
+def consultar_leituras(sensorId=None, desde=None, ate=None, limite=50, cursor=None):
+    """
+    Consulta as leituras gravadas, mais recentes primeiro.
+    Filtros:
+      - sensorId
+      - desde / ate (data da leitura; epoch, ISO ou "dd/mm/aaaa HH:MM:SS")
+      - cursor      (proximo_cursor da página anterior)
+
+    O índice temporal faz busca binária no intervalo, então
+    "últimos 15 minutos do sensor-07" não lê o histórico inteiro.
+    Retorna uma Pagina (iterador preguiçoso com 'proximo_cursor').
+    """
+    posicoes = obter_indice_leituras().buscar(
+        sensorId=sensorId,
+        desde=interpretar_limite(desde),
+        ate=interpretar_limite(ate),
+        antes_de=decodificar_cursor(cursor)
+    )
+    return Pagina(obter_log_leituras(), posicoes, limite)
+
+
+def consultar_agregados(janela="1h", sensorId=None, desde=None, ate=None, limite=None):
+    """
+    Mín/máx/média de temperatura e umidade por sensor em janelas fixas
+    (1m, 1h, 1d), mais recentes primeiro, sem reler as leituras brutas
+    (GET /leituras/agregados; limite None = todas as janelas).
+    Levanta ValueError se a janela ou as datas forem inválidas.
+    """
+    return obter_agregados_leituras().consultar(
+        janela=janela,
+        sensorId=sensorId,
+        desde=interpretar_limite(desde),
+        ate=interpretar_limite(ate),
+        limite=limite
+    )
+
+
+# ============================================================
+# Lógica de AUDITORIA (API e Lambdas registrarauditoria/consultarauditoria)
+# ============================================================
+
+def montar_registro_auditoria(detalhes):
+    agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+    return {
+        "date": agora,
+        "detalhes": detalhes or {}
+    }
+
+
+def detalhes_do_corpo(dados):
+    """
+    Detalhes do evento a partir do corpo do POST /auditoria, que pode
+    vir como {"detalhes": {...}} ou com os campos direto. Sem 'date',
+    usa a hora atual; sem 'acionado', False.
+    """
+    if not isinstance(dados, dict):
+        dados = {}
+
+    # aceita tanto {"detalhes": {...}} quanto {...} direto
+    if "detalhes" in dados and isinstance(dados["detalhes"], dict):
+        detalhes = dados["detalhes"]
+    else:
+        detalhes = dados
+
+    if "date" not in detalhes:
+        detalhes["date"] = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    if "acionado" not in detalhes:
+        detalhes["acionado"] = False
+    return detalhes
+
+
+def registrar_registro_auditoria(detalhes):
+    """
+    Acrescenta o registro no log de auditoria (date/auditoria/):
+    { "date": "...", "detalhes": {...} }
+
+    O documento antigo auditoriaEventos.json pode ser gerado com:
+    python -m clima.log_segmentado exportar date/auditoria date/auditoriaEventos.json
+    """
+    registro = montar_registro_auditoria(detalhes)
+
+    obter_log_auditoria().acrescentar(registro)
+
+    return registro
+
+
+def registrar_evento_na_fila(detalhes):
+    """
+    Simula o produtor de auditoria:
+    envia para a fila de auditoria (queue/filas.db) uma mensagem no formato:
+    { "detalhes": { ... } }
+    """
+    mensagem = {"detalhes": detalhes or {}}
+
+    obter_fila_auditoria().enviar(mensagem)
+
+    return mensagem
+
+
+def mensagem_para_registro(msg):
+    if isinstance(msg, dict) and "detalhes" in msg:
+        return montar_registro_auditoria(msg.get("detalhes") or {})
+    return montar_registro_auditoria(msg or {})
+
+
+def processar_fila_para_banco(tamanho_lote=TAMANHO_LOTE):
+    """
+    Consumidor da fila (execução única; o consumidor em segundo plano
+    chama o mesmo drenar periodicamente):
+    - recebe até 'tamanho_lote' mensagens por vez
+    - monta os registros de auditoria em memória
+    - grava cada lote no log numa única escrita
+    - confirma o lote na fila só depois de gravado
+    - retorna a lista de registros gravados
+    """
+    return drenar(obter_fila_auditoria(), obter_log_auditoria(), mensagem_para_registro, tamanho_lote)
+
+
+_consumidor_auditoria = None
+_trava_consumidor = threading.Lock()
+
+
+def iniciar_consumidor_auditoria():
+    """
+    Inicia (uma vez por processo) a thread que drena a fila de auditoria
+    para o log a cada INTERVALO_CONSUMIDOR_AUDITORIA segundos.
+    """
+    global _consumidor_auditoria
+    with _trava_consumidor:
+        if _consumidor_auditoria is None:
+            _consumidor_auditoria = ConsumidorFila(
+                obter_fila_auditoria(),
+                obter_log_auditoria(),
+                mensagem_para_registro,
+                intervalo=INTERVALO_CONSUMIDOR_AUDITORIA,
+                tamanho_lote=TAMANHO_LOTE_CONSUMIDOR_AUDITORIA,
+                nome="consumidor-auditoria"
+            )
+        return _consumidor_auditoria.iniciar()
+
+
+def parar_consumidor_auditoria():
+    """
+    Para a thread do consumidor (se houver); a próxima chamada de
+    iniciar_consumidor_auditoria() cria outro, com os caminhos atuais.
+    """
+    global _consumidor_auditoria
+    with _trava_consumidor:
+        if _consumidor_auditoria is not None:
+            _consumidor_auditoria.parar()
+            _consumidor_auditoria = None
+
+
+@metricas.etapa("consultar_eventos")
+def consultar_eventos(
+    sensorId=None,
+    tipo_evento=None,
+    tipo_sensor=None,
+    somente_acionados=False,
+    limite=50,
+    desde=None,
+    ate=None,
+    cursor=None
+):
+    """
+    Consulta os registros gravados no log de auditoria (date/auditoria/)
+    usando o índice secundário: só os registros que casam são lidos.
+    Filtros:
+      - sensorId          (detalhes.sensorId)
+      - tipo_evento       (campo tipoEvento)
+      - tipo_sensor       (detalhes.tipoSensor)
+      - somente_acionados (detalhes.acionado == True)
+      - desde / ate       (data do registro; epoch, ISO ou "dd/mm/aaaa HH:MM:SS")
+      - cursor            (proximo_cursor da página anterior)
+      - limite            (0 = todos)
+
+    Retorna uma Pagina: iterador preguiçoso dos registros (mais recentes
+    primeiro) com o 'proximo_cursor' da página seguinte (ou None).
+    Levanta ValueError se data, cursor ou limite forem inválidos.
+    """
+    posicoes = obter_indice_auditoria().buscar(
+        sensorId=sensorId,
+        tipo_evento=tipo_evento,
+        tipo_sensor=tipo_sensor,
+        somente_acionados=somente_acionados,
+        desde=interpretar_limite(desde),
+        ate=interpretar_limite(ate),
+        antes_de=decodificar_cursor(cursor)
+    )
+    return Pagina(obter_log_auditoria(), posicoes, limite)
+
+
+def consultar_auditoria(args):
+    """
+    GET /auditoria a partir dos parâmetros da URL ('args': nome -> valor,
+    ausentes = None). Retorna (Pagina, ndjson?); levanta ValueError se
+    data ou cursor forem inválidos.
+    """
+    somente_alerta = (args.get("somenteAlerta") or "").lower() in VALORES_VERDADEIROS
+    ndjson = (args.get("formato") or "").lower() == "ndjson"
+
+    limite = args.get("limite")
+    try:
+        limite = int("0" if ndjson else "50") if limite is None else int(limite)
+    except ValueError:
+        limite = 50
+
+    eventos = consultar_eventos(
+        sensorId=args.get("sensorId"),
+        somente_acionados=somente_alerta,
+        limite=limite,
+        desde=args.get("desde"),
+        ate=args.get("ate"),
+        cursor=args.get("cursor")
+    )
+    return eventos, ndjson
+
+
+def obter_config_alerta():
+    # limites.json em cache (validado por stat); configAlertas.json é o legado
+    dados = ConfigLimites(ARQ_LIMITES, legado=ARQ_CONFIG_ALERTAS).obter()
+    limites = dados.get("limites", {})
+    return {
+        "tempMax": limites.get("tempMax"),
+        "umiMax": limites.get("umiMax"),
+        "tempMin": limites.get("tempMin"),
+        "umiMin": limites.get("umiMin"),
+        "histerese": limites.get("histerese"),
+        "nDeM": limites.get("nDeM"),
+        "cooldown": limites.get("cooldown"),
+        # regras por tipo de sensor / por sensor (sobrescrevem os limites)
+        "regras": dados.get("regras", {})
+    }
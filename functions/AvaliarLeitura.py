@@ -1,43 +1,112 @@
-import json
 import os
+import sys
 from datetime import datetime
 
 BASE_PATH = os.path.dirname(os.path.dirname(__file__))  
 
-DATA_PATH = os.path.join(BASE_PATH, "data")
-QUEUE_PATH = os.path.join(BASE_PATH, "queue")
+# permite importar o pacote compartilhado "clima" rodando o script direto
+if os.path.abspath(BASE_PATH) not in sys.path:
+    sys.path.insert(0, os.path.abspath(BASE_PATH))
 
-ARQ_LEITURAS = os.path.join(DATA_PATH, "leituras.json")
-ARQ_FILA = os.path.join(QUEUE_PATH, "filaLeituras.json")
-ARQ_CONFIG_ALERTAS = os.path.join(DATA_PATH, "configAlertas.json")
-ARQ_NOTIFICACOES = os.path.join(QUEUE_PATH, "notificacaoAlerta.json")
+from clima import HistoricoAlertas, armazenamento, metricas  # noqa: E402
+from clima.arquivos import trava  # noqa: E402
+from clima.avaliacao import LoteColunar  # noqa: E402
+from clima.configuracao import ConfigLimites  # noqa: E402
+from clima.disparo import EstadoDisparo  # noqa: E402
+from clima.fila import abrir_fila  # noqa: E402
+from clima.paralelo import AvaliadorParalelo  # noqa: E402
+from clima.regras import RegrasAlerta  # noqa: E402
 
-ARQ_FILA_AUDITORIA = os.path.join(QUEUE_PATH, "filaAuditoria.json")
+# Caminhos compartilhados com app.py e as outras Lambdas (clima.armazenamento)
+DATA_PATH = armazenamento.DIR_DADOS
+QUEUE_PATH = armazenamento.DIR_FILAS
 
+ARQ_LEITURAS = armazenamento.ARQ_LEITURAS
+ARQ_FILA = armazenamento.ARQ_FILA_LEITURAS
+ARQ_CONFIG_ALERTAS = armazenamento.ARQ_CONFIG_ALERTAS
+ARQ_LIMITES = armazenamento.ARQ_LIMITES
 
-def carregar_json(caminho):
-    if not os.path.exists(caminho):
-        return {}
-    with open(caminho, "r") as f:
-        return json.load(f)
+# Histórico de alertas (antes era a lista "alertas" de configAlertas.json)
+DIR_ALERTAS = armazenamento.DIR_ALERTAS
 
+# Fila de notificações antiga; importada na primeira abertura da fila
+# durável "notificacoes", consumida por NotificarAlerta.py
+ARQ_NOTIFICACOES = armazenamento.ARQ_NOTIFICACOES
 
-def salvar_json(caminho, dados):
-    with open(caminho, "w") as f:
-        json.dump(dados, f, indent=4)
+# Checkpoint do estado de disparo por sensor (janelas nDeM, cooldown)
+ARQ_ESTADO_DISPARO = armazenamento.ARQ_ESTADO_DISPARO
 
+ARQ_FILA_AUDITORIA = armazenamento.ARQ_FILA_AUDITORIA
 
-def enviar_evento_auditoria(leitura, alerta_acionado):
+# Filas duráveis (SQLite); os arquivos JSON acima são importados na
+# primeira abertura
+ARQ_FILAS = armazenamento.ARQ_FILAS
+
+# Leituras recebidas (e confirmadas) por vez
+TAMANHO_LOTE_AVALIACAO = 10000
+
+# "lote":    avalia a fila inteira de uma vez (colunar/NumPy) e grava em bloco
+# "simples": loop leitura a leitura, com uma mensagem por leitura
+# "paralelo": como "lote", com o lote dividido por sensor entre processos
+MODO_AVALIACAO = "lote"
+
+# Processos do modo "paralelo" (None = um por núcleo)
+PROCESSOS_AVALIACAO = None
+
+
+def obter_fila_leituras():
+    return abrir_fila(ARQ_FILAS, "leituras", legado=ARQ_FILA)
+
+
+def obter_fila_notificacoes():
+    return abrir_fila(
+        ARQ_FILAS, "notificacoes",
+        legado=ARQ_NOTIFICACOES, chaves_legado=("notificacoes",)
+    )
+
+
+def obter_fila_auditoria():
+    # "eventos" era onde esta Lambda gravava antes; o consumidor lia só
+    # "mensagens", então eventos antigos pendentes também são importados
+    return abrir_fila(
+        ARQ_FILAS, "auditoria",
+        legado=ARQ_FILA_AUDITORIA, chaves_legado=("mensagens", "eventos")
+    )
+
+
+_historico_alertas = None
+
+
+def obter_historico_alertas():
     """
-    Envia para fila de auditoria no formato desejado.
+    Histórico de alertas (date/alertas/); os alertas antigos de
+    configAlertas.json são importados na primeira abertura.
+    """
+    global _historico_alertas
+    if _historico_alertas is None or _historico_alertas.diretorio != DIR_ALERTAS:
+        _historico_alertas = HistoricoAlertas(DIR_ALERTAS, legado=ARQ_CONFIG_ALERTAS)
+    return _historico_alertas
+
+
+_regras = None
+
+
+def obter_regras():
     """
-    fila_audit = carregar_json(ARQ_FILA_AUDITORIA)
+    Regras de limite (globais, por tipo e por sensor) compiladas a partir
+    de limites.json (ou configAlertas.json, se ainda não separado) e
+    recompiladas quando o arquivo muda.
+    """
+    global _regras
+    fonte = _regras.fonte if _regras else None
+    if fonte is None or (fonte.caminho, fonte.legado) != (ARQ_LIMITES, ARQ_CONFIG_ALERTAS):
+        _regras = RegrasAlerta(ConfigLimites(ARQ_LIMITES, legado=ARQ_CONFIG_ALERTAS))
+    return _regras
 
-    if "eventos" not in fila_audit:
-        fila_audit["eventos"] = []
 
-    evento = {
-        "date": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+def montar_evento_auditoria(leitura, alerta_acionado, agora=None):
+    return {
+        "date": agora or datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
         "detalhes": {
             "sensorId": leitura["sensorId"],
             "temperatura": leitura["temperatura"],
@@ -47,44 +116,51 @@ def enviar_evento_auditoria(leitura, alerta_acionado):
         }
     }
 
-    fila_audit["eventos"].append(evento)
-    salvar_json(ARQ_FILA_AUDITORIA, fila_audit)
 
-    print("📤 Evento de auditoria registrado na fila.")
-
-
-def avaliar_leituras():
-    fila = carregar_json(ARQ_FILA)
+def enviar_evento_auditoria(leitura, alerta_acionado):
+    """
+    Envia para fila de auditoria no formato desejado.
+    """
+    enviar_eventos_auditoria([leitura], [alerta_acionado])
 
-    if "mensagens" not in fila or len(fila["mensagens"]) == 0:
-        print("⚠ Fila vazia. Nada para avaliar.")
-        return
+    print("📤 Evento de auditoria registrado na fila.")
 
-    config = carregar_json(ARQ_CONFIG_ALERTAS)
-    if "alertas" not in config:
-        config["alertas"] = []
 
-    limites = config.get("limites", {})
-    tempMax = limites.get("tempMax")
-    umiMax = limites.get("umiMax")
+def enviar_eventos_auditoria(leituras, acionados):
+    """
+    Envia um evento de auditoria por leitura numa única transação
+    da fila de auditoria.
+    """
+    agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    obter_fila_auditoria().enviar_lote(
+        montar_evento_auditoria(leitura, acionado, agora)
+        for leitura, acionado in zip(leituras, acionados)
+    )
 
-    notificacoes = carregar_json(ARQ_NOTIFICACOES)
-    if "notificacoes" not in notificacoes:
-        notificacoes["notificacoes"] = []
 
-    print("\n=== Avaliando Leituras da Fila ===")
+def avaliar_uma_a_uma(leituras, regras, alertas, notificacoes, estado=None, ids=None):
+    """
+    Modo "simples": avalia e envia para auditoria leitura por leitura.
+    A auditoria registra se a leitura saiu dos limites; o alerta só é
+    disparado se o estado do sensor permitir (nDeM, cooldown, repetição).
+    """
+    if estado is None:
+        estado = EstadoDisparo()
+    if ids is None:
+        ids = [None] * len(leituras)
 
-    for leitura in fila["mensagens"]:
+    for leitura, id_mensagem in zip(leituras, ids):
         sensor = leitura["sensorId"]
         temp = leitura["temperatura"]
         umi = leitura["umidade"]
 
-        temp_alerta = tempMax is not None and temp > tempMax
-        umi_alerta = umiMax is not None and umi > umiMax
+        alerta_acionado = regras.avaliar(leitura)
+        regra = regras.compiladas().regra(sensor)
 
-        alerta_acionado = temp_alerta or umi_alerta
+        if alerta_acionado and not estado.decidir(regra, leitura, True, id_mensagem):
+            print(f"⚠ Sensor {sensor} fora dos limites (alerta retido por nDeM/cooldown).")
 
-        if alerta_acionado:
+        elif alerta_acionado:
             print(f"🚨 ALERTA! Sensor {sensor} ultrapassou os limites!")
 
             alerta = {
@@ -94,27 +170,155 @@ def avaliar_leituras():
                 "date": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
             }
 
-            config["alertas"].append(alerta)
+            alertas.append(alerta)
             notificacoes["notificacoes"].append(alerta)
+            if metricas.ATIVO:
+                metricas.ALERTAS.inc()
 
-            print("✔ Gravado em configAlertas.json")
-            print("✔ Gravado em notificacaoAlerta.json")
-            print("✔ Notificação SNS simulada (SMS enviado)")
+            print("✔ Gravado no histórico de alertas")
+            print("✔ Enviado para a fila de notificações")
 
         else:
+            estado.decidir(regra, leitura, False, id_mensagem)
             print(f"✔ Sensor {sensor}: dentro dos limites.")
 
         # 🔵 SEMPRE manda para auditoria agora
         enviar_evento_auditoria(leitura, alerta_acionado)
 
-    salvar_json(ARQ_CONFIG_ALERTAS, config)
-    salvar_json(ARQ_NOTIFICACOES, notificacoes)
 
-    fila["mensagens"] = []
-    salvar_json(ARQ_FILA, fila)
+@metricas.etapa("avaliar")
+def decidir_lote(leituras, regras, estado, ids=None, avaliador=None):
+    """
+    Máscara (fora dos limites), alertas disparados e número de sensores
+    de um lote, sem gravar nada. Usado pelo modo "lote" e pelo pipeline
+    em processo (ExecutarPipeline.py).
+    """
+    if avaliador is None:
+        lote = LoteColunar(leituras)
+        sensores = len(lote.sensores)
+        mascara = regras.mascara(lote)
+        acionados = estado.filtrar(leituras, mascara, regras.compiladas().regra, ids)
+    else:
+        sensores = len({leitura.get("sensorId") for leitura in leituras})
+        mascara, acionados = avaliador.avaliar(leituras, regras, estado, ids)
+
+    agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    novos = [
+        {
+            "sensorId": leituras[i]["sensorId"],
+            "temperatura": leituras[i]["temperatura"],
+            "umidade": leituras[i]["umidade"],
+            "date": agora
+        }
+        for i in acionados
+    ]
+    if metricas.ATIVO:
+        metricas.ITENS_ETAPA.inc(len(leituras), etapa="avaliar")
+        metricas.ALERTAS.inc(len(novos))
+    return mascara, novos, sensores
+
+
+def avaliar_em_lote(leituras, regras, alertas, notificacoes, estado=None, ids=None, avaliador=None):
+    """
+    Modo "lote": converte as leituras em colunas, calcula a máscara de
+    alerta numa passada vetorizada e grava alertas/auditoria em bloco.
+    Gera os mesmos registros do modo "simples".
+
+    Com 'avaliador' (AvaliadorParalelo, modo "paralelo") a máscara e a
+    decisão de disparo são calculadas por sensor em vários processos;
+    a gravação continua aqui, na ordem do lote.
+    """
+    if estado is None:
+        estado = EstadoDisparo()
+
+    mascara, novos, sensores = decidir_lote(leituras, regras, estado, ids, avaliador)
+
+    alertas.extend(novos)
+    notificacoes["notificacoes"].extend(novos)
+
+    enviar_eventos_auditoria(leituras, (bool(a) for a in mascara))
+
+    fora = sum(1 for a in mascara if a)
+    print(f"🚨 {len(novos)} alertas em {len(leituras)} leituras "
+          f"({sensores} sensores, {fora} fora dos limites).")
+    if novos:
+        print("✔ Gravado no histórico de alertas")
+        print(f"✔ {len(novos)} alertas enviados para a fila de notificações")
+    print(f"📤 {len(leituras)} eventos de auditoria registrados na fila.")
+
+
+def avaliar_leituras(
+    modo=MODO_AVALIACAO,
+    tamanho_lote=TAMANHO_LOTE_AVALIACAO,
+    processos=PROCESSOS_AVALIACAO
+):
+    """
+    Consome a fila de leituras em lotes. Cada lote só é confirmado
+    (removido da fila) depois que alertas, notificações e eventos de
+    auditoria dele foram gravados; se o processo cair no meio, o lote
+    volta para a fila quando a visibilidade expirar.
+
+    'processos' só vale no modo "paralelo".
+    """
+    fila = obter_fila_leituras()
+    mensagens = fila.receber(tamanho_lote)
+
+    if not mensagens:
+        print("⚠ Fila vazia. Nada para avaliar.")
+        return
+
+    regras = obter_regras()
+    estado = EstadoDisparo()
+    avaliador = AvaliadorParalelo(processos) if modo == "paralelo" else None
+
+    print("\n=== Avaliando Leituras da Fila ===")
+
+    try:
+        _avaliar_fila(fila, mensagens, modo, tamanho_lote, regras, estado, avaliador)
+    finally:
+        if avaliador is not None:
+            avaliador.encerrar()
 
     print("\n✔ Fila processada e limpa!")
 
 
+def _avaliar_fila(fila, mensagens, modo, tamanho_lote, regras, estado, avaliador):
+    while mensagens:
+        leituras = [m.corpo for m in mensagens]
+        ids = [m.id for m in mensagens]
+        alertas = []
+        notificacoes = {"notificacoes": []}
+
+        # o estado de disparo é lido e gravado sob trava: outro avaliador
+        # não pode intercalar leituras do mesmo sensor neste lote
+        with trava(ARQ_ESTADO_DISPARO):
+            estado.caminho = ARQ_ESTADO_DISPARO
+            estado.carregar()
+            # lacunas abaixo do menor id da fila (ids de outras filas,
+            # mensagens já confirmadas) não voltam mais
+            estado.compactar(fila.menor_id())
+            # histerese: sensores em alerta no checkpoint continuam em alerta
+            regras.em_alerta = estado.em_alerta
+
+            if modo in ("lote", "paralelo"):
+                avaliar_em_lote(leituras, regras, alertas, notificacoes, estado, ids, avaliador)
+            else:
+                avaliar_uma_a_uma(leituras, regras, alertas, notificacoes, estado, ids)
+
+            obter_historico_alertas().registrar(alertas)
+            # o envio (agrupado e com limite de taxa) é feito pelo
+            # despachante de NotificarAlerta.py, fora deste loop
+            obter_fila_notificacoes().enviar_lote(notificacoes["notificacoes"])
+
+            # checkpoint antes de confirmar: se cair depois daqui, o lote
+            # volta para a fila mas as leituras repetidas não disparam de novo
+            estado.salvar()
+
+        fila.confirmar(mensagens)
+        mensagens = fila.receber(tamanho_lote)
+
+
 if __name__ == "__main__":
+    # CLIMA_METRICAS_ARQUIVO=metricas.prom grava as métricas periodicamente
+    metricas.configurar_pelo_ambiente()
     avaliar_leituras()
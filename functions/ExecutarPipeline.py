@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from itertools import islice
+
+BASE_PATH = os.path.dirname(os.path.dirname(__file__))
+
+# permite importar o pacote compartilhado "clima" rodando o script direto
+if os.path.abspath(BASE_PATH) not in sys.path:
+    sys.path.insert(0, os.path.abspath(BASE_PATH))
+
+from clima import metricas  # noqa: E402
+from clima.arquivos import trava  # noqa: E402
+from clima.disparo import EstadoDisparo  # noqa: E402
+from clima.leituras import interpretar_ndjson, normalizar_lote  # noqa: E402
+from clima.lote import TAMANHO_LOTE  # noqa: E402
+from clima.pipeline import Etapa, Pipeline, PROFUNDIDADE_PIPELINE  # noqa: E402
+from functions import AvaliarLeitura, RegistrarLeitura, registrarauditoria  # noqa: E402
+
+# "processo": RegistrarLeitura -> AvaliarLeitura -> registrarauditoria
+#             em threads deste processo, ligadas por filas em memória
+# "arquivos": as três Lambdas em sequência, passando pelas filas duráveis
+MODO_PIPELINE = "processo"
+
+
+def em_lotes(itens, tamanho_lote):
+    iterador = iter(itens)
+    while True:
+        lote = list(islice(iterador, tamanho_lote))
+        if not lote:
+            return
+        yield lote
+
+
+def registrar(lote):
+    """
+    Etapa 1: valida e grava as leituras no log de leituras (durável:
+    o histórico e os agregados vêm dele). Não passa pela fila de leituras.
+    """
+    leituras = normalizar_lote(lote)
+    RegistrarLeitura.obter_log_leituras().acrescentar_lote(leituras)
+    return leituras
+
+
+def criar_etapa_avaliar():
+    """
+    Etapa 2: avalia o lote como o modo "lote" de AvaliarLeitura. Alertas
+    (histórico e fila de notificações) e o checkpoint do estado de
+    disparo são gravados; os eventos de auditoria seguem em memória.
+    """
+    regras = AvaliarLeitura.obter_regras()
+    estado = EstadoDisparo()
+    historico = AvaliarLeitura.obter_historico_alertas()
+    notificacoes = AvaliarLeitura.obter_fila_notificacoes()
+
+    def avaliar(leituras):
+        with trava(AvaliarLeitura.ARQ_ESTADO_DISPARO):
+            estado.caminho = AvaliarLeitura.ARQ_ESTADO_DISPARO
+            estado.carregar()
+            regras.em_alerta = estado.em_alerta
+            mascara, novos, _ = AvaliarLeitura.decidir_lote(leituras, regras, estado)
+            historico.registrar(novos)
+            notificacoes.enviar_lote(novos)
+            estado.salvar()
+
+        agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        return [
+            registrarauditoria.mensagem_para_registro(
+                AvaliarLeitura.montar_evento_auditoria(leitura, bool(acionado), agora)
+            )
+            for leitura, acionado in zip(leituras, mascara)
+        ]
+
+    return avaliar
+
+
+def auditar(registros):
+    """
+    Etapa 3: grava os registros de auditoria no log (uma escrita por lote).
+    """
+    registrarauditoria.obter_log_auditoria().acrescentar_lote(registros)
+
+
+def executar_em_processo(leituras, tamanho_lote=TAMANHO_LOTE, profundidade=PROFUNDIDADE_PIPELINE):
+    """
+    Leituras -> log de leituras -> avaliação -> log de auditoria, em
+    lotes de 'tamanho_lote', com até 'profundidade' lotes entre duas
+    etapas. 'leituras' pode ser um gerador (ex.: linhas NDJSON).
+
+    Os lotes em trânsito só existem na memória: se o processo cair, as
+    leituras já estão no log de leituras mas podem ficar sem avaliação e
+    auditoria (use o modo "arquivos" quando isso não for aceitável).
+    Levanta ValueError na primeira leitura inválida; os lotes anteriores
+    já foram gravados.
+    """
+    pipeline = Pipeline([
+        Etapa("registrar", registrar),
+        Etapa("avaliar", criar_etapa_avaliar()),
+        Etapa("auditoria", auditar)
+    ], profundidade)
+    return pipeline.executar(em_lotes(leituras, tamanho_lote))
+
+
+def executar_por_arquivos(leituras, tamanho_lote=TAMANHO_LOTE):
+    """
+    As três Lambdas em sequência, com as filas duráveis entre elas
+    (entrega ao menos uma vez em cada passagem).
+    """
+    RegistrarLeitura.registrar_leituras_lote(list(leituras), tamanho_lote)
+    AvaliarLeitura.avaliar_leituras()
+    registrarauditoria.processar_fila_auditoria(tamanho_lote)
+
+
+def executar_pipeline(leituras, modo=MODO_PIPELINE, tamanho_lote=TAMANHO_LOTE):
+    if modo == "arquivos":
+        return executar_por_arquivos(leituras, tamanho_lote)
+    return executar_em_processo(leituras, tamanho_lote)
+
+
+if __name__ == "__main__":
+    # Leituras em NDJSON (uma por linha) de um arquivo ou da entrada padrão:
+    #   python ExecutarPipeline.py leituras.ndjson
+    #   python ExecutarPipeline.py --modo arquivos < leituras.ndjson
+    parser = argparse.ArgumentParser(description="Pipeline leitura -> avaliação -> auditoria")
+    parser.add_argument("arquivo", nargs="?", help="NDJSON de leituras (padrão: entrada padrão)")
+    parser.add_argument("--modo", choices=("processo", "arquivos"), default=MODO_PIPELINE)
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE)
+    args = parser.parse_args()
+    # CLIMA_METRICAS_ARQUIVO=metricas.prom grava as métricas periodicamente
+    metricas.configurar_pelo_ambiente()
+
+    entrada = open(args.arquivo, "r", encoding="utf-8") if args.arquivo else sys.stdin
+    with entrada:
+        resultado = executar_pipeline(interpretar_ndjson(entrada), args.modo, args.lote)
+    if resultado:
+        print(json.dumps(resultado, indent=4, ensure_ascii=False))
@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(__file__))
+
+# permite importar o pacote compartilhado "clima" rodando o script direto
+if os.path.abspath(BASE_PATH) not in sys.path:
+    sys.path.insert(0, os.path.abspath(BASE_PATH))
+
+from clima import armazenamento, metricas  # noqa: E402
+from clima.configuracao import ConfigLimites  # noqa: E402
+from clima.fila import abrir_fila  # noqa: E402
+from clima.notificacoes import Despachante, DestinoConsole, EstadoNotificacoes, criar_destino  # noqa: E402
+
+# Caminhos compartilhados com app.py e as outras Lambdas (clima.armazenamento)
+DATA_PATH = armazenamento.DIR_DADOS
+QUEUE_PATH = armazenamento.DIR_FILAS
+
+ARQ_CONFIG_ALERTAS = armazenamento.ARQ_CONFIG_ALERTAS
+ARQ_LIMITES = armazenamento.ARQ_LIMITES
+
+# Fila antiga, importada na primeira abertura da fila durável
+ARQ_NOTIFICACOES = armazenamento.ARQ_NOTIFICACOES
+
+# Filas duráveis (SQLite), as mesmas gravadas por AvaliarLeitura.py
+ARQ_FILAS = armazenamento.ARQ_FILAS
+
+# Segundos entre dois ciclos do despachante contínuo
+INTERVALO_DESPACHANTE = 5.0
+
+
+def obter_fila_notificacoes():
+    return abrir_fila(
+        ARQ_FILAS, "notificacoes",
+        legado=ARQ_NOTIFICACOES, chaves_legado=("notificacoes",)
+    )
+
+
+def obter_config_notificacoes():
+    """
+    Bloco "notificacoes" de limites.json (ou configAlertas.json), relido
+    do cache só quando o arquivo muda.
+    """
+    dados = ConfigLimites(ARQ_LIMITES, legado=ARQ_CONFIG_ALERTAS).obter() or {}
+    return dados.get("notificacoes") or {}
+
+
+def criar_destinos(config=None):
+    """
+    Destinos do bloco "destinos"; sem configuração, só o console
+    (o "SMS simulado" que antes era impresso dentro da avaliação).
+    """
+    config = obter_config_notificacoes() if config is None else config
+    especificacoes = config.get("destinos")
+    if not especificacoes:
+        return [DestinoConsole()]
+    return [criar_destino(especificacao) for especificacao in especificacoes]
+
+
+def obter_estado_notificacoes():
+    """
+    Fichas do limite de taxa e entregas por destino, no banco das filas:
+    valem entre execuções da Lambda e entre processos despachantes.
+    """
+    return EstadoNotificacoes(ARQ_FILAS)
+
+
+def criar_despachante(destinos=None):
+    return Despachante(
+        obter_fila_notificacoes(),
+        criar_destinos() if destinos is None else destinos,
+        config=obter_config_notificacoes,
+        estado=obter_estado_notificacoes()
+    )
+
+
+def processar_fila_notificacoes(forcar=True):
+    """
+    Execução única: recebe todos os alertas da fila, agrupa por
+    destinatário/sensor e entrega os resumos. Com 'forcar' (padrão nesta
+    execução única) não espera a janela de agrupamento fechar; o limite de
+    taxa continua valendo e os resumos retidos voltam para a fila.
+    """
+    despachante = criar_despachante()
+    despachante.ciclo(forcar)
+    resultado = despachante.metricas()
+
+    if not resultado["recebidos"]:
+        print("⚠ Fila de notificações vazia. Nada para enviar.")
+    else:
+        print(
+            f"✔ {resultado['alertasEntregues']} alertas enviados em "
+            f"{resultado['resumosEntregues']} resumos "
+            f"({resultado['limitados']} retidos pelo limite de taxa)."
+        )
+    return resultado
+
+
+def despachar_continuamente(intervalo=INTERVALO_DESPACHANTE):
+    """
+    Processo despachante dedicado: a cada 'intervalo' segundos recebe os
+    alertas novos e entrega os resumos cuja janela fechou, até Ctrl+C.
+    """
+    despachante = criar_despachante()
+    print(f"✔ Despachante de notificações rodando (intervalo {intervalo}s). Ctrl+C para parar.")
+    anterior = None
+    try:
+        while True:
+            despachante.ciclo()
+            resultado = despachante.metricas()
+            atual = (resultado["resumosEntregues"], resultado["resumosAbertos"], resultado["falhas"])
+            if atual != anterior:
+                print(
+                    f"  resumos={resultado['resumosEntregues']} "
+                    f"alertas={resultado['alertasEntregues']} "
+                    f"abertos={resultado['resumosAbertos']} "
+                    f"limitados={resultado['limitados']}"
+                    + (f" erro={resultado['ultimoErro']}" if resultado["ultimoErro"] else "")
+                )
+                anterior = atual
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        # entrega o que estiver aberto antes de sair (se houver ficha)
+        despachante.despachar(forcar=True)
+        print("\nDespachante parado.")
+
+
+# ============================
+# Handler da Lambda
+# ============================
+
+def lambda_handler(event, context):
+    """
+    Consome a fila de notificações e entrega os resumos.
+    Não usa o payload da requisição.
+    """
+    resultado = processar_fila_notificacoes()
+
+    return {
+        "statusCode": 200,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(resultado, ensure_ascii=False)
+    }
+
+
+if __name__ == "__main__":
+    # Execução única:
+    #   python NotificarAlerta.py
+    # Despachante contínuo (processo dedicado):
+    #   python NotificarAlerta.py --continuo --intervalo 5
+    parser = argparse.ArgumentParser(description="Despachante de notificações de alerta")
+    parser.add_argument("--continuo", action="store_true")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_DESPACHANTE)
+    args = parser.parse_args()
+    # CLIMA_METRICAS_ARQUIVO=metricas.prom grava as métricas periodicamente
+    metricas.configurar_pelo_ambiente()
+
+    if args.continuo:
+        despachar_continuamente(args.intervalo)
+    else:
+        processar_fila_notificacoes()
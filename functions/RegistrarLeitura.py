@@ -1,26 +1,36 @@
-import json
 import os
+import sys
 from datetime import datetime
 
 BASE_PATH = os.path.dirname(os.path.dirname(__file__))  
 
-DATA_PATH = os.path.join(BASE_PATH, "data")
-QUEUE_PATH = os.path.join(BASE_PATH, "queue")
+# permite importar o pacote compartilhado "clima" rodando o script direto
+if os.path.abspath(BASE_PATH) not in sys.path:
+    sys.path.insert(0, os.path.abspath(BASE_PATH))
 
-ARQ_LEITURAS = os.path.join(DATA_PATH, "leituras.json")
-ARQ_FILA = os.path.join(QUEUE_PATH, "filaLeituras.json")
+from clima import armazenamento, metricas  # noqa: E402
+from clima.colunar import LeitorColunar, construir_do_log  # noqa: E402
+# log/índice/agregados/fila de leituras, gravação em lote e consultas:
+# a mesma implementação do POST /leituras (clima.servico), com os caminhos de lá
+from clima.servico import (  # noqa: E402, F401
+    consultar_agregados,
+    consultar_leituras,
+    obter_agregados_leituras,
+    obter_fila_leituras,
+    obter_indice_leituras,
+    obter_log_leituras,
+    registrar_leituras_lote
+)
 
+# Caminhos compartilhados com app.py e as outras Lambdas (clima.armazenamento)
+DATA_PATH = armazenamento.DIR_DADOS
+QUEUE_PATH = armazenamento.DIR_FILAS
 
-def carregar_json(caminho):
-    if not os.path.exists(caminho):
-        return {}
-    with open(caminho, "r") as f:
-        return json.load(f)
+# Cópia colunar (mmap) do log de leituras para análises do histórico
+DIR_LEITURAS_COLUNAR = armazenamento.DIR_LEITURAS_COLUNAR
 
 
-def salvar_json(caminho, dados):
-    with open(caminho, "w") as f:
-        json.dump(dados, f, indent=4)
+_leitor_colunar = None
 
 
 def registrar_leitura(sensorId, temperatura, umidade, date=None):
@@ -35,26 +45,47 @@ def registrar_leitura(sensorId, temperatura, umidade, date=None):
     }
     
 
-    # 1. Salvar em LEITURAS
-    dados_leituras = carregar_json(ARQ_LEITURAS)
-    if "leituras" not in dados_leituras:
-        dados_leituras["leituras"] = []
+    # 1. Salvar em LEITURAS (append no log date/leituras/)
+    obter_log_leituras().acrescentar(nova_leitura)
 
-    dados_leituras["leituras"].append(nova_leitura)
-    salvar_json(ARQ_LEITURAS, dados_leituras)
+    print("✔ Leitura registrada no log de LEITURAS")
 
-    print("✔ Leitura registrada em LEITURAS.json")
+    # 2. Adicionar na FILA (um INSERT; não regrava a fila inteira)
+    obter_fila_leituras().enviar(nova_leitura)
 
-    # 2. Adicionar na FILA
-    fila = carregar_json(ARQ_FILA)
-    if "mensagens" not in fila:
-        fila["mensagens"] = []
+    print("✔ Leitura adicionada à FILA (queue/filas.db)")
 
-    fila["mensagens"].append(nova_leitura)
-    salvar_json(ARQ_FILA, fila)
 
-    print("✔ Leitura adicionada à FILA (queue/filaLeituras.json)")
+def obter_leitor_colunar(atualizar=True):
+    """
+    Lado de leitura para análises: as mesmas leituras do log em colunas
+    mapeadas em memória (epocas, temperaturas, umidades, codigos), sem
+    cópia. 'leitor.sensor("sensor-07")' devolve a fatia de um sensor.
+
+    Com atualizar=True as colunas são refeitas se o log recebeu leituras
+    desde a última construção; com False usa a geração que estiver em
+    disco (construindo só se ainda não existir).
+    """
+    global _leitor_colunar
+    log = obter_log_leituras()
+
+    if _leitor_colunar is not None and not (atualizar and _leitor_colunar.desatualizado(log)):
+        return _leitor_colunar
+
+    try:
+        leitor = LeitorColunar(DIR_LEITURAS_COLUNAR)
+    except FileNotFoundError:
+        leitor = None
+
+    if leitor is None or (atualizar and leitor.desatualizado(log)):
+        construir_do_log(log, DIR_LEITURAS_COLUNAR)
+        leitor = LeitorColunar(DIR_LEITURAS_COLUNAR)
+
+    _leitor_colunar = leitor
+    return leitor
 
 
 if __name__ == "__main__":
+    # CLIMA_METRICAS_ARQUIVO=metricas.prom grava as métricas periodicamente
+    metricas.configurar_pelo_ambiente()
     registrar_leitura("sensor-01", 32.5, 70)
@@ -1,130 +1,104 @@
 import json
 import os
+import sys
+import time
 from datetime import datetime
 
-BASE_PATH = os.path.dirname(os.path.dirname(__file__))
-
-DATA_PATH = os.path.join(BASE_PATH, "data")
-QUEUE_PATH = os.path.join(BASE_PATH, "queue")
-
-ARQ_AUDITORIA = os.path.join(DATA_PATH, "auditoriaEventos.json")
-ARQ_FILA_AUDITORIA = os.path.join(QUEUE_PATH, "filaAuditoria.json")
-ARQ_CONFIG_ALERTAS = os.path.join(DATA_PATH, "configAlertas.json") 
-
-
-def carregar_json(caminho):
-    if not os.path.exists(caminho):
-        return {}
-    with open(caminho, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def salvar_json(caminho, dados):
-    os.makedirs(os.path.dirname(caminho), exist_ok=True)
-    with open(caminho, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4, ensure_ascii=False)
-
-
-def processar_fila_para_banco():
-    """
-    Move todos os REGISTROS de filaAuditoria.json para auditoriaEventos.json
-    (simulação de consumir SQS e gravar em um banco).
-    """
-    fila = carregar_json(ARQ_FILA_AUDITORIA)
-    dados_auditoria = carregar_json(ARQ_AUDITORIA)
-
-    mensagens = fila.get("mensagens", [])
-    if "eventos" not in dados_auditoria:
-        dados_auditoria["eventos"] = []
-
-    if mensagens:
-        dados_auditoria["eventos"].extend(mensagens)
-        print(f"✔ {len(mensagens)} registros movidos da fila para auditoriaEventos.json")
-
-    # Limpa a fila
-    fila["mensagens"] = []
-
-    salvar_json(ARQ_AUDITORIA, dados_auditoria)
-    salvar_json(ARQ_FILA_AUDITORIA, fila)
-
+# início da importação (partida a frio, ver clima.perfil)
+_INICIO_IMPORTACAO = time.perf_counter()
 
-def consultar_eventos(
-    sensorId=None,
-    tipo_evento=None,
-    tipo_sensor=None,
-    somente_acionados=False,
-    limite=50
-):
-    """
-    Consulta REGISTROS já persistidos em auditoriaEventos.json
-
-    Filtros opcionais:
-      - sensorId         (detalhes.sensorId)
-      - tipo_evento      (campo tipoEvento)  [usado pelo handler da Lambda]
-      - tipo_sensor      (detalhes.tipoSensor) [não usado no menu atual]
-      - somente_acionados: True -> apenas registros com detalhes.acionado == True
-    """
-    dados = carregar_json(ARQ_AUDITORIA)
-    eventos = dados.get("eventos", [])
-
-    filtrados = []
-    # Mais recentes primeiro
-    for e in reversed(eventos):
-        if tipo_evento and e.get("tipoEvento") != tipo_evento:
-            continue
-
-        detalhes = e.get("detalhes", {}) or {}
-
-        if sensorId and detalhes.get("sensorId") != sensorId:
-            continue
+BASE_PATH = os.path.dirname(os.path.dirname(__file__))
 
-        if tipo_sensor and detalhes.get("tipoSensor") != tipo_sensor:
-            continue
+# permite importar o pacote compartilhado "clima" rodando o script direto
+if os.path.abspath(BASE_PATH) not in sys.path:
+    sys.path.insert(0, os.path.abspath(BASE_PATH))
 
-        if somente_acionados and not detalhes.get("acionado", False):
-            continue
+from clima import HistoricoAlertas, armazenamento, metricas, perfil  # noqa: E402
+from clima.configuracao import ConfigLimites  # noqa: E402
+# log/índice/fila de auditoria e a consulta: a mesma implementação da
+# API (clima.servico), com os caminhos de lá
+from clima.servico import (  # noqa: E402, F401
+    consultar_eventos,
+    obter_fila_auditoria,
+    obter_indice_auditoria,
+    obter_log_auditoria
+)
 
-        filtrados.append(e)
+# Caminhos compartilhados com app.py e as outras Lambdas (clima.armazenamento)
+DATA_PATH = armazenamento.DIR_DADOS
+QUEUE_PATH = armazenamento.DIR_FILAS
 
-        if limite and len(filtrados) >= limite:
-            break
+ARQ_CONFIG_ALERTAS = armazenamento.ARQ_CONFIG_ALERTAS
 
-    return filtrados
+# Histórico de alertas gravado pela Lambda AvaliarLeituras
+DIR_ALERTAS = armazenamento.DIR_ALERTAS
+ARQ_LIMITES = armazenamento.ARQ_LIMITES
 
 
 # ============================
 # Handler da Lambda (API GW)
 # ============================
 
+# CLIMA_PERFIL=1 ou ?perfil=1: relatório cProfile/tracemalloc em perfil/
+@perfil.perfilado("consultarauditoria")
 def lambda_handler(event, context):
     """
     GET /auditoria?sensorId=sensor-01&tipoEvento=ALERTA_DISPARADO&limite=20
+                  &desde=28/11/2025 00:00:00&ate=28/11/2025 23:59:59
+                  &cursor=...&formato=ndjson
     (mantido para compatibilidade; o menu de terminal usa outros filtros)
-    """
 
-    # 1) Primeiro, consome a fila e grava no "banco"
-    processar_fila_para_banco()
+    O cursor da próxima página vem no cabeçalho X-Proximo-Cursor.
+    formato=ndjson devolve um registro JSON por linha.
+    """
 
+    # Só leitura: a fila é drenada pelo consumidor (Lambda registrarauditoria
+    # ou "python registrarauditoria.py --continuo")
     params = (event or {}).get("queryStringParameters") or {}
 
     sensor_id = params.get("sensorId")
     tipo_evento = params.get("tipoEvento")
+    ndjson = (params.get("formato") or "").lower() == "ndjson"
 
     try:
         limite = int(params.get("limite", "50"))
     except ValueError:
         limite = 50
 
-    registros = consultar_eventos(
-        sensorId=sensor_id,
-        tipo_evento=tipo_evento,
-        limite=limite
-    )
+    # a primeira abertura do log (importação do legado, índice) entra
+    # no relatório da invocação fria
+    with perfil.partida(__name__, "primeiraCarga"):
+        obter_log_auditoria()
+
+    try:
+        registros = consultar_eventos(
+            sensorId=sensor_id,
+            tipo_evento=tipo_evento,
+            limite=limite,
+            desde=params.get("desde"),
+            ate=params.get("ate"),
+            cursor=params.get("cursor")
+        )
+    except ValueError as erro:
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps({"erro": str(erro)}, ensure_ascii=False)
+        }
+
+    headers = {"Content-Type": "application/x-ndjson" if ndjson else "application/json"}
+    if registros.proximo_cursor:
+        headers["X-Proximo-Cursor"] = registros.proximo_cursor
+
+    if ndjson:
+        corpo = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros)
+    else:
+        corpo = json.dumps(list(registros), ensure_ascii=False)
 
     return {
         "statusCode": 200,
-        "headers": {"Content-Type": "application/json"},
-        "body": json.dumps(registros, ensure_ascii=False)
+        "headers": headers,
+        "body": corpo
     }
 
 
@@ -132,16 +106,27 @@ def lambda_handler(event, context):
 # Funções extras para TERMINAL
 # ============================
 
-def obter_ultimo_alerta():
+_historico_alertas = None
+
+
+def obter_historico_alertas():
+    """
+    Histórico de alertas (date/alertas/); os alertas antigos de
+    configAlertas.json são importados na primeira abertura.
+    """
+    global _historico_alertas
+    if _historico_alertas is None or _historico_alertas.diretorio != DIR_ALERTAS:
+        _historico_alertas = HistoricoAlertas(DIR_ALERTAS, legado=ARQ_CONFIG_ALERTAS)
+    return _historico_alertas
+
+
+def obter_ultimo_alerta(sensorId=None):
     """
-    Lê o 'banco' usado pela Lambda AvaliarLeituras (configAlertas.json)
-    e retorna o último alerta registrado.
+    Lê o 'banco' usado pela Lambda AvaliarLeituras (histórico de alertas)
+    e retorna o último alerta registrado (geral ou de um sensor).
+    O último alerta fica materializado, então a consulta é O(1).
     """
-    dados = carregar_json(ARQ_CONFIG_ALERTAS)
-    alertas = dados.get("alertas", [])
-    if not alertas:
-        return None
-    return alertas[-1]
+    return obter_historico_alertas().ultimo(sensorId)
 
 
 def registrar_registro_teste():
@@ -152,7 +137,7 @@ def registrar_registro_teste():
     """
     alerta = obter_ultimo_alerta()
     if not alerta:
-        print("⚠ Nenhum alerta encontrado em configAlertas.json.")
+        print("⚠ Nenhum alerta encontrado no histórico de alertas.")
         print("  Rode a Lambda AvaliarLeituras primeiro para gerar alertas.")
         return
 
@@ -177,25 +162,21 @@ def registrar_registro_teste():
         }
     }
 
-    fila = carregar_json(ARQ_FILA_AUDITORIA)
-    if "mensagens" not in fila:
-        fila["mensagens"] = []
-
-    fila["mensagens"].append(registro_teste)
-    salvar_json(ARQ_FILA_AUDITORIA, fila)
+    obter_fila_auditoria().enviar(registro_teste)
 
-    print("✔ Registro de TESTE inserido na filaAuditoria.json com base no último alerta.")
+    print("✔ Registro de TESTE inserido na fila de auditoria com base no último alerta.")
 
 
-def exibir_eventos_no_terminal(registros):
+def exibir_eventos_no_terminal(registros, inicio=1):
+    """
+    Mostra os registros (qualquer iterável; são lidos um a um) e
+    retorna quantos foram exibidos.
+    """
     os.system("cls" if os.name == "nt" else "clear")
     print("==== RESULTADO DA CONSULTA DE AUDITORIA ====\n")
 
-    if not registros:
-        print("Nenhum registro encontrado.\n")
-        return
-
-    for idx, e in enumerate(registros, start=1):
+    idx = inicio - 1
+    for idx, e in enumerate(registros, start=inicio):
         print(f"Registro #{idx}")
 
         detalhes = e.get("detalhes", {}) or {}
@@ -232,25 +213,31 @@ def exibir_eventos_no_terminal(registros):
                 print(f"    - {k}: {v}")
 
         print("-" * 40)
+
+    if idx < inicio:
+        print("Nenhum registro encontrado.\n")
+        return 0
+
     print()
+    return idx - inicio + 1
 
 
 def exibir_config_alerta_terminal():
     """
     Mostra a configuração atual de alerta (temperatura máxima e umidade máxima)
-    baseada no arquivo configAlertas.json.
+    baseada no arquivo limites.json (ou configAlertas.json, se não separado).
     """
     os.system("cls" if os.name == "nt" else "clear")
     print("==== CONFIGURAÇÃO ATUAL DE ALERTA ====\n")
 
-    dados = carregar_json(ARQ_CONFIG_ALERTAS)
+    dados = ConfigLimites(ARQ_LIMITES, legado=ARQ_CONFIG_ALERTAS).obter()
     limites = dados.get("limites", {})
 
     temp_max = limites.get("tempMax")
     umi_max = limites.get("umiMax")
 
     if temp_max is None and umi_max is None:
-        print("Nenhuma configuração de limites encontrada em configAlertas.json.\n")
+        print("Nenhuma configuração de limites encontrada em limites.json.\n")
     else:
         if temp_max is not None:
             print(f"Temperatura máxima configurada: {temp_max}")
@@ -264,6 +251,16 @@ def exibir_config_alerta_terminal():
 
         print()
 
+    regras = dados.get("regras", {}) or {}
+    for titulo, chave in (("Regras por tipo de sensor", "tipos"), ("Regras por sensor", "sensores")):
+        itens = regras.get(chave, {}) or {}
+        if itens:
+            print(f"{titulo}:")
+            for nome, valores in itens.items():
+                campos = ", ".join(f"{k}={v}" for k, v in valores.items())
+                print(f"  - {nome}: {campos}")
+            print()
+
     input("Pressione ENTER para voltar ao menu...")
 
 
@@ -303,18 +300,36 @@ def menu_terminal():
         except ValueError:
             limite = 50
 
-        # Sempre processa a fila antes de consultar
-        processar_fila_para_banco()
+        # A consulta não drena a fila; só avisa o que ainda não foi gravado
+        pendentes = obter_fila_auditoria().profundidade()
+
+        cursor = None
+        exibidos = 0
+        while True:
+            registros = consultar_eventos(
+                sensorId=sensor_id,
+                somente_acionados=somente_alerta,
+                limite=limite,
+                cursor=cursor
+            )
+            exibidos += exibir_eventos_no_terminal(registros, inicio=exibidos + 1)
+
+            if pendentes:
+                print(f"⚠ {pendentes} mensagens ainda na fila (aguardando o consumidor).\n")
+
+            cursor = registros.proximo_cursor
+            if not cursor:
+                input("Pressione ENTER para voltar ao menu...")
+                break
+            if input("ENTER para a próxima página, 0 para voltar ao menu: ").strip() == "0":
+                break
 
-        registros = consultar_eventos(
-            sensorId=sensor_id,
-            somente_acionados=somente_alerta,
-            limite=limite
-        )
 
-        exibir_eventos_no_terminal(registros)
-        input("Pressione ENTER para voltar ao menu...")
+# fim da importação (vai no relatório da invocação fria)
+perfil.registrar_importacao(__name__, _INICIO_IMPORTACAO)
 
 
 if __name__ == "__main__":
+    # CLIMA_METRICAS_ARQUIVO=metricas.prom grava as métricas periodicamente
+    metricas.configurar_pelo_ambiente()
     menu_terminal()
\ No newline at end of file
@@ -1,109 +1,117 @@
+import argparse
 import json
 import os
-from datetime import datetime
+import sys
+import time
 
-BASE_PATH = os.path.dirname(os.path.dirname(__file__))
+# início da importação (partida a frio, ver clima.perfil)
+_INICIO_IMPORTACAO = time.perf_counter()
 
-DATA_PATH = os.path.join(BASE_PATH, "data")
-QUEUE_PATH = os.path.join(BASE_PATH, "queue")
+BASE_PATH = os.path.dirname(os.path.dirname(__file__))
 
-ARQ_AUDITORIA = os.path.join(DATA_PATH, "auditoriaEventos.json")   
-ARQ_FILA_AUDITORIA = os.path.join(QUEUE_PATH, "filaAuditoria.json")  
-ARQ_CONFIG_ALERTAS = os.path.join(DATA_PATH, "configAlertas.json")   
+# permite importar o pacote compartilhado "clima" rodando o script direto
+if os.path.abspath(BASE_PATH) not in sys.path:
+    sys.path.insert(0, os.path.abspath(BASE_PATH))
 
+from clima import HistoricoAlertas, armazenamento, metricas, perfil  # noqa: E402
+from clima.consumidor import ConsumidorFila, INTERVALO_CONSUMIDOR  # noqa: E402
+from clima.lote import TAMANHO_LOTE  # noqa: E402
+# log/índice/fila de auditoria e montagem dos registros: a mesma
+# implementação da API (clima.servico), com os caminhos de lá
+from clima.servico import (  # noqa: E402, F401
+    mensagem_para_registro,
+    montar_registro_auditoria,
+    obter_fila_auditoria,
+    obter_indice_auditoria,
+    obter_log_auditoria,
+    processar_fila_para_banco,
+    registrar_registro_auditoria
+)
 
-def carregar_json(caminho):
-    if not os.path.exists(caminho):
-        return {}
-    with open(caminho, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Caminhos compartilhados com app.py e as outras Lambdas (clima.armazenamento)
+DATA_PATH = armazenamento.DIR_DADOS
+QUEUE_PATH = armazenamento.DIR_FILAS
 
+ARQ_CONFIG_ALERTAS = armazenamento.ARQ_CONFIG_ALERTAS
 
-def salvar_json(caminho, dados):
-    os.makedirs(os.path.dirname(caminho), exist_ok=True)
-    with open(caminho, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4, ensure_ascii=False)
+# Histórico de alertas gravado pela Lambda AvaliarLeituras
+DIR_ALERTAS = armazenamento.DIR_ALERTAS
 
 
-def registrar_registro_auditoria(detalhes):
-    """
-    Recebe 'detalhes' e grava DIRETAMENTE em auditoriaEventos.json.
-
-    Estrutura em auditoriaEventos.json:
-    {
-      "eventos": [
-        {
-          "date": "data/hora do REGISTRO DE AUDITORIA",
-          "detalhes": { ... dados do sensor/alerta ... }
-        },
-        ...
-      ]
-    }
+def processar_fila_auditoria(tamanho_lote=TAMANHO_LOTE):
     """
-    agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-
-    registro = {
-        "date": agora,       # data do registro de auditoria
-        "detalhes": detalhes or {}
-    }
-
-    dados_auditoria = carregar_json(ARQ_AUDITORIA)
-    if "eventos" not in dados_auditoria:
-        dados_auditoria["eventos"] = []
+    Consome todas as mensagens da fila de auditoria e grava no banco de
+    auditoria (log em date/auditoria/).
 
-    dados_auditoria["eventos"].append(registro)
-    salvar_json(ARQ_AUDITORIA, dados_auditoria)
-
-    print("✔ Registro de auditoria gravado em auditoriaEventos.json")
-    return registro
-
-
-def processar_fila_auditoria():
-    """
-    Lê todas as mensagens da fila de auditoria (filaAuditoria.json),
-    grava cada uma no banco de auditoria (auditoriaEventos.json)
-    e ESVAZIA a fila.
+    As mensagens são recebidas em lotes de até 'tamanho_lote': cada lote
+    vira UMA escrita no log e só é confirmado (removido da fila) depois
+    dela, então uma queda no meio não perde mensagens.
     """
-    fila = carregar_json(ARQ_FILA_AUDITORIA)
-    mensagens = fila.get("mensagens", [])
+    # a primeira abertura do log (importação do legado, índice) entra
+    # no relatório da invocação fria
+    with perfil.partida(__name__, "primeiraCarga"):
+        obter_log_auditoria()
 
-    registros_processados = []
+    registros_processados = processar_fila_para_banco(tamanho_lote)
 
-    if not mensagens:
+    if not registros_processados:
         print("⚠ Fila de auditoria vazia. Nada para processar.")
     else:
-        for msg in mensagens:
-            # Suporta tanto mensagens no formato {"detalhes": {...}}
-            # quanto diretamente {...}
-            if isinstance(msg, dict) and "detalhes" in msg:
-                detalhes = msg.get("detalhes") or {}
-            else:
-                detalhes = msg or {}
-
-            reg = registrar_registro_auditoria(detalhes)
-            registros_processados.append(reg)
+        print(
+            f"✔ {len(registros_processados)} registros processados da fila de auditoria "
+            f"e confirmados."
+        )
 
-        print(f"✔ {len(registros_processados)} registros processados da fila de auditoria.")
+    return registros_processados
 
-    # Esvazia a fila
-    fila["mensagens"] = []
-    salvar_json(ARQ_FILA_AUDITORIA, fila)
-    print("✔ Fila de auditoria esvaziada.")
 
-    return registros_processados
+def consumir_continuamente(intervalo=INTERVALO_CONSUMIDOR, tamanho_lote=TAMANHO_LOTE):
+    """
+    Processo consumidor dedicado: drena a fila de auditoria a cada
+    'intervalo' segundos até Ctrl+C, mostrando o atraso quando muda.
+    """
+    consumidor = ConsumidorFila(
+        obter_fila_auditoria(),
+        obter_log_auditoria(),
+        mensagem_para_registro,
+        intervalo=intervalo,
+        tamanho_lote=tamanho_lote,
+        nome="consumidor-auditoria"
+    ).iniciar()
+
+    print(f"✔ Consumidor da fila de auditoria rodando (intervalo {intervalo}s). Ctrl+C para parar.")
+    anterior = None
+    try:
+        while True:
+            time.sleep(intervalo)
+            estado = consumidor.metricas()
+            atual = (estado["processadas"], estado["profundidade"], estado["ultimoErro"])
+            if atual != anterior:
+                print(
+                    f"  processadas={estado['processadas']} "
+                    f"na fila={estado['profundidade']} "
+                    f"mais antiga={estado['idadeMaisAntiga']}s"
+                    + (f" erro={estado['ultimoErro']}" if estado["ultimoErro"] else "")
+                )
+                anterior = atual
+    except KeyboardInterrupt:
+        consumidor.parar()
+        print("\nConsumidor parado.")
 
 
 # ============================
 # Handler da Lambda (API GW)
 # ============================
 
+# CLIMA_PERFIL=1 ou ?perfil=1: relatório cProfile/tracemalloc em perfil/
+@perfil.perfilado("registrarauditoria")
 def lambda_handler(event, context):
     """
     Essa Lambda NÃO usa o payload da requisição.
     Ela apenas:
-      - lê a filaAuditoria.json
-      - grava tudo em auditoriaEventos.json
-      - esvazia a fila
+      - consome a fila de auditoria
+      - grava tudo no log de auditoria
+      - confirma as mensagens gravadas
       - retorna quantos registros foram processados
     """
 
@@ -126,28 +134,39 @@ def lambda_handler(event, context):
 # TESTE LOCAL
 # ============================
 
-def obter_ultimo_alerta():
+_historico_alertas = None
+
+
+def obter_historico_alertas():
     """
-    Lê o 'banco' usado pela Lambda AvaliarLeituras (configAlertas.json)
-    e retorna o último alerta registrado.
+    Histórico de alertas (date/alertas/); os alertas antigos de
+    configAlertas.json são importados na primeira abertura.
     """
-    dados = carregar_json(ARQ_CONFIG_ALERTAS)
-    alertas = dados.get("alertas", [])
-    if not alertas:
-        return None
-    return alertas[-1]
+    global _historico_alertas
+    if _historico_alertas is None or _historico_alertas.diretorio != DIR_ALERTAS:
+        _historico_alertas = HistoricoAlertas(DIR_ALERTAS, legado=ARQ_CONFIG_ALERTAS)
+    return _historico_alertas
+
+
+def obter_ultimo_alerta(sensorId=None):
+    """
+    Lê o 'banco' usado pela Lambda AvaliarLeituras (histórico de alertas)
+    e retorna o último alerta registrado (geral ou de um sensor).
+    O último alerta fica materializado, então a consulta é O(1).
+    """
+    return obter_historico_alertas().ultimo(sensorId)
 
 
 def teste_fila_com_ultimo_alerta():
     """
     Teste local:
-    - pega o último alerta de configAlertas.json
-    - coloca na FILA de auditoria (filaAuditoria.json) como uma mensagem
+    - pega o último alerta do histórico de alertas
+    - coloca na FILA de auditoria como uma mensagem
     - chama processar_fila_auditoria()
     """
     alerta = obter_ultimo_alerta()
     if not alerta:
-        print("⚠ Nenhum alerta encontrado em configAlertas.json.")
+        print("⚠ Nenhum alerta encontrado no histórico de alertas.")
         print("  Rode a Lambda AvaliarLeituras primeiro para gerar alertas.")
         return
 
@@ -162,13 +181,8 @@ def teste_fila_com_ultimo_alerta():
         }
     }
 
-    fila = carregar_json(ARQ_FILA_AUDITORIA)
-    if "mensagens" not in fila:
-        fila["mensagens"] = []
-
-    fila["mensagens"].append(mensagem)
-    salvar_json(ARQ_FILA_AUDITORIA, fila)
-    print("✔ Mensagem de teste inserida na filaAuditoria.json")
+    obter_fila_auditoria().enviar(mensagem)
+    print("✔ Mensagem de teste inserida na fila de auditoria")
 
     # Agora processa a fila e grava no banco
     registros = processar_fila_auditoria()
@@ -177,7 +191,24 @@ def teste_fila_com_ultimo_alerta():
     print(json.dumps(registros, indent=4, ensure_ascii=False))
 
 
+# fim da importação (vai no relatório da invocação fria)
+perfil.registrar_importacao(__name__, _INICIO_IMPORTACAO)
+
+
 if __name__ == "__main__":
     # Executar teste local:
-    # python registrarAuditoria.py
-    teste_fila_com_ultimo_alerta()
\ No newline at end of file
+    #   python registrarauditoria.py
+    # Consumidor contínuo (processo dedicado):
+    #   python registrarauditoria.py --continuo --intervalo 1 --lote 1000
+    parser = argparse.ArgumentParser(description="Consumidor da fila de auditoria")
+    parser.add_argument("--continuo", action="store_true")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_CONSUMIDOR)
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE)
+    args = parser.parse_args()
+    # CLIMA_METRICAS_ARQUIVO=metricas.prom grava as métricas periodicamente
+    metricas.configurar_pelo_ambiente()
+
+    if args.continuo:
+        consumir_continuamente(args.intervalo, args.lote)
+    else:
+        teste_fila_com_ultimo_alerta()
\ No newline at end of file
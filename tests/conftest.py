@@ -0,0 +1,8 @@
+import os
+import sys
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# permite importar o pacote "clima" e as Lambdas de functions/ nos testes
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
@@ -0,0 +1,92 @@
+import pytest
+
+from clima.agregados import AgregadosLeituras, inicio_janela
+from clima.datas import para_epoca
+from clima.log_segmentado import LogSegmentado
+
+
+def leitura(sensor, hora, minuto, temperatura, umidade=60):
+    return {"sensorId": sensor, "temperatura": temperatura, "umidade": umidade,
+            "date": f"01/01/2025 {hora:02d}:{minuto:02d}:30"}
+
+
+def test_janela_alinhada():
+    epoca = para_epoca("01/01/2025 10:17:30")
+    assert inicio_janela(epoca, 60) == para_epoca("01/01/2025 10:17:00")
+    assert inicio_janela(epoca, 3600) == para_epoca("01/01/2025 10:00:00")
+    # 1d segue a meia-noite local
+    assert inicio_janela(epoca, 86400) == para_epoca("01/01/2025 00:00:00")
+
+
+def test_agrega_por_janela_e_sensor(tmp_path):
+    log = LogSegmentado(str(tmp_path / "leituras"))
+    agregados = AgregadosLeituras(log)
+    log.acrescentar_lote([
+        leitura("estufa-1", 10, 0, 20),
+        leitura("estufa-1", 10, 30, 30, umidade=None),
+        leitura("estufa-1", 11, 5, 25),
+        leitura("estufa-2", 10, 10, 40),
+        {"sensorId": "estufa-1", "temperatura": 99},  # sem data: ignorada
+    ])
+
+    por_hora = agregados.consultar("1h", sensorId="estufa-1")
+    assert [(a["inicio"], a["leituras"]) for a in por_hora] == [
+        ("01/01/2025 11:00:00", 1), ("01/01/2025 10:00:00", 2)
+    ]
+    assert por_hora[1]["temperatura"] == {"min": 20, "max": 30, "media": 25}
+    assert por_hora[1]["umidade"] == {"min": 60, "max": 60, "media": 60}
+    assert por_hora[1]["fim"] == "01/01/2025 11:00:00"
+
+    dia = agregados.consultar("1d")
+    assert {a["sensorId"]: a["leituras"] for a in dia} == {"estufa-1": 3, "estufa-2": 1}
+    assert len(agregados.consultar("1m", limite=2)) == 2
+    desde = para_epoca("01/01/2025 11:00:00")
+    assert [a["sensorId"] for a in agregados.consultar("1h", desde=desde)] == ["estufa-1"]
+
+    with pytest.raises(ValueError):
+        agregados.consultar("1s")
+
+
+def test_outro_processo_e_reconstrucao_nao_contam_duas_vezes(tmp_path):
+    diretorio = str(tmp_path / "leituras")
+    agregados = AgregadosLeituras(LogSegmentado(diretorio))
+
+    # outro processo grava no mesmo log sem o observador
+    LogSegmentado(diretorio).acrescentar_lote([leitura("estufa-1", 10, i, 20 + i) for i in range(3)])
+    assert agregados.consultar("1h")[0]["leituras"] == 3
+    assert agregados.sincronizar() == 0
+
+    # um segundo agregador no mesmo banco não reaplica
+    assert AgregadosLeituras(LogSegmentado(diretorio)).consultar("1h")[0]["leituras"] == 3
+
+    assert agregados.reconstruir() == 3
+    assert agregados.consultar("1h")[0]["temperatura"]["max"] == 22
+
+
+class TravaContada:
+    def __init__(self, trava):
+        self.trava = trava
+        self.entradas = 0
+
+    def __enter__(self):
+        self.entradas += 1
+        return self.trava.__enter__()
+
+    def __exit__(self, *exc):
+        return self.trava.__exit__(*exc)
+
+
+def test_consulta_sem_gravacao_nova_nao_trava_o_log(tmp_path):
+    diretorio = str(tmp_path / "leituras")
+    log = LogSegmentado(diretorio)
+    agregados = AgregadosLeituras(log)
+    log.acrescentar(leitura("estufa-1", 10, 0, 20))
+    agregados.consultar("1h")
+
+    log.trava = TravaContada(log.trava)
+    agregados.consultar("1h")
+    assert log.trava.entradas == 0
+
+    LogSegmentado(diretorio).acrescentar(leitura("estufa-1", 10, 1, 22))
+    assert agregados.consultar("1h")[0]["leituras"] == 2
+    assert log.trava.entradas == 1
@@ -0,0 +1,46 @@
+import json
+import time
+
+from clima.alertas import HistoricoAlertas
+from clima.datas import FORMATO_DATA
+
+
+def alerta(sensor, n, dias_atras=0):
+    data = time.strftime(FORMATO_DATA, time.localtime(time.time() - dias_atras * 86400))
+    return {"sensorId": sensor, "temperatura": 30 + n, "date": data}
+
+
+def test_ultimo_alerta_materializado(tmp_path):
+    legado = tmp_path / "configAlertas.json"
+    legado.write_text(json.dumps({"limites": {}, "alertas": [alerta("estufa-9", 0)]}), encoding="utf-8")
+    diretorio = str(tmp_path / "alertas")
+
+    historico = HistoricoAlertas(diretorio, legado=str(legado))
+    assert historico.ultimo()["sensorId"] == "estufa-9"
+
+    historico.registrar([alerta("estufa-1", 1), alerta("estufa-2", 2), alerta("estufa-1", 3)])
+    assert historico.ultimo()["temperatura"] == 33
+    assert historico.ultimo("estufa-2")["temperatura"] == 32
+    assert historico.ultimo("estufa-7") is None
+    assert set(historico.ultimos_por_sensor()) == {"estufa-9", "estufa-1", "estufa-2"}
+
+    # reaberto (outro processo) lê o mesmo ultimos.json, sem reler o histórico
+    reaberto = HistoricoAlertas(diretorio, legado=str(legado))
+    assert reaberto.ultimo("estufa-1")["temperatura"] == 33
+    assert len(list(reaberto.iterar())) == 4
+
+
+def test_retencao_por_quantidade_e_idade(tmp_path):
+    historico = HistoricoAlertas(str(tmp_path / "alertas"), tamanho_max_segmento=150)
+    historico.registrar([alerta("estufa-1", n, dias_atras=10) for n in range(6)])
+    historico.registrar([alerta("estufa-1", n) for n in range(6, 9)])
+    total = len(list(historico.iterar()))
+
+    assert historico.compactar() == 0       # sem retenção configurada
+    assert historico.compactar(dias=5) > 0
+    restantes = [a["temperatura"] for a in historico.iterar()]
+    assert len(restantes) < total and restantes[-3:] == [36, 37, 38]
+
+    historico.compactar(maximo=1)
+    assert [a["temperatura"] for a in historico.iterar()][-1] == 38
+    assert historico.ultimo()["temperatura"] == 38
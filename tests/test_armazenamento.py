@@ -0,0 +1,81 @@
+import pytest
+
+from clima.arquivos import carregar_json, salvar_json
+from clima.armazenamento import TIPOS_BACKEND, abrir_log
+
+
+def evento(n):
+    return {"date": f"01/01/2025 10:00:{n:02d}", "detalhes": {"sensorId": f"estufa-{n}"}}
+
+
+@pytest.fixture
+def legado(tmp_path):
+    caminho = str(tmp_path / "auditoriaEventos.json")
+    salvar_json(caminho, {"eventos": [evento(0), evento(1)], "outra": 1})
+    return caminho
+
+
+@pytest.mark.parametrize("backend", TIPOS_BACKEND)
+def test_interface_comum(tmp_path, legado, backend):
+    log = abrir_log(str(tmp_path / "auditoria"), legado=legado, backend=backend)
+    posicoes = log.acrescentar_lote([evento(2), evento(3)])
+    assert log.acrescentar(evento(4)) > posicoes[-1]
+
+    assert list(log.iterar()) == [evento(n) for n in range(5)]
+    assert list(log.iterar_reverso()) == [evento(n) for n in reversed(range(5))]
+    assert log.ler(posicoes[1]) == evento(3)
+    assert [r for _, r in log.iterar_com_posicao(posicoes[0])] == [evento(3), evento(4)]
+
+    # os registros lidos são cópias
+    log.ler(posicoes[0])["detalhes"]["sensorId"] = "outro"
+    assert log.ler(posicoes[0]) == evento(2)
+
+
+@pytest.mark.parametrize("backend", TIPOS_BACKEND)
+def test_posicao_final_e_a_do_ultimo_registro(tmp_path, backend):
+    log = abrir_log(str(tmp_path / "auditoria"), backend=backend, tamanho_max_segmento=60)
+    assert log.posicao_final() is None
+
+    for n in range(4):
+        log.acrescentar(evento(n))
+        ultima = list(log.iterar_com_posicao())[-1][0]
+        assert log.posicao_final() == ultima
+        assert list(log.iterar_com_posicao(desde=log.posicao_final())) == []
+    assert log.ler(log.posicao_final()) == evento(3)
+
+
+def test_posicao_final_ignora_linha_incompleta(tmp_path):
+    log = abrir_log(str(tmp_path / "auditoria"), backend="log")
+    posicao = log.acrescentar(evento(0))
+    # outro processo no meio de uma gravação
+    with open(log.caminho_segmento(log.segmentos[-1]), "ab") as f:
+        f.write(b'{"date": "01/0')
+    assert log.posicao_final() == posicao
+
+
+def test_troca_de_backend_usa_o_log_existente(tmp_path, legado):
+    diretorio = str(tmp_path / "auditoria")
+    log = abrir_log(diretorio, legado=legado, backend="log")
+    log.acrescentar_lote([evento(2), evento(3)])
+    esperado = [evento(n) for n in range(4)]
+
+    # o documento legado ficou com 2 eventos; o log tem 4
+    assert list(abrir_log(diretorio, legado=legado, backend="sqlite").iterar()) == esperado
+    documento = abrir_log(diretorio, legado=legado, backend="json")
+    assert list(documento.iterar()) == esperado
+    assert carregar_json(legado)["outra"] == 1
+
+    # depois da exportação, o documento é o armazenamento
+    documento.acrescentar(evento(4))
+    reaberto = abrir_log(diretorio, legado=legado, backend="json")
+    assert list(reaberto.iterar()) == esperado + [evento(4)]
+
+
+def test_json_sem_log_mantem_o_documento(tmp_path, legado):
+    documento = abrir_log(str(tmp_path / "auditoria"), legado=legado, backend="json")
+    assert list(documento.iterar()) == [evento(0), evento(1)]
+
+
+def test_backend_desconhecido(tmp_path):
+    with pytest.raises(ValueError, match="desconhecido"):
+        abrir_log(str(tmp_path), backend="postgres")
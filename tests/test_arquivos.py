@@ -0,0 +1,45 @@
+import os
+import threading
+
+import pytest
+
+from clima.arquivos import atualizar_json, carregar_json, salvar_json
+
+
+def test_carregar_inexistente_e_salvar(tmp_path):
+    caminho = str(tmp_path / "sub" / "dados.json")
+    assert carregar_json(caminho) == {}
+
+    salvar_json(caminho, {"sensor": "estufa-1", "temperatura": 31.5})
+    assert carregar_json(caminho) == {"sensor": "estufa-1", "temperatura": 31.5}
+    # a troca atômica não deixa temporários para trás
+    assert os.listdir(tmp_path / "sub") == ["dados.json"]
+
+
+def test_atualizar_concorrente_nao_perde_gravacoes(tmp_path):
+    caminho = str(tmp_path / "contador.json")
+
+    def incrementar():
+        for _ in range(50):
+            with atualizar_json(caminho) as dados:
+                dados["total"] = dados.get("total", 0) + 1
+
+    threads = [threading.Thread(target=incrementar) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert carregar_json(caminho) == {"total": 200}
+
+
+def test_atualizar_com_excecao_nao_grava(tmp_path):
+    caminho = str(tmp_path / "dados.json")
+    salvar_json(caminho, {"versao": 1})
+
+    with pytest.raises(RuntimeError):
+        with atualizar_json(caminho) as dados:
+            dados["versao"] = 2
+            raise RuntimeError("falhou no meio")
+
+    assert carregar_json(caminho) == {"versao": 1}
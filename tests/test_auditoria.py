@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from clima import servico
+from functions import consultarauditoria, registrarauditoria
+
+
+@pytest.fixture
+def auditoria(tmp_path, monkeypatch):
+    # as duas Lambdas usam o log e a fila de clima.servico
+    diretorio = str(tmp_path)
+    monkeypatch.setattr(servico, "ARQ_AUDITORIA", os.path.join(diretorio, "auditoriaEventos.json"))
+    monkeypatch.setattr(servico, "ARQ_FILA_AUDITORIA", os.path.join(diretorio, "filaAuditoria.json"))
+    monkeypatch.setattr(servico, "ARQ_FILAS", os.path.join(diretorio, "filas.db"))
+    monkeypatch.setattr(servico, "DIR_AUDITORIA", os.path.join(diretorio, "auditoria"))
+    monkeypatch.setattr(servico, "_log_auditoria", None)
+    monkeypatch.setattr(servico, "_indice_auditoria", None)
+
+
+def test_consulta_ve_o_que_o_consumidor_gravou(auditoria):
+    fila = registrarauditoria.obter_fila_auditoria()
+    # as duas formas de mensagem da fila: {"detalhes": {...}} e {...}
+    fila.enviar({"detalhes": {"sensorId": "estufa-1", "acionado": True,
+                              "date": "01/01/2025 10:00:00"}})
+    fila.enviar({"sensorId": "estufa-2", "acionado": False, "date": "01/01/2025 10:01:00"})
+
+    # a consulta abre o log antes do consumidor gravar
+    assert list(consultarauditoria.consultar_eventos()) == []
+    assert len(registrarauditoria.processar_fila_auditoria()) == 2
+    assert fila.profundidade() == 0
+
+    # registros convertidos (mensagem_para_registro), não as mensagens cruas
+    eventos = list(consultarauditoria.consultar_eventos())
+    assert [e["detalhes"]["sensorId"] for e in eventos] == ["estufa-2", "estufa-1"]
+    assert all(set(e) == {"date", "detalhes"} for e in eventos)
+    assert "detalhes" not in eventos[1]["detalhes"]
+
+    acionados = list(consultarauditoria.consultar_eventos(somente_acionados=True))
+    assert [e["detalhes"]["sensorId"] for e in acionados] == ["estufa-1"]
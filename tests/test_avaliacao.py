@@ -0,0 +1,20 @@
+import math
+
+from clima.avaliacao import LoteColunar
+
+
+def test_colunas_por_leitura():
+    lote = LoteColunar([
+        {"sensorId": "estufa-1", "temperatura": 31.5, "umidade": 60},
+        {"sensorId": "estufa-2", "temperatura": 20, "umidade": None},
+        {"sensorId": "estufa-1", "temperatura": True, "umidade": "70"},
+    ])
+
+    assert len(lote) == 3
+    assert lote.sensores == ["estufa-1", "estufa-2"]
+    assert list(lote.codigos) == [0, 1, 0]
+    assert lote.temperaturas[0] == 31.5 and lote.temperaturas[1] == 20
+    # ausente, texto ou bool viram NaN (não avaliados)
+    assert math.isnan(lote.umidades[1])
+    assert math.isnan(lote.temperaturas[2])
+    assert math.isnan(lote.umidades[2])
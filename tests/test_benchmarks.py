@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+from clima.datas import para_epoca
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_BENCHMARKS = os.path.join(BASE_PATH, "benchmarks")
+if DIR_BENCHMARKS not in sys.path:
+    sys.path.insert(0, DIR_BENCHMARKS)
+
+from dados_sinteticos import FIM, TEMP_MAX, iterar_leituras, iterar_registros_auditoria  # noqa: E402
+
+
+def rodar_suite(cwd, *argumentos):
+    return subprocess.run(
+        [sys.executable, os.path.join(DIR_BENCHMARKS, "suite.py"), "--tamanhos", "200",
+         "--operacoes", "5", "--sensores", "10", *argumentos],
+        cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def retrato(diretorio):
+    """
+    Arquivos e mtimes sob 'diretorio' (vazio se não existir).
+    """
+    arquivos = {}
+    for raiz, _, nomes in os.walk(diretorio):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            arquivos[caminho] = os.stat(caminho).st_mtime_ns
+    return arquivos
+
+
+def test_dados_sinteticos_reprodutiveis():
+    leituras = list(iterar_leituras(2000, sensores=7, proporcao_alerta=0.1, horas=2, semente=1))
+    assert leituras == list(iterar_leituras(2000, sensores=7, proporcao_alerta=0.1, horas=2, semente=1))
+    assert leituras != list(iterar_leituras(2000, sensores=7, proporcao_alerta=0.1, horas=2, semente=2))
+
+    assert len({l["sensorId"] for l in leituras}) == 7
+    alertas = sum(l["temperatura"] > TEMP_MAX for l in leituras)
+    assert 150 <= alertas <= 250
+
+    epocas = [para_epoca(l["date"]) for l in leituras]
+    assert epocas == sorted(epocas)
+    assert FIM - 2 * 3600 <= epocas[0] and epocas[-1] <= FIM
+
+    assert len(list(iterar_registros_auditoria(300, sensores=7))) == 300
+
+
+def test_suite_grava_e_compara_resultados(tmp_path):
+    antes = {d: retrato(os.path.join(BASE_PATH, d)) for d in ("date", "queue")}
+
+    saida = tmp_path / "resultado.json"
+    rodar_suite(tmp_path, "--saida", str(saida))
+    documento = json.loads(saida.read_text(encoding="utf-8"))
+
+    assert documento["parametros"]["tamanhos"] == [200]
+    caminhos = [r["caminho"] for r in documento["resultados"]]
+    for caminho in ("registrar_leitura", "registrar_leituras_lote", "avaliar_leituras",
+                    "processar_fila_auditoria", "consultar_eventos", "GET /auditoria (lambda)"):
+        assert caminho in caminhos
+    for r in documento["resultados"]:
+        assert r["historico"] == 200
+        assert r["operacoes"] > 0
+        assert r["porSegundo"] > 0
+    latencia = next(r for r in documento["resultados"] if r["caminho"] == "registrar_leitura")
+    assert latencia["operacoes"] == 5
+    assert 0 <= latencia["p50Ms"] <= latencia["p99Ms"]
+
+    comparacao = rodar_suite(tmp_path, "--comparar", str(saida))
+    assert f"Comparação com {saida}" in comparacao
+    assert "registrar_leitura" in comparacao.split("Comparação com", 1)[1]
+
+    # só diretórios temporários: date/ e queue/ do repositório intactos
+    assert {d: retrato(os.path.join(BASE_PATH, d)) for d in ("date", "queue")} == antes
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from clima.binario import REGISTRO, ArquivoLeiturasBinario, exportar, importar
+
+
+def leitura(sensor, minuto, temperatura=20.1, umidade=55):
+    return {"sensorId": sensor, "temperatura": temperatura, "umidade": umidade,
+            "date": f"01/01/2025 10:{minuto:02d}:00"}
+
+
+def test_registros_de_largura_fixa_voltam_iguais(tmp_path):
+    arquivo = ArquivoLeiturasBinario(str(tmp_path / "bin"))
+    leituras = [leitura("estufa-1", 0), leitura("estufa-2", 1, 32.5), leitura("estufa-1", 2, None, "x")]
+    assert arquivo.acrescentar_lote(leituras) == 3
+    assert arquivo.acrescentar_lote([]) == 0
+
+    assert len(arquivo) == 3
+    assert REGISTRO.size == 20
+    assert arquivo.sensores == ["estufa-1", "estufa-2"]
+    # ausentes/não numéricos voltam como None
+    assert list(arquivo.iterar_dicts()) == [
+        leitura("estufa-1", 0), leitura("estufa-2", 1, 32.5), leitura("estufa-1", 2, None, None)
+    ]
+
+    # outro processo acrescenta um sensor novo ao mesmo dicionário
+    ArquivoLeiturasBinario(str(tmp_path / "bin")).acrescentar_lote([leitura("estufa-3", 3)])
+    arquivo.acrescentar_lote([leitura("estufa-4", 4)])
+    assert arquivo.sensores == ["estufa-1", "estufa-2", "estufa-3", "estufa-4"]
+    assert [l.sensorId for l in arquivo.iterar()][-2:] == ["estufa-3", "estufa-4"]
+
+
+def test_importar_e_exportar(tmp_path):
+    origem = tmp_path / "leituras.json"
+    leituras = [leitura(f"estufa-{i % 3}", i) for i in range(7)]
+    origem.write_text(json.dumps({"leituras": leituras}), encoding="utf-8")
+
+    assert importar(str(origem), str(tmp_path / "bin"), tamanho_lote=3) == 7
+    assert exportar(str(tmp_path / "bin"), str(tmp_path / "volta.json")) == 7
+    assert json.loads((tmp_path / "volta.json").read_text(encoding="utf-8")) == {"leituras": leituras}
+
+
+def test_cabecalho_invalido(tmp_path):
+    (tmp_path / "bin").mkdir()
+    (tmp_path / "bin" / "leituras.bin").write_bytes(b"XXXX\x01\x00\x14\x00")
+    with pytest.raises(ValueError):
+        ArquivoLeiturasBinario(str(tmp_path / "bin"))
@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from clima.colunar import LeitorColunar, construir, construir_do_log
+from clima.datas import para_epoca
+from clima.log_segmentado import LogSegmentado
+
+
+def leitura(sensor, minuto, temperatura=20):
+    return {"sensorId": sensor, "temperatura": temperatura, "umidade": 50,
+            "date": f"01/01/2025 10:{minuto:02d}:00"}
+
+
+def test_fatias_por_sensor_ordenadas_por_data(tmp_path):
+    diretorio = str(tmp_path / "colunar")
+    leituras = [leitura("estufa-2", 5, 25), leitura("estufa-1", 9, 19), leitura("estufa-1", 1, 11),
+                leitura("estufa-2", 0, 20), leitura("estufa-1", 4, 14)]
+    assert construir(leituras, diretorio) == 5
+
+    with LeitorColunar(diretorio) as leitor:
+        assert len(leitor) == 5
+        fatia = leitor.sensor("estufa-1")
+        assert len(fatia) == 3
+        assert list(fatia.temperaturas) == [11, 14, 19]
+        inicio, fim = fatia.intervalo(para_epoca("01/01/2025 10:02:00"), para_epoca("01/01/2025 10:09:00"))
+        assert list(fatia.temperaturas[inicio:fim]) == [14, 19]
+        assert list(leitor.sensor("estufa-2").temperaturas) == [20, 25]
+        assert leitor.sensor("estufa-9") is None
+
+
+def test_nova_geracao_e_desatualizado(tmp_path):
+    log = LogSegmentado(str(tmp_path / "leituras"))
+    log.acrescentar_lote([leitura("estufa-1", 0), {"sensorId": "estufa-1", "temperatura": "x"}])
+    diretorio = str(tmp_path / "colunar")
+    assert construir_do_log(log, diretorio) == 2
+
+    leitor = LeitorColunar(diretorio)
+    assert not leitor.desatualizado(log)
+    assert math.isnan(leitor.sensor("estufa-1").temperaturas[1])
+
+    log.acrescentar(leitura("estufa-1", 1))
+    assert leitor.desatualizado(log)
+    # o leitor aberto continua lendo a geração anterior
+    construir_do_log(log, diretorio)
+    assert len(leitor.sensor("estufa-1")) == 2
+    leitor.fechar()
+
+    with LeitorColunar(diretorio) as novo:
+        assert len(novo.sensor("estufa-1")) == 3
+        assert not novo.desatualizado(log)
+
+
+def test_sem_construcao(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LeitorColunar(str(tmp_path / "colunar"))
+    construir([], str(tmp_path / "colunar"))
+    with LeitorColunar(str(tmp_path / "colunar")) as leitor:
+        assert len(leitor) == 0
@@ -0,0 +1,48 @@
+import json
+import os
+
+from clima.configuracao import ConfigEmCache, ConfigLimites, separar
+
+
+def gravar(caminho, dados):
+    # tamanho diferente garante outra assinatura mesmo com o mesmo mtime
+    caminho.write_text(json.dumps(dados), encoding="utf-8")
+
+
+def test_cache_revalidado_pela_assinatura(tmp_path):
+    caminho = tmp_path / "limites.json"
+    gravar(caminho, {"limites": {"tempMax": 30}})
+    cache = ConfigEmCache(str(caminho))
+
+    assert cache.obter() == {"limites": {"tempMax": 30}}
+    assert cache.obter() is cache.obter()
+    assert (cache.acertos, cache.falhas) == (2, 1)
+
+    gravar(caminho, {"limites": {"tempMax": 35.5}})
+    assert cache.obter()["limites"]["tempMax"] == 35.5
+
+    os.remove(caminho)
+    assert cache.obter() == {}
+    assert cache.ausente
+
+
+def test_json_pela_metade_mantem_a_versao_anterior(tmp_path):
+    caminho = tmp_path / "limites.json"
+    gravar(caminho, {"limites": {"tempMax": 30}})
+    cache = ConfigEmCache(str(caminho))
+    cache.obter()
+
+    caminho.write_text('{"limites": {"tempMax"', encoding="utf-8")
+    assert cache.obter() == {"limites": {"tempMax": 30}}
+
+
+def test_limites_com_legado_e_separar(tmp_path):
+    legado = tmp_path / "configAlertas.json"
+    limites = tmp_path / "limites.json"
+    gravar(legado, {"limites": {"tempMax": 30}, "alertas": [{"sensorId": "estufa-1"}] * 3})
+
+    fonte = ConfigLimites(str(limites), legado=str(legado))
+    assert fonte.obter()["limites"] == {"tempMax": 30}
+
+    assert separar(str(legado), str(limites)) == {"limites": {"tempMax": 30}}
+    assert fonte.obter() == {"limites": {"tempMax": 30}}
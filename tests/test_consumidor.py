@@ -0,0 +1,49 @@
+import time
+
+from clima.consumidor import ConsumidorFila
+from clima.fila import FilaDuravel
+from clima.log_segmentado import LogSegmentado
+
+
+class LogQueFalha:
+    def acrescentar_lote(self, registros):
+        raise OSError("disco cheio")
+
+
+def test_consumidor_drena_em_segundo_plano(tmp_path):
+    fila = FilaDuravel(str(tmp_path / "filas.db"), "auditoria")
+    log = LogSegmentado(str(tmp_path / "auditoria"))
+    consumidor = ConsumidorFila(fila, log, lambda corpo: {"detalhes": corpo}, intervalo=0.01, tamanho_lote=2)
+
+    assert consumidor.ciclo() == 0
+    consumidor.iniciar()
+    assert consumidor.iniciar().ativo
+    try:
+        fila.enviar_lote([{"n": i} for i in range(5)])
+        for _ in range(200):
+            if consumidor.processadas == 5:
+                break
+            time.sleep(0.01)
+    finally:
+        consumidor.parar(timeout=5)
+
+    assert not consumidor.ativo
+    assert [r["detalhes"]["n"] for r in log.iterar()] == list(range(5))
+    estado = consumidor.metricas()
+    assert (estado["processadas"], estado["profundidade"], estado["idadeMaisAntiga"]) == (5, 0, None)
+
+
+def test_erro_fica_nas_metricas_e_a_mensagem_na_fila(tmp_path):
+    fila = FilaDuravel(str(tmp_path / "filas.db"), "auditoria")
+    fila.enviar({"n": 0})
+    consumidor = ConsumidorFila(fila, LogQueFalha(), intervalo=0.01).iniciar()
+    try:
+        for _ in range(200):
+            if consumidor.ultimo_erro:
+                break
+            time.sleep(0.01)
+    finally:
+        consumidor.parar(timeout=5)
+
+    assert consumidor.ultimo_erro == "OSError: disco cheio"
+    assert consumidor.metricas()["profundidade"] == 1
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+import pytest
+
+from clima.datas import interpretar_limite, para_epoca
+
+
+def test_formatos_aceitos():
+    esperado = datetime(2025, 1, 1, 10, 30).timestamp()
+    assert para_epoca("01/01/2025 10:30:00") == esperado
+    assert para_epoca(" 2025-01-01T10:30:00 ") == esperado
+    assert para_epoca(str(esperado)) == esperado
+    assert para_epoca(1700000000) == 1700000000.0
+
+
+@pytest.mark.parametrize("valor", [None, True, "", "ontem", "32/01/2025 10:00:00", ["01/01/2025"]])
+def test_valores_nao_reconhecidos(valor):
+    assert para_epoca(valor) is None
+
+
+def test_interpretar_limite():
+    assert interpretar_limite(None) is None
+    assert interpretar_limite("") is None
+    assert interpretar_limite("1700000000") == 1700000000.0
+    with pytest.raises(ValueError):
+        interpretar_limite("ontem")
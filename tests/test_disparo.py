@@ -0,0 +1,78 @@
+from clima.disparo import EstadoDisparo
+from clima.regras import Regra
+
+SEM_JANELA = Regra(30, None, None, None, 0, None, 0)
+
+
+def leitura(sensor, temperatura, minuto):
+    return {
+        "sensorId": sensor,
+        "temperatura": temperatura,
+        "umidade": 50,
+        "date": f"01/01/2025 10:{minuto:02d}:00"
+    }
+
+
+def filtrar(estado, leituras, ids, regra=SEM_JANELA):
+    mascara = [l["temperatura"] > 30 for l in leituras]
+    return estado.filtrar(leituras, mascara, lambda _: regra, ids)
+
+
+def test_lotes_fora_de_ordem_disparam(tmp_path):
+    caminho = str(tmp_path / "estadoDisparo.json")
+    novo = [leitura("estufa-1", 35, 2), leitura("estufa-1", 36, 3)]
+    antigo = [leitura("estufa-1", 33, 0), leitura("estufa-1", 34, 1)]
+
+    # o avaliador do lote mais novo pega a trava primeiro
+    estado = EstadoDisparo(caminho)
+    assert filtrar(estado, novo, [3, 4]) == [0, 1]
+    estado.salvar()
+
+    estado = EstadoDisparo(caminho)
+    assert filtrar(estado, antigo, [1, 2]) == [0, 1]
+    estado.salvar()
+
+    assert EstadoDisparo(caminho).aplicados == [[1, 4]]
+
+
+def test_lote_reentregue_nao_dispara_de_novo(tmp_path):
+    caminho = str(tmp_path / "estadoDisparo.json")
+    lote = [leitura("estufa-1", 35, 0), leitura("estufa-2", 36, 0)]
+
+    estado = EstadoDisparo(caminho)
+    assert filtrar(estado, lote, [7, 9]) == [0, 1]
+    estado.salvar()
+
+    # caiu entre o checkpoint e a confirmação: o lote volta
+    estado = EstadoDisparo(caminho)
+    assert filtrar(estado, lote + [leitura("estufa-1", 37, 1)], [7, 9, 8]) == [2]
+
+
+def test_n_de_m_e_cooldown():
+    regra = Regra(30, None, None, None, 0, (2, 3), 600)
+    estado = EstadoDisparo()
+    leituras = [leitura("estufa-1", t, m) for m, t in enumerate([35, 20, 35, 35, 35])]
+
+    # 1a: só 1 de 3; 3a: 2 de 3 dispara; 4a e 5a: dentro do cooldown
+    assert filtrar(estado, leituras, None, regra) == [2]
+
+
+def test_lacunas_nao_sao_dadas_como_aplicadas():
+    estado = EstadoDisparo()
+    ids = list(range(1, 1000, 2))
+    assert estado.marcar_aplicadas(ids) == [True] * len(ids)
+    assert len(estado.aplicados) == len(ids)
+    # qualquer lacuna, mesmo a mais antiga, ainda é nova se for entregue
+    assert estado.marcar_aplicadas([2, 998, 999]) == [True, True, False]
+
+
+def test_compactar_fecha_so_o_que_nao_volta():
+    estado = EstadoDisparo()
+    estado.marcar_aplicadas([1, 3, 5, 7, 9, 12])
+    # 8 ainda está na fila: 2, 4 e 6 não voltam, 8 e 10-11 podem voltar
+    estado.compactar(8)
+    assert estado.aplicados == [[1, 7], [9, 9], [12, 12]]
+    assert estado.marcar_aplicadas([6, 8, 10]) == [False, True, True]
+    estado.compactar(None)
+    estado.compactar(1)
+    assert estado.aplicados == [[1, 10], [12, 12]]
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from clima.fila import FilaDuravel, abrir_fila, drenar
+from clima.log_segmentado import LogSegmentado
+
+
+@pytest.fixture
+def fila(tmp_path):
+    return FilaDuravel(str(tmp_path / "filas.db"), "leituras")
+
+
+def test_receber_esconde_e_confirmar_apaga(fila):
+    ids = [fila.enviar({"n": 0}), fila.enviar({"n": 1})]
+    assert fila.enviar_lote([{"n": 2}, {"n": 3}]) == 2
+    assert fila.profundidade() == 4
+
+    primeiras = fila.receber(3, visibilidade=60)
+    assert [m.corpo["n"] for m in primeiras] == [0, 1, 2]
+    assert [m.id for m in primeiras[:2]] == ids
+    assert all(m.recebimentos == 1 for m in primeiras)
+    # escondidas até a confirmação
+    assert [m.corpo["n"] for m in fila.receber(10, visibilidade=60)] == [3]
+    assert fila.receber(10) == []
+
+    fila.confirmar(primeiras)
+    assert fila.profundidade() == 1
+    assert fila.espiar() == [{"n": 3}]
+
+
+def test_visibilidade_expirada_devolver_e_estender(fila):
+    fila.enviar({"n": 0})
+    fila.enviar({"n": 1})
+
+    # visibilidade zero: o consumidor "caiu" e as mensagens voltam
+    primeira = fila.receber(2, visibilidade=0)
+    segunda = fila.receber(2, visibilidade=60)
+    assert [m.id for m in segunda] == [m.id for m in primeira]
+    assert [m.recebimentos for m in segunda] == [2, 2]
+
+    fila.devolver(segunda[:1])
+    assert [m.corpo["n"] for m in fila.receber(2, visibilidade=0)] == [0]
+
+    fila.estender(segunda, visibilidade=60)
+    assert fila.receber(2) == []
+    assert fila.profundidade() == 2
+
+
+def test_filas_separadas_no_mesmo_banco(tmp_path):
+    caminho = str(tmp_path / "filas.db")
+    FilaDuravel(caminho, "a").enviar({"fila": "a"})
+    b = FilaDuravel(caminho, "b")
+    assert b.profundidade() == 0
+    assert b.idade_mais_antiga() is None
+
+
+def test_legado_importado_uma_vez(tmp_path):
+    legado = tmp_path / "filaAuditoria.json"
+    legado.write_text(json.dumps({"mensagens": [{"n": 0}], "eventos": [{"n": 1}]}), encoding="utf-8")
+    caminho = str(tmp_path / "filas.db")
+
+    fila = abrir_fila(caminho, "auditoria", legado=str(legado), chaves_legado=("mensagens", "eventos"))
+    assert abrir_fila(caminho, "auditoria", legado=str(legado)) is fila
+    assert fila.espiar() == [{"n": 0}, {"n": 1}]
+    # outro processo abrindo o mesmo banco não importa de novo
+    assert FilaDuravel(caminho, "auditoria").importar_json(str(legado), ("mensagens", "eventos")) == 0
+    assert fila.profundidade() == 2
+
+
+class LogQueFalha:
+    def acrescentar_lote(self, registros):
+        raise OSError("disco cheio")
+
+
+def test_drenar_confirma_so_depois_de_gravar(fila, tmp_path):
+    fila.enviar_lote([{"n": i} for i in range(5)])
+
+    with pytest.raises(OSError):
+        drenar(fila, LogQueFalha(), tamanho_lote=2)
+    assert fila.profundidade() == 5
+
+    fila.devolver(range(1, 100))
+    log = LogSegmentado(str(tmp_path / "log"))
+    gravados = drenar(fila, log, lambda corpo: {"dobro": corpo["n"] * 2}, tamanho_lote=2)
+    assert gravados == [{"dobro": i * 2} for i in range(5)]
+    assert fila.profundidade() == 0
+    assert list(log.iterar()) == gravados
+
+
+def test_menor_id_ainda_na_fila(tmp_path):
+    caminho = str(tmp_path / "filas.db")
+    fila = FilaDuravel(caminho, "leituras")
+    outra = FilaDuravel(caminho, "auditoria")
+    assert fila.menor_id() is None
+
+    # as filas dividem a sequência de ids do banco
+    primeiro = fila.enviar({"n": 0})
+    outra.enviar({"n": 1})
+    terceiro = fila.enviar({"n": 2})
+    recebidas = fila.receber(1)
+    assert fila.menor_id() == primeiro
+    fila.confirmar(recebidas)
+    assert fila.menor_id() == terceiro
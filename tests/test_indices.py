@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+
+import pytest
+
+from clima.datas import para_epoca
+from clima.indices import IndiceAuditoria, IndiceLeituras
+from clima.log_segmentado import LogSegmentado
+from clima import servico
+from functions import RegistrarLeitura, registrarauditoria
+
+
+def evento(sensor, minuto, acionado=False, tipo="leitura"):
+    return {
+        "date": f"01/01/2025 10:{minuto:02d}:00",
+        "tipoEvento": tipo,
+        "detalhes": {"sensorId": sensor, "tipoSensor": sensor.split("-")[0], "acionado": acionado}
+    }
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = LogSegmentado(str(tmp_path / "auditoria"), tamanho_max_segmento=3)
+    log.acrescentar_lote([
+        evento("estufa-1", 0), evento("sala-1", 1, acionado=True), evento("estufa-1", 2, acionado=True),
+        evento("estufa-2", 3), evento("estufa-1", 4, tipo="alerta")
+    ])
+    return log
+
+
+def registros(log, posicoes):
+    return [log.ler(p) for p in posicoes]
+
+
+def test_busca_por_campos_e_flags(log):
+    indice = IndiceAuditoria(log)
+    assert [r["date"][-5:-3] for r in registros(log, indice.buscar(sensorId="estufa-1"))] == ["04", "02", "00"]
+    assert registros(log, indice.buscar(somente_acionados=True)) == [
+        evento("estufa-1", 2, acionado=True), evento("sala-1", 1, acionado=True)
+    ]
+    assert registros(log, indice.buscar(tipo_evento="alerta")) == [evento("estufa-1", 4, tipo="alerta")]
+    assert list(indice.buscar(sensorId="inexistente")) == []
+
+
+def test_intervalo_de_datas_e_antes_de(log):
+    indice = IndiceAuditoria(log)
+    desde = para_epoca("01/01/2025 10:01:00")
+    ate = para_epoca("01/01/2025 10:03:00")
+    posicoes = list(indice.buscar(desde=desde, ate=ate))
+    assert [r["detalhes"]["sensorId"] for r in registros(log, posicoes)] == ["estufa-2", "estufa-1", "sala-1"]
+    assert list(indice.buscar(desde=desde, ate=ate, antes_de=posicoes[0])) == posicoes[1:]
+
+
+def test_indice_acompanha_o_log_e_reabre_pelo_diario(log):
+    indice = IndiceAuditoria(log)
+    log.acrescentar(evento("estufa-3", 5))
+    assert len(list(indice.buscar(sensorId="estufa-3"))) == 1
+
+    reaberto = IndiceAuditoria(LogSegmentado(log.diretorio))
+    assert len(reaberto) == 6
+    os.remove(reaberto.caminho_diario)
+    assert reaberto.reconstruir() == 6
+
+
+def test_indice_leituras(tmp_path):
+    log = LogSegmentado(str(tmp_path / "leituras"))
+    log.acrescentar_lote([
+        {"sensorId": "estufa-1", "date": "01/01/2025 10:00:00"},
+        {"sensorId": "estufa-2", "date": "02/01/2025 10:00:00"},
+        {"sensorId": "estufa-1", "date": "03/01/2025 10:00:00"},
+    ])
+    indice = IndiceLeituras(log)
+    desde = para_epoca("02/01/2025 00:00:00")
+    assert registros(log, indice.buscar(sensorId="estufa-1", desde=desde)) == [
+        {"sensorId": "estufa-1", "date": "03/01/2025 10:00:00"}
+    ]
+
+
+def test_leituras_fora_de_ordem(tmp_path):
+    log = LogSegmentado(str(tmp_path / "leituras"))
+    indice = IndiceLeituras(log)
+    minutos = [5, 1, 7, 3, 3, 9, 0]
+    log.acrescentar_lote({"sensorId": "s", "date": f"01/01/2025 10:{m:02d}:00"} for m in minutos)
+
+    desde = para_epoca("01/01/2025 10:02:00")
+    ate = para_epoca("01/01/2025 10:07:00")
+    # em ordem de gravação (mais recentes primeiro), não de data
+    assert [r["date"][-5:-3] for r in registros(log, indice.buscar(desde=desde, ate=ate))] == [
+        "03", "03", "07", "05"
+    ]
+
+    # atrasada depois de uma consulta já ter ordenado
+    log.acrescentar({"sensorId": "s", "date": "01/01/2025 10:04:00"})
+    assert [r["date"][-5:-3] for r in registros(log, indice.buscar(desde=desde, ate=ate))] == [
+        "04", "03", "03", "07", "05"
+    ]
+
+
+class TravaContada:
+    def __init__(self, trava):
+        self.trava = trava
+        self.entradas = 0
+
+    def __enter__(self):
+        self.entradas += 1
+        return self.trava.__enter__()
+
+    def __exit__(self, *exc):
+        return self.trava.__exit__(*exc)
+
+
+def test_consulta_so_trava_quando_o_log_cresceu(log):
+    indice = IndiceAuditoria(log)
+    log.trava = TravaContada(log.trava)
+
+    for _ in range(3):
+        list(indice.buscar(sensorId="estufa-1"))
+    assert log.trava.entradas == 0
+
+    # outro processo grava sem este índice observando
+    LogSegmentado(log.diretorio, tamanho_max_segmento=3).acrescentar(evento("estufa-9", 9))
+    assert len(list(indice.buscar(sensorId="estufa-9"))) == 1
+    assert log.trava.entradas == 1
+    list(indice.buscar(sensorId="estufa-9"))
+    assert log.trava.entradas == 1
+
+
+def _abrir_em_threads(modulo, obter, monkeypatch):
+    aberturas = []
+    abrir_log = modulo.abrir_log
+
+    def abrir_devagar(*args, **kwargs):
+        aberturas.append(args)
+        time.sleep(0.05)
+        return abrir_log(*args, **kwargs)
+
+    monkeypatch.setattr(modulo, "abrir_log", abrir_devagar)
+    barreira = threading.Barrier(8)
+    logs = []
+
+    def trabalho():
+        barreira.wait()
+        logs.append(obter())
+
+    threads = [threading.Thread(target=trabalho) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return aberturas, logs
+
+
+def test_primeiro_acesso_concorrente_abre_o_log_uma_vez(tmp_path, monkeypatch):
+    monkeypatch.setattr(servico, "DIR_LEITURAS", str(tmp_path / "leituras"))
+    monkeypatch.setattr(servico, "ARQ_LEITURAS", str(tmp_path / "leituras.json"))
+    monkeypatch.setattr(servico, "_log_leituras", None)
+
+    aberturas, logs = _abrir_em_threads(servico, RegistrarLeitura.obter_log_leituras, monkeypatch)
+    assert len(aberturas) == 1
+    assert all(log is logs[0] for log in logs)
+    assert RegistrarLeitura.obter_indice_leituras().log is logs[0]
+    assert RegistrarLeitura.obter_agregados_leituras() is not None
+
+
+def test_primeiro_acesso_concorrente_auditoria(tmp_path, monkeypatch):
+    monkeypatch.setattr(servico, "DIR_AUDITORIA", str(tmp_path / "auditoria"))
+    monkeypatch.setattr(servico, "ARQ_AUDITORIA", str(tmp_path / "auditoriaEventos.json"))
+    monkeypatch.setattr(servico, "_log_auditoria", None)
+
+    aberturas, logs = _abrir_em_threads(servico, registrarauditoria.obter_log_auditoria, monkeypatch)
+    assert len(aberturas) == 1
+    assert registrarauditoria.obter_indice_auditoria().log is logs[0]
+    assert len(logs[0].observadores) == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from clima.leituras import interpretar_json, interpretar_ndjson, normalizar_leitura, normalizar_lote
+
+
+def test_normalizar_leitura():
+    dados = {"sensorId": "estufa-1", "temperatura": 25, "umidade": 60.5, "extra": 1,
+             "date": "01/01/2025 10:00:00"}
+    assert normalizar_leitura(dados) == {
+        "sensorId": "estufa-1", "temperatura": 25, "umidade": 60.5, "date": "01/01/2025 10:00:00"
+    }
+    sem_data = normalizar_leitura({"sensorId": "estufa-1", "temperatura": 25, "umidade": 60},
+                                  agora="02/01/2025 00:00:00")
+    assert sem_data["date"] == "02/01/2025 00:00:00"
+
+
+@pytest.mark.parametrize("dados", [
+    [],
+    {"temperatura": 25, "umidade": 60},
+    {"sensorId": "", "temperatura": 25, "umidade": 60},
+    {"sensorId": "estufa-1", "temperatura": "25", "umidade": 60},
+    {"sensorId": "estufa-1", "temperatura": True, "umidade": 60},
+    {"sensorId": "estufa-1", "temperatura": 25},
+    {"sensorId": "estufa-1", "temperatura": 25, "umidade": 60, "date": "31/02/2025 10:00:00"},
+    {"sensorId": "estufa-1", "temperatura": 25, "umidade": 60, "date": "ontem"},
+    {"sensorId": "estufa-1", "temperatura": 25, "umidade": 60, "date": True},
+])
+def test_leitura_invalida(dados):
+    with pytest.raises(ValueError):
+        normalizar_leitura(dados)
+
+
+def test_lote_aponta_a_leitura_invalida():
+    valida = {"sensorId": "estufa-1", "temperatura": 25, "umidade": 60}
+    lote = normalizar_lote([valida, valida])
+    # o lote inteiro recebe a mesma data de chegada
+    assert lote[0]["date"] == lote[1]["date"]
+    with pytest.raises(ValueError, match="leitura 2: umidade"):
+        normalizar_lote([valida, {"sensorId": "estufa-1", "temperatura": 25}])
+    with pytest.raises(ValueError, match="leitura 3: date inválida: 'ontem'"):
+        normalizar_lote([valida, valida, dict(valida, date="ontem")])
+
+
+def test_json_e_ndjson():
+    assert interpretar_json('{"sensorId": "a"}') == [{"sensorId": "a"}]
+    assert interpretar_json('[{"n": 1}, {"n": 2}]') == [{"n": 1}, {"n": 2}]
+    assert list(interpretar_ndjson([b'{"n": 1}\n', b"\n", '{"n": 2}'])) == [{"n": 1}, {"n": 2}]
+    with pytest.raises(ValueError, match="linha 2"):
+        list(interpretar_ndjson(['{"n": 1}', '{"n":']))
+    with pytest.raises(ValueError):
+        interpretar_json("[")
@@ -0,0 +1,66 @@
+import json
+
+from clima.log_segmentado import LogSegmentado
+
+
+def registro(i):
+    return {"sensorId": f"estufa-{i % 3}", "n": i}
+
+
+def test_rola_segmentos_e_le_em_ordem(tmp_path):
+    log = LogSegmentado(str(tmp_path / "log"), tamanho_max_segmento=200)
+    posicoes = log.acrescentar_lote(registro(i) for i in range(10))
+    posicoes.append(log.acrescentar(registro(10)))
+
+    assert len(log.segmentos) > 1
+    assert list(log.iterar()) == [registro(i) for i in range(11)]
+    assert list(log.iterar_reverso()) == [registro(i) for i in reversed(range(11))]
+    assert [log.ler(p) for p in posicoes] == [registro(i) for i in range(11)]
+    assert [r["n"] for _, r in log.iterar_com_posicao(desde=posicoes[7])] == [8, 9, 10]
+
+    # outro processo abrindo o mesmo diretório pelo manifesto
+    assert list(LogSegmentado(str(tmp_path / "log")).iterar()) == list(log.iterar())
+
+
+def test_linha_incompleta_descartada_na_abertura(tmp_path):
+    diretorio = str(tmp_path / "log")
+    log = LogSegmentado(diretorio)
+    log.acrescentar_lote([registro(0), registro(1)])
+    # queda no meio de uma gravação
+    with open(log.caminho_segmento(log.segmentos[-1]), "ab") as f:
+        f.write(b'{"sensorId": "estu')
+
+    reaberto = LogSegmentado(diretorio)
+    assert list(reaberto.iterar()) == [registro(0), registro(1)]
+    reaberto.acrescentar(registro(2))
+    assert [r["n"] for r in reaberto.iterar()] == [0, 1, 2]
+
+
+def test_descartar_segmentos_antigos(tmp_path):
+    log = LogSegmentado(str(tmp_path / "log"), tamanho_max_segmento=40)
+    for i in range(8):
+        log.acrescentar(registro(i))
+    segmentos = list(log.segmentos)
+    assert len(segmentos) == 8
+
+    assert log.descartar_segmentos_antigos(100) == segmentos[:-1]
+    assert log.segmentos == segmentos[-1:]
+    assert list(log.iterar()) == [registro(7)]
+
+
+def test_legado_importado_e_exportado(tmp_path):
+    legado = tmp_path / "auditoriaEventos.json"
+    legado.write_text(json.dumps({"eventos": [registro(0), registro(1)]}), encoding="utf-8")
+
+    log = LogSegmentado(str(tmp_path / "log"), legado=str(legado))
+    log.acrescentar(registro(2))
+
+    exportado = tmp_path / "exportado.json"
+    assert log.exportar_documento(str(exportado)) == 3
+    assert json.loads(exportado.read_text(encoding="utf-8")) == {
+        "eventos": [registro(0), registro(1), registro(2)]
+    }
+
+    vazio = LogSegmentado(str(tmp_path / "vazio"))
+    assert vazio.exportar_documento(str(tmp_path / "vazio.json")) == 0
+    assert json.loads((tmp_path / "vazio.json").read_text(encoding="utf-8")) == {"eventos": []}
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from clima.lote import GravadorAssincrono
+
+
+def test_gravador_assincrono():
+    lotes = []
+
+    async def cenario():
+        gravador = GravadorAssincrono(lotes.append, tamanho_max=2, intervalo_flush=10).iniciar()
+        for i in range(5):
+            await gravador.adicionar({"n": i})
+        # lote cheio: a tarefa em segundo plano grava sem esperar o intervalo
+        for _ in range(100):
+            if gravador.total_gravado == 5:
+                break
+            await asyncio.sleep(0.01)
+        assert gravador.total_gravado == 5
+        await gravador.parar()
+        return gravador
+
+    gravador = asyncio.run(cenario())
+    assert [r["n"] for lote in lotes for r in lote] == list(range(5))
+    assert not gravador.ativo and gravador.buffer == []
+
+
+def test_gravador_assincrono_falha_devolve_o_lote():
+    async def cenario():
+        def falhar(lote):
+            raise OSError("disco cheio")
+
+        gravador = GravadorAssincrono(falhar, tamanho_max=10)
+        gravador.iniciar()
+        await gravador.adicionar({"n": 0})
+        with pytest.raises(OSError):
+            await gravador.flush()
+        assert gravador.buffer == [{"n": 0}]
+        gravador.gravar = lambda lote: None
+        await gravador.parar()
+        assert gravador.buffer == []
+
+    asyncio.run(cenario())
@@ -0,0 +1,44 @@
+import pytest
+
+from clima import metricas
+
+
+@pytest.fixture
+def desligadas(monkeypatch):
+    monkeypatch.delenv("CLIMA_METRICAS", raising=False)
+    monkeypatch.delenv("CLIMA_METRICAS_ARQUIVO", raising=False)
+    metricas.ativar(False)
+    metricas.zerar()
+    yield
+    metricas.ativar(False)
+    metricas.zerar()
+
+
+def test_importar_as_apis_nao_liga_as_metricas(desligadas):
+    import app_asgi  # noqa: F401
+    from clima import servico  # noqa: F401
+    assert not metricas.ATIVO
+
+
+def test_configurar_pelo_ambiente(desligadas, monkeypatch):
+    metricas.configurar_pelo_ambiente()
+    assert not metricas.ATIVO
+    monkeypatch.setenv("CLIMA_METRICAS", "1")
+    metricas.configurar_pelo_ambiente()
+    assert metricas.ATIVO
+
+
+def test_etapa_e_texto(desligadas):
+    @metricas.etapa("teste")
+    def etapa():
+        return 1
+
+    etapa()
+    assert 'etapa="teste"' not in metricas.texto()
+
+    metricas.ativar()
+    etapa()
+    metricas.ALERTAS.inc(3)
+    texto = metricas.texto()
+    assert 'clima_etapa_segundos_count{etapa="teste"} 1' in texto
+    assert "clima_alertas_total 3" in texto
@@ -0,0 +1,166 @@
+import json
+
+import pytest
+
+from clima.fila import FilaDuravel
+from clima.notificacoes import (Despachante, DestinoArquivo, EstadoNotificacoes,
+                                destinatarios_de)
+
+CONFIG = {"janela": 0, "porMinuto": 1, "rajada": 1}
+
+
+class DestinoFalho(DestinoArquivo):
+    """
+    Arquivo que falha enquanto 'falhar' for verdadeiro.
+    """
+
+    tipo = "falho"
+
+    def __init__(self, caminho):
+        super().__init__(caminho)
+        self.falhar = True
+
+    def enviar(self, resumo):
+        if self.falhar:
+            raise ConnectionError("destino fora do ar")
+        super().enviar(resumo)
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+def alerta(sensor, minuto, temperatura=35):
+    return {"sensorId": sensor, "temperatura": temperatura, "umidade": 50,
+            "date": f"01/01/2025 10:{minuto:02d}:00"}
+
+
+def linhas(caminho):
+    if not caminho.exists():
+        return []
+    return [json.loads(l) for l in caminho.read_text(encoding="utf-8").splitlines()]
+
+
+def expirar(fila):
+    """
+    Visibilidade vencida: as mensagens recebidas voltam para a fila.
+    """
+    fila._conexao().execute("UPDATE mensagens SET visivel_em = 0")
+
+
+@pytest.fixture
+def ambiente(tmp_path):
+    caminho = str(tmp_path / "filas.db")
+    return caminho, FilaDuravel(caminho, "notificacoes"), Relogio()
+
+
+def test_limite_de_taxa_vale_entre_execucoes(ambiente, tmp_path):
+    caminho, fila, relogio = ambiente
+    saida = tmp_path / "enviados.jsonl"
+
+    def execucao():
+        # cada execução da Lambda cria um despachante novo
+        despachante = Despachante(fila, [DestinoArquivo(str(saida))], CONFIG,
+                                  estado=EstadoNotificacoes(caminho, relogio))
+        despachante.ciclo(forcar=True)
+        return despachante.metricas()
+
+    fila.enviar(alerta("estufa-1", 0))
+    assert execucao()["resumosEntregues"] == 1
+
+    # sem ficha: o alerta volta para a fila em vez de sair outro SMS
+    fila.enviar(alerta("estufa-1", 1))
+    assert execucao()["limitados"] == 1
+    assert len(linhas(saida)) == 1
+
+    relogio.agora += 60
+    expirar(fila)
+    assert execucao()["resumosEntregues"] == 1
+    assert len(linhas(saida)) == 2
+    assert fila.profundidade() == 0
+
+
+def test_falha_num_destino_nao_reenvia_aos_outros(ambiente, tmp_path):
+    caminho, fila, relogio = ambiente
+    sms = tmp_path / "sms.jsonl"
+    http = DestinoFalho(str(tmp_path / "http.jsonl"))
+    config = dict(CONFIG, porMinuto=600, rajada=10)
+
+    def despachante():
+        return Despachante(fila, [DestinoArquivo(str(sms)), http], config,
+                           estado=EstadoNotificacoes(caminho, relogio))
+
+    fila.enviar_lote([alerta("estufa-1", 0), alerta("estufa-1", 1)])
+    primeiro = despachante()
+    primeiro.ciclo(forcar=True)
+    assert primeiro.metricas()["falhas"] == 1
+    assert [r["alertas"] for r in linhas(sms)] == [2]
+
+    # mesmo processo: só o destino que falhou recebe na nova tentativa
+    http.falhar = False
+    fila.enviar(alerta("estufa-1", 2))
+    primeiro.ciclo(forcar=True)
+    assert [r["alertas"] for r in linhas(sms)] == [2, 1]
+    assert [r["alertas"] for r in linhas(tmp_path / "http.jsonl")] == [3]
+    assert fila.profundidade() == 0
+
+    # outra execução, depois de as mensagens voltarem para a fila
+    http.falhar = True
+    fila.enviar(alerta("estufa-2", 3))
+    despachante().ciclo(forcar=True)
+    expirar(fila)
+    http.falhar = False
+    despachante().ciclo(forcar=True)
+    assert [r["sensorId"] for r in linhas(sms)] == ["estufa-1", "estufa-1", "estufa-2"]
+    assert [r["sensorId"] for r in linhas(tmp_path / "http.jsonl")] == ["estufa-1", "estufa-2"]
+    assert fila.profundidade() == 0
+
+
+def test_resumo_agrupa_alertas_do_sensor(ambiente, tmp_path):
+    _, fila, relogio = ambiente
+    saida = tmp_path / "enviados.jsonl"
+    fila.enviar_lote([alerta("estufa-1", 0, 31), alerta("estufa-1", 5, 38), alerta("estufa-2", 1)])
+
+    despachante = Despachante(fila, [DestinoArquivo(str(saida))],
+                              dict(CONFIG, porMinuto=60, rajada=5), relogio=relogio)
+    despachante.ciclo(forcar=True)
+
+    resumos = {r["sensorId"]: r for r in linhas(saida)}
+    assert resumos["estufa-1"]["alertas"] == 2
+    assert resumos["estufa-1"]["temperaturaMax"] == 38
+    assert resumos["estufa-1"]["primeiro"] == "01/01/2025 10:00:00"
+    assert resumos["estufa-1"]["ultimo"] == "01/01/2025 10:05:00"
+    assert resumos["estufa-2"]["alertas"] == 1
+
+
+def test_destinatarios_sensor_tipo_global():
+    config = {
+        "destinatarios": ["plantao"],
+        "tipos": {"estufa": ["estufa@exemplo.com"]},
+        "sensores": {"estufa-07": ["agronomo"]}
+    }
+    assert destinatarios_de(config, "estufa-07") == ["agronomo"]
+    assert destinatarios_de(config, "estufa-01") == ["estufa@exemplo.com"]
+    assert destinatarios_de(config, "camara-01") == ["plantao"]
+    assert destinatarios_de({}, "camara-01") == ["padrao"]
+
+
+def test_alerta_sem_destinatario_e_confirmado(ambiente, tmp_path):
+    _, fila, relogio = ambiente
+    saida = tmp_path / "enviados.jsonl"
+    fila.enviar_lote([alerta("estufa-1", 0), alerta("estufa-2", 1)])
+
+    config = dict(CONFIG, sensores={"estufa-1": []})
+    despachante = Despachante(fila, [DestinoArquivo(str(saida))], config, relogio=relogio)
+    despachante.receber()
+
+    # só o alerta da estufa-2 espera o resumo; o outro já saiu da fila
+    assert fila.profundidade() == 1
+    assert despachante.metricas()["semDestinatario"] == 1
+    despachante.ciclo(forcar=True)
+    assert fila.profundidade() == 0
+    assert [r["sensorId"] for r in linhas(saida)] == ["estufa-2"]
@@ -0,0 +1,49 @@
+import pytest
+
+from clima.log_segmentado import LogSegmentado
+from clima.paginacao import Pagina, codificar_cursor, decodificar_cursor
+
+
+def test_cursor_ida_e_volta():
+    for posicao in [(1, 0), (3, 8388608), (12345678, 42)]:
+        cursor = codificar_cursor(posicao)
+        assert "=" not in cursor
+        assert decodificar_cursor(cursor) == posicao
+    assert decodificar_cursor("") is None
+    assert decodificar_cursor(None) is None
+
+
+@pytest.mark.parametrize("cursor", ["!!", "bm9wZQ", codificar_cursor(("1", "x")), codificar_cursor((-1, 0))])
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValueError):
+        decodificar_cursor(cursor)
+
+
+def test_pagina_le_sob_demanda_e_aponta_a_seguinte(tmp_path):
+    log = LogSegmentado(str(tmp_path / "log"))
+    posicoes = log.acrescentar_lote({"n": i} for i in range(5))
+    recentes = list(reversed(posicoes))
+
+    pagina = Pagina(log, iter(recentes), limite=2)
+    assert [r["n"] for r in pagina] == [4, 3]
+    assert decodificar_cursor(pagina.proximo_cursor) == recentes[1]
+
+    # a próxima página começa logo depois do cursor
+    depois = decodificar_cursor(pagina.proximo_cursor)
+    seguinte = Pagina(log, (p for p in recentes if p < depois), limite=2)
+    assert [r["n"] for r in seguinte] == [2, 1]
+
+    ultima = Pagina(log, (p for p in recentes if p < recentes[3]), limite=2)
+    assert [r["n"] for r in ultima] == [0]
+    assert ultima.proximo_cursor is None
+
+    tudo = Pagina(log, iter(recentes), limite=0)
+    assert [r["n"] for r in tudo] == [4, 3, 2, 1, 0]
+    assert tudo.proximo_cursor is None
+
+
+def test_limite_negativo_invalido(tmp_path):
+    log = LogSegmentado(str(tmp_path / "log"))
+    posicoes = log.acrescentar_lote({"n": i} for i in range(3))
+    with pytest.raises(ValueError):
+        Pagina(log, iter(posicoes), limite=-1)
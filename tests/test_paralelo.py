@@ -0,0 +1,55 @@
+import random
+
+from clima.disparo import EstadoDisparo
+from clima.paralelo import AvaliadorParalelo, fatia_do_sensor, particionar
+from clima.regras import RegrasAlerta
+
+CONFIG = {
+    "limites": {"tempMax": 30, "umiMax": 80, "nDeM": [2, 3]},
+    "regras": {"tipos": {"estufa": {"histerese": 2}}}
+}
+
+
+class ConfigFixa:
+    def obter(self):
+        return CONFIG
+
+
+def gerar(quantidade, semente=7):
+    aleatorio = random.Random(semente)
+    return [
+        {"sensorId": f"{aleatorio.choice(['estufa', 'sala'])}-{aleatorio.randrange(20)}",
+         "temperatura": aleatorio.choice([25, 29, 31, 35]), "umidade": 50,
+         "date": f"01/01/2025 10:{i // 60 % 60:02d}:{i % 60:02d}"}
+        for i in range(quantidade)
+    ]
+
+
+def test_particionar_mantem_sensor_e_ordem():
+    leituras = gerar(200)
+    fatias = particionar(leituras, 3)
+    assert sorted(i for fatia in fatias for i in fatia) == list(range(200))
+    for numero, posicoes in enumerate(fatias):
+        assert posicoes == sorted(posicoes)
+        assert {fatia_do_sensor(leituras[i]["sensorId"], 3) for i in posicoes} <= {numero}
+
+
+def test_paralelo_igual_ao_sequencial():
+    leituras = gerar(600)
+    lotes = [leituras[i:i + 200] for i in range(0, 600, 200)]
+    # o segundo lote volta da fila depois de aplicado (reentrega)
+    ids = [list(range(0, 200)), list(range(200, 400)), list(range(200, 400)), list(range(400, 600))]
+    lotes.insert(2, lotes[1])
+
+    def rodar(avaliador):
+        regras = RegrasAlerta(ConfigFixa())
+        estado = EstadoDisparo()
+        resultados = [avaliador.avaliar(lote, regras, estado, ids_lote) for lote, ids_lote in zip(lotes, ids)]
+        return [([bool(a) for a in m], d) for m, d in resultados], regras.em_alerta, estado.sensores
+
+    sequencial = rodar(AvaliadorParalelo(processos=1))
+    with AvaliadorParalelo(processos=2, minimo=0) as avaliador:
+        paralelo = rodar(avaliador)
+
+    assert paralelo == sequencial
+    assert sequencial[0][2][1] == []
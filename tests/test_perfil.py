@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from clima import perfil
+
+
+@pytest.fixture
+def dir_perfil(tmp_path, monkeypatch):
+    monkeypatch.delenv("CLIMA_PERFIL", raising=False)
+    monkeypatch.setattr(perfil, "DIR_PERFIL", str(tmp_path))
+    return tmp_path
+
+
+def test_desligado_nao_grava(dir_perfil):
+    @perfil.perfilado("teste_desligado")
+    def handler(event, context):
+        return {"statusCode": 200}
+
+    assert handler({}, None) == {"statusCode": 200}
+    assert list(dir_perfil.iterdir()) == []
+
+
+def test_relatorio_por_invocacao(dir_perfil, monkeypatch):
+    with perfil.partida("teste_modulo", "primeiraCarga"):
+        pass
+
+    @perfil.perfilado("teste_ligado", modulo="teste_modulo")
+    def handler(event, context):
+        if event.get("falhar"):
+            raise RuntimeError("falhou")
+        return sum(range(1000))
+
+    evento = {"queryStringParameters": {"perfil": "1"}}
+    assert handler(evento, None) == sum(range(1000))
+    monkeypatch.setenv("CLIMA_PERFIL", "sim")
+    handler({}, None)
+    with pytest.raises(RuntimeError):
+        handler({"falhar": True}, None)
+
+    relatorios = sorted(perfil.carregar_relatorios(str(dir_perfil), "teste_ligado"),
+                        key=lambda r: r["invocacao"])
+    assert [r["frio"] for r in relatorios] == [True, False, False]
+    assert "primeiraCargaSegundos" in relatorios[0]["partida"]
+    assert relatorios[1]["partida"] is None
+    assert relatorios[2]["erro"] == "RuntimeError('falhou')"
+    assert len(list(dir_perfil.glob("*.prof"))) == 3
+
+    resumo = perfil.resumir(relatorios)["teste_ligado"]
+    assert (resumo["frias"]["invocacoes"], resumo["quentes"]["invocacoes"], resumo["erros"]) == (1, 2, 1)
+    assert json.dumps(resumo)
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from clima.pipeline import Etapa, Pipeline
+
+
+def test_etapas_em_ordem_com_finalizar():
+    saida = []
+    finalizadas = []
+    pipeline = Pipeline([
+        Etapa("dobrar", lambda lote: [x * 2 for x in lote]),
+        Etapa("pares", lambda lote: [x for x in lote if x % 4 == 0] or None),
+        Etapa("gravar", saida.extend, finalizar=lambda: finalizadas.append("gravar")),
+    ], profundidade=1)
+
+    resultado = pipeline.executar([list(range(i, i + 3)) for i in range(0, 30, 3)])
+
+    assert saida == [x * 2 for x in range(30) if x % 2 == 0]
+    assert finalizadas == ["gravar"]
+    assert [(e["nome"], e["lotes"], e["itens"]) for e in resultado["etapas"]] == [
+        ("dobrar", 10, 30), ("pares", 10, 30), ("gravar", 10, 15)
+    ]
+
+
+def test_contrapressao_limita_lotes_em_transito():
+    liberar = threading.Event()
+    produzidos = []
+
+    def lotes():
+        for i in range(20):
+            produzidos.append(i)
+            yield [i]
+
+    def lenta(lote):
+        liberar.wait(5)
+
+    pipeline = Pipeline([Etapa("rapida", lambda lote: lote), Etapa("lenta", lenta)], profundidade=2)
+    thread = threading.Thread(target=pipeline.executar, args=(lotes(),))
+    thread.start()
+    thread.join(0.3)
+    # no máximo: 2 por fila, 1 em cada etapa e 1 esperando para entrar
+    assert len(produzidos) <= 7
+    liberar.set()
+    thread.join(5)
+    assert len(produzidos) == 20
+
+
+def test_erro_numa_etapa_para_o_pipeline():
+    finalizadas = []
+
+    def falhar(lote):
+        if lote == [3]:
+            raise ValueError("leitura inválida")
+        return lote
+
+    pipeline = Pipeline([
+        Etapa("validar", falhar),
+        Etapa("gravar", lambda lote: None, finalizar=lambda: finalizadas.append(True)),
+    ])
+    with pytest.raises(ValueError, match="leitura inválida"):
+        pipeline.executar([i] for i in range(1000))
+    assert finalizadas == []
@@ -0,0 +1,116 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+from clima.arquivos import salvar_json
+from clima.avaliacao import LoteColunar
+from clima.disparo import EstadoDisparo
+from clima.regras import RegrasAlerta, RegrasCompiladas
+from functions import AvaliarLeitura
+
+CONFIG = {
+    "limites": {"tempMax": 30, "umiMax": 80},
+    "regras": {
+        "tipos": {"estufa": {"tempMax": 40, "histerese": 2}},
+        "sensores": {"estufa-7": {"umiMax": 95}}
+    }
+}
+
+
+class ConfigFixa:
+    def __init__(self, config):
+        self.config = config
+
+    def obter(self):
+        return self.config
+
+
+def leitura(sensor, temperatura, umidade=50):
+    return {"sensorId": sensor, "temperatura": temperatura, "umidade": umidade,
+            "date": "01/01/2025 10:00:00"}
+
+
+def test_precedencia_sensor_tipo_global():
+    compiladas = RegrasCompiladas(CONFIG)
+    assert compiladas.regra("sala-1").temp_max == 30
+    assert compiladas.regra("estufa-1").temp_max == 40
+    assert compiladas.regra("estufa-7")[:3] == (40, None, 95)
+    assert compiladas.regra("estufa-7").histerese == 2
+
+
+def test_histerese():
+    regras = RegrasAlerta(ConfigFixa(CONFIG))
+    temperaturas = [41, 39, 38.5, 37, 39]
+    assert [regras.avaliar(leitura("estufa-1", t)) for t in temperaturas] == [
+        True, True, True, False, False
+    ]
+
+
+def test_mascara_igual_a_avaliar():
+    leituras = [leitura(s, t) for s, t in [
+        ("estufa-1", 41), ("sala-1", 31), ("estufa-1", 39), ("estufa-7", 20), ("estufa-1", 37)
+    ]]
+    uma_a_uma = RegrasAlerta(ConfigFixa(CONFIG))
+    em_lote = RegrasAlerta(ConfigFixa(CONFIG))
+    esperado = [uma_a_uma.avaliar(l) for l in leituras]
+    assert [bool(a) for a in em_lote.mascara(LoteColunar(leituras))] == esperado
+    assert uma_a_uma.em_alerta == em_lote.em_alerta
+
+
+def test_histerese_sobrevive_ao_checkpoint(tmp_path):
+    caminho = str(tmp_path / "estadoDisparo.json")
+
+    estado = EstadoDisparo(caminho)
+    regras = RegrasAlerta(ConfigFixa(CONFIG))
+    regras.em_alerta = estado.em_alerta
+    assert regras.avaliar(leitura("estufa-1", 41))
+    estado.salvar()
+
+    # reinício: regras e estado novos, carregados do checkpoint
+    estado = EstadoDisparo(caminho)
+    regras = RegrasAlerta(ConfigFixa(CONFIG))
+    regras.em_alerta = estado.em_alerta
+    assert regras.avaliar(leitura("estufa-1", 39))
+    assert not regras.avaliar(leitura("estufa-1", 37))
+    estado.salvar()
+
+    assert EstadoDisparo(caminho).em_alerta == set()
+
+
+@pytest.fixture
+def avaliacao(tmp_path, monkeypatch):
+    diretorio = str(tmp_path)
+    for nome, arquivo in [
+        ("ARQ_FILA", "filaLeituras.json"),
+        ("ARQ_CONFIG_ALERTAS", "configAlertas.json"),
+        ("ARQ_LIMITES", "limites.json"),
+        ("DIR_ALERTAS", "alertas"),
+        ("ARQ_NOTIFICACOES", "notificacaoAlerta.json"),
+        ("ARQ_ESTADO_DISPARO", os.path.join("alertas", "estadoDisparo.json")),
+        ("ARQ_FILA_AUDITORIA", "filaAuditoria.json"),
+        ("ARQ_FILAS", "filas.db"),
+    ]:
+        monkeypatch.setattr(AvaliarLeitura, nome, os.path.join(diretorio, arquivo))
+    monkeypatch.setattr(AvaliarLeitura, "_regras", None)
+    monkeypatch.setattr(AvaliarLeitura, "_historico_alertas", None)
+    salvar_json(AvaliarLeitura.ARQ_LIMITES, CONFIG)
+    return AvaliarLeitura
+
+
+@pytest.mark.parametrize("modo", ["lote", "simples"])
+def test_histerese_entre_execucoes_do_avaliador(avaliacao, monkeypatch, modo):
+    def executar(temperatura):
+        avaliacao.obter_fila_leituras().enviar(leitura("estufa-1", temperatura))
+        # cada execução da Lambda começa com regras novas
+        monkeypatch.setattr(avaliacao, "_regras", None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            avaliacao.avaliar_leituras(modo=modo)
+        eventos = avaliacao.obter_fila_auditoria().receber(10)
+        avaliacao.obter_fila_auditoria().confirmar(eventos)
+        return [e.corpo["detalhes"]["alerta acionado"] for e in eventos]
+
+    assert executar(41) == ["sim"]
+    assert executar(39) == ["sim"]
+    assert executar(37) == ["não"]
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+from clima import servico
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    diretorio = str(tmp_path)
+    for nome, arquivo in [
+        ("ARQ_AUDITORIA", "auditoriaEventos.json"),
+        ("ARQ_FILA_AUDITORIA", "filaAuditoria.json"),
+        ("ARQ_CONFIG_ALERTAS", "configAlertas.json"),
+        ("ARQ_LIMITES", "limites.json"),
+        ("ARQ_FILAS", "filas.db"),
+        ("DIR_AUDITORIA", "auditoria"),
+        ("ARQ_LEITURAS", "leituras.json"),
+        ("ARQ_FILA_LEITURAS", "filaLeituras.json"),
+        ("DIR_LEITURAS", "leituras"),
+    ]:
+        monkeypatch.setattr(servico, nome, os.path.join(diretorio, arquivo))
+    monkeypatch.setattr(servico, "_log_auditoria", None)
+    monkeypatch.setattr(servico, "_log_leituras", None)
+    monkeypatch.setattr(servico, "INTERVALO_CONSUMIDOR_AUDITORIA", 0.05)
+    yield servico
+    servico.parar_consumidor_auditoria()
+
+
+def test_detalhes_do_corpo():
+    assert servico.detalhes_do_corpo({"detalhes": {"sensorId": "a", "date": "d"}}) == {
+        "sensorId": "a", "date": "d", "acionado": False
+    }
+    assert servico.detalhes_do_corpo({"sensorId": "a", "acionado": True, "date": "d"})["acionado"]
+    assert "date" in servico.detalhes_do_corpo([1, 2])
+
+
+def test_fila_para_log_e_consulta(api):
+    for i in range(5):
+        api.registrar_evento_na_fila({"sensorId": f"estufa-{i % 2}", "acionado": i == 4,
+                                      "date": f"01/01/2025 10:0{i}:00"})
+    assert len(api.processar_fila_para_banco()) == 5
+    assert api.obter_fila_auditoria().profundidade() == 0
+
+    eventos, ndjson = api.consultar_auditoria({"sensorId": "estufa-0", "limite": "2"})
+    assert not ndjson
+    assert [e["detalhes"]["date"][-5:-3] for e in eventos] == ["04", "02"]
+    assert eventos.proximo_cursor
+
+    seguinte, _ = api.consultar_auditoria({"sensorId": "estufa-0", "cursor": eventos.proximo_cursor})
+    assert [e["detalhes"]["date"][-5:-3] for e in seguinte] == ["00"]
+
+    somente, _ = api.consultar_auditoria({"somenteAlerta": "sim"})
+    assert len(list(somente)) == 1
+    with pytest.raises(ValueError):
+        api.consultar_auditoria({"cursor": "invalido"})
+    with pytest.raises(ValueError):
+        api.consultar_auditoria({"limite": "-1"})
+
+
+def test_leituras_em_lote(api):
+    api.registrar_leituras_lote([
+        {"sensorId": "estufa-1", "temperatura": 20, "umidade": 50, "date": "01/01/2025 10:00:00"},
+        {"sensorId": "estufa-1", "temperatura": 30, "umidade": 60, "date": "01/01/2025 10:30:00"},
+    ])
+    assert api.obter_fila_leituras().profundidade() == 2
+    [janela] = api.consultar_agregados(janela="1h", sensorId="estufa-1")
+    assert janela["leituras"] == 2
+    assert janela["temperatura"] == {"min": 20, "max": 30, "media": 25}
+    with pytest.raises(ValueError):
+        api.registrar_leituras_lote([{"sensorId": "estufa-1"}])
+
+
+async def chamar(app, metodo, caminho, corpo=b""):
+    caminho, _, consulta = caminho.partition("?")
+    scope = {"type": "http", "method": metodo, "path": caminho, "query_string": consulta.encode()}
+    recebido = []
+
+    async def receive():
+        return {"type": "http.request", "body": corpo, "more_body": False}
+
+    async def send(mensagem):
+        recebido.append(mensagem)
+
+    await app(scope, receive, send)
+    corpo = b"".join(m.get("body", b"") for m in recebido[1:])
+    return recebido[0]["status"], corpo
+
+
+def test_app_asgi_sem_flask(api, monkeypatch):
+    import app_asgi
+    monkeypatch.setattr(app_asgi, "_gravador_auditoria", None)
+
+    async def cenario():
+        status, corpo = await chamar(app_asgi.app, "POST", "/auditoria",
+                                     json.dumps({"sensorId": "estufa-1", "acionado": True}).encode())
+        assert status == 202
+        assert json.loads(corpo)["detalhes"]["acionado"] is True
+        await app_asgi.encerrar()
+
+        await asyncio.to_thread(api.processar_fila_para_banco)
+        status, corpo = await chamar(app_asgi.app, "GET", "/auditoria?somenteAlerta=true&formato=ndjson")
+        assert status == 200
+        assert [json.loads(l)["detalhes"]["sensorId"] for l in corpo.splitlines()] == ["estufa-1"]
+        await app_asgi.encerrar()
+
+        assert (await chamar(app_asgi.app, "DELETE", "/auditoria"))[0] == 405
+
+    asyncio.run(cenario())
+    assert "flask" not in sys.modules
+
+
+def test_lambdas_usam_a_mesma_implementacao():
+    from functions import RegistrarLeitura, consultarauditoria, registrarauditoria
+
+    assert RegistrarLeitura.registrar_leituras_lote is servico.registrar_leituras_lote
+    assert RegistrarLeitura.consultar_agregados is servico.consultar_agregados
+    assert RegistrarLeitura.obter_log_leituras is servico.obter_log_leituras
+    assert consultarauditoria.consultar_eventos is servico.consultar_eventos
+    assert registrarauditoria.mensagem_para_registro is servico.mensagem_para_registro
+    assert registrarauditoria.obter_log_auditoria is consultarauditoria.obter_log_auditoria